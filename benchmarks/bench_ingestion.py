@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Doküman yükleme (embedding + Chroma yazımı) benchmark'ı, sentetik bir korpus ile sahte Ollama'ya karşı.
+Çalıştırma: Proje kökünden
+  PYTHONPATH=. python3 benchmarks/bench_ingestion.py [--chunks 3000] [--latency 0.02] [--per-input 0.002]
+
+"before": Chroma'nın kendi add_documents yolu (tüm chunk'lar tek embedding çağrısında, tek upsert)
+"after":  EmbeddingPipeline (batch'ler, sınırlı paralel istek, yeniden deneme, sayfalı upsert)
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from langchain_core.documents import Document
+from langchain_ollama import OllamaEmbeddings
+
+from benchmarks.stub_ollama import StubOllamaServer
+from src.utils.ingestion import chunk_id
+from src.utils.vector_store import VectorStoreManager
+
+_WORDS = (
+    "pizza hamur peynir domates sipariş müşteri fiyat menü lezzet sunum hizmet hız kalabalık "
+    "fırın mozzarella fesleğen mantar zeytin biber sucuk kampanya indirim şube kurye teslimat"
+).split()
+
+
+def synthetic_corpus(n_chunks: int, seed: int = 7) -> list[Document]:
+    """~800 karakterlik rastgele Türkçe kelime dizilerinden oluşan chunk'lar (20 sahte dosyaya dağıtılmış)."""
+    rng = random.Random(seed)
+    docs = []
+    for i in range(n_chunks):
+        text = " ".join(rng.choice(_WORDS) for _ in range(120))
+        docs.append(Document(page_content=text, metadata={"source": f"synthetic/doc_{i % 20}.txt"}))
+    return docs
+
+
+def _store(url: str, directory: str, **kwargs) -> VectorStoreManager:
+    embeddings = OllamaEmbeddings(model="nomic-embed-text", base_url=url)
+    return VectorStoreManager(persist_directory=directory, embeddings=embeddings, **kwargs)
+
+
+def run_before(url: str, docs, ids) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        store = _store(url, directory)
+        started = time.perf_counter()
+        store.db.add_documents(docs, ids=ids)
+        return time.perf_counter() - started
+
+
+def run_after(url: str, docs, ids, batch_size: int, workers: int):
+    with tempfile.TemporaryDirectory() as directory:
+        store = _store(url, directory, embed_batch_size=batch_size, embed_workers=workers)
+        last = {"pct": -1}
+
+        def progress(done: int, total: int) -> None:
+            pct = done * 100 // total
+            if pct // 25 != last["pct"] // 25:
+                print(f"    ilerleme: {done}/{total} (%{pct})")
+            last["pct"] = pct
+
+        stats = store.add_documents_batched(docs, ids=ids, progress=progress)
+        assert store.db._collection.count() == stats.written
+        return stats
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=3000)
+    parser.add_argument("--latency", type=float, default=0.02, help="Embedding isteği başına sabit gecikme (sn)")
+    parser.add_argument("--per-input", type=float, default=0.002, help="Girdi başına embedding süresi (sn)")
+    parser.add_argument("--batch-sizes", default="16,64,256")
+    parser.add_argument("--workers", default="1,4")
+    parser.add_argument("--skip-before", action="store_true")
+    args = parser.parse_args()
+
+    docs = synthetic_corpus(args.chunks)
+    ids = [chunk_id(d.metadata["source"], i, d.page_content) for i, d in enumerate(docs)]
+    print(f"Sentetik korpus: {len(docs)} chunk, istek gecikmesi={args.latency}s, girdi başına={args.per_input}s")
+
+    with StubOllamaServer(latency=args.latency, embed_seconds_per_input=args.per_input) as stub:
+        if not args.skip_before:
+            seconds = run_before(stub.url, docs, ids)
+            print(f"before   tek çağrı: {seconds:.2f}s  ({len(docs) / seconds:.0f} chunk/sn)")
+        for workers in (int(w) for w in args.workers.split(",")):
+            for batch_size in (int(b) for b in args.batch_sizes.split(",")):
+                print(f"after    batch={batch_size} paralel={workers}:")
+                stats = run_after(stub.url, docs, ids, batch_size, workers)
+                print(
+                    f"    {stats.seconds:.2f}s  ({stats.chunks_per_second:.0f} chunk/sn)  "
+                    f"batch={stats.batches}  yeniden deneme={stats.retries}  başarısız={len(stats.failed_ids)}"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+LLMClient çağrı başına HTTP ek yükü benchmark'ı (sahte Ollama sunucusuna karşı).
+Çalıştırma: Proje kökünden  PYTHONPATH=. python3 benchmarks/bench_llm_client.py [--calls 200]
+
+"before": her çağrıda yeni httpx.AsyncClient (eski davranış)
+"after":  LLMClient'ın uzun ömürlü, keep-alive bağlantı havuzu
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import httpx
+
+from benchmarks.stub_ollama import StubOllamaServer
+from src.llm_client import LLMClient
+
+
+async def _per_call_client(url: str, calls: int) -> list[float]:
+    """Eski davranış: her üretim için ayrı AsyncClient aç-kapat."""
+    timings = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        async with httpx.AsyncClient(timeout=120.0) as client:
+            response = await client.post(f"{url}/api/generate", json={"model": "m", "prompt": "x", "stream": False})
+            response.raise_for_status()
+            response.json()
+        timings.append(time.perf_counter() - t0)
+    return timings
+
+
+async def _pooled_client(url: str, calls: int) -> list[float]:
+    """Yeni davranış: LLMClient havuzu bir kez açılır, tüm çağrılar bağlantıları yeniden kullanır."""
+    timings = []
+    async with LLMClient(host=url) as client:
+        for _ in range(calls):
+            t0 = time.perf_counter()
+            await client.ask("x")
+            timings.append(time.perf_counter() - t0)
+    return timings
+
+
+def _report(name: str, timings: list[float]) -> None:
+    ms = sorted(t * 1000 for t in timings)
+    p95 = ms[int(len(ms) * 0.95) - 1]
+    print(f"{name:<8} ortalama={statistics.mean(ms):.3f}ms  medyan={statistics.median(ms):.3f}ms  p95={p95:.3f}ms")
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    with StubOllamaServer() as stub:
+        before = await _per_call_client(stub.url, args.calls)
+        after = await _pooled_client(stub.url, args.calls)
+
+    print(f"Sahte Ollama, {args.calls} ardışık çağrı:")
+    _report("before", before)
+    _report("after", after)
+    print(f"Çağrı başına kazanç: {(statistics.mean(before) - statistics.mean(after)) * 1000:.3f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
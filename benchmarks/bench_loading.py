@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Doküman ayrıştırma (yükleme + parçalama) benchmark'ı, sentetik metin dosyalarıyla.
+Çalıştırma: Proje kökünden
+  PYTHONPATH=. python3 benchmarks/bench_loading.py [--files 40] [--file-kb 2000] [--workers 1,4]
+
+"before": Dosyalar sırayla DocumentProcessor.process ile tamamen belleğe alınır, tüm chunk'lar listede toplanır
+          (eski sync_data_dir davranışı).
+"after":  ParallelLoader; dosyalar süreç havuzunda akış halinde ayrıştırılır, chunk'lar sınırlı kuyruktan
+          tüketilip bırakılır (embedding aşaması gibi).
+Ana süreçteki en yüksek Python bellek kullanımı tracemalloc ile, süreden ayrı bir çalıştırmada ölçülür.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.utils.document_processor import DocumentProcessor
+from src.utils.parallel_loader import ParallelLoader
+
+_WORDS = (
+    "pizza hamur peynir domates sipariş müşteri fiyat menü lezzet sunum hizmet hız kalabalık "
+    "fırın mozzarella fesleğen mantar zeytin biber sucuk kampanya indirim şube kurye teslimat"
+).split()
+
+
+def write_corpus(directory: str, files: int, file_kb: int, seed: int = 7) -> list[str]:
+    """Boş satırlarla ayrılmış paragraflardan oluşan, her biri ~file_kb KB'lık metin dosyaları."""
+    rng = random.Random(seed)
+    paths = []
+    for i in range(files):
+        path = os.path.join(directory, f"doc_{i}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            written = 0
+            while written < file_kb * 1024:
+                paragraph = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(40, 160))) + "\n\n"
+                f.write(paragraph)
+                written += len(paragraph.encode("utf-8"))
+        paths.append(path)
+    return paths
+
+
+def _measure(fn):
+    # tracemalloc ayrıştırmayı yavaşlatır; süre ve bellek ayrı çalıştırmalarda ölçülür
+    started = time.perf_counter()
+    chunks = fn()
+    seconds = time.perf_counter() - started
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return chunks, seconds, peak / (1024 * 1024)
+
+
+def run_before(paths: list[str]) -> int:
+    chunks = []
+    for path in paths:
+        chunks.extend(DocumentProcessor(path).process())
+    return len(chunks)
+
+
+def run_after(paths: list[str], workers: int) -> int:
+    count = 0
+    for kind, _, payload in ParallelLoader(max_workers=workers).iter_events(paths):
+        if kind == "chunks":
+            count += len(payload)
+    return count
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--file-kb", type=int, default=2000)
+    parser.add_argument("--workers", default=f"1,{os.cpu_count() or 1}")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_corpus(directory, args.files, args.file_kb)
+        print(f"Sentetik korpus: {args.files} dosya x ~{args.file_kb} KB, CPU sayısı={os.cpu_count()}")
+
+        chunks, seconds, peak = _measure(lambda: run_before(paths))
+        print(f"before   sıralı, tüm chunk'lar bellekte: {seconds:.2f}s  {chunks} chunk  tepe bellek {peak:.1f} MB")
+        for workers in sorted({int(w) for w in args.workers.split(",")}):
+            chunks, seconds, peak = _measure(lambda: run_after(paths, workers))
+            print(f"after    {workers} süreç, akış halinde:      {seconds:.2f}s  {chunks} chunk  tepe bellek {peak:.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Uçtan uca pipeline benchmark'ı: sahte Ollama (üretim + embedding) karşısında build_graph'ı
+tekrar oynatılabilir bir sorgu karışımıyla (benchmarks/query_mix.json) çalıştırır.
+Çalıştırma: Proje kökünden
+  PYTHONPATH=. python3 benchmarks/bench_pipeline.py [--queries 48] [--concurrency 4] [--latency 0.05]
+      [--tokens-per-second 200] [--search-latency 0.2] [--output sonuc.json] [--compare onceki.json]
+
+Raporlananlar: p50/p95/p99 gecikme, saniyedeki sorgu (QPS), sorgu başına LLM çağrısı,
+route ve aşama (graph node'u) başına süre. Sonuçlar regresyon karşılaştırması için JSON olarak kaydedilir.
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from collections import defaultdict
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from langchain_ollama import OllamaEmbeddings
+
+from benchmarks.stub_ollama import StubOllamaServer
+from src.agents.analyst import QueryAnalyst
+from src.agents.coder import CoderAgent
+from src.agents.researcher import ResearcherAgent
+from src.agents.router import QueryRouter
+from src.llm_client import LLMClient
+from src.orchestration import build_graph
+from src.tools.code_executor import CodeExecutor
+from src.utils.answer_cache import SemanticAnswerCache
+from src.utils.ingestion import sync_data_dir
+from src.utils.vector_store import VectorStoreManager
+
+DEFAULT_QUERY_MIX = os.path.join(os.path.dirname(os.path.abspath(__file__)), "query_mix.json")
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Sahte embedding'ler rastgele yönlü olduğu için Chroma negatif alaka skoru uyarısı basar; ölçümü etkilemez
+warnings.filterwarnings("ignore", message="Relevance scores must be between 0 and 1")
+
+_ROUTE_TASK_TYPE = {"researcher": "rag", "coder": "coding", "general": "general"}
+
+# Sorgu başına LLM çağrı sayacı; LangGraph node'ları ve to_thread çağrıları context'i kopyaladığı için
+# aynı dict'e yazarlar
+_llm_calls: contextvars.ContextVar[dict | None] = contextvars.ContextVar("llm_calls", default=None)
+
+
+def load_query_mix(path: str = DEFAULT_QUERY_MIX) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["sorgular"]
+
+
+def _count_llm_call() -> None:
+    counter = _llm_calls.get()
+    if counter is not None:
+        counter["calls"] += 1
+
+
+class CountingLLMClient(LLMClient):
+    """LLMClient'a yapılan çağrıları (önbellek isabetleri dahil) sorgu bazında sayar."""
+
+    async def ask(self, prompt: str, **kwargs) -> str:
+        _count_llm_call()
+        return await super().ask(prompt, **kwargs)
+
+    async def ask_stream(self, prompt: str, **kwargs):
+        _count_llm_call()
+        async for token in super().ask_stream(prompt, **kwargs):
+            yield token
+
+
+class BenchSearchTool:
+    """Ağa çıkmayan arama aracı; sabit gecikme ile sabit sonuç döner."""
+
+    def __init__(self, latency: float = 0.2):
+        self.latency = latency
+
+    async def asearch(self, query: str) -> str:
+        await asyncio.sleep(self.latency)
+        return f"Sahte internet sonucu: {query}"
+
+
+def make_responder(mix: list[dict], answer_tokens: int = 40):
+    """
+    Sahte Ollama'nın yanıt üreticisi: analyst prompt'una sorgu karışımındaki route'u JSON olarak,
+    coder prompt'una çalıştırılabilir kod, diğer prompt'lara answer_tokens kelimelik metin döner.
+    """
+    routes = {item["query"]: item["route"] for item in mix}
+    answer = " ".join(f"kelime{i}" for i in range(answer_tokens))
+
+    def respond(body: dict) -> str:
+        # Sahte Ollama chat isteklerinde de kullanıcı mesajını "prompt", sistem mesajını "system" olarak verir
+        prompt = body.get("prompt", "")
+        if "Kullanıcı Sorgusu:" in prompt:
+            query = prompt.rsplit("Kullanıcı Sorgusu:", 1)[1].strip()
+            route = routes.get(query, "general")
+            return json.dumps({"task_type": _ROUTE_TASK_TYPE[route], "reason": "bench", "plan": []})
+        if "Sen uzman bir Python programcısısın" in body.get("system", ""):
+            # Düzeltme prompt'unda "Soru:" yoktur; biçim seçimi için prompt'un tamamı kullanılır
+            query = prompt.rsplit("Soru:", 1)[-1].strip()
+            # Çıktı biçimleri: tam sayı, ondalık sayı, anahtar/değer, serbest cümle (yalnızca sonuncusu özet ister)
+            fmt = (
+                "len(data['siparisler'])",
+                "len(data['siparisler']) / 4",
+                "f\"Toplam: {len(data['siparisler'])}\"",
+                "f\"Siparişler incelendi, {len(data['siparisler'])} müşteri bu hafta sipariş verdi.\"",
+            )[sum(map(ord, query)) % 4]
+            return (
+                "```python\nimport json\n"
+                "with open('./data/orders.json', encoding='utf-8') as f:\n"
+                "    data = json.load(f)\n"
+                f"print({fmt})\n```"
+            )
+        return answer
+
+    return respond
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """En yakın sıra (nearest-rank) yüzdeliği."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[rank - 1]
+
+
+def _latency_summary(seconds: list[float]) -> dict:
+    ms = [s * 1000 for s in seconds]
+    return {
+        "mean": round(statistics.mean(ms), 2) if ms else 0.0,
+        "p50": round(percentile(ms, 50), 2),
+        "p95": round(percentile(ms, 95), 2),
+        "p99": round(percentile(ms, 99), 2),
+        "max": round(max(ms), 2) if ms else 0.0,
+    }
+
+
+async def run_query(graph, item: dict) -> dict:
+    """Tek sorguyu çalıştırır; toplam süre, aşama süreleri ve LLM çağrı sayısını döndürür."""
+    counter = {"calls": 0}
+    token = _llm_calls.set(counter)
+    stages = {}
+    decision = {}
+    started = last = time.perf_counter()
+    try:
+        async for update in graph.astream({"query": item["query"]}, stream_mode="updates"):
+            now = time.perf_counter()
+            for node, values in update.items():
+                stages[node] = now - last
+                if node == "analyst" and values:
+                    decision = values.get("decision") or {}
+            last = now
+    finally:
+        _llm_calls.reset(token)
+    executed = [node for node in stages if node != "analyst"]
+    return {
+        "query": item["query"],
+        "expected_route": item["route"],
+        "route": executed[0] if executed else "analyst",
+        "route_source": decision.get("source", "analyst"),
+        "latency": time.perf_counter() - started,
+        "stages": stages,
+        "llm_calls": counter["calls"],
+    }
+
+
+async def run_benchmark(graph, workload: list[dict], concurrency: int) -> tuple[list[dict], float]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker(item):
+        async with semaphore:
+            return await run_query(graph, item)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(worker(item) for item in workload))
+    return results, time.perf_counter() - started
+
+
+def summarize(results: list[dict], wall_seconds: float) -> dict:
+    by_route = defaultdict(list)
+    by_stage = defaultdict(list)
+    for r in results:
+        by_route[r["route"]].append(r)
+        for node, seconds in r["stages"].items():
+            by_stage[node].append(seconds)
+    return {
+        "queries": len(results),
+        "wall_seconds": round(wall_seconds, 3),
+        "qps": round(len(results) / wall_seconds, 3) if wall_seconds else 0.0,
+        "latency_ms": _latency_summary([r["latency"] for r in results]),
+        "llm_calls_per_query": round(statistics.mean(r["llm_calls"] for r in results), 3) if results else 0.0,
+        "router_fast_path_rate": round(
+            sum(r["route_source"] == "router" for r in results) / len(results), 3
+        ) if results else 0.0,
+        "routes": {
+            route: {
+                "queries": len(items),
+                "latency_ms": _latency_summary([r["latency"] for r in items]),
+                "llm_calls_per_query": round(statistics.mean(r["llm_calls"] for r in items), 3),
+            }
+            for route, items in sorted(by_route.items())
+        },
+        "stages_ms": {node: _latency_summary(seconds) for node, seconds in sorted(by_stage.items())},
+    }
+
+
+def print_report(summary: dict, backend: dict) -> None:
+    lat = summary["latency_ms"]
+    print(f"{summary['queries']} sorgu, {summary['wall_seconds']}s, {summary['qps']} sorgu/sn")
+    print(f"gecikme  p50={lat['p50']}ms  p95={lat['p95']}ms  p99={lat['p99']}ms  ortalama={lat['mean']}ms")
+    print(f"sorgu başına LLM çağrısı: {summary['llm_calls_per_query']}  router hızlı yol oranı: {summary['router_fast_path_rate']}")
+    print(f"sahte Ollama istekleri: {backend}")
+    print("route bazında:")
+    for route, stats in summary["routes"].items():
+        print(
+            f"  {route:<11} n={stats['queries']:<4} p50={stats['latency_ms']['p50']}ms  "
+            f"p95={stats['latency_ms']['p95']}ms  LLM/sorgu={stats['llm_calls_per_query']}"
+        )
+    print("aşama bazında:")
+    for node, stats in summary["stages_ms"].items():
+        print(f"  {node:<11} ortalama={stats['mean']}ms  p95={stats['p95']}ms")
+
+
+def print_comparison(current: dict, baseline: dict) -> None:
+    """Önceki bir sonuç dosyasına göre p50/p95/QPS/LLM çağrısı değişimlerini yazdırır."""
+    def delta(now: float, before: float) -> str:
+        if not before:
+            return "n/a"
+        return f"{(now - before) / before * 100:+.1f}%"
+
+    cur, base = current["summary"], baseline["summary"]
+    print("karşılaştırma (önceki → şimdiki):")
+    for label, now, before in (
+        ("p50 ms", cur["latency_ms"]["p50"], base["latency_ms"]["p50"]),
+        ("p95 ms", cur["latency_ms"]["p95"], base["latency_ms"]["p95"]),
+        ("p99 ms", cur["latency_ms"]["p99"], base["latency_ms"]["p99"]),
+        ("qps", cur["qps"], base["qps"]),
+        ("LLM/sorgu", cur["llm_calls_per_query"], base["llm_calls_per_query"]),
+    ):
+        print(f"  {label:<10} {before} → {now} ({delta(now, before)})")
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=48, help="Ölçülen sorgu sayısı")
+    parser.add_argument("--warmup", type=int, default=3, help="Ölçüme dahil edilmeyen ısınma sorgusu sayısı")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42, help="Sorgu sırası için rastgelelik tohumu")
+    parser.add_argument("--query-mix", default=DEFAULT_QUERY_MIX)
+    parser.add_argument("--latency", type=float, default=0.05, help="Sahte Ollama ilk token gecikmesi (sn)")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Sahte Ollama üretim hızı; 0 → anında")
+    parser.add_argument("--answer-tokens", type=int, default=40)
+    parser.add_argument("--search-latency", type=float, default=0.2, help="Sahte internet araması gecikmesi (sn)")
+    parser.add_argument("--no-router", action="store_true", help="Yerel ön sınıflandırıcıyı kapat (her sorgu analyst LLM'e gider)")
+    parser.add_argument("--cache", action="store_true", help="LLM yanıt önbelleğini aç (varsayılan: kapalı)")
+    parser.add_argument("--answer-cache", action="store_true", help="Anlamsal yanıt önbelleğini aç (varsayılan: kapalı)")
+    parser.add_argument("--output", help="Sonuç JSON yolu (varsayılan: benchmarks/results/pipeline_<zaman>.json)")
+    parser.add_argument("--compare", help="Karşılaştırılacak önceki sonuç JSON'u")
+    args = parser.parse_args()
+
+    mix = load_query_mix(args.query_mix)
+    rng = random.Random(args.seed)
+    workload = [rng.choice(mix) for _ in range(args.warmup + args.queries)]
+
+    stub = StubOllamaServer(
+        latency=args.latency,
+        reply=make_responder(mix, answer_tokens=args.answer_tokens),
+        tokens_per_second=args.tokens_per_second,
+    )
+    with stub, tempfile.TemporaryDirectory() as chroma_dir:
+        client = CountingLLMClient(host=stub.url, enable_cache=args.cache)
+        await client.start()
+        executor = CodeExecutor(pool_size=max(1, min(args.concurrency, 4)))
+        executor.start()
+        try:
+            embeddings = OllamaEmbeddings(model="nomic-embed-text", base_url=stub.url)
+            vector_store = VectorStoreManager(persist_directory=chroma_dir, embeddings=embeddings)
+            sync_data_dir(vector_store, os.path.join(PROJECT_ROOT, "data"))
+            router = None if args.no_router else QueryRouter.default()
+            answer_cache = (
+                SemanticAnswerCache(vector_store.embeddings, os.path.join(PROJECT_ROOT, "data"))
+                if args.answer_cache else None
+            )
+            graph = build_graph(
+                QueryAnalyst(client),
+                ResearcherAgent(client, BenchSearchTool(args.search_latency), vector_store),
+                CoderAgent(client, executor),
+                client,
+                router=router,
+                answer_cache=answer_cache,
+            )
+
+            if args.warmup:
+                await run_benchmark(graph, workload[: args.warmup], args.concurrency)
+            before = stub.path_counts
+            results, wall = await run_benchmark(graph, workload[args.warmup :], args.concurrency)
+            after = stub.path_counts
+            models = client.model_stats()
+            prompt_eval = client.prompt_stats()
+        finally:
+            executor.close()
+            await client.aclose()
+
+    backend = {path: after.get(path, 0) - before.get(path, 0) for path in after}
+    summary = summarize(results, wall)
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "summary": summary,
+        "backend_requests": backend,
+        "models": models,
+        "prompt_eval": prompt_eval,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    print_report(summary, backend)
+    print("model kuyrukları (ısınma dahil):")
+    for name, stats in models.items():
+        print(
+            f"  {name:<16} istek={stats['requests']:<4} bekleyen={stats['waited']:<4} ort. bekleme={stats['avg_wait_ms']}ms  "
+            f"en uzun={stats['max_wait_ms']}ms  gecikme={stats['latency_ms']}ms  küçüğe düşürülen={stats['downgraded_from']}"
+        )
+
+    output = args.output or os.path.join(DEFAULT_RESULTS_DIR, f"pipeline_{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Sonuç kaydedildi: {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(report, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
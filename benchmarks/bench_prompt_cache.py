@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Prompt değerlendirme (KV önbelleği) benchmark'ı: sahte Ollama'nın model yükleme ve ön ek önbelleği modeliyle
+(bkz. benchmarks/stub_ollama.py) sorgu karışımını analyst → researcher | coder grafı üzerinden sırayla çalıştırır
+ve LLMClient.prompt_stats() ile ajan başına prompt değerlendirme süresini raporlar.
+Çalıştırma: Proje kökünden
+  PYTHONPATH=. python3 benchmarks/bench_prompt_cache.py [--queries 24] [--prompt-ms-per-token 0.5]
+      [--load-seconds 0.5] [--cache-slots 4] [--output sonuc.json]
+
+Senaryolar (her biri model boşaltılmış sahte Ollama ile başlar):
+  unload     keep_alive=0: model her istekten sonra boşaltılır; sorgular Ollama'nın varsayılan 5 dakikasından
+             seyrek geldiğinde olan budur. Her çağrı model yüklemesini ve tüm prompt'u öder.
+  keep_alive keep_alive="30m": model bellekte kalır, sabit sistem prompt'ları KV önbelleğinden gelir;
+             ilk sorgu modeli yükler.
+  warmup     keep_alive + LLMClient.warmup(): modeller ve ajanların sistem prompt'ları başlangıçta hazırlanır.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from langchain_ollama import OllamaEmbeddings
+
+from benchmarks.bench_pipeline import BenchSearchTool, load_query_mix, make_responder
+from benchmarks.stub_ollama import StubOllamaServer
+from src.agents.analyst import QueryAnalyst
+from src.agents.coder import CoderAgent
+from src.agents.researcher import ResearcherAgent
+from src.llm_client import LLMClient
+from src.orchestration import build_graph
+from src.tools.code_executor import CodeExecutor
+from src.utils.ingestion import sync_data_dir
+from src.utils.vector_store import VectorStoreManager
+
+warnings.filterwarnings("ignore", message="Relevance scores must be between 0 and 1")
+
+SCENARIOS = {
+    "unload": {"keep_alive": 0, "warmup": False},
+    "keep_alive": {"keep_alive": "30m", "warmup": False},
+    "warmup": {"keep_alive": "30m", "warmup": True},
+}
+
+
+async def run_scenario(stub, vector_store, executor, workload: list[dict], keep_alive, warmup: bool) -> dict:
+    stub.unload_all()
+    client = LLMClient(host=stub.url, enable_cache=False, keep_alive=keep_alive)
+    await client.start()
+    try:
+        analyst = QueryAnalyst(client)
+        graph = build_graph(
+            analyst,
+            ResearcherAgent(client, BenchSearchTool(0.0), vector_store),
+            CoderAgent(client, executor),
+            client,
+        )
+        warmup_seconds = 0.0
+        if warmup:
+            started = time.perf_counter()
+            await client.warmup(
+                [
+                    ("general", analyst.system_prompt()),
+                    ("coding", CoderAgent.SYSTEM_PROMPT),
+                ]
+            )
+            warmup_seconds = time.perf_counter() - started
+
+        latencies = []
+        for item in workload:
+            started = time.perf_counter()
+            await graph.ainvoke({"query": item["query"]})
+            latencies.append(time.perf_counter() - started)
+        return {
+            "warmup_ms": round(warmup_seconds * 1000, 1),
+            "first_query_ms": round(latencies[0] * 1000, 1),
+            "mean_query_ms": round(statistics.mean(latencies) * 1000, 1),
+            "agents": client.prompt_stats(),
+        }
+    finally:
+        await client.aclose()
+
+
+def print_report(results: dict) -> None:
+    for name, result in results.items():
+        print(
+            f"{name:<10} ısıtma={result['warmup_ms']}ms  ilk sorgu={result['first_query_ms']}ms  "
+            f"ortalama sorgu={result['mean_query_ms']}ms"
+        )
+        for agent, stats in sorted(result["agents"].items()):
+            print(
+                f"  {agent:<10} çağrı={stats['calls']:<3} prompt değerlendirme ort.={stats['avg_prompt_eval_ms']}ms  "
+                f"önbellekten={stats['reuse_ratio']:.0%}  kazanç≈{stats['saved_ms']}ms  "
+                f"yükleme={stats['load_ms']}ms ({stats['loads']} kez)"
+            )
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=24)
+    parser.add_argument("--seed", type=int, default=42, help="Sorgu sırası için rastgelelik tohumu")
+    parser.add_argument("--prompt-ms-per-token", type=float, default=0.5, help="Sahte prompt değerlendirme hızı")
+    parser.add_argument("--load-seconds", type=float, default=0.5, help="Sahte model yükleme süresi")
+    parser.add_argument(
+        "--cache-slots", type=int, default=4, help="Model başına KV önbelleği yuvası (OLLAMA_NUM_PARALLEL; Ollama varsayılanı bellek yeterse 4)"
+    )
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--output", help="Sonuç JSON yolu")
+    args = parser.parse_args()
+
+    mix = load_query_mix()
+    rng = random.Random(args.seed)
+    workload = [rng.choice(mix) for _ in range(args.queries)]
+
+    stub = StubOllamaServer(
+        reply=make_responder(mix),
+        prompt_seconds_per_token=args.prompt_ms_per_token / 1000,
+        cache_slots=args.cache_slots,
+        load_seconds=args.load_seconds,
+    )
+    results = {}
+    with stub, tempfile.TemporaryDirectory() as chroma_dir:
+        executor = CodeExecutor(pool_size=1)
+        executor.start()
+        try:
+            embeddings = OllamaEmbeddings(model="nomic-embed-text", base_url=stub.url)
+            vector_store = VectorStoreManager(persist_directory=chroma_dir, embeddings=embeddings)
+            sync_data_dir(vector_store, os.path.join(PROJECT_ROOT, "data"))
+            for name in args.scenarios:
+                results[name] = await run_scenario(stub, vector_store, executor, workload, **SCENARIOS[name])
+        finally:
+            executor.close()
+
+    print_report(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"Sonuç kaydedildi: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
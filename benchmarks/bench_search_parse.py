@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+DuckDuckGo sonuç sayfası ayrıştırma benchmark'ı, kaydedilmiş fixture sayfalarıyla (tests/fixtures/duckduckgo_*.html).
+Çalıştırma: Proje kökünden
+  PYTHONPATH=. python3 benchmarks/bench_search_parse.py [--repeat 200] [--max-results 3] [--pages dosya.html ...]
+
+"html.parser": Eski davranış; BeautifulSoup saf Python ayrıştırıcısı tüm sayfayı ağaca çevirir.
+"lxml":        Pull parser sayfayı parça parça okur, max_results sonuç bulununca durur.
+Süre (sayfa başına medyan) ve tracemalloc ile ölçülen tepe Python belleği ayrı çalıştırmalarda ölçülür.
+(lxml'in C tarafındaki ağaç belleği tracemalloc'a görünmez; html.parser'ın ağacı tamamen Python nesnesidir.)
+"""
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.tools.duckduckgo_parser import parse_results
+
+FIXTURES = os.path.join(PROJECT_ROOT, "tests", "fixtures", "duckduckgo_*.html")
+
+
+def _time(html: str, backend: str, max_results: int, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parse_results(html, max_results, backend=backend)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+
+def _peak_kb(html: str, backend: str, max_results: int) -> float:
+    # tracemalloc ayrıştırmayı yavaşlatır; bellek süreden ayrı bir çalıştırmada ölçülür
+    tracemalloc.start()
+    parse_results(html, max_results, backend=backend)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--max-results", type=int, default=3)
+    parser.add_argument("--pages", nargs="*", default=sorted(glob.glob(FIXTURES)))
+    args = parser.parse_args()
+
+    print(f"{'sayfa':34} {'ayrıştırıcı':12} {'sonuç':>5} {'medyan ms':>10} {'tepe KB':>9}")
+    for path in args.pages:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        name = f"{os.path.basename(path)} ({len(html) // 1024} KB)"
+        baseline = None
+        for backend in ("html.parser", "lxml"):  # önce eski davranış (hızlanma ona göre)
+            results = len(parse_results(html, args.max_results, backend=backend))
+            ms = _time(html, backend, args.max_results, args.repeat)
+            peak = _peak_kb(html, backend, args.max_results)
+            speedup = "" if baseline is None else f"  x{baseline / ms:.1f}"
+            baseline = baseline or ms
+            print(f"{name:34} {backend:12} {results:>5} {ms:>10.3f} {peak:>9.1f}{speedup}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""
+Benchmark'lar için yerel sahte Ollama sunucusu.
+Gerçek model çalıştırmadan LLMClient'ın HTTP katmanını ve uçtan uca pipeline'ı ölçmeye yarar.
+
+Desteklenen uç noktalar:
+  /api/generate   stream=false (tek JSON) ve stream=true (NDJSON, token hızı ile); boş prompt → sadece model yükleme
+  /api/chat       /api/generate ile aynı; {"messages": [...]} → {"message": {"role": "assistant", "content": ...}}
+  /api/embeddings {"prompt": str} → {"embedding": [...]}
+  /api/embed      {"input": str | [str]} → {"embeddings": [[...], ...]}
+
+Gecikme modeli: her istek önce `latency` saniye bekler (ilk token süresi), ardından yanıtın her
+token'ı için 1 / tokens_per_second saniye (tokens_per_second=0 → anında). Embedding isteklerinde
+ayrıca girdi başına `embed_seconds_per_input` saniye beklenir.
+
+Prompt değerlendirme modeli (Ollama'nın KV önbelleği): model ilk istekte `load_seconds` ile yüklenir
+(keep_alive=0 gönderilirse istekten sonra boşaltılır). Model başına `cache_slots` yuva son prompt'ları tutar;
+yeni prompt yuvalardaki en uzun ortak ön eki kullanır, sadece kalan kısmı token başına
+`prompt_seconds_per_token` saniyede değerlendirilir ve boş ya da en uzun süredir kullanılmayan yuvaya yazılır. Token ≈ karakter/3 (src.utils.text.estimate_tokens gibi).
+Yanıtlar Ollama gibi prompt_eval_count, prompt_eval_duration ve load_duration (ns) alanlarını içerir.
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_TOKEN_RE = re.compile(r"\S+\s*")
+
+
+def _fake_embedding(text: str, dim: int) -> list[float]:
+    """Metinden deterministik, normalize edilmiş vektör (aynı metin → aynı vektör)."""
+    values = []
+    counter = 0
+    while len(values) < dim:
+        digest = hashlib.sha256(f"{counter}\0{text}".encode("utf-8")).digest()
+        values.extend((b - 127.5) / 127.5 for b in digest)
+        counter += 1
+    values = values[:dim]
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return [v / norm for v in values]
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # Keep-alive için HTTP/1.1 (BaseHTTPRequestHandler varsayılanı 1.0'dır)
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, body: dict) -> None:
+        data = (json.dumps(body) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _reply_text(self, body: dict) -> str:
+        reply = self.server.reply
+        return reply(body) if callable(reply) else reply
+
+    def _token_delay(self) -> float:
+        rate = self.server.tokens_per_second
+        return 1.0 / rate if rate else 0.0
+
+    @staticmethod
+    def _render(body: dict) -> str:
+        """Sohbet şablonunun karşılığı: sistem ve kullanıcı mesajları sabit etiketlerle art arda yazılır."""
+        if "messages" in body:
+            messages = body["messages"]
+        else:
+            messages = [{"role": "user", "content": body.get("prompt", "")}]
+            if body.get("system"):
+                messages.insert(0, {"role": "system", "content": body["system"]})
+        return "".join(f"<|{m.get('role')}|>{m.get('content', '')}<|end|>" for m in messages) + "<|assistant|>"
+
+    def _evaluate_prompt(self, body: dict) -> dict:
+        """Model yükleme + KV önbelleği yuvası seçimi; Ollama'nın süre alanlarını (ns) döndürür."""
+        server = self.server
+        model = body.get("model")
+        rendered = self._render(body)
+        with server.lock:
+            load = model not in server.loaded
+            server.loaded.add(model)
+            slots = server.slots.setdefault(model, [])
+            common = [len(os.path.commonprefix([slot, rendered])) for slot in slots]
+            best = max(range(len(slots)), key=common.__getitem__, default=None)
+            reused = common[best] if best is not None else 0
+            if best is not None:
+                # Ön eki kullanılan yuva yeni kullanılmış sayılır; prompt boş veya en eski yuvaya yazılır
+                slots.append(slots.pop(best))
+            if len(slots) >= server.cache_slots:
+                slots.pop(0)
+            slots.append(rendered)
+            if body.get("keep_alive") == 0:
+                server.loaded.discard(model)
+                server.slots.pop(model, None)
+        evaluated = max((len(rendered) - reused + 2) // 3, 1)
+        load_seconds = server.load_seconds if load else 0.0
+        eval_seconds = evaluated * server.prompt_seconds_per_token
+        if load_seconds + eval_seconds:
+            time.sleep(load_seconds + eval_seconds)
+        return {
+            "prompt_eval_count": evaluated,
+            "prompt_eval_duration": int(eval_seconds * 1e9),
+            "load_duration": int(load_seconds * 1e9),
+        }
+
+    def _generate(self, body: dict, chat: bool = False) -> None:
+        model = body.get("model")
+        if not chat and not body.get("prompt") and not body.get("system"):
+            # Ollama: boş prompt sadece modeli yükler (keep_alive ile bellekte tutulur)
+            with self.server.lock:
+                load = model not in self.server.loaded
+                self.server.loaded.add(model)
+            if load and self.server.load_seconds:
+                time.sleep(self.server.load_seconds)
+            self._send_json(200, {"model": model, "response": "", "done": True, "done_reason": "load"})
+            return
+
+        timings = self._evaluate_prompt(body)
+        if chat:
+            # Yanıt üreticisi chat isteklerini de generate gövdesi gibi görür (prompt + system)
+            messages = body.get("messages", [])
+            user = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+            system = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+            text = self._reply_text(dict(body, prompt=user, system=system))
+        else:
+            text = self._reply_text(body)
+        tokens = _TOKEN_RE.findall(text) or [text]
+        delay = self._token_delay()
+
+        def part(content: str, done: bool) -> dict:
+            if chat:
+                return {"model": model, "message": {"role": "assistant", "content": content}, "done": done}
+            return {"model": model, "response": content, "done": done}
+
+        if not body.get("stream", True):
+            if delay:
+                time.sleep(delay * len(tokens))
+            self._send_json(200, {**part(text, True), "eval_count": len(tokens), **timings})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for token in tokens:
+            if delay:
+                time.sleep(delay)
+            self._write_chunk(part(token, False))
+        self._write_chunk({**part("", True), "eval_count": len(tokens), **timings})
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+            server.path_counts[self.path] += 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        if self.path == "/api/generate":
+            self._generate(body)
+        elif self.path == "/api/chat":
+            self._generate(body, chat=True)
+        elif self.path == "/api/embeddings":
+            if server.embed_seconds_per_input:
+                time.sleep(server.embed_seconds_per_input)
+            self._send_json(200, {"embedding": _fake_embedding(body.get("prompt", ""), server.embedding_dim)})
+        elif self.path == "/api/embed":
+            inputs = body.get("input", "")
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            if server.embed_seconds_per_input:
+                time.sleep(server.embed_seconds_per_input * len(inputs))
+            self._send_json(
+                200,
+                {
+                    "model": body.get("model"),
+                    "embeddings": [_fake_embedding(text, server.embedding_dim) for text in inputs],
+                },
+            )
+        else:
+            self._send_json(404, {"error": f"bilinmeyen yol: {self.path}"})
+
+
+class StubOllamaServer:
+    """
+    Arka plan thread'inde çalışan sahte Ollama. `with StubOllamaServer() as stub:` ile kullanılır.
+    `reply` sabit bir metin veya istek gövdesini alıp metin döndüren bir fonksiyon olabilir.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        reply="ok",
+        tokens_per_second: float = 0.0,
+        embedding_dim: int = 768,
+        embed_seconds_per_input: float = 0.0,
+        prompt_seconds_per_token: float = 0.0,
+        cache_slots: int = 1,
+        load_seconds: float = 0.0,
+    ):
+        self._httpd = ThreadingHTTPServer((host, port), _StubHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.latency = latency
+        self._httpd.reply = reply
+        self._httpd.tokens_per_second = tokens_per_second
+        self._httpd.embedding_dim = embedding_dim
+        self._httpd.embed_seconds_per_input = embed_seconds_per_input
+        self._httpd.prompt_seconds_per_token = prompt_seconds_per_token
+        self._httpd.cache_slots = max(cache_slots, 1)
+        self._httpd.load_seconds = load_seconds
+        self._httpd.loaded = set()
+        self._httpd.slots = {}
+        self._httpd.request_count = 0
+        self._httpd.path_counts = Counter()
+        self._httpd.lock = threading.Lock()
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def request_count(self) -> int:
+        return self._httpd.request_count
+
+    @property
+    def path_counts(self) -> dict[str, int]:
+        """Uç nokta başına istek sayısı, örn. {"/api/generate": 12, "/api/embed": 3}."""
+        with self._httpd.lock:
+            return dict(self._httpd.path_counts)
+
+    def unload_all(self) -> None:
+        """Yüklü modelleri ve KV önbelleği yuvalarını sıfırlar (Ollama'nın yeniden başlatılması gibi)."""
+        with self._httpd.lock:
+            self._httpd.loaded.clear()
+            self._httpd.slots.clear()
+
+    def start(self) -> "StubOllamaServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "StubOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -2,75 +2,196 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+import argparse
 import asyncio
 from rich.console import Console
 from rich.panel import Panel
 from rich.live import Live
+from rich.progress import Progress
 from rich.spinner import Spinner
 from langfuse import get_client
 
 from src.llm_client import LLMClient
+from src.utils.answer_cache import SemanticAnswerCache
+from src.utils.code_cache import CodeCache
+from src.utils.llm_cache import SQLiteResponseCache
+from src.utils.token_counter import TokenCounter
 from src.agents.analyst import QueryAnalyst
+from src.agents.router import QueryRouter
 from src.agents.researcher import ResearcherAgent
 from src.agents.coder import CoderAgent
 from src.tools.search_tool import SearchTool
 from src.tools.code_executor import CodeExecutor
+from src.tools.query_engine import QueryEngine
 from src.utils.vector_store import VectorStoreManager
-from src.utils.document_processor import DocumentProcessor
+from src.utils.ingestion import sync_data_dir
+from src.utils.parallel_loader import ParallelLoader
 from src.orchestration import build_graph
+from src.server import QueryServer, serve
 import os
-import glob
 
 console = Console()
 langfuse = get_client()
 
 def load_data_files(vector_store: VectorStoreManager):
-    """Data klasöründeki tüm dosyaları vector store'a yükler."""
-    data_dir = "./data"
-    if not os.path.exists(data_dir):
-        return
-    
-    # Desteklenen dosya formatları
-    supported_extensions = ["*.txt", "*.md", "*.pdf", "*.json"]
-    all_chunks = []
-    
-    for ext in supported_extensions:
-        files = glob.glob(os.path.join(data_dir, ext))
-        for file_path in files:
-            try:
-                processor = DocumentProcessor(file_path)
-                chunks = processor.process()
-                all_chunks.extend(chunks)
-                console.print(f"[green]✓[/green] Yüklendi: {os.path.basename(file_path)}")
-            except Exception as e:
-                console.print(f"[yellow]⚠[/yellow] Yüklenemedi {os.path.basename(file_path)}: {e}")
-    
-    # Tüm chunk'ları vector store'a ekle
-    if all_chunks:
-        vector_store.add_documents(all_chunks)
-        console.print(f"[green]✓[/green] Toplam {len(all_chunks)} doküman parçası vector store'a eklendi.")
+    """Data klasörünü vector store ile eşitler; sadece yeni/değişen dosyalar embed edilir."""
+    with Progress(transient=True, console=console) as bar:
+        task = bar.add_task("Embedding", total=None)
+        report = sync_data_dir(
+            vector_store,
+            "./data",
+            progress=lambda done, total: bar.update(task, completed=done, total=total),
+            loader=ParallelLoader(max_workers=int(os.getenv("INGEST_WORKERS", "0")) or None),
+        )
+    for path in report.added:
+        console.print(f"[green]✓[/green] Yüklendi: {os.path.basename(path)}")
+    for path in report.updated:
+        console.print(f"[green]✓[/green] Güncellendi: {os.path.basename(path)}")
+    for path in report.removed:
+        console.print(f"[yellow]-[/yellow] Kaldırıldı: {os.path.basename(path)}")
+    for path, error in report.failed.items():
+        console.print(f"[yellow]⚠[/yellow] Yüklenemedi {os.path.basename(path)}: {error}")
+    if report.chunks_added or report.chunks_deleted:
+        console.print(
+            f"[green]✓[/green] {report.chunks_added} doküman parçası eklendi, {report.chunks_deleted} eski parça silindi."
+        )
+    if report.embed_stats is not None and report.embed_stats.written:
+        stats = report.embed_stats
+        console.print(
+            f"[cyan]{stats.written} parça {stats.seconds:.1f}s içinde embed edildi "
+            f"({stats.chunks_per_second:.0f} parça/sn, {stats.retries} yeniden deneme).[/cyan]"
+        )
+    if report.unchanged:
+        console.print(f"[cyan]{len(report.unchanged)} dosya değişmemiş, yeniden embed edilmedi.[/cyan]")
+
+async def build_components():
+    """
+    LLMClient, araçlar, vector store, ajanlar, yanıt önbelleği ve LangGraph'ı bir kez oluşturur.
+    REPL ve sunucu modu aynı bileşenleri kullanır; dönen client/executor/search_tool çıkışta kapatılmalıdır.
+    """
+    # LLM_CACHE_PATH set edilirse yanıt önbelleği diskte (SQLite) tutulur ve yeniden başlatmada korunur
+    cache_path = os.getenv("LLM_CACHE_PATH")
+    # OLLAMA_NUM_PARALLEL: Ollama sunucusunun model başına paralel istek sayısı; istemci de aynı sınırı uygular,
+    # fazlası öncelikli kuyrukta bekler. LLM_DOWNGRADE_AFTER: büyük modelde beklenen bekleme bu süreyi (sn) aşınca
+    # uygun görevler küçük modele düşürülür ("" → kapalı).
+    # TOKENIZER_PATH: modelin tokenizer.json dosyası (ör. Llama 3); verilmezse token sayısı karakter/3 ile tahmin edilir.
+    # Model seçimi, num_ctx/num_predict ve ajanların prompt bütçeleri aynı sayacı kullanır.
+    # OLLAMA_KEEP_ALIVE: modellerin son istekten sonra bellekte kalma süresi ("30m", saniye, "-1" = hep; "" → Ollama
+    # varsayılanı 5 dk). Model boşaltılınca KV önbelleğindeki sabit prompt ön ekleri de kaybolur.
+    token_counter = TokenCounter(os.getenv("TOKENIZER_PATH") or None)
+    num_parallel = int(os.getenv("OLLAMA_NUM_PARALLEL", "0"))
+    downgrade_after = os.getenv("LLM_DOWNGRADE_AFTER", "2.0")
+    keep_alive = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+    client = executor = search_tool = None
+    try:
+        client = LLMClient(
+            cache=SQLiteResponseCache(cache_path) if cache_path else None,
+            model_concurrency={"fast": num_parallel, "smart": num_parallel} if num_parallel else None,
+            downgrade_after=float(downgrade_after) if downgrade_after else None,
+            token_counter=token_counter,
+            keep_alive=(int(keep_alive) if keep_alive.lstrip("-").isdigit() else keep_alive) if keep_alive else None,
+        )
+        await client.start()  # Ollama bağlantı havuzu tüm oturum boyunca açık kalır
+        search_tool = SearchTool()  # Arama sağlayıcıları için paylaşılan bağlantı havuzu (ilk aramada açılır)
+        executor = CodeExecutor()
+        executor.start()  # Kod çalıştırma süreçleri önceden ısıtılır
+        # Embedding önbelleği: aynı chunk/sorgu metni tekrar embed edilmez (EMBEDDING_CACHE_PATH="" ile kapatılır)
+        vector_store = VectorStoreManager(
+            embedding_cache_path=os.getenv("EMBEDDING_CACHE_PATH", "./.cache/embeddings.sqlite") or None
+        ) # RAG hafızası için
+
+        # Data klasöründeki dosyaları yükle
+        console.print("[cyan]Data klasöründeki dosyalar yükleniyor...[/cyan]")
+        load_data_files(vector_store)
+
+        # Ajanları oluştur
+        # Basit toplulaştırma soruları için yerel sorgu motoru: analyst sorgu tanımı üretir, coder kod yazdırmadan
+        # çalıştırır (QUERY_ENGINE=0 ile kapatılır)
+        query_engine = QueryEngine("./data") if os.getenv("QUERY_ENGINE", "1") != "0" else None
+        analyst = QueryAnalyst(client, query_engine=query_engine)
+        researcher = ResearcherAgent(
+            client, search_tool, vector_store, rag_mode=os.getenv("RAG_MODE", "hybrid"), token_counter=token_counter
+        )
+        # Başarıyla çalışmış kod önbelleği: tekrar eden hesaplama soruları için kod yeniden üretilmez,
+        # okuduğu data/ dosyaları değişince geçersiz olur (CODE_CACHE_PATH="" ile kapatılır)
+        code_cache_path = os.getenv("CODE_CACHE_PATH", "./.cache/code_cache.json")
+        code_cache = CodeCache("./data", path=code_cache_path) if code_cache_path else None
+        coder = CoderAgent(client, executor, code_cache=code_cache, query_engine=query_engine, token_counter=token_counter)
+
+        # Modelleri önceden yükle ve ajanların sabit sistem prompt'larını KV önbelleğine al; ilk sorgu model yüklemesini
+        # ve uzun ön ekin değerlendirilmesini beklemez (LLM_WARMUP=0 ile kapatılır)
+        if os.getenv("LLM_WARMUP", "1") != "0":
+            console.print("[cyan]Modeller ısıtılıyor...[/cyan]")
+            warmed = await client.warmup(
+                [
+                    ("general", analyst.system_prompt()),
+                    ("coding", CoderAgent.SYSTEM_PROMPT),
+                ]
+            )
+            for model, seconds in warmed.items():
+                console.print(f"[cyan]{model} {seconds:.1f}s içinde hazırlandı.[/cyan]")
+
+        # Belirgin sorgular için LLM analyst'i atlayan yerel ön sınıflandırıcı
+        # (ROUTER_MODEL_PATH: scripts/eval_router.py --save ile kaydedilmiş model, ROUTER_THRESHOLD: güven eşiği)
+        router = QueryRouter.default(
+            threshold=float(os.getenv("ROUTER_THRESHOLD", "0.85")),
+            model_path=os.getenv("ROUTER_MODEL_PATH"),
+        )
+
+        # Anlamsal yanıt önbelleği: benzer sorular ajanları yeniden çalıştırmaz, data/ değişince boşalır
+        # (ANSWER_CACHE=0 ile kapatılır, ANSWER_CACHE_THRESHOLD: kosinüs benzerliği eşiği)
+        answer_cache = None
+        if os.getenv("ANSWER_CACHE", "1") != "0":
+            answer_cache = SemanticAnswerCache(
+                vector_store.embeddings,
+                "./data",
+                threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92")),
+            )
 
-async def main():
+        # LangGraph orkestrasyonu (önbellek → router/analyst → researcher | coder | general)
+        graph = build_graph(analyst, researcher, coder, client, router=router, answer_cache=answer_cache)
+        return client, executor, graph, answer_cache, search_tool
+    except BaseException:
+        # Başlangıç yarıda kaldı (yükleme, ısıtma): o ana kadar açılan havuz ve çalışan süreçler kapatılır
+        await close_components(client, executor, search_tool)
+        raise
+
+
+async def close_components(client, executor, search_tool):
+    """build_components'ın açtığı kaynakları kapatır; henüz oluşturulmamış (None) olanları atlar."""
+    if executor is not None:
+        executor.close()
+    if search_tool is not None:
+        await search_tool.aclose()
+    if client is not None:
+        await client.aclose()
+
+
+async def main(args=None):
     # 1. Başlangıç Ayarları
     console.print(Panel.fit("[bold magenta]Multi-Agent DocService Başlatılıyor...[/bold magenta]\n[cyan]MacBook M4 Pro - Yerel Llama Modelleri Aktif[/cyan]"))
-    
-    client = LLMClient()
-    search_tool = SearchTool()
-    executor = CodeExecutor()
-    vector_store = VectorStoreManager() # RAG hafızası için
-    
-    # Data klasöründeki dosyaları yükle
-    console.print("[cyan]Data klasöründeki dosyalar yükleniyor...[/cyan]")
-    load_data_files(vector_store)
-    
-    # Ajanları oluştur
-    analyst = QueryAnalyst(client)
-    researcher = ResearcherAgent(client, search_tool, vector_store)
-    coder = CoderAgent(client, executor)
 
-    # LangGraph orkestrasyonu (analyst → researcher | coder | general)
-    graph = build_graph(analyst, researcher, coder, client)
+    client = executor = search_tool = None
+    try:
+        client, executor, graph, answer_cache, search_tool = await build_components()
+        if args is not None and args.serve:
+            server = QueryServer(
+                graph,
+                client=client,
+                answer_cache=answer_cache,
+                max_concurrent=args.max_concurrent,
+                max_queue=args.max_queue,
+                request_timeout=args.request_timeout,
+            )
+            console.print(f"[green]✓[/green] Sunucu http://{args.host}:{args.port} adresinde dinliyor (POST /query, GET /health, GET /metrics)")
+            await serve(server, host=args.host, port=args.port)
+        else:
+            await _repl(graph)
+    finally:
+        await close_components(client, executor, search_tool)
 
+async def _repl(graph):
+    """Kullanıcıdan soru alıp grafı çalıştıran CLI döngüsü."""
     while True:
         user_query = console.input("\n[bold green]Soru sorun (çıkış için 'exit'): [/bold green]")
         if user_query.lower() in ["exit", "quit", "çıkış"]:
@@ -83,21 +204,49 @@ async def main():
                 name="user_query",
                 input=user_query,
             ) as span:
+                result = {}
+                streamed = ""
+                # Son node'un token'ları geldikçe panel canlı güncellenir; bitince kalıcı panel basılır
                 with Live(
                     Spinner("dots", text="Analiz ediliyor...", style="cyan"),
                     refresh_per_second=10,
-                ):
-                    result = await graph.ainvoke({"query": user_query})
+                    transient=True,
+                ) as live:
+                    async for mode, chunk in graph.astream(
+                        {"query": user_query}, stream_mode=["custom", "values"]
+                    ):
+                        if mode == "custom" and "token" in chunk:
+                            streamed += chunk["token"]
+                            live.update(Panel(streamed, title="[bold cyan]Agent Yanıtı[/bold cyan]", border_style="cyan"))
+                        elif mode == "values":
+                            result = chunk
 
                 response = result.get("response", "Yanıt üretilemedi.")
                 span.update(output=response)
 
-            console.print(Panel(response, title="[bold green]Agent Yanıtı[/bold green]", border_style="green"))
+            title = "Agent Yanıtı (önbellekten)" if result.get("cache_hit") else "Agent Yanıtı"
+            console.print(Panel(response, title=f"[bold green]{title}[/bold green]", border_style="green"))
         except Exception as e:
             console.print(f"[bold red]Bir hata oluştu: {e}[/bold red]")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-Agent DocService")
+    parser.add_argument("--serve", action="store_true", help="REPL yerine çok oturumlu HTTP sunucusunu başlat")
+    parser.add_argument("--host", default=os.getenv("SERVER_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVER_PORT", "8080")))
+    parser.add_argument("--max-concurrent", type=int, default=int(os.getenv("SERVER_MAX_CONCURRENT", "8")),
+                        help="Aynı anda çalışan sorgu sayısı")
+    parser.add_argument("--max-queue", type=int, default=int(os.getenv("SERVER_MAX_QUEUE", "32")),
+                        help="Sırada bekleyebilecek en fazla sorgu; aşılırsa 503")
+    parser.add_argument("--request-timeout", type=float, default=float(os.getenv("SERVER_REQUEST_TIMEOUT", "300")),
+                        help="İstek başına süre sınırı (saniye); aşılırsa 504")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
     async def start():
-        await main()
+        await main(parse_args())
     
-    asyncio.run(start())
\ No newline at end of file
+    try:
+        asyncio.run(start())
+    except KeyboardInterrupt:
+        pass
\ No newline at end of file
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+QueryRouter yönlendirme doğruluğu ölçümü (k-katlı çapraz doğrulama).
+Çalıştırma: Proje kökünden  PYTHONPATH=. python3 scripts/eval_router.py [--threshold 0.85] [--folds 5] [--save model.json]
+"""
+import argparse
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.agents.router import QueryRouter, load_labelled_queries
+
+
+def cross_validate(examples, threshold: float, folds: int) -> dict:
+    """Her katta kalan örneklerle eğitip ayrılan örneklerle ölçer; sonuçları birleştirir."""
+    totals = {"n": 0, "correct": 0.0, "covered": 0.0, "covered_correct": 0.0}
+    for k in range(folds):
+        test = [ex for i, ex in enumerate(examples) if i % folds == k]
+        train = [ex for i, ex in enumerate(examples) if i % folds != k]
+        m = QueryRouter(threshold=threshold).train(train).evaluate(test)
+        totals["n"] += m["n"]
+        totals["correct"] += m["accuracy"] * m["n"]
+        totals["covered"] += m["coverage"] * m["n"]
+        totals["covered_correct"] += m["fast_path_accuracy"] * m["coverage"] * m["n"]
+    n = totals["n"] or 1
+    return {
+        "n": totals["n"],
+        "accuracy": totals["correct"] / n,
+        "coverage": totals["covered"] / n,
+        "fast_path_accuracy": (totals["covered_correct"] / totals["covered"]) if totals["covered"] else 0.0,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threshold", type=float, default=0.85)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--save", help="Tüm setle eğitilmiş modeli bu yola kaydet")
+    args = parser.parse_args()
+
+    examples = load_labelled_queries()
+    m = cross_validate(examples, args.threshold, args.folds)
+    print(f"{m['n']} etiketli sorgu, {args.folds}-katlı çapraz doğrulama, eşik={args.threshold}")
+    print(f"  doğruluk (tüm sorgular):     {m['accuracy']:.1%}")
+    print(f"  hızlı yol kapsamı:           {m['coverage']:.1%}  (analyst LLM çağrısı atlanır)")
+    print(f"  hızlı yol doğruluğu:         {m['fast_path_accuracy']:.1%}")
+
+    if args.save:
+        QueryRouter(threshold=args.threshold).train(examples).save(args.save)
+        print(f"Model kaydedildi: {args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
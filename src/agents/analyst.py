@@ -1,15 +1,24 @@
 import json
 from src.llm_client import LLMClient
+from src.tools.query_engine import QueryEngine
 
 
 class QueryAnalyst:
     """Sorguyu analiz edip hangi node'a gidileceğine karar verir. LangGraph'ın giriş node'udur."""
 
-    def __init__(self, client: LLMClient):
+    def __init__(self, client: LLMClient, query_engine: QueryEngine | None = None):
+        """
+        query_engine verilirse coding kararlarında prompt'a tablo şeması eklenir ve modelden ayrıca
+        "query_spec" (yapılandırılmış sorgu tanımı) istenir; CoderAgent bunu kod üretmeden çalıştırır.
+        """
         self.client = client
+        self.query_engine = query_engine
 
-    async def analyze(self, query: str) -> dict:
-        """task_type döndürür: web_search/rag → researcher, coding → coder, aksi halde general."""
+    def system_prompt(self) -> str:
+        """
+        Sorgudan bağımsız, sabit talimat metni. Soru ayrı kullanıcı mesajı olarak gittiği için bu ön ek her çağrıda
+        aynı kalır ve Ollama tarafından yeniden değerlendirilmez (main.py başlangıçta bununla ısıtır).
+        """
         system_prompt = """Sen çok ajanlı sistemin planlayıcısısın. Kullanıcı sorusuna göre hangi aracın kullanılacağına karar ver.
 
 Araçlar:
@@ -19,8 +28,18 @@ Araçlar:
 
 Yanıtın SADECE aşağıdaki JSON olsun, başka metin ekleme:
 {"task_type": "web_search"|"rag"|"coding"|"general", "reason": "kısa gerekçe", "plan": ["Adım 1", "Adım 2"]}"""
+        if self.query_engine is not None:
+            system_prompt += f"""
+
+task_type "coding" ise JSON'a ayrıca "query_spec" alanı ekle: soru tek bir tablo üzerinde filtre/gruplama/toplulaştırma/sıralama ile cevaplanabiliyorsa sorgu tanımı, cevaplanamıyorsa null.
+{self.query_engine.spec_prompt()}"""
+        return system_prompt
 
-        response = await self.client.ask(f"{system_prompt}\n\nKullanıcı Sorgusu: {query}", task_type="general")
+    async def analyze(self, query: str) -> dict:
+        """task_type döndürür: web_search/rag → researcher, coding → coder, aksi halde general."""
+        response = await self.client.ask(
+            f"Kullanıcı Sorgusu: {query}", task_type="general", system=self.system_prompt(), agent="analyst"
+        )
 
         try:
             return json.loads(response.strip())
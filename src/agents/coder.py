@@ -1,115 +1,229 @@
+import asyncio
+from typing import Callable
+
 from src.llm_client import LLMClient
 from src.tools.code_executor import CodeExecutor
+from src.tools.query_engine import QueryEngine, QuerySpecError, parse_spec
+from src.utils.code_cache import CodeCache
+from src.utils.result_formatter import format_result
+from src.utils.token_counter import TokenCounter
 
-class CoderAgent:
-    def __init__(self, client: LLMClient, executor: CodeExecutor):
-        self.client = client
-        self.executor = executor
+_NO_OUTPUT_ERROR = "Kod Çalıştırma Hatası: Kod herhangi bir çıktı üretmedi, print() ile sonucu yazdırman gerekiyor."
 
-    async def solve(self, query: str) -> str:
-        """
-        Kullanıcının sorusunu çözmek için Python kodu yazar, çalıştırır ve sonucu döndürür.
-        Kod yazımı her zaman 'smart' (ileri) model ile yapılır.
-        """
-        prompt = f"""Sen uzman bir Python programcısısın. Aşağıdaki soruyu çözmek için yalnızca çalıştırılabilir Python kodu yaz.
+
+class CoderAgent:
+    # Kod üretme ve düzeltme çağrılarının ortak, sorgudan bağımsız sistem prompt'u. Soru kullanıcı mesajında gider;
+    # bu ön ek her çağrıda aynı kaldığı için Ollama onu KV önbelleğinden kullanır (main.py başlangıçta ısıtır).
+    SYSTEM_PROMPT = """Sen uzman bir Python programcısısın. Kullanıcının sorusunu çözmek için yalnızca çalıştırılabilir Python kodu yaz.
 
 Kurallar:
 - Yanıtında SADECE tek bir ```python ... ``` bloğu olsun; açıklama veya örnek çıktı yazma.
 - Kod tam ve çalışır olsun: open() ile dosya oku, parse et, hesapla, print() ile sonucu yazdır. Placeholder veya "..." kullanma.
-- Değişken isimlerini (örneğin \"pizza_type\") TANIMLAMADAN kullanma; her kullandığın değişken mutlaka daha önce atanmış olsun.
+- Değişken isimlerini (örneğin "pizza_type") TANIMLAMADAN kullanma; her kullandığın değişken mutlaka daha önce atanmış olsun.
 - Veri ./data/ klasöründe:
   * JSON dosyaları için: import json ile json.load() kullan (örn: menu.json, orders.json, reviews.json, expenses.json)
   * Metin dosyaları için: open() ile oku ve parse et
 - JSON şemaları:
-  * orders.json: kök dict; \"siparisler\" anahtarı altında müşteri listesi vardır. Her müşteri kaydında:
-      - \"musteri_no\" (int)
-      - \"isim\" (str)
-      - \"yas_grubu\" (str)
-      - \"siparisler\" (liste, içinde {{\"pizza\": str, \"adet\": int}})
-    DİKKAT: Alan adı \"isim\"dir, asla \"name\" değildir. Bir müşteriyi isme göre ararken:
-      - hem sorguyu hem de order[\"isim\"] değerini .lower() ile küçült ve karşılaştır.
+  * orders.json: kök dict; "siparisler" anahtarı altında müşteri listesi vardır. Her müşteri kaydında:
+      - "musteri_no" (int)
+      - "isim" (str)
+      - "yas_grubu" (str)
+      - "siparisler" (liste, içinde {"pizza": str, "adet": int})
+    DİKKAT: Alan adı "isim"dir, asla "name" değildir. Bir müşteriyi isme göre ararken:
+      - hem sorguyu hem de order["isim"] değerini .lower() ile küçült ve karşılaştır.
     Örnek Python iskeleti (isimden sipariş bulmak için):
       import json
-      with open(\"./data/orders.json\", encoding=\"utf-8\") as f:
+      with open("./data/orders.json", encoding="utf-8") as f:
           data = json.load(f)
-      target_name = \"fatma çelik\"
-      for order in data[\"siparisler\"]:
-          if order[\"isim\"].lower() == target_name:
-              print(order[\"siparisler\"])
+      target_name = "fatma çelik"
+      for order in data["siparisler"]:
+          if order["isim"].lower() == target_name:
+              print(order["siparisler"])
               break
-  * reviews.json: kök dict; \"puanlar\" anahtarı altında müşteri değerlendirmeleri listesi vardır. Her kayıtta:
-      - \"musteri_no\" (int)
-      - \"isim\" (str)
-      - \"hiz\" (int)
-      - \"lezzet\" (int)
-      - \"sunum\" (int)
-      - \"hizmet\" (int)
-      - \"kalabalik\" (int)
-    DİKKAT: Bu JSON'da TARİH ALANI YOKTUR. Asla review[\"tarih\"] veya benzeri alanlara erişmeye çalışma.
-    \"3-9 Şubat aralığı\" gibi ifadeler sadece dönem açıklamasıdır; ortalama hesaplamak için TÜM kayıtlardaki ilgili puanları kullan.
+  * reviews.json: kök dict; "puanlar" anahtarı altında müşteri değerlendirmeleri listesi vardır. Her kayıtta:
+      - "musteri_no" (int)
+      - "isim" (str)
+      - "hiz" (int)
+      - "lezzet" (int)
+      - "sunum" (int)
+      - "hizmet" (int)
+      - "kalabalik" (int)
+    DİKKAT: Bu JSON'da TARİH ALANI YOKTUR. Asla review["tarih"] veya benzeri alanlara erişmeye çalışma.
+    "3-9 Şubat aralığı" gibi ifadeler sadece dönem açıklamasıdır; ortalama hesaplamak için TÜM kayıtlardaki ilgili puanları kullan.
     Örnek Python iskeleti (musteri_no ile bir puanı bulmak için):
       import json
-      with open(\"./data/reviews.json\", encoding=\"utf-8\") as f:
+      with open("./data/reviews.json", encoding="utf-8") as f:
           data = json.load(f)
       target_no = 9
-      for review in data[\"puanlar\"]:
-          if review[\"musteri_no\"] == target_no:
-              print(review[\"hiz\"])
+      for review in data["puanlar"]:
+          if review["musteri_no"] == target_no:
+              print(review["hiz"])
               break
-    Örnek Python iskeleti (tüm müşteriler için ortalama \"hiz\" puanını bulmak için):
+    Örnek Python iskeleti (tüm müşteriler için ortalama "hiz" puanını bulmak için):
       import json
-      with open(\"./data/reviews.json\", encoding=\"utf-8\") as f:
+      with open("./data/reviews.json", encoding="utf-8") as f:
           data = json.load(f)
       total = 0
       count = 0
-      for review in data[\"puanlar\"]:
-          total += review[\"hiz\"]
+      for review in data["puanlar"]:
+          total += review["hiz"]
           count += 1
       avg = total / count if count > 0 else 0
       print(avg)
-  * menu.json: kök dict; \"pizzalar\" listesinde her öğede en az \"ad\" (str) ve \"fiyat\" (int) alanları bulunur.
-  * expenses.json: kök dict; \"haftalik_toplam_gider\" anahtarı haftalık toplam gideri içerir.
-- Metin/kelime eşleştirmede büyük/küçük harfe duyarsız ol (örn. .lower() veya re.IGNORECASE).
+  * menu.json: kök dict; "pizzalar" listesinde her öğede en az "ad" (str) ve "fiyat" (int) alanları bulunur.
+  * expenses.json: kök dict; "haftalik_toplam_gider" anahtarı haftalık toplam gideri içerir.
+- Metin/kelime eşleştirmede büyük/küçük harfe duyarsız ol (örn. .lower() veya re.IGNORECASE)."""
 
-Soru: {query}"""
-
-        code_response = await self.client.ask(prompt, task_type="coding")
+    def __init__(
+        self,
+        client: LLMClient,
+        executor: CodeExecutor,
+        code_cache: CodeCache | None = None,
+        query_engine: QueryEngine | None = None,
+        token_budget: int = 1500,
+        token_counter: TokenCounter | None = None,
+    ):
+        """
+        code_cache verilirse başarıyla çalışmış kod saklanır; aynı/benzer soru tekrar geldiğinde
+        kod yeniden üretilmeden tekrar çalıştırılır.
+        query_engine verilirse basit toplulaştırma soruları kod üretmeden yapılandırılmış sorgu ile cevaplanır.
+        token_budget: Özet ve kod düzeltme prompt'larının (sabit SYSTEM_PROMPT hariç) en fazla token sayısı; uzun çalıştırma çıktısı, hata
+        ve hatalı kod bu bütçeye sığacak şekilde ortadan kısaltılır (token_counter ile sayılır).
+        """
+        self.client = client
+        self.executor = executor
+        self.code_cache = code_cache
+        self.query_engine = query_engine
+        self.token_budget = token_budget
+        self.token_counter = token_counter if token_counter is not None else TokenCounter()
 
-        # 2. Adım: Markdown içinden kodu çıkar ve çalıştır
-        execution_result = self.executor.execute(code_response)
+    def _fit_parts(self, fixed_prompt: str, *parts: str) -> list[str]:
+        """fixed_prompt: değişken parçalar boşken prompt. Bütçeden kalan kısım parçalar arasında eşit bölünür."""
+        available = max(self.token_budget - self.token_counter.count(fixed_prompt), 0)
+        share = available // max(len(parts), 1)
+        return [self.token_counter.fit(part, share) for part in parts]
 
+    async def _execute(self, code_response: str) -> str:
+        # Markdown içinden kodu çıkar ve çalıştır (çalışan süreç beklenirken event loop bloklanmaz)
+        execution_result = await asyncio.to_thread(self.executor.execute, code_response)
         # Eğer kod çıktı üretmediyse bunu da hata olarak değerlendir
         if execution_result.strip().startswith("Kod başarıyla çalıştı (Çıktı üretilmedi)"):
-            execution_result = "Kod Çalıştırma Hatası: Kod herhangi bir çıktı üretmedi, print() ile sonucu yazdırman gerekiyor."
+            return _NO_OUTPUT_ERROR
+        return execution_result
 
-        # 3. Adım: Hata varsa bir kez düzeltmeyi dene (yine smart model)
-        if "Kod Çalıştırma Hatası" in execution_result:
-            fix_prompt = f"""Kullanıcı sorusu: {query}
-Üretilen kod (hata veriyor): {code_response}
-Hata: {execution_result}
-Yukarıdaki JSON şemalarını dikkate alarak bu hatayı gideren, çalışan tam Python kodunu yaz. Yanıtında SADECE ```python ... ``` bloğu olsun."""
-            code_response = await self.client.ask(fix_prompt, task_type="coding")
-            execution_result = self.executor.execute(code_response)
+    async def _plan_query(self, query: str) -> dict | None:
+        """Analyst'in atlandığı (router) durumda sorgu tanımını hızlı modelden ister; ifade edilemiyorsa None."""
+        system = f"""Kullanıcının sorusu tek bir tablo üzerinde filtre/gruplama/toplulaştırma/sıralama ile cevaplanabiliyorsa
+SADECE sorgu tanımını JSON olarak yaz; cevaplanamıyorsa sadece null yaz.
 
-        # Eğer çıktı sade bir sayı ise, doğrudan onu döndür (özet için modele gitme)
-        numeric_output = execution_result.strip()
-        # Sona eklenmiş satır sonlarını veya boşlukları temizle
+{self.query_engine.spec_prompt()}"""
+        # Sorgu tanımı kısa bir JSON; cevap sınırı küçük tutulur (num_predict)
+        response = await self.client.ask(
+            f"Soru: {query}", task_type="general", max_tokens=256, system=system, agent="coder"
+        )
+        return parse_spec(response)
+
+    async def _run_query(self, query: str, query_spec: dict | None, plan: bool) -> str | None:
+        """Sorgu tanımını yerel motorda çalıştırır; tanım yoksa veya geçersizse None (kod üretimine dönülür)."""
+        if query_spec is None and plan:
+            query_spec = await self._plan_query(query)
+        if not query_spec:
+            return None
         try:
-            # Tam sayı olarak parse edebiliyorsak, direkt sayıyı string olarak döndür
-            int_value = int(numeric_output)
-            return str(int_value)
-        except ValueError:
-            pass
+            result = await asyncio.to_thread(self.query_engine.execute, query_spec)
+        except (QuerySpecError, TypeError, ValueError, AttributeError, KeyError):
+            # Motorun yakalamadığı bozuk bir LLM tanımı da grafı düşürmez; kod üretimine dönülür
+            return None
+        return result.text()
 
-        if "Kod Çalıştırma Hatası" in execution_result:
-            final_prompt = f"""Kullanıcı sorusu: {query}
+    async def solve(
+        self,
+        query: str,
+        on_token: Callable[[str], None] | None = None,
+        query_spec: dict | None = None,
+        plan_query: bool = True,
+        on_failure: Callable[[], None] | None = None,
+    ) -> str:
+        """
+        Kullanıcının sorusunu çözmek için Python kodu yazar, çalıştırır ve sonucu döndürür.
+        Kod yazımı her zaman 'smart' (ileri) model ile yapılır.
+        on_token verilirse son özet adımı token token akıtılır.
+        query_spec: Analyst'in ürettiği sorgu tanımı; query_engine varsa önce bu çalıştırılır.
+        plan_query: query_spec yoksa hızlı modelden tanım istensin mi (analyst zaten null döndürdüyse False).
+        on_failure: Kod düzeltmeden sonra da hata verdiyse çağrılır; dönen metin sonuç değil hatanın açıklamasıdır.
+        """
+        execution_result = None
+        # 1. Adım: Yapılandırılmış sorgu (mikrosaniyeler) veya önbellekte çalışmış kod varsa smart model hiç çağrılmaz
+        if self.query_engine is not None:
+            execution_result = await self._run_query(query, query_spec, plan_query)
+        cached = None
+        if execution_result is None and self.code_cache is not None:
+            cached = self.code_cache.lookup(query)
+        if cached is not None:
+            execution_result = await self._execute(cached.code)
+            if "Kod Çalıştırma Hatası" in execution_result:
+                # Veri şekli değişmiş olabilir; kayıt silinir ve kod yeniden üretilir
+                self.code_cache.discard(cached.query)
+                execution_result = None
+
+        if execution_result is None:
+            execution_result = await self._generate_and_run(query)
+
+        # Çıktı zaten nihai cevapsa (sayı, anahtar/değer, liste, küçük tablo) şablonla biçimlendirilir;
+        # özet için modele sadece yapısız metin çıktılarında gidilir
+        formatted = format_result(execution_result)
+        if formatted is not None:
+            return formatted
+
+        failed = "Kod Çalıştırma Hatası" in execution_result
+        if failed and on_failure is not None:
+            on_failure()
+        (result,) = self._fit_parts(self._summary_prompt(query, "", failed), execution_result)
+        final_prompt = self._summary_prompt(query, result, failed)
+        if on_token is not None:
+            return await self.client.ask_streaming(final_prompt, task_type="general", on_token=on_token, agent="coder")
+        return await self.client.ask(final_prompt, task_type="general", priority="interactive", agent="coder")
+
+    @staticmethod
+    def _summary_prompt(query: str, execution_result: str, failed: bool) -> str:
+        if failed:
+            return f"""Kullanıcı sorusu: {query}
 Kod çalıştırma çıktısı (hata): {execution_result}
 
 Yalnızca hatayı 1-2 cümleyle, sade Türkçe olarak açıkla. Tahmini sonuç veya sayı üretme; sadece hatayı özetle."""
-        else:
-            final_prompt = f"""Kullanıcı sorusu: {query}
+        return f"""Kullanıcı sorusu: {query}
 Kod çalıştırma çıktısı: {execution_result}
 
 Bu çıktıyı kullanarak kısa, Türkçe bir özet ver. Çıktıda sayı varsa ona göre cevap ver; uydurma yapma."""
 
-        return await self.client.ask(final_prompt, task_type="general")
\ No newline at end of file
+    @staticmethod
+    def _fix_prompt(query: str, code_response: str, execution_result: str) -> str:
+        return f"""Kullanıcı sorusu: {query}
+Üretilen kod (hata veriyor): {code_response}
+Hata: {execution_result}
+Talimatlardaki JSON şemalarını dikkate alarak bu hatayı gideren, çalışan tam Python kodunu yaz. Yanıtında SADECE ```python ... ``` bloğu olsun."""
+
+    async def _generate_and_run(self, query: str) -> str:
+        """Smart modelle kod üretir, çalıştırır, gerekirse bir kez düzeltir; başarılı kodu önbelleğe yazar."""
+        # Yanıt önbelleği atlanır: üretilen kod çalışmazsa tekrar eden soruda aynı hatalı kod dönerdi.
+        # Çalıştığı doğrulanan kod CodeCache'e yazılır ve oradan tekrar kullanılır.
+        code_response = await self.client.ask(
+            f"Soru: {query}", task_type="coding", use_cache=False, system=self.SYSTEM_PROMPT, agent="coder"
+        )
+
+        # 2. Adım: Kodu çalıştır
+        execution_result = await self._execute(code_response)
+
+        # 3. Adım: Hata varsa bir kez düzeltmeyi dene (yine smart model)
+        if "Kod Çalıştırma Hatası" in execution_result:
+            code, error = self._fit_parts(self._fix_prompt(query, "", ""), code_response, execution_result)
+            fix_prompt = self._fix_prompt(query, code, error)
+            # Düzeltme denemesi önbellekten gelmemeli; aynı hatalı kod tekrar dönmesin
+            code_response = await self.client.ask(
+                fix_prompt, task_type="coding", use_cache=False, system=self.SYSTEM_PROMPT, agent="coder"
+            )
+            execution_result = await self._execute(code_response)
+
+        if self.code_cache is not None and "Kod Çalıştırma Hatası" not in execution_result:
+            self.code_cache.store(query, code_response)
+        return execution_result
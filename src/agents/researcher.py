@@ -1,63 +1,136 @@
+import asyncio
 import os
-import glob
+from typing import Callable
 from src.llm_client import LLMClient
 from src.tools.search_tool import SearchTool
 from src.utils.vector_store import VectorStoreManager
+from src.utils.context_builder import ContextBuilder
+from src.utils.token_counter import TokenCounter
 
 # Proje kökündeki data/ klasörü (main.py ile aynı seviye)
 _PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 DATA_DIR = os.path.join(_PROJECT_ROOT, "data")
 
 class ResearcherAgent:
-    def __init__(self, client: LLMClient, search_tool: SearchTool, vector_store: VectorStoreManager):
+    # Sabit kurallar sistem prompt'unda; soru ve bağlam kullanıcı mesajında gider (ön ek çağrılar arasında aynı kalır)
+    SYSTEM_PROMPT = """Kullanıcının sorusunu verilen [YEREL DÖKÜMANLAR] ve [İNTERNET] bölümlerine göre cevapla.
+
+Kurallar:
+- ÖNCE [YEREL DÖKÜMANLAR] bölümünde cevabı ara. Özellikle welcome.txt, menu.json, orders.json, reviews.json dosyalarına bak.
+- Eğer yerel dosyalarda net bir cevap varsa, onu doğrudan kullan. İnternet sonuçlarını görmezden gel.
+- Yerel dosyalarda bilgi yoksa veya belirsizse, internet sonuçlarını kullan.
+- Türkçe, net ve kısa bir yanıt ver. Yerel dosyadan bulduğun bilgiyi kelimesi kelimesine kullan; uydurma yapma."""
+
+    def __init__(
+        self,
+        client: LLMClient,
+        search_tool: SearchTool,
+        vector_store: VectorStoreManager,
+        context_builder: ContextBuilder | None = None,
+        rag_timeout: float = 10.0,
+        web_timeout: float = 15.0,
+        web_hedge_delay: float = 0.3,
+        local_confidence: float = 0.8,
+        rag_mode: str = "hybrid",
+        token_budget: int = 1400,
+        token_counter: TokenCounter | None = None,
+    ):
+        """
+        Args:
+            rag_timeout / web_timeout: Vektör araması ve internet araması için ayrı süre sınırları (saniye).
+            web_hedge_delay: İnternet araması, RAG bu süre içinde bitmezse paralel başlatılır.
+            local_confidence: En iyi RAG skoru bunun üzerindeyse internet araması hiç yapılmaz.
+            rag_mode: "hybrid" (BM25 + vektör, RRF), "vector" veya "lexical" (embedding çağrısı yapmaz).
+            token_budget: Cevap prompt'unun (sistem talimatı dahil) en fazla token sayısı; şablondan kalan kısım internet sonuçları
+                (en fazla üçte biri) ve yerel bağlam arasında paylaştırılır.
+            token_counter: Bütçe hesabında kullanılan sayaç (LLMClient ile aynısı verilmeli).
+        """
         self.client = client
         self.search_tool = search_tool
         self.vector_store = vector_store
+        self.token_budget = token_budget
+        self.token_counter = token_counter if token_counter is not None else TokenCounter()
+        # data/ dosyalarının tamamı yerine token bütçesine sığan, sorguyla ilgili bağlam
+        self.context_builder = context_builder or ContextBuilder(DATA_DIR, count_tokens=self.token_counter.count)
+        self.rag_timeout = rag_timeout
+        self.web_timeout = web_timeout
+        self.web_hedge_delay = web_hedge_delay
+        self.local_confidence = local_confidence
+        self.rag_mode = rag_mode
+
+    async def _rag_search(self, query: str) -> list:
+        """Bloklayan yerel aramayı (hybrid/vector modda Ollama embedding çağrısı dahil) thread'de, süre sınırıyla çalıştırır."""
+        try:
+            return await asyncio.wait_for(
+                asyncio.to_thread(self.vector_store.search_hybrid, query, 5, mode=self.rag_mode), self.rag_timeout
+            )
+        except Exception:
+            return []
+
+    async def _web_search(self, query: str) -> str:
+        """Asenkron internet aramasını süre sınırıyla çalıştırır (sağlayıcılar paylaşılan bağlantı havuzunu kullanır)."""
+        try:
+            return await asyncio.wait_for(self.search_tool.asearch(query), self.web_timeout)
+        except asyncio.TimeoutError:
+            return f"İnternet araması {self.web_timeout:.0f} saniye içinde tamamlanamadı."
+        except Exception as e:
+            return f"İnternet araması başarısız: {e}"
+
+    async def _gather_context(self, query: str) -> tuple[list, str]:
+        """
+        RAG ve internet aramasını event loop'u bloklamadan eşzamanlı toplar; gecikme toplam değil en uzun kaynak olur.
+        RAG web_hedge_delay içinde güvenli bir sonuçla dönerse internet araması hiç başlatılmaz.
+        """
+        rag_task = asyncio.create_task(self._rag_search(query))
+        done, _ = await asyncio.wait({rag_task}, timeout=self.web_hedge_delay)
+        if done and self._is_confident(rag_task.result()):
+            return rag_task.result(), "Yerel dökümanlarda yeterli bilgi bulunduğu için internet araması yapılmadı."
+
+        web_task = asyncio.create_task(self._web_search(query))
+        scored = await rag_task
+        if self._is_confident(scored) and not web_task.done():
+            # RAG güvenli çıktıysa internet sonucunu beklemeden devam et
+            web_task.cancel()
+            return scored, "Yerel dökümanlarda yeterli bilgi bulunduğu için internet araması yapılmadı."
+        return scored, await web_task
 
-    def _read_data_folder(self) -> str:
-        """data/ klasöründeki tüm .txt, .md ve .json dosyalarını doğrudan okur."""
-        if not os.path.exists(DATA_DIR):
-            return ""
-        parts = []
-        for ext in ["*.txt", "*.md", "*.json"]:
-            for path in sorted(glob.glob(os.path.join(DATA_DIR, ext))):
-                try:
-                    with open(path, "r", encoding="utf-8") as f:
-                        content = f.read().strip()
-                    if content:
-                        parts.append(f"--- Dosya: {os.path.basename(path)} ---\n{content}")
-                except Exception:
-                    pass
-        return "\n\n".join(parts) if parts else ""
-
-    async def research(self, query: str) -> str:
-        """Yerel data/ dosyaları + RAG + internet araması ile yanıt üretir. LangGraph researcher node bu metodu çağırır."""
-        direct_data = self._read_data_folder()
-        rag_docs = self.vector_store.search(query, k=5)
-        rag_context = "\n".join([d.page_content for d in rag_docs]) if rag_docs else ""
-
-        if direct_data:
-            local_context = f"""[DATA KLASÖRÜNDEKİ DOSYALAR]
-{direct_data}
-
-[RAG SONUÇLARI]
-{rag_context or "Ek eşleşme yok."}"""
-        else:
-            local_context = rag_context or "Yerel dökümanlarda ilgili bilgi bulunamadı."
-
-        search_results = self.search_tool.search(query)
-
-        prompt = f"""Kullanıcı sorusu: {query}
+    def _is_confident(self, scored: list) -> bool:
+        return bool(scored) and max(score for _, score in scored) >= self.local_confidence
+
+    async def research(self, query: str, on_token: Callable[[str], None] | None = None) -> str:
+        """
+        Yerel data/ dosyaları + RAG + internet araması ile yanıt üretir. LangGraph researcher node bu metodu çağırır.
+        on_token verilirse cevap token token akıtılır (CLI'de canlı gösterim için).
+        """
+        scored, search_results = await self._gather_context(query)
+        rag_docs = [doc for doc, _ in scored]
+
+        # Prompt bütçesi: sistem talimatı + şablon + soru sabit; internet sonuçları kalanın en fazla üçte birini alır,
+        # gerisi yerel bağlamın
+        fixed = self.token_counter.count(self.SYSTEM_PROMPT) + self.token_counter.count(self._build_prompt(query, "", ""))
+        available = max(self.token_budget - fixed, 0)
+        search_results = self.token_counter.fit(search_results, available // 3)
+        local_budget = available - self.token_counter.count(search_results)
+        local_context = (
+            self.context_builder.build(query, rag_docs, token_budget=local_budget)
+            or "Yerel dökümanlarda ilgili bilgi bulunamadı."
+        )
+
+        prompt = self._build_prompt(query, local_context, search_results)
+        if on_token is not None:
+            return await self.client.ask_streaming(
+                prompt, task_type="general", on_token=on_token, system=self.SYSTEM_PROMPT, agent="researcher"
+            )
+        return await self.client.ask(
+            prompt, task_type="general", priority="interactive", system=self.SYSTEM_PROMPT, agent="researcher"
+        )
+
+    @staticmethod
+    def _build_prompt(query: str, local_context: str, search_results: str) -> str:
+        return f"""Kullanıcı sorusu: {query}
 
 [YEREL DÖKÜMANLAR - ÖNCELİKLİ - MUTLAKA BURAYA BAK]
 {local_context}
 
 [İNTERNET]
-{search_results}
-
-Kurallar:
-- ÖNCE yukarıdaki [YEREL DÖKÜMANLAR] bölümünde cevabı ara. Özellikle welcome.txt, menu.json, orders.json, reviews.json dosyalarına bak.
-- Eğer yerel dosyalarda net bir cevap varsa, onu doğrudan kullan. İnternet sonuçlarını görmezden gel.
-- Yerel dosyalarda bilgi yoksa veya belirsizse, internet sonuçlarını kullan.
-- Türkçe, net ve kısa bir yanıt ver. Yerel dosyadan bulduğun bilgiyi kelimesi kelimesine kullan; uydurma yapma."""
-        return await self.client.ask(prompt, task_type="general")
\ No newline at end of file
+{search_results}"""
@@ -0,0 +1,199 @@
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+
+from src.utils.text import normalize_tr, tokenize
+
+ROUTES = ("researcher", "coder", "general")
+
+# Route → analyst'in task_type değeri (route_after_analyst bu değerleri tanır)
+_ROUTE_TASK_TYPE = {"researcher": "rag", "coder": "coding", "general": "general"}
+
+DEFAULT_LABELLED_QUERIES = os.path.join(os.path.dirname(__file__), "routing_queries.json")
+
+# (route, ağırlık, desen) — desenler normalize_tr() uygulanmış metinde aranır
+_DEFAULT_RULES = [
+    ("coder", 0.9, r"\b(ortalama\w*|toplam\w*|kac|kac tane|sayisi|hesapla\w*|yuzde\w*)\b"),
+    ("coder", 0.9, r"\ben (cok|az|yuksek|dusuk|pahali|ucuz)\b"),
+    ("coder", 0.7, r"\b(puan\w*|adet\w*)\b.*\b(kim|hangi\w*|ne)\b"),
+    ("researcher", 0.6, r"\b(nedir|nelerdir|ne zaman|hakkinda|aciklama\w*|malzeme\w*|kural\w*|nasil yapilir)\b"),
+    ("researcher", 0.7, r"\b(menude hangi|icinde ne|var mi)\b"),
+    ("general", 0.95, r"^(merhaba|selam|gunaydin|iyi (gunler|aksamlar|geceler)|tesekkur\w*|hosca kal|naber|kolay gelsin)\b"),
+    ("general", 0.9, r"\b(sen kimsin|adin ne|kendini tanit|neler yapabilirsin)\b"),
+]
+
+
+def load_labelled_queries(path: str = DEFAULT_LABELLED_QUERIES) -> list[tuple[str, str]]:
+    """Etiketli sorgu setini [(sorgu, route), ...] olarak yükler."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return [(item["query"], item["route"]) for item in data["sorgular"]]
+
+
+def _features(query: str) -> list[str]:
+    """Kelime, kelime kökü (ilk 5 harf; Türkçe ekler için) ve ikili kelime öznitelikleri."""
+    tokens = tokenize(query)
+    feats = list(tokens)
+    feats += [f"p:{t[:5]}" for t in tokens if len(t) > 5]
+    feats += [f"b:{a}_{b}" for a, b in zip(tokens, tokens[1:])]
+    return feats
+
+
+class QueryRouter:
+    """
+    LLM analyst'ten önce çalışan yerel ön sınıflandırıcı.
+    Anahtar kelime/regex kuralları + küçük bir Naive Bayes sınıflandırıcının birleşik güveni
+    eşiği geçerse sorgu doğrudan researcher/coder/general'a yönlendirilir; aksi halde None döner
+    ve LangGraph analyst LLM çağrısına düşer.
+    """
+
+    def __init__(self, threshold: float = 0.85, rules: list[tuple[str, float, str]] | None = None, alpha: float = 1.0):
+        self.threshold = threshold
+        self.alpha = alpha
+        self.rules = [(route, weight, re.compile(pattern)) for route, weight, pattern in (rules or _DEFAULT_RULES)]
+        self.class_counts: Counter = Counter()
+        self.feature_counts: dict[str, Counter] = defaultdict(Counter)
+
+    # --- eğitim / kalıcılık ---
+
+    def train(self, examples: list[tuple[str, str]]) -> "QueryRouter":
+        """[(sorgu, route), ...] örnekleriyle sınıflandırıcıyı (yeniden) eğitir."""
+        self.class_counts = Counter()
+        self.feature_counts = defaultdict(Counter)
+        for query, route in examples:
+            if route not in ROUTES:
+                raise ValueError(f"Bilinmeyen route: {route}. Geçerli değerler: {', '.join(ROUTES)}")
+            self.class_counts[route] += 1
+            self.feature_counts[route].update(_features(query))
+        self._prepare()
+        return self
+
+    def _prepare(self) -> None:
+        vocab = set()
+        for counts in self.feature_counts.values():
+            vocab.update(counts)
+        self._vocab_size = max(len(vocab), 1)
+        self._class_totals = {route: sum(self.feature_counts[route].values()) for route in ROUTES}
+        total = sum(self.class_counts.values()) or 1
+        self._log_prior = {
+            route: math.log((self.class_counts[route] + self.alpha) / (total + self.alpha * len(ROUTES)))
+            for route in ROUTES
+        }
+
+    def save(self, path: str) -> None:
+        """Eğitilmiş modeli JSON olarak kaydeder."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "alpha": self.alpha,
+                    "class_counts": dict(self.class_counts),
+                    "feature_counts": {route: dict(c) for route, c in self.feature_counts.items()},
+                },
+                f,
+                ensure_ascii=False,
+            )
+
+    @classmethod
+    def load(cls, path: str, threshold: float = 0.85) -> "QueryRouter":
+        """save() ile kaydedilmiş modeli diskten yükler."""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        router = cls(threshold=threshold, alpha=data.get("alpha", 1.0))
+        router.class_counts = Counter(data["class_counts"])
+        router.feature_counts = defaultdict(Counter, {r: Counter(c) for r, c in data["feature_counts"].items()})
+        router._prepare()
+        return router
+
+    @classmethod
+    def default(cls, threshold: float = 0.85, model_path: str | None = None) -> "QueryRouter":
+        """model_path varsa oradan yükler; yoksa paketle gelen etiketli setle eğitir."""
+        if model_path and os.path.exists(model_path):
+            return cls.load(model_path, threshold=threshold)
+        return cls(threshold=threshold).train(load_labelled_queries())
+
+    # --- tahmin ---
+
+    def _classifier_probs(self, query: str) -> dict[str, float]:
+        if not self.class_counts:
+            return {route: 1.0 / len(ROUTES) for route in ROUTES}
+        feats = _features(query)
+        scores = {}
+        for route in ROUTES:
+            denom = self._class_totals[route] + self.alpha * self._vocab_size
+            counts = self.feature_counts[route]
+            scores[route] = self._log_prior[route] + sum(
+                math.log((counts.get(f, 0) + self.alpha) / denom) for f in feats
+            )
+        top = max(scores.values())
+        exp = {route: math.exp(s - top) for route, s in scores.items()}
+        norm = sum(exp.values())
+        return {route: v / norm for route, v in exp.items()}
+
+    def _rule_scores(self, query: str) -> dict[str, float]:
+        text = normalize_tr(query)
+        scores = {route: 0.0 for route in ROUTES}
+        for route, weight, pattern in self.rules:
+            if pattern.search(text):
+                scores[route] = max(scores[route], weight)
+        return scores
+
+    def predict(self, query: str) -> tuple[str, float]:
+        """
+        (route, güven) döndürür.
+        - Kural yoksa: sınıflandırıcı olasılığı.
+        - Tek route'un kuralı tetiklendi ve sınıflandırıcı da aynı route'u seçtiyse: ikisinin büyüğü.
+        - Aksi halde (çelişki): kural ve sınıflandırıcı skorlarının ortalaması; güven düşer, LLM'e düşülür.
+        """
+        probs = self._classifier_probs(query)
+        rules = self._rule_scores(query)
+        fired = [route for route in ROUTES if rules[route] > 0]
+        if not fired:
+            route = max(probs, key=probs.get)
+            return route, probs[route]
+        combined = {route: (rules[route] + probs[route]) / 2 for route in ROUTES}
+        route = max(combined, key=combined.get)
+        if fired == [route] and max(probs, key=probs.get) == route:
+            return route, max(rules[route], probs[route])
+        return route, combined[route]
+
+    def route(self, query: str) -> dict | None:
+        """
+        Güven eşiği geçilirse analyst ile aynı biçimde karar dict'i döndürür, aksi halde None.
+        Dönen dict'te ayrıca "source": "router" ve "confidence" alanları bulunur.
+        """
+        if not query or not query.strip():
+            return None
+        route, confidence = self.predict(query)
+        if confidence < self.threshold:
+            return None
+        return {
+            "task_type": _ROUTE_TASK_TYPE[route],
+            "reason": f"Yerel ön sınıflandırıcı ({route}, güven {confidence:.2f})",
+            "plan": [],
+            "source": "router",
+            "confidence": round(confidence, 3),
+        }
+
+    def evaluate(self, examples: list[tuple[str, str]]) -> dict:
+        """
+        Etiketli set üzerinde ölçüm:
+        accuracy: tüm sorgularda en olası route'un doğruluğu,
+        coverage: eşiği geçip LLM analyst'i atlayan sorgu oranı,
+        fast_path_accuracy: eşiği geçen sorgulardaki doğruluk.
+        """
+        correct = covered = covered_correct = 0
+        for query, expected in examples:
+            route, confidence = self.predict(query)
+            correct += route == expected
+            if confidence >= self.threshold:
+                covered += 1
+                covered_correct += route == expected
+        n = len(examples) or 1
+        return {
+            "n": len(examples),
+            "accuracy": correct / n,
+            "coverage": covered / n,
+            "fast_path_accuracy": (covered_correct / covered) if covered else 0.0,
+        }
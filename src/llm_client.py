@@ -1,10 +1,87 @@
+import json
+import time
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable
+
 import httpx
 from langfuse import get_client
 
+from src.model_scheduler import ModelScheduler
+from src.utils.llm_cache import MemoryResponseCache, ResponseCache, make_cache_key
+from src.utils.token_counter import TokenCounter
+
+
+MODEL_ERROR_PREFIX = "Model hatası"
+NO_ANSWER_TEXT = "Cevap alınamadı."
+
+
+def is_error_response(text: str) -> bool:
+    """ask/ask_stream'in hata yerine döndürdüğü metin mi (akış yarıda kesildiyse hata sona eklenir)."""
+    return f"{MODEL_ERROR_PREFIX} (" in text or text.strip() == NO_ANSWER_TEXT
+
+
+def _http2_available() -> bool:
+    """httpx'in HTTP/2 desteği için `h2` paketinin kurulu olup olmadığını kontrol eder."""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
 
 class LLMClient:
-    def __init__(self):
-        self.base_url = "http://localhost:11434/api/generate"
+    # Görev türü gereği büyük model isteyen işler; yük altında küçük modele düşürülmez
+    SMART_TASK_TYPES = ("coding", "calculation", "complex_reasoning")
+    # num_ctx her çağrıda bu basamaklardan ihtiyaca yetenin en küçüğüne yuvarlanır (küçük bağlam → küçük KV cache).
+    # Ollama num_ctx değişince modeli yeniden yükler; bu yüzden model başına kullanılan basamak sadece büyür.
+    CONTEXT_BUCKETS = (2048, 4096, 8192, 16384, 32768, 65536, 131072)
+
+    def __init__(
+        self,
+        host: str = "http://localhost:11434",
+        max_connections: int = 10,
+        max_keepalive_connections: int = 5,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        connect_timeout: float = 5.0,
+        timeouts: dict | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        cache: ResponseCache | None = None,
+        enable_cache: bool = True,
+        model_concurrency: dict | None = None,
+        downgrade_after: float | None = 2.0,
+        token_counter: TokenCounter | None = None,
+        smart_prompt_tokens: int = 500,
+        context_limits: dict | None = None,
+        output_tokens: dict | None = None,
+        keep_alive: str | int | None = "30m",
+    ):
+        """
+        Args:
+            host: Ollama sunucusunun adresi.
+            max_connections / max_keepalive_connections / keepalive_expiry: Bağlantı havuzu limitleri.
+            http2: Sunucu ve `h2` paketi destekliyorsa HTTP/2 kullanılır.
+            connect_timeout: Bağlantı kurma zaman aşımı (saniye).
+            timeouts: Model anahtarı ("fast"/"smart") → okuma zaman aşımı (saniye).
+            transport: Testler için özel httpx transport'u.
+            cache: Yanıt önbelleği (varsayılan: bellek içi LRU). enable_cache=False ile tamamen kapatılır.
+            model_concurrency: Model anahtarı ("fast"/"smart") → Ollama'ya aynı anda gidebilecek istek sayısı.
+                Fazlası öncelikli kuyrukta bekler (interactive > normal > background); 0/None → sınırsız.
+            downgrade_after: Büyük modelde beklenen bekleme bu süreyi (saniye) aşarsa, sadece prompt uzunluğu
+                yüzünden büyük modele giden görevler küçük modele düşürülür; None → düşürme kapalı.
+            token_counter: Prompt token sayacı (varsayılan: karakter tabanlı tahmin).
+            smart_prompt_tokens: Bundan uzun prompt'lar büyük modele gider.
+            context_limits: Model anahtarı → en büyük num_ctx; prompt + cevap sığmazsa prompt ortadan kısaltılır.
+            output_tokens: task_type → varsayılan num_predict (cevap token sınırı); çağrıda max_tokens ile ezilir.
+            keep_alive: Her istekle gönderilen Ollama keep_alive değeri ("30m", saniye veya -1 = hep yüklü);
+                Ollama varsayılanı (5 dk) sorgular arasında modeli boşaltıp KV önbelleğini sıfırlar. None → gönderilmez.
+        """
+        self.host = host.rstrip("/")
+        self.base_url = f"{self.host}/api/generate"
+        # system verilen çağrılar chat uç noktasına gider: sabit sistem mesajı prompt'un başında kalır ve
+        # Ollama önceki isteklerden KV önbelleğinde duran bu ön eki yeniden değerlendirmez
+        self.chat_url = f"{self.host}/api/chat"
+        self.keep_alive = keep_alive
 
         # En az iki farklı yerel model konfigürasyonu kullanımı
         self.models = {
@@ -12,37 +89,354 @@ class LLMClient:
             "smart": "llama3.1:8b",  # Karmaşık ve ayrıntılı cevap gerektiren görevler için büyük model
         }
 
+        # Model başına zaman aşımı: büyük model daha uzun sürebilir
+        self.timeouts = {"fast": 60.0, "smart": 180.0}
+        if timeouts:
+            self.timeouts.update(timeouts)
+        self.connect_timeout = connect_timeout
+
+        # Model başına eşzamanlı istek sınırı: Ollama'nın paralel kapasitesini (OLLAMA_NUM_PARALLEL) aşmamak için
+        self.model_concurrency = {"fast": 4, "smart": 2}
+        if model_concurrency:
+            self.model_concurrency.update(model_concurrency)
+        self.scheduler = ModelScheduler(
+            {self.models[key]: limit for key, limit in self.model_concurrency.items() if key in self.models},
+            downgrade_after=downgrade_after,
+        )
+
+        # Token tabanlı model seçimi ve bağlam boyutu (Türkçe metin İngilizceden daha çok token'a bölünür)
+        self.token_counter = token_counter if token_counter is not None else TokenCounter()
+        self.smart_prompt_tokens = smart_prompt_tokens
+        self.context_limits = {"fast": 8192, "smart": 8192}
+        if context_limits:
+            self.context_limits.update(context_limits)
+        self.output_tokens = {"general": 512, "coding": 1024, "calculation": 1024, "complex_reasoning": 1024}
+        if output_tokens:
+            self.output_tokens.update(output_tokens)
+        self._context_in_use: dict[str, int] = {}
+        # Ajan (veya task_type) başına Ollama prompt değerlendirme ölçümleri (bkz. prompt_stats)
+        self._prompt_eval: dict[str, dict] = {}
+
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2 and _http2_available()
+        self._transport = transport
+        self._http: httpx.AsyncClient | None = None
+
+        # Aynı model + prompt + seçenekler için Ollama'ya tekrar gitmemek üzere yanıt önbelleği
+        self.cache: ResponseCache | None = (
+            (cache if cache is not None else MemoryResponseCache()) if enable_cache else None
+        )
+
         # Langfuse client (env: LANGFUSE_PUBLIC_KEY, LANGFUSE_SECRET_KEY, LANGFUSE_BASE_URL)
         # Yoksa SDK no-op çalışır, uygulama bozulmaz.
         self.langfuse = get_client()
 
-    def _select_model(self, task_type: str, prompt: str) -> str:
+    async def start(self) -> None:
+        """Uzun ömürlü bağlantı havuzunu açar. main.py başlangıçta çağırır."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                limits=self.limits,
+                http2=self.http2,
+                timeout=httpx.Timeout(120.0, connect=self.connect_timeout),
+                transport=self._transport,
+            )
+
+    async def aclose(self) -> None:
+        """Bağlantı havuzunu kapatır. main.py çıkışta çağırır."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def __aenter__(self) -> "LLMClient":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def _get_http(self) -> httpx.AsyncClient:
+        # start() çağrılmadıysa havuz ilk istekte açılır
+        if self._http is None or self._http.is_closed:
+            await self.start()
+        return self._http
+
+    async def warmup(self, prefixes: list[tuple[str, str]] | None = None) -> dict[str, float]:
+        """
+        Modelleri keep_alive ile belleğe yükler; ilk kullanıcı sorgusu model yüklemesini beklemez (main.py başlangıçta
+        çağırır). prefixes: ajanların (task_type, sabit sistem prompt'u) çiftleri; her biri ask() ile aynı model seçimiyle
+        boş kullanıcı mesajı eşliğinde bir kez değerlendirilir ve sonraki çağrılar bu ön eki Ollama'nın KV önbelleğinden
+        kullanır. num_ctx en uzun ön ek + smart_prompt_tokens + en büyük cevap sınırına göre baştan ayrılır; sonraki
+        çağrılar bağlamı büyütüp modeli yeniden yükletmesin. Dönüş: model → ısıtma süresi (sn); hata veren model atlanır.
+        """
+        by_model = {model: [] for model in self.models.values()}
+        for task_type, system in prefixes or ():
+            by_model[self._select_model(task_type, system)].append(system)
+        client = await self._get_http()
+        durations = {}
+        for model, systems in by_model.items():
+            key = self._model_key(model)
+            needed = (
+                max((self.token_counter.count(system) for system in systems), default=0)
+                + self.smart_prompt_tokens
+                + max(self.output_tokens.values())
+            )
+            num_ctx = next((size for size in self.CONTEXT_BUCKETS if size >= needed), self.CONTEXT_BUCKETS[-1])
+            num_ctx = min(num_ctx, self.context_limits.get(key, self.CONTEXT_BUCKETS[-1]))
+            num_ctx = self._context_in_use[model] = max(num_ctx, self._context_in_use.get(model, 0))
+
+            # Boş prompt → Ollama sadece modeli yükler; sistem prompt'u varsa chat isteği yüklemeyi de yapar
+            payloads = [{"model": model, "prompt": "", "stream": False, "options": {"num_ctx": num_ctx}}]
+            if self.keep_alive is not None:
+                payloads[0]["keep_alive"] = self.keep_alive
+            if systems:
+                payloads = [
+                    self._build_payload(model, "", stream=False, prompt_tokens=0, num_predict=1, system=system)
+                    for system in systems
+                ]
+                for payload in payloads:
+                    payload["options"]["num_ctx"] = num_ctx
+
+            started = time.perf_counter()
+            try:
+                for payload in payloads:
+                    async with self._model_slot(model, "background"):
+                        response = await client.post(
+                            self._url_for(payload), json=payload, timeout=self._timeout_for(model)
+                        )
+                    response.raise_for_status()
+            except httpx.HTTPError:
+                continue
+            durations[model] = time.perf_counter() - started
+        return durations
+
+    def _model_key(self, model: str) -> str | None:
+        return next((k for k, name in self.models.items() if name == model), None)
+
+    def _timeout_for(self, model: str) -> httpx.Timeout:
+        """Seçilen modele ait okuma zaman aşımını döndürür."""
+        key = self._model_key(model)
+        read_timeout = self.timeouts.get(key, 120.0)
+        return httpx.Timeout(read_timeout, connect=self.connect_timeout)
+
+    def _model_slot(self, model: str, priority: str = "normal"):
+        """Model başına eşzamanlılık sınırı ve öncelikli kuyruk (bkz. ModelScheduler)."""
+        return self.scheduler.slot(model, priority)
+
+    def model_stats(self) -> dict:
+        """Model başına sınır, çalışan/bekleyen istek, bekleme süresi, gecikme ve düşürme sayıları (/metrics için)."""
+        return {name: self.scheduler.stats(name) for name in self.models.values()}
+
+    def _select_model(self, task_type: str, prompt: str, prompt_tokens: int | None = None) -> str:
         """
         Ajanların görevini ve metin uzunluğunu dikkate alan model seçim fonksiyonu
         """
-        # Görevin türüne göre seçim 
-        if task_type in ["coding", "calculation", "complex_reasoning"]:
+        # Görevin türüne göre seçim
+        if task_type in self.SMART_TASK_TYPES:
             return self.models["smart"]
-        
-        # metnin uzunluğuna göre seçim
-        if len(prompt) > 1500:
+
+        # metnin token sayısına göre seçim
+        if prompt_tokens is None:
+            prompt_tokens = self.token_counter.count(prompt)
+        if prompt_tokens > self.smart_prompt_tokens:
             return self.models["smart"]
-        
-        
+
+
         return self.models["fast"]
 
-    async def ask(self, prompt: str, task_type: str = "general") -> str:
+    def _prepare(
+        self,
+        prompt: str,
+        task_type: str,
+        stream: bool,
+        use_cache: bool,
+        max_tokens: int | None = None,
+        system: str | None = None,
+    ):
+        """
+        Model seçimi + bağlam boyutu + önbellek kontrolü. Önce görevin tercih ettiği modelin önbelleğine bakılır;
+        yoksa model zamanlayıcının yüküne göre (gerekirse küçük modele düşürülerek) belirlenir ve düşürülen
+        modelin önbelleğine de bakılır.
+        Model seçimi ve num_ctx sistem + kullanıcı prompt'unun toplam token sayısına göre yapılır.
+        Dönüş: (model, payload, önbellek_anahtarı, önbellekteki_yanıt, izleme_metadatası)
+        """
+        prompt_tokens = self.token_counter.count(prompt)
+        system_tokens = self.token_counter.count(system) if system else 0
+        num_predict = max_tokens or self.output_tokens.get(task_type, self.output_tokens["general"])
+        meta = {
+            "prompt_tokens": prompt_tokens,
+            "system_tokens": system_tokens,
+            "num_predict": num_predict,
+            "downgraded_from": None,
+        }
+        preferred = self._select_model(task_type, prompt, prompt_tokens + system_tokens)
+        payload = self._build_payload(
+            preferred, prompt, stream=stream, prompt_tokens=prompt_tokens, num_predict=num_predict, system=system
+        )
+        cache_key, cached = self._cache_get(payload, use_cache)
+        model = preferred
+        if cached is None:
+            model = self.scheduler.choose(
+                preferred, self.models["fast"], eligible=task_type not in self.SMART_TASK_TYPES
+            )
+        if model != preferred:
+            meta["downgraded_from"] = preferred
+            payload = self._build_payload(
+                model, prompt, stream=stream, prompt_tokens=prompt_tokens, num_predict=num_predict, system=system
+            )
+            # Düşürülmüş istek küçük modelin önbelleğinden de karşılanabilir (tekrarlanan düşürmeler Ollama'ya gitmez)
+            cache_key, cached = self._cache_get(payload, use_cache)
+        if cached is None:
+            options = payload["options"]
+            options["num_ctx"] = self._context_in_use[model] = max(options["num_ctx"], self._context_in_use.get(model, 0))
+        meta["num_ctx"] = payload["options"]["num_ctx"]
+        meta["truncated"] = self._user_text(payload) is not prompt
+        return model, payload, cache_key, cached, meta
+
+    def _build_payload(
+        self,
+        model: str,
+        prompt: str,
+        stream: bool,
+        prompt_tokens: int | None = None,
+        num_predict: int | None = None,
+        system: str | None = None,
+    ) -> dict:
+        """
+        num_ctx: prompt + cevap için yeten en küçük basamak (modelin sınırını aşmadan); prompt sınıra sığmıyorsa
+        Ollama'nın baştan sessizce kesmesi yerine ortadan kısaltılır (talimatlar ve soru korunur).
+        system verilirse /api/chat gövdesi üretilir; sistem mesajı hiç kısaltılmaz (ön ek sabit kalsın).
+        """
+        if prompt_tokens is None:
+            prompt_tokens = self.token_counter.count(prompt)
+        system_tokens = self.token_counter.count(system) if system else 0
+        num_predict = num_predict or self.output_tokens["general"]
+        limit = self.context_limits.get(self._model_key(model), self.CONTEXT_BUCKETS[-1])
+        if system_tokens + prompt_tokens + num_predict > limit:
+            prompt = self.token_counter.fit(prompt, max(limit - num_predict - system_tokens, 0))
+            prompt_tokens = max(limit - num_predict - system_tokens, 0)
+        needed = system_tokens + prompt_tokens + num_predict
+        num_ctx = next((size for size in self.CONTEXT_BUCKETS if size >= needed), self.CONTEXT_BUCKETS[-1])
+        payload = {"model": model}
+        if system:
+            payload["messages"] = [{"role": "system", "content": system}, {"role": "user", "content": prompt}]
+        else:
+            payload["prompt"] = prompt
+        payload["stream"] = stream
+        payload["options"] = {"num_ctx": min(num_ctx, limit), "num_predict": num_predict}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return payload
+
+    @staticmethod
+    def _user_text(payload: dict) -> str:
+        """Gövdedeki kullanıcı prompt'u (generate: prompt, chat: son mesaj)."""
+        return payload["messages"][-1]["content"] if "messages" in payload else payload["prompt"]
+
+    def _url_for(self, payload: dict) -> str:
+        return self.chat_url if "messages" in payload else self.base_url
+
+    @staticmethod
+    def _response_text(data: dict) -> str | None:
+        """Yanıt/akış parçasındaki metin (generate: response, chat: message.content)."""
+        if "message" in data:
+            return (data.get("message") or {}).get("content")
+        return data.get("response")
+
+    def _cache_key(self, payload: dict) -> str:
+        # stream bayrağı, keep_alive ve num_ctx (prompt sığdığı sürece) yanıt içeriğini değiştirmez; anahtara girmez
+        options = {k: v for k, v in payload.items() if k not in ("model", "prompt", "messages", "stream", "keep_alive")}
+        if "options" in options:
+            options["options"] = {k: v for k, v in options["options"].items() if k != "num_ctx"}
+        if "messages" in payload:
+            # Aynı kullanıcı prompt'u farklı sistem prompt'larıyla farklı cevaplar üretir
+            options["system"] = payload["messages"][0]["content"]
+        return make_cache_key(payload["model"], self._user_text(payload), options)
+
+    def _record_prompt_eval(self, label: str, meta: dict, data: dict) -> None:
+        """
+        Ollama'nın son yanıt parçasındaki prompt_eval_count/prompt_eval_duration/load_duration değerlerini
+        label (ajan adı) altında biriktirir. prompt_eval_count KV önbelleğinden gelen token'ları içermez; beklenen
+        token sayısı (sistem + prompt, token_counter ile) ile farkı yeniden kullanılan ön ek olarak sayılır.
+        """
+        if "prompt_eval_count" not in data and "load_duration" not in data:
+            return
+        stats = self._prompt_eval.setdefault(
+            label,
+            {"calls": 0, "prompt_tokens": 0, "evaluated_tokens": 0, "prompt_eval_ns": 0, "load_ns": 0, "loads": 0},
+        )
+        stats["calls"] += 1
+        stats["prompt_tokens"] += meta["prompt_tokens"] + meta["system_tokens"]
+        stats["evaluated_tokens"] += data.get("prompt_eval_count", 0)
+        stats["prompt_eval_ns"] += data.get("prompt_eval_duration", 0)
+        # Model yüklemesi load_duration'ı belirgin şekilde artırır (yüklü modelde birkaç ms)
+        load_ns = data.get("load_duration", 0)
+        stats["load_ns"] += load_ns
+        stats["loads"] += load_ns >= 100_000_000
+
+    def prompt_stats(self) -> dict:
+        """
+        Ajan başına prompt değerlendirme ölçümleri (/metrics için): çağrı sayısı, beklenen ve Ollama'nın gerçekten
+        değerlendirdiği token sayısı, toplam prompt değerlendirme ve model yükleme süresi, önbellekten gelen token
+        oranı ve ortalama token başına süreyle tahmin edilen kazanç (saved_ms).
+        """
+        result = {}
+        for label, stats in self._prompt_eval.items():
+            evaluated = stats["evaluated_tokens"]
+            reused = max(stats["prompt_tokens"] - evaluated, 0)
+            eval_ms = stats["prompt_eval_ns"] / 1e6
+            result[label] = {
+                "calls": stats["calls"],
+                "prompt_tokens": stats["prompt_tokens"],
+                "evaluated_tokens": evaluated,
+                "reused_tokens": reused,
+                "reuse_ratio": round(reused / stats["prompt_tokens"], 3) if stats["prompt_tokens"] else 0.0,
+                "prompt_eval_ms": round(eval_ms, 1),
+                "avg_prompt_eval_ms": round(eval_ms / stats["calls"], 1),
+                "saved_ms": round(reused * eval_ms / evaluated, 1) if evaluated else 0.0,
+                "load_ms": round(stats["load_ns"] / 1e6, 1),
+                "loads": stats["loads"],
+            }
+        return result
+
+    def _cache_get(self, payload: dict, use_cache: bool) -> tuple[str | None, str | None]:
+        """(önbellek_anahtarı, önbellekteki_yanıt) döndürür; önbellek kapalıysa (None, None)."""
+        if self.cache is None or not use_cache:
+            return None, None
+        key = self._cache_key(payload)
+        return key, self.cache.get(key)
+
+    def _cache_set(self, key: str | None, text: str) -> None:
+        # Hata mesajları önbelleğe yazılmaz; bir sonraki çağrı tekrar denesin
+        if key is not None and self.cache is not None and text:
+            self.cache.set(key, text)
+
+    async def ask(
+        self,
+        prompt: str,
+        task_type: str = "general",
+        use_cache: bool = True,
+        priority: str = "normal",
+        max_tokens: int | None = None,
+        system: str | None = None,
+        agent: str | None = None,
+    ) -> str:
         """
         Otomatik model seçimi ile Ollama API üzerinden yanıt üretir.
         Langfuse ile her çağrı bir `generation` olarak izlenir.
+        use_cache=False: önbellek atlanır (tekrar denemeler gibi farklı cevap beklenen çağrılar için).
+        priority: Model kuyruğundaki öncelik ("interactive" nihai cevaplar, "normal" ara adımlar, "background").
+        max_tokens: Cevap token sınırı (num_predict); None → task_type varsayılanı.
+        system: Sabit sistem prompt'u; verilirse /api/chat ile sistem + kullanıcı mesajı olarak gönderilir.
+            Değişken içerik (soru, bağlam) prompt'ta kalmalı ki ön ek çağrılar arasında aynı kalsın.
+        agent: prompt_stats() etiketi (varsayılan: task_type).
         """
-        selected_model = self._select_model(task_type, prompt)
-
-        payload = {
-            "model": selected_model,
-            "prompt": prompt,
-            "stream": False,
-        }
+        selected_model, payload, cache_key, cached, meta = self._prepare(
+            prompt, task_type, stream=False, use_cache=use_cache, max_tokens=max_tokens, system=system
+        )
 
         # Langfuse generation span
         with self.langfuse.start_as_current_observation(
@@ -51,18 +445,162 @@ class LLMClient:
             model=selected_model,
         ) as gen:
             gen.update(
-                input=prompt,
-                metadata={"task_type": task_type, "model": selected_model},
+                input=payload.get("messages", prompt),
+                metadata={
+                    "task_type": task_type,
+                    "model": selected_model,
+                    "cache_hit": cached is not None,
+                    "priority": priority,
+                    **meta,
+                },
             )
+            if cached is not None:
+                gen.update(output=cached)
+                return cached
 
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                try:
-                    response = await client.post(self.base_url, json=payload)
+            try:
+                client = await self._get_http()
+                async with self._model_slot(selected_model, priority):
+                    response = await client.post(
+                        self._url_for(payload), json=payload, timeout=self._timeout_for(selected_model)
+                    )
+                response.raise_for_status()
+                data = response.json()
+                self._record_prompt_eval(agent or task_type, meta, data)
+                text = self._response_text(data)
+                if text is None:
+                    text = NO_ANSWER_TEXT
+                else:
+                    self._cache_set(cache_key, text)
+                gen.update(output=text)
+                return text
+            except Exception as e:
+                error_text = f"{MODEL_ERROR_PREFIX} ({selected_model}): {str(e)}"
+                gen.update(output=error_text, level="error")
+                return error_text
+
+    async def ask_stream(
+        self,
+        prompt: str,
+        task_type: str = "general",
+        use_cache: bool = True,
+        priority: str = "interactive",
+        max_tokens: int | None = None,
+        system: str | None = None,
+        agent: str | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        ask() ile aynı model seçimini yapar, ancak yanıtı Ollama'nın NDJSON akışından
+        parça parça (token token) üretir. İlk token süresi Langfuse generation'a yazılır.
+        Hata durumunda tek parça olarak "Model hatası (...)" mesajı üretilir.
+        Önbellekte varsa yanıt tek parça olarak hemen döner. Akışlı çağrılar kullanıcıya giden nihai
+        cevaplardır; varsayılan öncelik "interactive". system/agent: bkz. ask().
+        """
+        selected_model, payload, cache_key, cached, meta = self._prepare(
+            prompt, task_type, stream=True, use_cache=use_cache, max_tokens=max_tokens, system=system
+        )
+        if cached is not None:
+            with self.langfuse.start_as_current_observation(
+                as_type="generation",
+                name="llm_client.ask_stream",
+                model=selected_model,
+            ) as gen:
+                gen.update(
+                    input=payload.get("messages", prompt),
+                    output=cached,
+                    metadata={"task_type": task_type, "model": selected_model, "stream": True, "cache_hit": True},
+                )
+            yield cached
+            return
+
+        # Async generator içinde context-var tabanlı "current" observation kullanılmaz;
+        # tüketici akışı yarıda bırakabilir. Generation açıkça başlatılıp bitirilir.
+        gen = self.langfuse.start_observation(
+            as_type="generation",
+            name="llm_client.ask_stream",
+            model=selected_model,
+            input=payload.get("messages", prompt),
+            metadata={
+                "task_type": task_type,
+                "model": selected_model,
+                "stream": True,
+                "priority": priority,
+                **meta,
+            },
+        )
+        parts = []
+        started = datetime.now(timezone.utc)
+        first_token_at = None
+        try:
+            try:
+                client = await self._get_http()
+                async with self._model_slot(selected_model, priority), client.stream(
+                    "POST", self._url_for(payload), json=payload, timeout=self._timeout_for(selected_model)
+                ) as response:
                     response.raise_for_status()
-                    text = response.json().get("response", "Cevap alınamadı.")
-                    gen.update(output=text)
-                    return text
-                except Exception as e:
-                    error_text = f"Model hatası ({selected_model}): {str(e)}"
-                    gen.update(output=error_text, level="error")
-                    return error_text
\ No newline at end of file
+                    async for line in response.aiter_lines():
+                        if not line.strip():
+                            continue
+                        data = json.loads(line)
+                        if data.get("error"):
+                            raise RuntimeError(data["error"])
+                        token = self._response_text(data) or ""
+                        if token:
+                            if first_token_at is None:
+                                first_token_at = datetime.now(timezone.utc)
+                                gen.update(completion_start_time=first_token_at)
+                            parts.append(token)
+                            yield token
+                        if data.get("done"):
+                            self._record_prompt_eval(agent or task_type, meta, data)
+                            break
+            except Exception as e:
+                error_text = f"{MODEL_ERROR_PREFIX} ({selected_model}): {str(e)}"
+                gen.update(output="".join(parts) + error_text, level="error")
+                yield error_text
+                return
+
+            text = "".join(parts)
+            metadata = {
+                "task_type": task_type,
+                "model": selected_model,
+                "stream": True,
+                "priority": priority,
+                **meta,
+            }
+            if first_token_at is not None:
+                metadata["time_to_first_token_ms"] = round((first_token_at - started).total_seconds() * 1000, 1)
+            gen.update(output=text, metadata=metadata)
+            if not text:
+                yield NO_ANSWER_TEXT
+            else:
+                self._cache_set(cache_key, text)
+        finally:
+            gen.end()
+
+    async def ask_streaming(
+        self,
+        prompt: str,
+        task_type: str = "general",
+        on_token: Callable[[str], None] | None = None,
+        use_cache: bool = True,
+        priority: str = "interactive",
+        max_tokens: int | None = None,
+        system: str | None = None,
+        agent: str | None = None,
+    ) -> str:
+        """ask_stream() akışını tüketir; her parçayı on_token'a iletir ve tam metni döndürür."""
+        parts = []
+        async for token in self.ask_stream(
+            prompt,
+            task_type=task_type,
+            use_cache=use_cache,
+            priority=priority,
+            max_tokens=max_tokens,
+            system=system,
+            agent=agent,
+        ):
+            if on_token is not None:
+                on_token(token)
+            parts.append(token)
+        return "".join(parts)
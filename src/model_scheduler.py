@@ -0,0 +1,177 @@
+"""
+LLMClient için model başına eşzamanlılık zamanlayıcısı.
+Her model için Ollama'ya aynı anda giden istek sayısı sınırlanır (OLLAMA_NUM_PARALLEL ile uyumlu); sınır doluysa
+istekler öncelikli kuyrukta bekler: kullanıcıya akan nihai cevaplar ("interactive") ara adımlardan ("normal"),
+ara adımlar da arka plan işlerinden ("background") önce slot alır. Model başına gözlenen gecikme (EWMA) ile
+beklenen bekleme süresi tahmin edilir; büyük model doyduğunda uygun görevler küçük modele düşürülebilir.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+
+PRIORITIES = {"interactive": 0, "normal": 1, "background": 2}
+
+
+class _ModelState:
+    def __init__(self, limit: int | None, latency: float):
+        self.limit = limit or None
+        self.in_flight = 0
+        self.queue: list[list] = []  # [öncelik, sıra, future] heap'i
+        self.latency = latency  # gözlenen servis süresi (EWMA, saniye)
+        self.latency_observed = False
+        self.requests = 0
+        self.waited = 0  # kuyrukta beklemek zorunda kalan istek sayısı
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.downgraded_from = 0
+        self.downgraded_to = 0
+
+    def has_free_slot(self) -> bool:
+        return self.limit is None or (self.in_flight < self.limit and not self.queue)
+
+
+class ModelScheduler:
+    def __init__(
+        self,
+        limits: dict | None = None,
+        downgrade_after: float | None = 2.0,
+        default_latency: float = 1.0,
+        latency_alpha: float = 0.2,
+        clock=time.perf_counter,
+    ):
+        """
+        Args:
+            limits: Model adı → aynı anda gidebilecek istek sayısı; verilmeyen model / 0 / None → sınırsız.
+            downgrade_after: Tercih edilen modelde beklenen bekleme bu süreyi (saniye) aşarsa ve küçük modelle
+                cevap daha erken bitecekse uygun görev küçük modele düşürülür; None → hiç düşürülmez.
+            default_latency: Henüz gecikme gözlenmemiş model için varsayılan servis süresi (saniye).
+            latency_alpha: Gecikme EWMA katsayısı (yeni gözlemin ağırlığı).
+        """
+        self.limits = dict(limits or {})
+        self.downgrade_after = downgrade_after
+        self.default_latency = default_latency
+        self.latency_alpha = latency_alpha
+        self.clock = clock
+        self._states: dict[str, _ModelState] = {}
+        self._seq = itertools.count()
+
+    def _state(self, model: str) -> _ModelState:
+        state = self._states.get(model)
+        if state is None:
+            state = self._states[model] = _ModelState(self.limits.get(model), self.default_latency)
+        return state
+
+    def set_limit(self, model: str, limit: int | None) -> None:
+        self.limits[model] = limit
+        self._state(model).limit = limit or None
+
+    # --- tahmin ve model seçimi ---
+
+    def expected_wait(self, model: str) -> float:
+        """Şimdi gelen bir isteğin slot alana kadar beklemesi tahmini (saniye)."""
+        state = self._state(model)
+        if state.has_free_slot():
+            return 0.0
+        rounds = len(state.queue) // state.limit + 1
+        return rounds * state.latency
+
+    def choose(self, preferred: str, fallback: str, eligible: bool = True) -> str:
+        """
+        Tercih edilen model doymuşsa ve fallback ile (bekleme + servis süresi) daha erken bitecekse fallback'i
+        döndürür. eligible=False (ör. kod üretimi) veya downgrade_after=None ise her zaman preferred.
+        """
+        if not eligible or self.downgrade_after is None or preferred == fallback:
+            return preferred
+        wait = self.expected_wait(preferred)
+        if wait < self.downgrade_after:
+            return preferred
+        fallback_finish = self.expected_wait(fallback) + self._state(fallback).latency
+        if fallback_finish >= wait + self._state(preferred).latency:
+            return preferred
+        self._state(preferred).downgraded_from += 1
+        self._state(fallback).downgraded_to += 1
+        return fallback
+
+    # --- slot yönetimi ---
+
+    async def _acquire(self, state: _ModelState, priority: int) -> None:
+        if state.has_free_slot():
+            state.in_flight += 1
+            return
+        entry = [priority, next(self._seq), asyncio.get_running_loop().create_future()]
+        heapq.heappush(state.queue, entry)
+        try:
+            await entry[2]
+        except asyncio.CancelledError:
+            if entry[2].done() and not entry[2].cancelled():
+                # Slot devredilmişti ama istek iptal edildi: slot sıradakine geçer
+                self._release(state)
+            elif entry in state.queue:
+                state.queue.remove(entry)
+                heapq.heapify(state.queue)
+            raise
+
+    def _release(self, state: _ModelState) -> None:
+        state.in_flight -= 1
+        while state.queue:
+            _, _, future = heapq.heappop(state.queue)
+            if not future.done():
+                state.in_flight += 1  # slot doğrudan bekleyene devredilir; araya yeni gelen giremez
+                future.set_result(None)
+                return
+
+    @asynccontextmanager
+    async def slot(self, model: str, priority: str = "normal"):
+        """Model için slot alır; bekleme süresi ve (başarılı) servis süresi metriklere yazılır."""
+        state = self._state(model)
+        state.requests += 1
+        queued_at = self.clock()
+        await self._acquire(state, PRIORITIES[priority])
+        started = self.clock()
+        wait = started - queued_at
+        if wait > 0.001:
+            state.waited += 1
+        state.wait_total += wait
+        state.wait_max = max(state.wait_max, wait)
+        try:
+            yield
+            self._observe_latency(state, self.clock() - started)
+        finally:
+            self._release(state)
+
+    def _observe_latency(self, state: _ModelState, seconds: float) -> None:
+        if not state.latency_observed:
+            state.latency, state.latency_observed = seconds, True
+        else:
+            state.latency += self.latency_alpha * (seconds - state.latency)
+
+    # --- metrikler ---
+
+    def in_flight(self, model: str) -> int:
+        return self._state(model).in_flight
+
+    def waiting(self, model: str) -> int:
+        return len(self._state(model).queue)
+
+    def stats(self, model: str) -> dict:
+        state = self._state(model)
+        by_priority = {name: 0 for name in PRIORITIES}
+        names = {value: name for name, value in PRIORITIES.items()}
+        for priority, _, future in state.queue:
+            if not future.done():
+                by_priority[names[priority]] += 1
+        return {
+            "limit": state.limit,
+            "in_flight": state.in_flight,
+            "waiting": len(state.queue),
+            "waiting_by_priority": by_priority,
+            "requests": state.requests,
+            "waited": state.waited,
+            "avg_wait_ms": round(state.wait_total / state.requests * 1000, 1) if state.requests else 0.0,
+            "max_wait_ms": round(state.wait_max * 1000, 1),
+            "latency_ms": round(state.latency * 1000, 1) if state.latency_observed else None,
+            "downgraded_from": state.downgraded_from,
+            "downgraded_to": state.downgraded_to,
+        }
@@ -1,36 +1,92 @@
 """
 LangGraph orkestrasyonu: Analyst → Researcher | Coder | General
 Mevcut ajanlar (analyst, researcher, coder) ve client dışarıdan verilir; sadece akış burada tanımlanır.
+Opsiyonel `router` (QueryRouter) verilirse analyst node önce yerel ön sınıflandırıcıya sorar;
+güven yeterliyse LLM analyst çağrısı atlanır.
+Opsiyonel `answer_cache` (SemanticAnswerCache) verilirse graf cache_lookup ile başlar: benzer bir soru
+daha önce yanıtlandıysa hiçbir ajan çalışmadan yanıt döner; aksi halde üretilen yanıt cache_store'da kaydedilir.
+Model hatası veya çalışmayan kodun hata açıklaması gibi başarısız yanıtlar (state["failed"]) kaydedilmez.
 """
+import asyncio
+import time
 from typing import TypedDict, Literal
 from langgraph.graph import StateGraph, END
+from langgraph.types import StreamWriter
 
+from src.llm_client import is_error_response
 
-class AgentState(TypedDict):
+
+class AgentState(TypedDict, total=False):
     query: str
     decision: dict
     response: str
+    failed: bool
+    cache_hit: bool
+    started_at: float
 
 
-def build_graph(analyst, researcher, coder, client):
+def build_graph(analyst, researcher, coder, client, router=None, answer_cache=None):
     """
     Grafiği oluşturur ve derler. main.py'den çağrılır.
+    Son cevabı üreten node'lar token'ları `{"token": ...}` olarak custom stream'e yazar;
+    `graph.astream(..., stream_mode=["custom", "values"])` ile canlı izlenebilir.
     """
     async def analyst_node(state: AgentState) -> dict:
+        if router is not None:
+            decision = router.route(state["query"])
+            if decision is not None:
+                return {"decision": decision}
         decision = await analyst.analyze(state["query"])
         return {"decision": decision}
 
-    async def researcher_node(state: AgentState) -> dict:
-        response = await researcher.research(state["query"])
-        return {"response": response}
+    def _token_writer(writer: StreamWriter):
+        return lambda token: writer({"token": token})
+
+    async def researcher_node(state: AgentState, writer: StreamWriter) -> dict:
+        response = await researcher.research(state["query"], on_token=_token_writer(writer))
+        return {"response": response, "failed": is_error_response(response)}
+
+    async def coder_node(state: AgentState, writer: StreamWriter) -> dict:
+        decision = state.get("decision") or {}
+        failures = []
+        # Analyst query_spec üretmişse (null dahil) coder tekrar planlama yapmaz
+        response = await coder.solve(
+            state["query"],
+            on_token=_token_writer(writer),
+            query_spec=decision.get("query_spec"),
+            plan_query="query_spec" not in decision,
+            on_failure=lambda: failures.append(True),
+        )
+        return {"response": response, "failed": bool(failures) or is_error_response(response)}
+
+    async def general_node(state: AgentState, writer: StreamWriter) -> dict:
+        response = await client.ask_streaming(
+            state["query"], task_type="general", on_token=_token_writer(writer)
+        )
+        return {"response": response, "failed": is_error_response(response)}
+
+    async def cache_lookup_node(state: AgentState, writer: StreamWriter) -> dict:
+        entry = await asyncio.to_thread(answer_cache.lookup, state["query"])
+        if entry is None:
+            return {"cache_hit": False, "started_at": time.perf_counter()}
+        writer({"token": entry.response})
+        return {
+            "cache_hit": True,
+            "response": entry.response,
+            "decision": {**entry.decision, "source": "cache"},
+        }
 
-    async def coder_node(state: AgentState) -> dict:
-        response = await coder.solve(state["query"])
-        return {"response": response}
+    async def cache_store_node(state: AgentState) -> dict:
+        if state.get("failed"):
+            return {}
+        elapsed = time.perf_counter() - state.get("started_at", time.perf_counter())
+        await asyncio.to_thread(
+            answer_cache.store, state["query"], state.get("response", ""), state.get("decision"), elapsed
+        )
+        return {}
 
-    async def general_node(state: AgentState) -> dict:
-        response = await client.ask(state["query"], task_type="general")
-        return {"response": response}
+    def route_after_cache(state: AgentState) -> Literal["analyst", "__end__"]:
+        return END if state.get("cache_hit") else "analyst"
 
     def route_after_analyst(state: AgentState) -> Literal["researcher", "coder", "general"]:
         decision = state.get("decision") or {}
@@ -50,7 +106,13 @@ def build_graph(analyst, researcher, coder, client):
     workflow.add_node("coder", coder_node)
     workflow.add_node("general", general_node)
 
-    workflow.set_entry_point("analyst")
+    if answer_cache is not None:
+        workflow.add_node("cache_lookup", cache_lookup_node)
+        workflow.add_node("cache_store", cache_store_node)
+        workflow.set_entry_point("cache_lookup")
+        workflow.add_conditional_edges("cache_lookup", route_after_cache, path_map={"analyst": "analyst", END: END})
+    else:
+        workflow.set_entry_point("analyst")
     workflow.add_conditional_edges(
         "analyst",
         route_after_analyst,
@@ -60,8 +122,11 @@ def build_graph(analyst, researcher, coder, client):
             "general": "general",
         },
     )
-    workflow.add_edge("researcher", END)
-    workflow.add_edge("coder", END)
-    workflow.add_edge("general", END)
+    final = "cache_store" if answer_cache is not None else END
+    workflow.add_edge("researcher", final)
+    workflow.add_edge("coder", final)
+    workflow.add_edge("general", final)
+    if answer_cache is not None:
+        workflow.add_edge("cache_store", END)
 
     return workflow.compile()
@@ -0,0 +1,164 @@
+"""
+Çok oturumlu HTTP sunucu modu (aiohttp).
+Tek bir LLMClient, VectorStoreManager ve derlenmiş graf tüm isteklerce paylaşılır; aynı anda
+en fazla `max_concurrent` sorgu çalışır, en fazla `max_queue` sorgu sırada bekler. Sıra doluysa
+istek 503 + Retry-After ile reddedilir (backpressure), süresi aşan istek 504 döner.
+
+Uç noktalar:
+  POST /query   {"query": "..."} → {"response", "task_type", "route_source", "elapsed_ms"}
+  GET  /health  → {"status": "ok"}
+  GET  /metrics → istek sayaçları, sıra durumu, model başına eşzamanlılık, ajan başına prompt değerlendirme ve önbellek istatistikleri
+"""
+import asyncio
+import time
+
+from aiohttp import web
+from langfuse import get_client
+
+
+class QueryServer:
+    """Grafı HTTP üzerinden çalıştıran, kabul (admission) kontrollü sorgu sunucusu."""
+
+    def __init__(
+        self,
+        graph,
+        client=None,
+        answer_cache=None,
+        max_concurrent: int = 8,
+        max_queue: int = 32,
+        request_timeout: float = 300.0,
+        retry_after_seconds: int = 2,
+    ):
+        """
+        Args:
+            graph: build_graph() ile derlenmiş LangGraph.
+            client: Paylaşılan LLMClient (sadece /metrics için; verilmezse model metrikleri eklenmez).
+            answer_cache: Grafın kullandığı SemanticAnswerCache (sadece /metrics için).
+            max_concurrent: Aynı anda çalışan sorgu sayısı.
+            max_queue: Çalışma sırası bekleyebilecek en fazla sorgu; aşılırsa 503 döner.
+            request_timeout: Sırada bekleme dahil istek başına süre sınırı (saniye); aşılırsa 504 döner.
+            retry_after_seconds: 503 yanıtındaki Retry-After değeri.
+        """
+        self.graph = graph
+        self.client = client
+        self.answer_cache = answer_cache
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.request_timeout = request_timeout
+        self.retry_after_seconds = retry_after_seconds
+        self._slots: asyncio.Semaphore | None = None
+        self.pending = 0  # kabul edilmiş, henüz bitmemiş istekler (çalışan + sırada bekleyen)
+        self.active = 0
+        self.counters = {"accepted": 0, "completed": 0, "rejected": 0, "timed_out": 0, "failed": 0}
+        self.langfuse = get_client()
+
+    @property
+    def queued(self) -> int:
+        return self.pending - self.active
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # Semaphore sunucunun event loop'unda oluşturulur
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        return self._slots
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/query", self.handle_query)
+        app.router.add_get("/health", self.handle_health)
+        app.router.add_get("/metrics", self.handle_metrics)
+        return app
+
+    async def _run(self, query: str) -> dict:
+        slots = self._get_slots()
+        await slots.acquire()
+        self.active += 1
+        try:
+            with self.langfuse.start_as_current_observation(
+                as_type="span",
+                name="user_query",
+                input=query,
+            ) as span:
+                result = await self.graph.ainvoke({"query": query})
+                span.update(output=result.get("response"))
+            return result
+        finally:
+            self.active -= 1
+            slots.release()
+
+    async def handle_query(self, request: web.Request) -> web.Response:
+        try:
+            body = await request.json()
+        except Exception:
+            return web.json_response({"error": "Geçersiz JSON gövdesi."}, status=400)
+        query = body.get("query") if isinstance(body, dict) else None
+        if not isinstance(query, str) or not query.strip():
+            return web.json_response({"error": "'query' alanı boş olmayan bir metin olmalı."}, status=400)
+
+        # Backpressure: çalışma slotları da sıra da doluysa hemen reddet
+        if self.pending >= self.max_concurrent + self.max_queue:
+            self.counters["rejected"] += 1
+            return web.json_response(
+                {"error": "Sunucu meşgul, lütfen daha sonra tekrar deneyin."},
+                status=503,
+                headers={"Retry-After": str(self.retry_after_seconds)},
+            )
+
+        self.counters["accepted"] += 1
+        self.pending += 1
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(self._run(query), timeout=self.request_timeout)
+        except asyncio.TimeoutError:
+            self.counters["timed_out"] += 1
+            return web.json_response(
+                {"error": f"Sorgu {self.request_timeout:g} saniye içinde tamamlanamadı."}, status=504
+            )
+        except Exception as e:
+            self.counters["failed"] += 1
+            return web.json_response({"error": f"Bir hata oluştu: {e}"}, status=500)
+        finally:
+            self.pending -= 1
+
+        self.counters["completed"] += 1
+        decision = result.get("decision") or {}
+        return web.json_response(
+            {
+                "response": result.get("response", "Yanıt üretilemedi."),
+                "task_type": decision.get("task_type"),
+                "route_source": decision.get("source", "analyst"),
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            }
+        )
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok"})
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        metrics = {
+            "requests": dict(self.counters),
+            "active": self.active,
+            "queued": self.queued,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+        }
+        if self.client is not None:
+            metrics["models"] = self.client.model_stats()
+            metrics["prompt_eval"] = self.client.prompt_stats()
+            if self.client.cache is not None:
+                metrics["llm_cache"] = self.client.cache.stats()
+        if self.answer_cache is not None:
+            metrics["answer_cache"] = self.answer_cache.stats()
+        return web.json_response(metrics)
+
+
+async def serve(server: QueryServer, host: str = "127.0.0.1", port: int = 8080) -> None:
+    """Sunucuyu başlatır ve iptal edilene kadar (Ctrl+C) çalışır."""
+    runner = web.AppRunner(server.create_app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
@@ -1,60 +1,217 @@
+import itertools
+import json
 import os
-import sys
+import queue
 import re
-from io import StringIO
-import traceback
-import signal
-from contextlib import contextmanager
-from typing import Optional
+import subprocess
+import sys
+import threading
 
 
-# Proje kökü: kod ./data/ gibi yollarla çalışsın diye exec öncesi chdir yapılacak
+# Proje kökü: çalışan süreçler burada başlatılır, böylece kod ./data/ gibi yollarla çalışır
 _PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 
 
-class TimeoutError(Exception):
-    """Kod çalıştırma timeout hatası."""
-    pass
+class _WorkerTimeout(Exception):
+    """İş, duvar saati süresi içinde sonuç döndürmedi."""
+
+
+class _WorkerCrashed(Exception):
+    """Çalışan süreç iş sırasında sonlandı (CPU/bellek sınırı veya çökme)."""
+
+
+class _Worker:
+    """
+    Tek bir `src.tools.code_worker` süreci. stdout'tan gelen satırlar ayrı bir thread'de
+    kuyruğa aktarılır; böylece bekleme süresi her platformda queue.get(timeout=...) ile sınırlanır.
+    """
+
+    def __init__(self, memory_limit_mb: int, start_timeout: float = 30.0):
+        self.memory_limit_mb = memory_limit_mb
+        self.start_timeout = start_timeout
+        self.process: subprocess.Popen | None = None
+        self._lines: queue.Queue = queue.Queue()
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def spawn(self) -> None:
+        """Süreci başlatır (hazır olmasını beklemez)."""
+        self._lines = queue.Queue()
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "src.tools.code_worker", "--memory-mb", str(self.memory_limit_mb)],
+            cwd=_PROJECT_ROOT,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+        )
+        threading.Thread(target=self._read_lines, args=(self.process.stdout,), daemon=True).start()
+
+    def _read_lines(self, stream) -> None:
+        for line in stream:
+            self._lines.put(line)
+        self._lines.put(None)  # EOF: süreç kapandı
+
+    def wait_ready(self) -> None:
+        message = self._next_message(self.start_timeout)
+        if not message.get("ready"):
+            raise _WorkerCrashed("Çalışan süreç beklenmeyen bir mesajla başladı.")
+
+    def start(self) -> None:
+        self.spawn()
+        self.wait_ready()
+
+    def _next_message(self, timeout: float) -> dict:
+        try:
+            line = self._lines.get(timeout=timeout)
+        except queue.Empty:
+            raise _WorkerTimeout() from None
+        if line is None:
+            self.process.wait()
+            raise _WorkerCrashed(f"Çalışan süreç sonlandı (çıkış kodu {self.process.returncode}).")
+        return json.loads(line)
+
+    def run(self, job: dict, timeout: float) -> dict:
+        try:
+            self.process.stdin.write(json.dumps(job, ensure_ascii=False) + "\n")
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            self.process.wait()
+            raise _WorkerCrashed(f"Çalışan süreç sonlandı (çıkış kodu {self.process.returncode}).") from None
+        while True:
+            message = self._next_message(timeout)
+            if message.get("id") == job["id"]:
+                return message
+
+    def kill(self) -> None:
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+        for stream in (self.process.stdin, self.process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+
+
+class WorkerPool:
+    """
+    Önceden ısıtılmış çalışan süreç havuzu. Boşta bekleyen süreçler bir kuyrukta tutulur;
+    zaman aşımına uğrayan veya çöken süreç öldürülür ve yerine yenisi (ilk kullanımda) başlatılır.
+    """
+
+    def __init__(self, size: int = 2, memory_limit_mb: int = 512):
+        self.size = size
+        self.memory_limit_mb = memory_limit_mb
+        self._idle: queue.Queue = queue.Queue()
+        self._workers: list[_Worker] = []
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self) -> None:
+        """Tüm süreçleri paralel başlatır ve hazır olmalarını bekler (idempotent)."""
+        with self._lock:
+            if self._started:
+                return
+            workers = [_Worker(self.memory_limit_mb) for _ in range(self.size)]
+            for worker in workers:
+                worker.spawn()
+            for worker in workers:
+                worker.wait_ready()
+                self._workers.append(worker)
+                self._idle.put(worker)
+            self._started = True
+
+    def acquire(self) -> _Worker:
+        self.start()
+        worker = self._idle.get()
+        if not worker.alive:
+            # Yeni eklenmiş (henüz başlatılmamış) veya boştayken kapanmış süreç
+            worker.kill()
+            try:
+                worker.start()
+            except BaseException:
+                self.release(worker, healthy=False)
+                raise
+        return worker
+
+    def release(self, worker: _Worker, healthy: bool = True) -> None:
+        if not healthy:
+            worker.kill()
+            # Yeni süreç bir sonraki acquire'da başlatılır; bu çağrı bekletilmez
+            worker = self._replace(worker)
+        self._idle.put(worker)
 
+    def _replace(self, worker: _Worker) -> _Worker:
+        with self._lock:
+            fresh = _Worker(self.memory_limit_mb)
+            if worker in self._workers:
+                self._workers.remove(worker)
+            self._workers.append(fresh)
+            return fresh
 
-@contextmanager
-def timeout_context(seconds: int):
-    """Unix sistemlerde timeout için signal kullanır, Windows'ta çalışmaz."""
-    if sys.platform == "win32":
-        # Windows'ta timeout yok, sadece context manager olarak çalışır
-        yield
-        return
-    
-    def timeout_handler(signum, frame):
-        raise TimeoutError(f"Kod çalıştırma {seconds} saniye içinde tamamlanamadı.")
-    
-    old_handler = signal.signal(signal.SIGALRM, timeout_handler)
-    signal.alarm(seconds)
-    try:
-        yield
-    finally:
-        signal.alarm(0)
-        signal.signal(signal.SIGALRM, old_handler)
+    def close(self) -> None:
+        with self._lock:
+            for worker in self._workers:
+                worker.kill()
+            self._workers = []
+            self._idle = queue.Queue()
+            self._started = False
 
 
 class CodeExecutor:
     """
-    LLM çıktısından kodu çıkarır ve proje kökünde çalıştırır (./data/ erişilebilir olur).
-    
+    LLM çıktısından kodu çıkarır ve önceden ısıtılmış çalışan süreçlerden birinde proje kökünde çalıştırır.
+
     Özellikler:
-    - Standart Python kütüphanelerini otomatik import eder (json, os, pathlib, re, math, statistics, collections, datetime)
-    - Return değerlerini yakalar (kod bir değer döndürüyorsa)
-    - Stdout ve stderr'i ayrı yakalar
-    - Timeout desteği (30 saniye)
+    - Kod sunucu sürecinde değil, ayrı süreçte çalışır; sys.stdout/os.chdir paylaşılmadığı için
+      farklı thread'lerden eşzamanlı execute çağrıları birbirinin çıktısını bozmaz
+    - Çalışanlarda standart kütüphaneler (json, os, pathlib, re, math, statistics, collections, datetime)
+      ve data/*.json içerikleri (`data_files`) önceden yüklüdür; iş başına fork+import maliyeti yoktur
+    - İş başına duvar saati (timeout_seconds), CPU süresi ve bellek sınırı (Unix'te RLIMIT_CPU / RLIMIT_AS)
+    - Return değerlerini yakalar (son satır bir ifade ise), stdout ve stderr'i ayrı yakalar
     - Gelişmiş kod bloğu çıkarma (markdown, farklı formatlar)
     """
 
-    def __init__(self, timeout_seconds: int = 30):
+    def __init__(
+        self,
+        timeout_seconds: int = 30,
+        pool_size: int = 2,
+        memory_limit_mb: int = 512,
+        cpu_seconds: int | None = None,
+    ):
         """
         Args:
             timeout_seconds: Kod çalıştırma için maksimum süre (saniye). Varsayılan: 30.
+            pool_size: Eşzamanlı kod çalıştırabilecek çalışan süreç sayısı.
+            memory_limit_mb: Çalışan süreç başına bellek (adres alanı) sınırı; 0 → sınırsız.
+            cpu_seconds: İş başına CPU süresi sınırı; None → timeout_seconds.
         """
         self.timeout_seconds = timeout_seconds
+        self.cpu_seconds = cpu_seconds if cpu_seconds is not None else timeout_seconds
+        self.pool = WorkerPool(size=pool_size, memory_limit_mb=memory_limit_mb)
+        self._job_ids = itertools.count(1)
+
+    def start(self) -> None:
+        """Çalışan süreçleri önceden başlatır (ilk sorgu süreç açılışını beklemesin)."""
+        self.pool.start()
+
+    def close(self) -> None:
+        """Tüm çalışan süreçleri sonlandırır."""
+        self.pool.close()
+
+    def __enter__(self) -> "CodeExecutor":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
 
     def _extract_code(self, code: str) -> str:
         """
@@ -85,82 +242,14 @@ class CodeExecutor:
         cleaned = code.replace("```python", "").replace("```", "").strip()
         return cleaned
 
-    def _create_safe_namespace(self):
-        """
-        Güvenli bir namespace oluşturur.
-        Standart Python kütüphanelerini içerir ama tehlikeli işlemleri engellemez
-        (çünkü data/ klasörüne erişmesi gerekiyor).
-        """
-        safe_dict = {
-            "__builtins__": __builtins__,
-            "__name__": "__main__",
-            "__file__": os.path.join(_PROJECT_ROOT, "executed_code.py"),
-        }
-        
-        # Standart kütüphaneleri import et
-        try:
-            import json
-            safe_dict["json"] = json
-        except ImportError:
-            pass
-        
-        try:
-            import os as os_module
-            safe_dict["os"] = os_module
-        except ImportError:
-            pass
-        
-        try:
-            from pathlib import Path
-            safe_dict["Path"] = Path
-            safe_dict["pathlib"] = __import__("pathlib")
-        except ImportError:
-            pass
-        
-        try:
-            import re as re_module
-            safe_dict["re"] = re_module
-        except ImportError:
-            pass
-        
-        try:
-            import math
-            safe_dict["math"] = math
-        except ImportError:
-            pass
-        
-        try:
-            import statistics
-            safe_dict["statistics"] = statistics
-        except ImportError:
-            pass
-        
-        try:
-            from collections import defaultdict, Counter, deque
-            safe_dict["defaultdict"] = defaultdict
-            safe_dict["Counter"] = Counter
-            safe_dict["deque"] = deque
-            safe_dict["collections"] = __import__("collections")
-        except ImportError:
-            pass
-        
-        try:
-            from datetime import datetime, date, timedelta
-            safe_dict["datetime"] = datetime
-            safe_dict["date"] = date
-            safe_dict["timedelta"] = timedelta
-        except ImportError:
-            pass
-        
-        return safe_dict
-
     def execute(self, code: str) -> str:
         """
-        Kodu çıkarır, çalıştırır ve sonucu döndürür.
-        
+        Kodu çıkarır, boştaki bir çalışan süreçte çalıştırır ve sonucu döndürür.
+        Thread-safe'tir; havuzdaki süreç sayısı kadar çağrı paralel çalışır, fazlası sırada bekler.
+
         Args:
             code: LLM'den gelen kod çıktısı (markdown bloğu veya ham kod)
-            
+
         Returns:
             Kod çıktısı (stdout), return değeri veya hata mesajı
         """
@@ -168,96 +257,49 @@ class CodeExecutor:
         if not clean_code:
             return "Kod Çalıştırma Hatası: Yanıtta çalıştırılacak kod bloğu bulunamadı."
 
-        # Çıktı yakalama için buffer'lar
-        stdout_buffer = StringIO()
-        stderr_buffer = StringIO()
-        old_stdout = sys.stdout
-        old_stderr = sys.stderr
-        old_cwd = os.getcwd()
-        
-        result_value = None
-        exc_info = None
-        timeout_occurred = False
-
+        job = {"id": next(self._job_ids), "code": clean_code, "cpu_seconds": self.cpu_seconds}
+        worker = self.pool.acquire()
         try:
-            # Stdout ve stderr'i yakala
-            sys.stdout = stdout_buffer
-            sys.stderr = stderr_buffer
-            
-            # Çalışma dizinini proje köküne değiştir
-            os.chdir(_PROJECT_ROOT)
-            
-            # Güvenli namespace oluştur
-            safe_namespace = self._create_safe_namespace()
-            
-            # Timeout ile çalıştır (Unix sistemlerde)
-            try:
-                if sys.platform != "win32":
-                    with timeout_context(self.timeout_seconds):
-                        # Kodu compile et ve çalıştır
-                        compiled_code = compile(clean_code, "<string>", "exec")
-                        exec(compiled_code, safe_namespace)
-                else:
-                    # Windows'ta timeout yok, direkt çalıştır
-                    compiled_code = compile(clean_code, "<string>", "exec")
-                    exec(compiled_code, safe_namespace)
-                
-                # Eğer kod bir değer döndürdüyse yakala (son satır expression ise)
-                # Not: exec() return değeri döndürmez, ama son satırı eval edebiliriz
-                try:
-                    # Son satırı expression olarak değerlendirmeyi dene
-                    lines = clean_code.strip().split('\n')
-                    last_line = lines[-1].strip()
-                    # Basit bir kontrol: eğer son satır bir ifade gibi görünüyorsa
-                    if last_line and not last_line.startswith('#') and '=' not in last_line:
-                        # Eğer print() çağrısı değilse, değerlendirmeyi dene
-                        if not last_line.startswith('print('):
-                            try:
-                                result_value = eval(last_line, safe_namespace)
-                            except:
-                                pass  # Eval başarısız olursa görmezden gel
-                except:
-                    pass  # Return değeri yakalama başarısız olursa görmezden gel
-                    
-            except TimeoutError as e:
-                timeout_occurred = True
-                exc_info = str(e)
-            except Exception:
-                exc_info = traceback.format_exc()
-                
-        finally:
-            # Her zaman eski duruma geri dön
-            sys.stdout = old_stdout
-            sys.stderr = old_stderr
-            os.chdir(old_cwd)
-
-        # Stderr varsa önce onu göster
-        stderr_output = stderr_buffer.getvalue()
-        stdout_output = stdout_buffer.getvalue()
-        
-        if timeout_occurred:
-            return f"Kod Çalıştırma Hatası: {exc_info}"
-        
+            outcome = worker.run(job, timeout=self.timeout_seconds)
+        except _WorkerTimeout:
+            self.pool.release(worker, healthy=False)
+            return f"Kod Çalıştırma Hatası: Kod çalıştırma {self.timeout_seconds} saniye içinde tamamlanamadı."
+        except _WorkerCrashed as e:
+            self.pool.release(worker, healthy=False)
+            return f"Kod Çalıştırma Hatası: {e} Kod CPU veya bellek sınırını aşmış olabilir."
+        except BaseException:
+            self.pool.release(worker, healthy=False)
+            raise
+        self.pool.release(worker)
+        return self._format_outcome(outcome)
+
+    @staticmethod
+    def _format_outcome(outcome: dict) -> str:
+        stderr_output = outcome.get("stderr") or ""
+        stdout_output = outcome.get("stdout") or ""
+        result_value = outcome.get("result")
+        exc_info = outcome.get("error")
+
         if exc_info:
             # Hata varsa traceback'i döndür
             error_msg = f"Kod Çalıştırma Hatası:\n{exc_info}"
             if stderr_output:
                 error_msg += f"\n\nStderr:\n{stderr_output}"
             return error_msg
-        
+
         # Stderr varsa ama exception yoksa, uyarı olarak ekle
         if stderr_output:
             if stdout_output or result_value is not None:
                 return f"{stdout_output}{stderr_output}"
             return f"Kod Çalıştırma Hatası: {stderr_output}"
-        
+
         # Return değeri varsa onu önceliklendir
         if result_value is not None:
             return str(result_value)
-        
+
         # Stdout varsa onu döndür
         if stdout_output:
             return stdout_output.strip()
-        
+
         # Hiç çıktı yoksa bilgilendirici mesaj
         return "Kod başarıyla çalıştı (Çıktı üretilmedi)."
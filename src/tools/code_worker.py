@@ -0,0 +1,200 @@
+"""
+CodeExecutor'ın önceden ısıtılmış çalışan (worker) süreci.
+`python -m src.tools.code_worker` ile proje kökünde başlatılır; stdin'den satır satır JSON iş alır,
+kodu çalıştırır ve sonucu stdout'a tek satır JSON olarak yazar.
+
+İş:    {"id": 1, "code": "...", "cpu_seconds": 30}
+Sonuç: {"id": 1, "stdout": "...", "stderr": "...", "result": "..." | null, "error": "..." | null}
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import sys
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+
+# LLM kodunun sık kullandığı modüller iş başına değil, süreç başlarken bir kez yüklenir
+import collections
+import collections.abc
+import datetime as datetime_module
+import math
+import pathlib
+import re
+import statistics
+
+try:
+    import resource
+except ImportError:  # Windows: CPU/bellek sınırları uygulanamaz, sadece süre sınırı (üst süreçte) geçerli
+    resource = None
+
+
+def _set_memory_limit(memory_mb: int) -> None:
+    if resource is None or not memory_mb:
+        return
+    limit = memory_mb * 1024 * 1024
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ValueError, OSError):
+        pass
+
+
+def _set_cpu_limit(cpu_seconds: int) -> None:
+    """RLIMIT_CPU süreç ömrü boyunca birikir; sınır, bu ana kadar harcanan CPU + iş bütçesi olarak ayarlanır."""
+    if resource is None or not cpu_seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime) + 1
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = used + cpu_seconds
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    try:
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    except (ValueError, OSError):
+        pass
+
+
+class _DataFiles:
+    """
+    ./data altındaki JSON dosyaları: süreç başında okunup bellekte tutulur, mtime değişirse yeniden okunur.
+    Her iş kendi kopyasını alır (bir işin veriyi değiştirmesi sonrakini etkilemez); parse erişimde yapılır.
+    """
+
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+        self._cache: dict[str, tuple[float, str]] = {}
+
+    def refresh(self) -> None:
+        names = set()
+        for path in glob.glob(os.path.join(self.data_dir, "*.json")):
+            name = os.path.basename(path)
+            names.add(name)
+            try:
+                mtime = os.path.getmtime(path)
+                if name not in self._cache or self._cache[name][0] != mtime:
+                    with open(path, encoding="utf-8") as f:
+                        self._cache[name] = (mtime, f.read())
+            except OSError:
+                continue
+        for name in set(self._cache) - names:
+            del self._cache[name]
+
+    def view(self) -> "_DataFileView":
+        self.refresh()
+        return _DataFileView({name: text for name, (_, text) in self._cache.items()})
+
+
+class _DataFileView(collections.abc.Mapping):
+    """data_files["orders.json"] → json.loads ile yeni bir kopya (iş içinde önbelleklenir)."""
+
+    def __init__(self, texts: dict[str, str]):
+        self._texts = texts
+        self._parsed: dict[str, object] = {}
+
+    def __getitem__(self, name: str):
+        if name not in self._parsed:
+            self._parsed[name] = json.loads(self._texts[name])
+        return self._parsed[name]
+
+    def __iter__(self):
+        return iter(self._texts)
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+
+def create_namespace(data_files) -> dict:
+    """
+    Her iş için temiz bir namespace. Standart kütüphaneler önceden import edilmiş olarak verilir;
+    data/ klasörüne erişmesi gerektiği için tehlikeli işlemler engellenmez.
+    `data_files`: {"orders.json": <parse edilmiş içerik>, ...}
+    """
+    return {
+        "__builtins__": __builtins__,
+        "__name__": "__main__",
+        "__file__": os.path.join(os.getcwd(), "executed_code.py"),
+        "json": json,
+        "os": os,
+        "Path": pathlib.Path,
+        "pathlib": pathlib,
+        "re": re,
+        "math": math,
+        "statistics": statistics,
+        "defaultdict": collections.defaultdict,
+        "Counter": collections.Counter,
+        "deque": collections.deque,
+        "collections": collections,
+        "datetime": datetime_module.datetime,
+        "date": datetime_module.date,
+        "timedelta": datetime_module.timedelta,
+        "data_files": data_files,
+    }
+
+
+def run_code(code: str, namespace: dict) -> dict:
+    """Kodu çalıştırır; stdout/stderr, son satır ifadesinin değeri ve varsa traceback döner."""
+    stdout_buffer = io.StringIO()
+    stderr_buffer = io.StringIO()
+    result_value = None
+    error = None
+    with redirect_stdout(stdout_buffer), redirect_stderr(stderr_buffer):
+        try:
+            exec(compile(code, "<string>", "exec"), namespace)
+            # exec() değer döndürmez; son satır bir ifade ise (print değilse) değerini yakala
+            last_line = code.strip().split("\n")[-1].strip()
+            if last_line and not last_line.startswith("#") and "=" not in last_line and not last_line.startswith("print("):
+                try:
+                    result_value = eval(last_line, namespace)
+                except Exception:
+                    pass
+        except BaseException:
+            error = traceback.format_exc()
+    return {
+        "stdout": stdout_buffer.getvalue(),
+        "stderr": stderr_buffer.getvalue(),
+        "result": None if result_value is None else str(result_value),
+        "error": error,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--memory-mb", type=int, default=0)
+    args = parser.parse_args()
+
+    # Protokol kanalları ayrı fd'lerde tutulur; kodun os.write(1, ...) gibi çıktıları protokolü bozmasın,
+    # input() / sys.stdin.read() iş kanalını okuyup zaman aşımına kadar asılı kalmasın
+    protocol = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8")
+    jobs = os.fdopen(os.dup(sys.stdin.fileno()), "r", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, sys.stdout.fileno())
+    os.dup2(devnull, sys.stdin.fileno())
+    project_root = os.getcwd()
+
+    _set_memory_limit(args.memory_mb)
+    data_files = _DataFiles(os.path.join(os.getcwd(), "data"))
+    data_files.refresh()
+
+    protocol.write(json.dumps({"ready": True}) + "\n")
+    protocol.flush()
+
+    for line in jobs:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        # Önceki işin os.chdir() veya sys.stdin değişiklikleri sonraki işlere taşınmaz (./data yolları göreli)
+        os.chdir(project_root)
+        sys.stdin = open(os.devnull, encoding="utf-8")
+        _set_cpu_limit(job.get("cpu_seconds") or 0)
+        result = run_code(job["code"], create_namespace(data_files.view()))
+        result["id"] = job.get("id")
+        sys.stdin.close()
+        protocol.write(json.dumps(result, ensure_ascii=False) + "\n")
+        protocol.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
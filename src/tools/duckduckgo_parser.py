@@ -0,0 +1,77 @@
+"""
+DuckDuckGo HTML sonuç sayfasının ayrıştırılması.
+Varsayılan "lxml" arka ucu sayfayı parça parça besleyen bir pull parser ile okur ve max_results sonuç
+bulununca durur; sayfanın geri kalanı (diğer sonuçlar, sayfalama formu, script'ler) hiç ayrıştırılmaz.
+"html.parser" arka ucu eski davranıştır (saf Python BeautifulSoup, tüm ağaç) ve lxml yoksa kullanılır.
+"""
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+except ImportError:  # lxml opsiyonel; yoksa BeautifulSoup'un saf Python ayrıştırıcısı kullanılır
+    etree = None
+
+BACKENDS = ("lxml", "html.parser")
+DEFAULT_BACKEND = "lxml" if etree is not None else "html.parser"
+
+# Pull parser'a bir seferde beslenen karakter sayısı; küçük parça → erken durma, büyük parça → az çağrı
+FEED_CHUNK_CHARS = 8192
+
+
+def _clean(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _classes(value: str | None) -> list[str]:
+    return (value or "").split()
+
+
+def _parse_lxml(html: str, max_results: int) -> list[tuple[str, str, str]]:
+    parser = etree.HTMLPullParser(events=("end",), tag="div")
+    results = []
+    for start in range(0, len(html), FEED_CHUNK_CHARS):
+        parser.feed(html[start : start + FEED_CHUNK_CHARS])
+        for _, div in parser.read_events():
+            if "result" not in _classes(div.get("class")):
+                continue
+            title = snippet = url = None
+            for a in div.iter("a"):
+                classes = _classes(a.get("class"))
+                if title is None and "result__a" in classes:
+                    title, url = _clean("".join(a.itertext())), a.get("href")
+                elif snippet is None and "result__snippet" in classes:
+                    snippet = _clean("".join(a.itertext()))
+            results.append((title or "N/A", snippet or "Özet bulunamadı", url or "N/A"))
+            div.clear()  # işlenmiş sonucun alt ağacı bellekte tutulmaz
+            if len(results) >= max_results:
+                return results
+    parser.close()
+    return results
+
+
+def _parse_soup(html: str, max_results: int) -> list[tuple[str, str, str]]:
+    soup = BeautifulSoup(html, "html.parser")
+    results = []
+    for div in soup.find_all("div", class_="result", limit=max_results):
+        title_elem = div.find("a", class_="result__a")
+        snippet_elem = div.find("a", class_="result__snippet")
+        results.append((
+            _clean(title_elem.get_text()) if title_elem else "N/A",
+            _clean(snippet_elem.get_text()) if snippet_elem else "Özet bulunamadı",
+            title_elem.get("href", "N/A") if title_elem else "N/A",
+        ))
+    return results
+
+
+def parse_results(html: str, max_results: int, backend: str = DEFAULT_BACKEND) -> list[tuple[str, str, str]]:
+    """
+    Sayfadaki ilk max_results sonucu (başlık, özet, url) olarak döndürür. Her iki arka uç da aynı sonucu
+    üretir; başlık/özet içindeki <b> vurguları ve satır sonları tek boşluğa indirgenir.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Bilinmeyen HTML ayrıştırıcı: {backend} (seçenekler: {', '.join(BACKENDS)})")
+    if max_results <= 0 or not html:
+        return []
+    if backend == "lxml" and etree is not None:
+        return _parse_lxml(html, max_results)
+    return _parse_soup(html, max_results)
@@ -0,0 +1,443 @@
+"""
+data/ altındaki JSON dosyaları için deterministik yapılandırılmış sorgu motoru.
+Sayma, toplam, ortalama, en çok/en az gibi basit toplulaştırmalar için kod üretmek yerine analyst'in
+ürettiği küçük bir sorgu tanımı (filtre / gruplama / toplulaştırma / sıralama) bellekteki sütunsal
+tablolar üzerinde çalıştırılır. Tanım soruyu ifade edemiyorsa QuerySpecError yükselir ve CoderAgent
+serbest kod üretimine döner.
+
+Tablolar:
+- Üst düzeydeki her kayıt listesi bir tablodur ("siparisler", "puanlar", "pizzalar").
+  Kayıt içindeki iç içe kayıt listesi satırlara açılır: orders.json'da her satır bir sipariş kalemidir
+  (musteri_no, isim, yas_grubu, pizza, adet). Skaler listeler ("etiketler") virgülle birleştirilir.
+- Dosyanın üst düzey skaler alanları dosya adıyla tek satırlık bir tablodur ("orders": donem, toplam_musteri).
+"""
+import json
+import os
+import threading
+
+import numpy as np
+
+from src.utils.text import normalize_tr
+
+FILTER_OPS = ("eq", "ne", "gt", "gte", "lt", "lte", "contains", "in")
+AGG_OPS = ("count", "count_distinct", "sum", "avg", "min", "max")
+
+SPEC_FORMAT = """{"table": "tablo", "where": [{"field": "alan", "op": "eq|ne|gt|gte|lt|lte|contains|in", "value": ...}], "group_by": "alan" veya null, "agg": {"op": "count|count_distinct|sum|avg|min|max", "field": "alan"} veya null, "select": ["alan", ...], "sort_by": "alan", "order": "desc|asc", "limit": sayı}"""
+
+SPEC_EXAMPLES = """- "En çok satılan pizza hangisi?" → {"table": "siparisler", "group_by": "pizza", "agg": {"op": "sum", "field": "adet"}, "order": "desc", "limit": 1}
+- "Ortalama lezzet puanı kaç?" → {"table": "puanlar", "agg": {"op": "avg", "field": "lezzet"}}
+- "Fatma Çelik hangi pizzaları sipariş etti?" → {"table": "siparisler", "where": [{"field": "isim", "op": "eq", "value": "Fatma Çelik"}], "select": ["pizza", "adet"]}
+- "100 TL'den ucuz pizzalar" → {"table": "pizzalar", "where": [{"field": "fiyat", "op": "lt", "value": 100}], "select": ["ad", "fiyat"]}"""
+
+
+class QuerySpecError(ValueError):
+    """Sorgu tanımı geçersiz veya motorun ifade edemeyeceği bir soru (kod üretimine dönülür)."""
+
+
+def _format_value(value) -> str:
+    if isinstance(value, (float, np.floating)):
+        value = float(value)
+        if np.isnan(value):
+            return "-"
+        if value.is_integer():
+            return str(int(value))
+        return f"{value:.2f}".rstrip("0").rstrip(".")
+    if isinstance(value, (np.integer,)):
+        return str(int(value))
+    if isinstance(value, (bool, np.bool_)):
+        return "evet" if value else "hayır"
+    return str(value)
+
+
+class QueryResult:
+    """
+    Sorgu sonucu. kind: "scalar" (tek değer), "pairs" ([(grup, değer), ...]) veya "rows" ([{alan: değer}, ...]).
+    text(), kodun print() çıktısına benzer düz metin üretir; CoderAgent bunu çalıştırma çıktısı gibi kullanır.
+    """
+
+    def __init__(self, kind: str, value, spec: dict):
+        self.kind = kind
+        self.value = value
+        self.spec = spec
+
+    def text(self) -> str:
+        if self.kind == "scalar":
+            return _format_value(self.value)
+        if not self.value:
+            return "Eşleşen kayıt bulunamadı."
+        if self.kind == "pairs":
+            return "\n".join(f"{_format_value(key)}: {_format_value(value)}" for key, value in self.value)
+        return "\n".join(", ".join(f"{k}: {_format_value(v)}" for k, v in row.items()) for row in self.value)
+
+
+class Table:
+    """Sütunsal tablo: her alan bir NumPy dizisidir (sayısal alanlar float64, diğerleri object)."""
+
+    def __init__(self, name: str, source: str, rows: list[dict]):
+        self.name = name
+        self.source = source
+        self.size = len(rows)
+        fields: list[str] = []
+        for row in rows:
+            fields.extend(k for k in row if k not in fields)
+        self.columns: dict[str, np.ndarray] = {}
+        # Alan tipi: "number", "bool" veya "text"
+        self.kinds: dict[str, str] = {}
+        self._normalized: dict[str, np.ndarray] = {}
+        for field in fields:
+            values = [row.get(field) for row in rows]
+            present = [v for v in values if v is not None]
+            if present and all(isinstance(v, bool) for v in present):
+                self.kinds[field] = "bool"
+                self.columns[field] = np.array(values, dtype=object)
+            elif present and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+                self.kinds[field] = "number"
+                self.columns[field] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+            else:
+                self.kinds[field] = "text"
+                self.columns[field] = np.array(values, dtype=object)
+
+    def is_numeric(self, field: str) -> bool:
+        return self.kinds[field] == "number"
+
+    def column(self, field: str) -> np.ndarray:
+        if not isinstance(field, str) or field not in self.columns:
+            raise QuerySpecError(f"'{self.name}' tablosunda '{field}' alanı yok. Alanlar: {', '.join(self.columns)}")
+        return self.columns[field]
+
+    def normalized(self, field: str) -> np.ndarray:
+        """Metin alanının normalize_tr uygulanmış hali (büyük/küçük harf ve Türkçe karakter duyarsız eşleşme için)."""
+        if field not in self._normalized:
+            self._normalized[field] = np.array(
+                ["" if v is None else normalize_tr(str(v)) for v in self.column(field)], dtype=object
+            )
+        return self._normalized[field]
+
+    def describe(self, max_examples: int = 4) -> str:
+        parts = []
+        for field, column in self.columns.items():
+            if self.kinds[field] == "number":
+                parts.append(f"{field}:sayı")
+                continue
+            if self.kinds[field] == "bool":
+                parts.append(f"{field}:true/false")
+                continue
+            distinct = list(dict.fromkeys(str(v) for v in column if v is not None))
+            if any(len(v) > 40 for v in distinct):
+                # Uzun açıklama metinleri prompt'a örnek olarak eklenmez
+                parts.append(f"{field}:metin")
+            elif len(distinct) <= max_examples:
+                parts.append(f"{field}:metin ({' | '.join(distinct)})")
+            else:
+                parts.append(f"{field}:metin (ör. {' | '.join(distinct[:2])})")
+        return f"- {self.name} ({os.path.basename(self.source)}, {self.size} satır): {', '.join(parts)}"
+
+
+def _flatten_records(records: list) -> list[dict]:
+    """Kayıtları satırlara çevirir; ilk iç içe kayıt listesi açılır, skaler listeler birleştirilir."""
+    rows = []
+    for record in records:
+        if not isinstance(record, dict):
+            continue
+        base, nested = {}, None
+        for key, value in record.items():
+            if isinstance(value, list) and value and all(isinstance(v, dict) for v in value):
+                if nested is None:
+                    nested = value
+            elif isinstance(value, list):
+                base[key] = ", ".join(str(v) for v in value)
+            elif not isinstance(value, dict):
+                base[key] = value
+        if nested is None:
+            rows.append(base)
+            continue
+        for child in nested:
+            row = dict(base)
+            for key, value in child.items():
+                if isinstance(value, (dict, list)):
+                    continue
+                row[key if key not in base else f"{key}_2"] = value
+            rows.append(row)
+    return rows
+
+
+def load_tables(path: str) -> list[Table]:
+    """Bir JSON dosyasından tabloları üretir."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        data = {os.path.splitext(os.path.basename(path))[0]: data}
+    if not isinstance(data, dict):
+        return []
+    tables = []
+    scalars = {k: v for k, v in data.items() if not isinstance(v, (dict, list))}
+    if scalars:
+        tables.append(Table(os.path.splitext(os.path.basename(path))[0], path, [scalars]))
+    for key, value in data.items():
+        if isinstance(value, list) and value and all(isinstance(v, dict) for v in value):
+            tables.append(Table(key, path, _flatten_records(value)))
+    return tables
+
+
+def parse_spec(response: str) -> dict | None:
+    """
+    LLM yanıtından sorgu tanımını çıkarır. {"query_spec": {...}} veya doğrudan {...} kabul edilir;
+    null / geçersiz JSON / "table" alanı olmayan yanıtta None döner.
+    """
+    start = response.find("{")
+    if start == -1:
+        return None
+    depth = 0
+    for i, c in enumerate(response[start:], start):
+        if c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                try:
+                    data = json.loads(response[start : i + 1])
+                except json.JSONDecodeError:
+                    return None
+                if isinstance(data, dict) and "query_spec" in data:
+                    data = data["query_spec"]
+                return data if isinstance(data, dict) and data.get("table") else None
+    return None
+
+
+class QueryEngine:
+    """
+    data_dir'deki JSON dosyalarını sütunsal tablolara yükler ve sorgu tanımlarını çalıştırır.
+    Dosyalar (boyut, mtime) değiştiğinde ilgili tablolar bir sonraki sorguda yeniden yüklenir. Thread-safe.
+    """
+
+    def __init__(self, data_dir: str = "./data"):
+        self.data_dir = data_dir
+        self._lock = threading.Lock()
+        self._stats: dict[str, tuple[int, int]] = {}
+        self._by_file: dict[str, list[Table]] = {}
+        self._tables: dict[str, Table] = {}
+
+    def _refresh(self) -> None:
+        paths = sorted(
+            os.path.join(self.data_dir, name)
+            for name in (os.listdir(self.data_dir) if os.path.isdir(self.data_dir) else [])
+            if name.lower().endswith(".json")
+        )
+        changed = False
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            stat = (st.st_size, st.st_mtime_ns)
+            if self._stats.get(path) == stat:
+                continue
+            try:
+                self._by_file[path] = load_tables(path)
+            except (OSError, json.JSONDecodeError):
+                # Okunamayan dosya sorgulanamaz; kod üretimi yine de deneyebilir
+                self._by_file[path] = []
+            self._stats[path] = stat
+            changed = True
+        for path in set(self._by_file) - set(paths):
+            del self._by_file[path]
+            del self._stats[path]
+            changed = True
+        if changed or not self._tables:
+            self._tables = {table.name: table for path in sorted(self._by_file) for table in self._by_file[path]}
+
+    def tables(self) -> dict[str, Table]:
+        with self._lock:
+            self._refresh()
+            return dict(self._tables)
+
+    def describe(self) -> str:
+        """Prompt'lar için tablo şeması (alan adları, tipleri, az sayıda değer içeren alanların değerleri)."""
+        return "\n".join(table.describe() for table in self.tables().values())
+
+    def spec_prompt(self) -> str:
+        """Analyst/coder prompt'larına eklenen sorgu tanımı açıklaması."""
+        return f"""Tablolar:
+{self.describe()}
+
+Sorgu tanımı biçimi (kullanılmayan alanları yazma):
+{SPEC_FORMAT}
+Örnekler:
+{SPEC_EXAMPLES}"""
+
+    # --- çalıştırma ---
+
+    def execute(self, spec: dict) -> QueryResult:
+        """Sorgu tanımını çalıştırır; tanım geçersizse QuerySpecError yükselir."""
+        if not isinstance(spec, dict):
+            raise QuerySpecError("Sorgu tanımı bir JSON nesnesi olmalı.")
+        tables = self.tables()
+        table = tables.get(spec["table"]) if isinstance(spec.get("table"), str) else None
+        if table is None:
+            raise QuerySpecError(f"Bilinmeyen tablo: {spec.get('table')}. Tablolar: {', '.join(tables)}")
+
+        mask = np.ones(table.size, dtype=bool)
+        where = spec.get("where") or []
+        if isinstance(where, dict):
+            where = [where]
+        for condition in where:
+            mask &= self._condition(table, condition)
+
+        order = spec.get("order") or "desc"
+        if not isinstance(order, str) or order.lower() not in ("asc", "desc"):
+            raise QuerySpecError(f"Geçersiz sıralama: {order}")
+        order = order.lower()
+        limit = spec.get("limit")
+        if limit is not None and (not isinstance(limit, int) or isinstance(limit, bool) or limit < 1):
+            raise QuerySpecError(f"Geçersiz limit: {limit}")
+
+        agg = spec.get("agg")
+        if agg:
+            if spec.get("group_by"):
+                return QueryResult("pairs", self._group(table, mask, spec["group_by"], agg, order, limit), spec)
+            return QueryResult("scalar", self._aggregate(table, mask, agg), spec)
+        if spec.get("group_by"):
+            # Toplulaştırma verilmemişse grup başına satır sayısı
+            return QueryResult("pairs", self._group(table, mask, spec["group_by"], {"op": "count"}, order, limit), spec)
+        return QueryResult("rows", self._select(table, mask, spec, order, limit), spec)
+
+    def _condition(self, table: Table, condition: dict) -> np.ndarray:
+        if not isinstance(condition, dict) or "field" not in condition:
+            raise QuerySpecError(f"Geçersiz filtre: {condition}")
+        field = condition["field"]
+        op = condition.get("op", "eq")
+        value = condition.get("value")
+        if op not in FILTER_OPS:
+            raise QuerySpecError(f"Desteklenmeyen filtre operatörü: {op}")
+        if op == "in" and value is not None and not isinstance(value, list):
+            raise QuerySpecError(f"'in' filtresinin değeri liste olmalı: {value}")
+        column = table.column(field)
+        if table.is_numeric(field):
+            if op == "in":
+                try:
+                    return np.isin(column, [float(v) for v in value or []])
+                except (TypeError, ValueError):
+                    raise QuerySpecError(f"'{field}' sayısal bir alan; değerler sayı olmalı: {value}") from None
+            if op == "contains":
+                raise QuerySpecError(f"'{field}' sayısal bir alan; contains kullanılamaz.")
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                raise QuerySpecError(f"'{field}' sayısal bir alan; değer sayı olmalı: {value}") from None
+            return {
+                "eq": column == number,
+                "ne": column != number,
+                "gt": column > number,
+                "gte": column >= number,
+                "lt": column < number,
+                "lte": column <= number,
+            }[op]
+        if table.kinds[field] == "bool":
+            target = value if isinstance(value, bool) else normalize_tr(str(value)) in ("true", "evet", "1")
+            matches = np.array([v is target for v in column], dtype=bool)
+            if op in ("eq", "ne"):
+                return matches if op == "eq" else ~matches
+            raise QuerySpecError(f"'{field}' evet/hayır alanı; sadece eq/ne kullanılabilir.")
+        normalized = table.normalized(field)
+        if op == "in":
+            targets = {normalize_tr(str(v)) for v in value or []}
+            return np.array([v in targets for v in normalized], dtype=bool)
+        target = normalize_tr(str(value))
+        if op == "eq":
+            return normalized == target
+        if op == "ne":
+            return normalized != target
+        if op == "contains":
+            return np.array([target in v for v in normalized], dtype=bool)
+        raise QuerySpecError(f"'{field}' metin alanı; {op} kullanılamaz.")
+
+    def _agg_input(self, table: Table, agg: dict) -> tuple[str, np.ndarray | None]:
+        if not isinstance(agg, dict):
+            raise QuerySpecError(f"Geçersiz toplulaştırma: {agg}")
+        op = agg.get("op")
+        if op not in AGG_OPS:
+            raise QuerySpecError(f"Desteklenmeyen toplulaştırma: {op}")
+        field = agg.get("field")
+        if op == "count" and not field:
+            return op, None
+        if not field:
+            raise QuerySpecError(f"{op} için alan gerekli.")
+        column = table.column(field)
+        if op in ("sum", "avg") and not table.is_numeric(field):
+            raise QuerySpecError(f"'{field}' sayısal değil; {op} uygulanamaz.")
+        return op, column
+
+    def _aggregate(self, table: Table, mask: np.ndarray, agg: dict):
+        op, column = self._agg_input(table, agg)
+        if column is None:
+            return int(mask.sum())
+        values = column[mask]
+        if op == "count_distinct":
+            return len({v for v in values if v is not None and v == v})
+        if table.is_numeric(agg["field"]):
+            values = values[~np.isnan(values)]
+        if op == "count":
+            return int(len(values))
+        if not len(values):
+            return float("nan")
+        if op == "sum":
+            return float(values.sum())
+        if op == "avg":
+            return float(values.mean())
+        return values.min() if op == "min" else values.max()
+
+    def _group(self, table: Table, mask: np.ndarray, group_by: str, agg: dict, order: str, limit: int | None):
+        keys = table.column(group_by)[mask]
+        if not len(keys):
+            return []
+        labels = np.array(["" if k is None else k for k in keys], dtype=object if keys.dtype == object else keys.dtype)
+        groups, inverse = np.unique(labels, return_inverse=True)
+        op, column = self._agg_input(table, agg)
+        counts = np.bincount(inverse, minlength=len(groups))
+        if column is None:
+            values = counts.astype(np.float64)
+        elif op == "count_distinct":
+            distinct = [set() for _ in groups]
+            for g, v in zip(inverse, column[mask]):
+                distinct[g].add(v)
+            values = np.array([len(s) for s in distinct], dtype=np.float64)
+        elif table.is_numeric(agg["field"]):
+            data = column[mask]
+            valid = ~np.isnan(data)
+            sums = np.bincount(inverse[valid], weights=data[valid], minlength=len(groups))
+            valid_counts = np.bincount(inverse[valid], minlength=len(groups))
+            if op == "count":
+                values = valid_counts.astype(np.float64)
+            elif op == "sum":
+                values = sums
+            elif op == "avg":
+                values = np.divide(sums, valid_counts, out=np.full(len(groups), np.nan), where=valid_counts > 0)
+            else:
+                values = np.full(len(groups), np.inf if op == "min" else -np.inf)
+                (np.minimum if op == "min" else np.maximum).at(values, inverse[valid], data[valid])
+        else:
+            raise QuerySpecError(f"'{agg['field']}' sayısal değil; {op} uygulanamaz.")
+        # Sıralama değere göre; eşitlikte grup adı sırası korunur (kararlı sıralama)
+        ranked = np.argsort(-values if order == "desc" else values, kind="stable")
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(groups[i], values[i]) for i in ranked]
+
+    def _select(self, table: Table, mask: np.ndarray, spec: dict, order: str, limit: int | None) -> list[dict]:
+        fields = spec.get("select") or list(table.columns)
+        if isinstance(fields, str):
+            fields = [fields]
+        if not isinstance(fields, list):
+            raise QuerySpecError(f"Geçersiz select: {fields}")
+        columns = {field: table.column(field) for field in fields}
+        indices = np.flatnonzero(mask)
+        sort_by = spec.get("sort_by")
+        if sort_by:
+            keys = table.column(sort_by)[indices]
+            if not table.is_numeric(sort_by):
+                keys = table.normalized(sort_by)[indices]
+            ranked = np.argsort(keys, kind="stable")
+            indices = indices[ranked[::-1] if order == "desc" else ranked]
+        if limit is not None:
+            indices = indices[:limit]
+        return [{field: columns[field][i] for field in fields} for i in indices]
@@ -1,122 +1,317 @@
+"""
+İnternet araması: Tavily API, DuckDuckGo HTML scraping ve Wikipedia özet API'si.
+Sağlayıcılar sırayla beklenmez; öncelik sırasına göre başlatılır ve bir sağlayıcı hedge_delay içinde
+sonuç vermezse (veya hata verirse) sıradaki de paralel başlatılır, ilk iyi sonuç döner.
+Tüm istekler tek bir paylaşılan httpx.AsyncClient üzerinden gider. Sonuçlar normalize edilmiş sorguya
+göre TTL'li önbellekte tutulur. Art arda hata veren sağlayıcı (circuit breaker) reset_timeout boyunca
+hiç denenmez; ölü bir sağlayıcı her sorguda tam zaman aşımı kadar süre kaybettirmez.
+"""
+import asyncio
+import json
 import os
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import quote_plus
+import time
+from urllib.parse import quote
+
+import httpx
+
+from src.tools.duckduckgo_parser import BACKENDS, DEFAULT_BACKEND, parse_results
+from src.utils.llm_cache import MemoryResponseCache
+from src.utils.text import tokenize
+
+DEFAULT_ENDPOINTS = {
+    "tavily": "https://api.tavily.com/search",
+    "duckduckgo": "https://html.duckduckgo.com/html/",
+    "wikipedia": "https://tr.wikipedia.org/api/rest_v1/page/summary/",
+}
+DEFAULT_TIMEOUTS = {"tavily": 10.0, "duckduckgo": 10.0, "wikipedia": 5.0}
+SOURCE_NAMES = {"tavily": "Tavily API", "duckduckgo": "DuckDuckGo (scraping)", "wikipedia": "Wikipedia API"}
+
+_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/91.0.4472.124 Safari/537.36"
+)
+UNAVAILABLE_MESSAGE = (
+    "Şu an internet sonuçlarına ulaşılamıyor. Lütfen biraz sonra tekrar deneyin veya Tavily API key ekleyin "
+    "(TAVILY_API_KEY environment variable)."
+)
+
+
+class CircuitBreaker:
+    """
+    Sağlayıcı başına devre kesici: failure_threshold ardışık hatadan sonra açılır ("open") ve
+    reset_timeout boyunca istek geçirmez; süre dolunca tek bir deneme isteğine izin verir ("half_open").
+    Deneme başarılıysa kapanır, başarısızsa yeniden açılır; sonuçsuz kalırsa (iptal) release() ile hak geri verilir.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 60.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial:
+            self._trial = True
+            return True
+        return False
+
+    def release(self) -> None:
+        """Sonuçlanmadan biten (iptal edilen) deneme hakkını geri verir; durum değişmez."""
+        self._trial = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial or self.failures >= self.failure_threshold:
+            self.opened_at = self.clock()
+        self._trial = False
+
 
 class SearchTool:
-    """İnternet araması. LangGraph'taki Researcher node tarafından kullanılır."""
+    """İnternet araması. LangGraph'taki Researcher node tarafından kullanılır (asearch)."""
 
-    def __init__(self, max_results: int = 3):
+    def __init__(
+        self,
+        max_results: int = 3,
+        tavily_api_key: str | None = None,
+        hedge_delay: float = 0.5,
+        cache_ttl: float | None = 600.0,
+        cache_size: int = 256,
+        failure_threshold: int = 3,
+        reset_timeout: float = 60.0,
+        timeouts: dict | None = None,
+        endpoints: dict | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        html_parser: str = DEFAULT_BACKEND,
+    ):
+        """
+        Args:
+            tavily_api_key: Verilmezse TAVILY_API_KEY ortam değişkeni kullanılır; yoksa Tavily atlanır.
+            hedge_delay: Bir sağlayıcı bu süre içinde sonuç vermezse sıradaki paralel başlatılır (saniye).
+            cache_ttl / cache_size: Sonuç önbelleğinin kayıt ömrü ve boyutu; cache_size=0 → önbellek kapalı.
+            failure_threshold / reset_timeout: Devre kesici ayarları.
+            timeouts: Sağlayıcı → istek zaman aşımı (saniye).
+            endpoints: Sağlayıcı → URL (testlerde yerel sahte sunucular için).
+            transport: Testler için özel httpx transport'u.
+            html_parser: DuckDuckGo sayfası ayrıştırıcısı ("lxml": max_results sonuçta durur, "html.parser": tüm sayfa).
+        """
+        if html_parser not in BACKENDS:
+            raise ValueError(f"Bilinmeyen HTML ayrıştırıcı: {html_parser} (seçenekler: {', '.join(BACKENDS)})")
         self.max_results = max_results
-        self.tavily_api_key = (os.getenv("TAVILY_API_KEY") or "").strip() or None
-    
-    def _search_with_tavily(self, query: str) -> tuple[str | None, str | None]:
-        """Tavily API ile arama. (sonuç_metni, hata_mesajı) döndürür."""
-        try:
-            from tavily import TavilyClient
-            
-            if not self.tavily_api_key:
-                return None, None
-
-            client = TavilyClient(api_key=self.tavily_api_key)
-            response = client.search(query, max_results=self.max_results)
-            
-            results = []
-            for result in response.get('results', [])[:self.max_results]:
-                results.append(
-                    f"Başlık: {result.get('title', 'N/A')}\n"
-                    f"Özet: {result.get('content', 'N/A')}\n"
-                    f"Kaynak: {result.get('url', 'N/A')}\n"
-                )
-            
-            return ("\n---\n".join(results) if results else None), None
-        except ImportError:
-            return None, "tavily-python yüklü değil (pip install tavily-python)"
-        except Exception as e:
-            return None, str(e)
-    
-    def _search_with_direct_scraping(self, query: str) -> str:
-        """Direct web scraping ile arama yapar (API key gerektirmez)"""
+        self.tavily_api_key = (tavily_api_key or os.getenv("TAVILY_API_KEY") or "").strip() or None
+        self.hedge_delay = hedge_delay
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.endpoints = {**DEFAULT_ENDPOINTS, **(endpoints or {})}
+        self.cache = MemoryResponseCache(max_size=cache_size, ttl_seconds=cache_ttl) if cache_size else None
+        self.breakers = {name: CircuitBreaker(failure_threshold, reset_timeout) for name in DEFAULT_ENDPOINTS}
+        self.wins = {name: 0 for name in DEFAULT_ENDPOINTS}
+        self.failures = {name: 0 for name in DEFAULT_ENDPOINTS}
+        self.html_parser = html_parser
+        self._transport = transport
+        self._http: httpx.AsyncClient | None = None
+
+    # --- bağlantı havuzu ---
+
+    def _new_http(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            headers={"User-Agent": _USER_AGENT},
+            timeout=httpx.Timeout(max(self.timeouts.values()), connect=5.0),
+            follow_redirects=True,
+            transport=self._transport,
+        )
+
+    async def start(self) -> None:
+        """Paylaşılan bağlantı havuzunu açar (ilk aramada da otomatik açılır)."""
+        if self._http is None or self._http.is_closed:
+            self._http = self._new_http()
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def __aenter__(self) -> "SearchTool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    # --- sağlayıcılar: sonuç metni veya None (sonuç yok) döndürür, ağ/HTTP hatasında exception yükseltir ---
+
+    def _format(self, title, snippet, url) -> str:
+        return f"Başlık: {title or 'N/A'}\nÖzet: {snippet or 'N/A'}\nKaynak: {url or 'N/A'}\n"
+
+    async def _search_with_tavily(self, http: httpx.AsyncClient, query: str) -> str | None:
+        """Tavily REST API (istemci nesnesi her çağrıda yeniden oluşturulmaz; paylaşılan havuz kullanılır)."""
+        response = await http.post(
+            self.endpoints["tavily"],
+            json={"api_key": self.tavily_api_key, "query": query, "max_results": self.max_results},
+            timeout=self.timeouts["tavily"],
+        )
+        response.raise_for_status()
+        results = [
+            self._format(r.get("title"), r.get("content"), r.get("url"))
+            for r in response.json().get("results", [])[: self.max_results]
+        ]
+        return "\n---\n".join(results) if results else None
+
+    def _parse_duckduckgo(self, html: str) -> str | None:
+        results = [
+            self._format(title, snippet, url)
+            for title, snippet, url in parse_results(html, self.max_results, backend=self.html_parser)
+        ]
+        return "\n---\n".join(results) if results else None
+
+    async def _search_with_direct_scraping(self, http: httpx.AsyncClient, query: str) -> str | None:
+        """DuckDuckGo HTML arama sayfasını scraping ile okur (API key gerektirmez)."""
+        response = await http.get(self.endpoints["duckduckgo"], params={"q": query}, timeout=self.timeouts["duckduckgo"])
+        response.raise_for_status()
+        # HTML ayrıştırma CPU işidir; event loop bloklanmasın
+        return await asyncio.to_thread(self._parse_duckduckgo, response.text)
+
+    async def _search_with_simple_api(self, http: httpx.AsyncClient, query: str) -> str | None:
+        """Wikipedia özet API'si (sayfa yoksa 404 → sonuç yok, hata sayılmaz)."""
+        title = quote(query.replace(" ", "_"), safe="")
+        response = await http.get(self.endpoints["wikipedia"] + title, timeout=self.timeouts["wikipedia"])
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        data = response.json()
+        return self._format(
+            data.get("title"), data.get("extract"), data.get("content_urls", {}).get("desktop", {}).get("page")
+        )
+
+    def _providers(self) -> list[str]:
+        names = ["tavily"] if self.tavily_api_key else []
+        return names + ["duckduckgo", "wikipedia"]
+
+    async def _call(self, name: str, http: httpx.AsyncClient, query: str) -> tuple[str | None, str | None]:
+        """Sağlayıcıyı zaman aşımıyla çağırır; (sonuç, hata_mesajı) döndürür ve devre kesiciyi günceller."""
+        provider = {
+            "tavily": self._search_with_tavily,
+            "duckduckgo": self._search_with_direct_scraping,
+            "wikipedia": self._search_with_simple_api,
+        }[name]
         try:
-            # DuckDuckGo HTML arama sayfasını kullanarak scraping yapıyoruz
-            search_url = f"https://html.duckduckgo.com/html/?q={quote_plus(query)}"
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            response = requests.get(search_url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            results = []
-            
-            # DuckDuckGo HTML yapısına göre sonuçları çıkar
-            result_divs = soup.find_all('div', class_='result')[:self.max_results]
-            
-            for div in result_divs:
-                title_elem = div.find('a', class_='result__a')
-                snippet_elem = div.find('a', class_='result__snippet')
-                url_elem = title_elem if title_elem else None
-                
-                title = title_elem.get_text(strip=True) if title_elem else "N/A"
-                snippet = snippet_elem.get_text(strip=True) if snippet_elem else "Özet bulunamadı"
-                url = url_elem.get('href', 'N/A') if url_elem else "N/A"
-                
-                results.append(f"Başlık: {title}\nÖzet: {snippet}\nKaynak: {url}\n")
-            
-            return "\n---\n".join(results) if results else None
-            
+            result = await asyncio.wait_for(provider(http, query), self.timeouts[name])
+        except asyncio.TimeoutError:
+            error = f"{self.timeouts[name]:.0f} saniyede yanıt gelmedi"
         except Exception as e:
-            return None
-    
-    def _search_with_simple_api(self, query: str) -> str:
-        """Basit bir alternatif: Wikipedia API (sadece Wikipedia sonuçları)"""
+            error = str(e) or type(e).__name__
+        except asyncio.CancelledError:
+            # Başka sağlayıcı kazandı: yarım deneme başarı/hata sayılmaz, half_open deneme hakkı geri verilir
+            self.breakers[name].release()
+            raise
+        else:
+            self.breakers[name].record_success()
+            return result, None
+        self.breakers[name].record_failure()
+        self.failures[name] += 1
+        return None, error
+
+    async def _search(self, http: httpx.AsyncClient, query: str) -> tuple[str, str, str | None]:
+        providers = self._providers()
+        tavily_error = None
+        names: dict[asyncio.Task, str] = {}
+        pending: set[asyncio.Task] = set()
         try:
-            # Wikipedia API kullanarak arama
-            wiki_url = "https://tr.wikipedia.org/api/rest_v1/page/summary/" + quote_plus(query)
-            response = requests.get(wiki_url, timeout=5)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return (
-                    f"Başlık: {data.get('title', 'N/A')}\n"
-                    f"Özet: {data.get('extract', 'N/A')}\n"
-                    f"Kaynak: {data.get('content_urls', {}).get('desktop', {}).get('page', 'N/A')}\n"
-                )
-        except Exception:
-            pass
-        return None
+            while True:
+                timeout = None
+                # Devre kesiciye sağlayıcı gerçekten başlatılacağı an sorulur; hiç başlatılmayan sağlayıcı
+                # half_open deneme hakkını harcamaz
+                while providers:
+                    name = providers.pop(0)
+                    if self.breakers[name].allow():
+                        task = asyncio.create_task(self._call(name, http, query))
+                        names[task] = name
+                        pending.add(task)
+                        timeout = self.hedge_delay if providers else None
+                        break
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result, error = task.result()
+                    if names[task] == "tavily" and error:
+                        tavily_error = error
+                    if result:
+                        self.wins[names[task]] += 1
+                        return result, SOURCE_NAMES[names[task]], tavily_error
+                # Zaman aşımı (hedge) veya başarısız sonuç: sıradaki sağlayıcı başlatılır
+        finally:
+            for task in pending:
+                task.cancel()
+            # İptaller işlensin (devre kesici deneme hakları geri verilsin) diye görevlerin bitmesi beklenir
+            await asyncio.gather(*pending, return_exceptions=True)
+        return UNAVAILABLE_MESSAGE, "yok", tavily_error
 
-    def search(self, query: str) -> str:
-        """İnternet araması yapar. Sonucu döndürür."""
-        result, _, _ = self.search_with_source(query)
-        return result
+    # --- genel arayüz ---
 
-    def search_with_source(self, query: str) -> tuple[str, str, str | None]:
+    async def _cached_search(self, http: httpx.AsyncClient, query: str) -> tuple[str, str, str | None]:
+        key = " ".join(tokenize(query))
+        if self.cache is not None and key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                text, source = json.loads(cached)
+                return text, f"{source} (önbellek)", None
+        text, source, tavily_error = await self._search(http, query)
+        # Sadece başarılı sonuçlar saklanır; "ulaşılamıyor" mesajı bir sonraki sorguda yeniden denenir
+        if self.cache is not None and key and source != "yok":
+            self.cache.set(key, json.dumps([text, source], ensure_ascii=False))
+        return text, source, tavily_error
+
+    async def asearch_with_source(self, query: str) -> tuple[str, str, str | None]:
         """
         İnternet araması yapar. (sonuç_metni, kullanılan_kaynak, tavily_hata_mesajı) döndürür.
+        Önbellekteki sonuçlarda kaynak adının sonuna " (önbellek)" eklenir.
         """
-        tavily_error = None
-        
-        # 1. Tavily API
-        if self.tavily_api_key:
-            result, err = self._search_with_tavily(query)
-            if err:
-                tavily_error = err
-            if result:
-                return result, "Tavily API", tavily_error
-
-        # 2. Direct scraping dene
-        result = self._search_with_direct_scraping(query)
-        if result:
-            return result, "DuckDuckGo (scraping)", tavily_error
-
-        # 3. Wikipedia fallback
-        result = self._search_with_simple_api(query)
-        if result:
-            return result, "Wikipedia API", tavily_error
-
-        # Hiçbiri çalışmazsa
-        msg = "Şu an internet sonuçlarına ulaşılamıyor. Lütfen biraz sonra tekrar deneyin veya Tavily API key ekleyin (TAVILY_API_KEY environment variable)."
-        return msg, "yok", tavily_error
\ No newline at end of file
+        if self._http is None or self._http.is_closed:
+            await self.start()
+        return await self._cached_search(self._http, query)
+
+    async def asearch(self, query: str) -> str:
+        """İnternet araması yapar. Sonucu döndürür."""
+        text, _, _ = await self.asearch_with_source(query)
+        return text
+
+    async def _search_once(self, query: str) -> tuple[str, str, str | None]:
+        # Senkron çağrılar kendi event loop'unda çalışır; paylaşılan havuz o loop'a bağlanmasın diye geçici istemci
+        async with self._new_http() as http:
+            return await self._cached_search(http, query)
+
+    def search_with_source(self, query: str) -> tuple[str, str, str | None]:
+        """asearch_with_source'un senkron sarmalayıcısı (event loop dışından çağrılmalıdır)."""
+        return asyncio.run(self._search_once(query))
+
+    def search(self, query: str) -> str:
+        """asearch'ün senkron sarmalayıcısı (event loop dışından çağrılmalıdır)."""
+        text, _, _ = self.search_with_source(query)
+        return text
+
+    def stats(self) -> dict:
+        """Sağlayıcı başına kazanılan arama / hata sayısı, devre kesici durumu ve önbellek isabetleri."""
+        return {
+            "providers": {
+                name: {"wins": self.wins[name], "failures": self.failures[name], "circuit": self.breakers[name].state}
+                for name in self._providers()
+            },
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
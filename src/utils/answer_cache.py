@@ -0,0 +1,167 @@
+"""
+Tüm graf için anlamsal yanıt önbelleği.
+Aynı sorunun farklı ifadeleri ("en çok satan pizza hangisi" / "hangi pizza en çok satıldı") analyst +
+researcher/coder + özet LLM çağrılarını yeniden çalıştırmaz: sorgu embed edilir, önceki sorgular arasında
+benzerliği eşiğin üzerinde olan varsa onun yanıtı döner.
+Yanlış eşleşmeyi önlemek için embedding benzerliğine ek olarak sayılar birebir aynı olmalı, sorguların
+kelime kökleri yeterince örtüşmeli ve sorgular data/ alan adı veya varlık adı olan bir kökte ayrışmamalıdır
+("Elif Kaya'nın puanı" ile "Mehmet Demir'in puanı", "ortalama hız puanı" ile "ortalama lezzet puanı" eşleşmez).
+data/ altındaki dosyalar değiştiğinde (parmak izi) önbellek kendiliğinden boşaltılır.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from src.utils.cache_match import data_terms
+from src.utils.cache_stats import HitStats
+from src.utils.ingestion import data_fingerprint
+from src.utils.text import query_signature
+
+
+class _Entry:
+    def __init__(self, query: str, vector: np.ndarray, response: str, decision: dict, elapsed: float):
+        self.query = query
+        self.vector = vector
+        self.response = response
+        self.decision = decision
+        self.elapsed = elapsed
+        self.created_at = time.time()
+        self.numbers, self.stems = query_signature(query)
+
+
+class SemanticAnswerCache(HitStats):
+    """
+    Süreç içi anlamsal önbellek (REPL ve sunucu oturumları arasında paylaşılır).
+    lookup / store bloklayan embedding çağrısı yapabilir; graf node'ları bunları thread'de çalıştırır.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        data_dir: str,
+        threshold: float = 0.92,
+        min_overlap: float = 0.5,
+        max_entries: int = 512,
+        ttl_seconds: float | None = 3600.0,
+        check_interval: float = 2.0,
+    ):
+        """
+        Args:
+            embeddings: embed_query metodu olan LangChain Embeddings (vector store ile aynı model).
+            data_dir: Değişiklikleri izlenen veri klasörü.
+            threshold: Kosinüs benzerliği eşiği.
+            min_overlap: Sorguların kelime kökü kümelerinin en az Jaccard örtüşmesi.
+            ttl_seconds: Kayıt ömrü (internet aramasıyla üretilmiş yanıtlar zamanla eskir); None = süresiz.
+            check_interval: data/ parmak izinin en sık kontrol edilme aralığı (saniye).
+        """
+        self.embeddings = embeddings
+        self.data_dir = data_dir
+        self.threshold = threshold
+        self.min_overlap = min_overlap
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.check_interval = check_interval
+        self._entries: list[_Entry] = []
+        self._matrix: np.ndarray | None = None
+        # Aynı sorgu lookup ve store'da iki kez embed edilmesin
+        self._vectors: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint = data_fingerprint(data_dir)
+        self._terms = data_terms(data_dir)
+        self._checked_at = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _check_data(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        fingerprint = data_fingerprint(self.data_dir)
+        if fingerprint != self._fingerprint:
+            self._fingerprint = fingerprint
+            self._terms = data_terms(self.data_dir)
+            if self._entries:
+                self.invalidations += 1
+            self.clear()
+
+    def _vector(self, query: str) -> np.ndarray:
+        with self._lock:
+            vector = self._vectors.get(query)
+        if vector is not None:
+            return vector
+        vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        norm = float(np.linalg.norm(vector)) or 1.0
+        vector = vector / norm
+        with self._lock:
+            self._vectors[query] = vector
+            while len(self._vectors) > 64:
+                self._vectors.popitem(last=False)
+        return vector
+
+    def _expired(self, entry: _Entry) -> bool:
+        return self.ttl_seconds is not None and time.time() - entry.created_at > self.ttl_seconds
+
+    def lookup(self, query: str) -> _Entry | None:
+        """Eşiği geçen en benzer önceki sorgunun kaydı; yoksa None."""
+        query = query.strip()
+        self._check_data()
+        if not query or not self._entries:
+            with self._lock:
+                self.misses += 1
+            return None
+        vector = self._vector(query)
+        numbers, stems = query_signature(query)
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.vstack([e.vector for e in self._entries])
+            similarities = self._matrix @ vector
+            for index in np.argsort(-similarities):
+                if similarities[index] < self.threshold:
+                    break
+                entry = self._entries[index]
+                if self._expired(entry) or entry.numbers != numbers:
+                    continue
+                union = entry.stems | stems
+                if union and len(entry.stems & stems) / len(union) < self.min_overlap:
+                    continue
+                if (entry.stems ^ stems) & self._terms:
+                    continue
+                self.hits += 1
+                self.saved_seconds += entry.elapsed
+                return entry
+            self.misses += 1
+        return None
+
+    def store(self, query: str, response: str, decision: dict | None = None, elapsed: float = 0.0) -> None:
+        """Grafın ürettiği yanıtı kaydeder; elapsed, yanıtın üretim süresidir (isabetlerde kazanılan süre)."""
+        query = query.strip()
+        if not query or not response:
+            return
+        vector = self._vector(query)
+        entry = _Entry(query, vector, response, dict(decision or {}), elapsed)
+        with self._lock:
+            self._entries = [e for e in self._entries if e.query != query and not self._expired(e)]
+            self._entries.append(entry)
+            if len(self._entries) > self.max_entries:
+                self._entries = self._entries[-self.max_entries:]
+            self._matrix = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = []
+            self._matrix = None
+
+    def _extra_stats(self) -> dict:
+        return {
+            "saved_seconds": round(self.saved_seconds, 3),
+            "entries": len(self._entries),
+            "invalidations": self.invalidations,
+        }
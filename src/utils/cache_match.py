@@ -0,0 +1,47 @@
+"""
+Anlamsal yanıt önbelleği ve kod önbelleğinin ortak eşleştirme yardımcıları.
+İki soru sadece bir data/ alan adında ("hiz" / "lezzet") veya varlık adında ("Elif Kaya" / "Can Öztürk")
+ayrışıyorsa kelime kökleri yüksek oranda örtüşse de aynı cevap/kod kullanılamaz.
+"""
+import functools
+import json
+
+from src.utils.ingestion import data_file_stats, data_fingerprint
+from src.utils.text import query_signature
+
+
+def data_terms(data_dir: str) -> frozenset[str]:
+    """
+    data_dir'deki JSON dosyalarının alan adlarının ("hiz", "lezzet") ve kısa metin değerlerinin ("Elif Kaya",
+    "Margherita") kelime kökleri. Önbellekler, sadece bu köklerden birinde ayrışan iki soruyu eşleştirmez.
+    """
+    return _data_terms(data_dir, data_fingerprint(data_dir))
+
+
+@functools.lru_cache(maxsize=8)
+def _data_terms(data_dir: str, fingerprint: str) -> frozenset[str]:
+    terms: set[str] = set()
+
+    def walk(value) -> None:
+        if isinstance(value, dict):
+            for key, item in value.items():
+                terms.update(query_signature(key)[1])
+                walk(item)
+        elif isinstance(value, list):
+            for item in value:
+                walk(item)
+        elif isinstance(value, str):
+            stems = query_signature(value)[1]
+            # Açıklama gibi serbest metinler atlanır; sadece isim/etiket gibi kısa değerler varlık sayılır
+            if len(stems) <= 3:
+                terms.update(stems)
+
+    for path in data_file_stats(data_dir):
+        if not path.endswith(".json"):
+            continue
+        try:
+            with open(path, encoding="utf-8") as f:
+                walk(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return frozenset(terms)
@@ -0,0 +1,21 @@
+class HitStats:
+    """
+    Önbelleklerin ortak isabet istatistikleri. Alt sınıf hits / misses sayaçlarını kendi __init__'inde
+    sıfırlar ve artırır; önbelleğe özgü alanları _extra_stats() ile ekler.
+    """
+
+    hits: int
+    misses: int
+
+    def _extra_stats(self) -> dict:
+        return {}
+
+    def stats(self) -> dict:
+        """hits / misses / hit_rate ve önbelleğe özgü alanlar (metrik ve log için)."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            **self._extra_stats(),
+        }
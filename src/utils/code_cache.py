@@ -0,0 +1,204 @@
+"""
+CoderAgent için başarılı üretilmiş kod önbelleği.
+Aynı veya çok benzer bir hesaplama sorusu tekrar geldiğinde smart modelle kod yeniden yazdırılmaz;
+önceden çalışmış program doğrudan tekrar çalıştırılır (sonuç güncel veriyle yeniden hesaplanır).
+Eşleşme normalize edilmiş sorgu terimleri üzerindendir: sayılar birebir aynı olmalı, kelime kökleri
+(ilk 5 harf) yüksek oranda örtüşmeli ve farklı kökler arasında data/ alan adı veya varlık adı olmamalıdır
+("Fatma Çelik'in siparişleri" ile "Elif Kaya'nın siparişleri", "ortalama hız puanı" ile "ortalama lezzet puanı" eşleşmez).
+Kodun okuduğu data/ dosyaları (boyut, mtime) ile saklanır; dosyalardan biri değişirse kayıt geçersiz olur.
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from src.utils.cache_match import data_terms
+from src.utils.cache_stats import HitStats
+from src.utils.ingestion import data_file_stats
+from src.utils.text import query_signature, tokenize
+
+# Kod içindeki "data/orders.json" gibi yollar; hiçbiri yoksa kod tüm data/ klasörüne bağlı sayılır
+_DATA_PATH_RE = re.compile(r"data[/\\]+([\w.\-]+\.\w+)")
+
+
+def normalize_query(query: str) -> str:
+    """Önbellek anahtarı: Türkçe küçük harf + ASCII katlanmış terimler, tek boşlukla."""
+    return " ".join(tokenize(query))
+
+
+class CodeEntry:
+    def __init__(
+        self,
+        query: str,
+        code: str,
+        files: dict[str, list[int] | None],
+        whole_dir: bool = False,
+        created_at: float | None = None,
+        uses: int = 0,
+    ):
+        self.query = query
+        self.code = code
+        self.files = files
+        # Kod belirli bir dosya adı içermiyorsa data/ klasörüne dosya eklenmesi/silinmesi de kaydı geçersiz kılar
+        self.whole_dir = whole_dir
+        self.created_at = created_at if created_at is not None else time.time()
+        self.uses = uses
+        self.numbers, self.stems = query_signature(query)
+
+    def to_dict(self) -> dict:
+        return {
+            "query": self.query,
+            "code": self.code,
+            "files": self.files,
+            "whole_dir": self.whole_dir,
+            "created_at": self.created_at,
+            "uses": self.uses,
+        }
+
+
+class CodeCache(HitStats):
+    """
+    Süreç içi (path verilirse JSON ile diskte kalıcı) kod önbelleği; thread-safe.
+    Kayıtlar normalize edilmiş sorguya göre LRU sırasıyla tutulur.
+    """
+
+    def __init__(self, data_dir: str = "./data", path: str | None = None, threshold: float = 0.8, max_entries: int = 256):
+        """
+        Args:
+            data_dir: Üretilen kodun okuduğu veri klasörü.
+            path: Verilirse önbellek bu JSON dosyasına yazılır ve açılışta yüklenir.
+            threshold: Birebir aynı olmayan sorgular için kelime kökü kümelerinin en az Jaccard örtüşmesi.
+        """
+        self.data_dir = data_dir
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, CodeEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    items = json.load(f).get("entries", [])
+            except (OSError, json.JSONDecodeError):
+                # Bozuk dosya: boş önbellekle devam edilir
+                items = []
+            for item in items:
+                entry = CodeEntry(
+                    item["query"],
+                    item["code"],
+                    item.get("files") or {},
+                    whole_dir=item.get("whole_dir", False),
+                    created_at=item.get("created_at"),
+                    uses=item.get("uses", 0),
+                )
+                self._entries[normalize_query(entry.query)] = entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _referenced_files(self, code: str) -> tuple[dict[str, list[int] | None], bool]:
+        """Kodun okuduğu data/ dosyalarının {yol: [boyut, mtime_ns]} kaydı ve kodun tüm klasöre bağlı olup olmadığı."""
+        stats = data_file_stats(self.data_dir)
+        names = set(_DATA_PATH_RE.findall(code))
+        if not names:
+            return {path: list(stat) for path, stat in stats.items()}, True
+        by_name = {os.path.basename(path): path for path in stats}
+        files = {by_name[name]: list(stats[by_name[name]]) for name in names if name in by_name}
+        # Kodun okuduğu ama data/ altında olmayan dosya: sonradan oluşturulursa da kayıt geçersiz olur
+        files.update({os.path.join(self.data_dir, name): None for name in names if name not in by_name})
+        return files, False
+
+    def _is_fresh(self, entry: CodeEntry) -> bool:
+        if entry.whole_dir:
+            current = {path: list(stat) for path, stat in data_file_stats(self.data_dir).items()}
+            return current == entry.files
+        for path, stat in entry.files.items():
+            try:
+                st = os.stat(path)
+            except OSError:
+                if stat is not None:
+                    return False
+                continue
+            if stat is None or [st.st_size, st.st_mtime_ns] != list(stat):
+                return False
+        return True
+
+    def lookup(self, query: str) -> CodeEntry | None:
+        """Bu soru için tekrar çalıştırılabilecek kod kaydı; yoksa veya veri değiştiyse None."""
+        key = normalize_query(query)
+        if not key:
+            return None
+        numbers, stems = query_signature(query)
+        terms = data_terms(self.data_dir)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                best = 0.0
+                for candidate in self._entries.values():
+                    # Farklı alan ("hiz" / "lezzet") veya varlık üzerine soru: aynı kod yanlış cevap üretir
+                    if candidate.numbers != numbers or (candidate.stems ^ stems) & terms:
+                        continue
+                    union = candidate.stems | stems
+                    overlap = len(candidate.stems & stems) / len(union) if union else 0.0
+                    if overlap >= self.threshold and overlap > best:
+                        entry, best = candidate, overlap
+            if entry is not None and not self._is_fresh(entry):
+                self._entries.pop(normalize_query(entry.query), None)
+                self.invalidations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(normalize_query(entry.query))
+            entry.uses += 1
+            self.hits += 1
+            return entry
+
+    def store(self, query: str, code: str) -> None:
+        """Başarıyla çalışıp çıktı üretmiş kodu, okuduğu dosyaların o anki durumuyla kaydeder."""
+        key = normalize_query(query)
+        if not key or not code.strip():
+            return
+        files, whole_dir = self._referenced_files(code)
+        entry = CodeEntry(query, code, files, whole_dir=whole_dir)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        self.save()
+
+    def discard(self, query: str) -> None:
+        """Tekrar çalıştırıldığında hata veren kaydı siler."""
+        with self._lock:
+            removed = self._entries.pop(normalize_query(query), None)
+        if removed is not None:
+            self.save()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        self.save()
+
+    def save(self) -> None:
+        """path verilmişse önbelleği atomik olarak yazar."""
+        if not self.path:
+            return
+        with self._lock:
+            items = [entry.to_dict() for entry in self._entries.values()]
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "entries": items}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def _extra_stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,205 @@
+import glob
+import json
+import os
+import re
+
+from src.utils.json_chunker import iter_records, record_text
+from src.utils.lexical_index import LexicalIndex
+from src.utils.text import estimate_tokens
+
+
+def _squash(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class _FileEntry:
+    def __init__(self, path: str, mtime: float, size: int, content: str, count_tokens=estimate_tokens):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.mtime = mtime
+        self.size = size
+        self.content = content
+        self.tokens = count_tokens(content)
+        passages = self._json_passages(content) if path.endswith(".json") else None
+        self.passages = passages if passages is not None else self._split_passages(content)
+
+    @staticmethod
+    def _json_passages(content: str) -> list[str] | None:
+        """JSON dosyasında kayıt başına bir parça (vector store chunk'larıyla aynı sınırlar); geçersiz JSON'da None."""
+        try:
+            data = json.loads(content)
+        except ValueError:
+            return None
+        return [record_text(record_path, value) for record_path, _, _, value in iter_records(data)]
+
+    @staticmethod
+    def _split_passages(content: str, max_chars: int = 400) -> list[str]:
+        """Boş satırlarla ayrılmış bloklar; uzun bloklar satır satır max_chars'lık parçalara bölünür."""
+        passages = []
+        for block in re.split(r"\n\s*\n", content):
+            block = block.strip()
+            if not block:
+                continue
+            if len(block) <= max_chars:
+                passages.append(block)
+                continue
+            current = []
+            size = 0
+            for line in block.splitlines():
+                if current and size + len(line) > max_chars:
+                    passages.append("\n".join(current))
+                    current, size = [], 0
+                current.append(line)
+                size += len(line) + 1
+            if current:
+                passages.append("\n".join(current))
+        return passages
+
+
+class ContextBuilder:
+    """
+    Researcher için token bütçeli yerel bağlam oluşturucu.
+    - data/ dosyaları mtime/boyut değişene kadar bellekte tutulur (her soruda diskten okunmaz).
+    - Dosya parçaları BM25 skoruyla (LexicalIndex), RAG chunk'ları vektör sırasıyla sıralanır ve
+      reciprocal rank fusion ile birleştirilir.
+    - Bir dosya ilgiliyse ve tamamı bütçeye sığıyorsa dosya bütün olarak eklenir; sığmıyorsa
+      sadece ilgili parçaları eklenir.
+    - Zaten eklenmiş metinle örtüşen RAG chunk'ları tekrar eklenmez.
+    """
+
+    def __init__(
+        self,
+        data_dir: str,
+        token_budget: int = 800,
+        whole_file_max_tokens: int = 500,
+        extensions: tuple[str, ...] = ("*.txt", "*.md", "*.json"),
+        rrf_k: int = 60,
+        count_tokens=estimate_tokens,
+    ):
+        """count_tokens: Token sayma fonksiyonu (ör. TokenCounter.count); varsayılan karakter tabanlı tahmin."""
+        self.data_dir = data_dir
+        self.token_budget = token_budget
+        self.whole_file_max_tokens = whole_file_max_tokens
+        self.extensions = extensions
+        self.rrf_k = rrf_k
+        self.count_tokens = count_tokens
+        self._files: dict[str, _FileEntry] = {}
+        # Dosya parçalarının BM25 indeksi (vector store'un sözcüksel indeksiyle aynı terimler); sadece değişen dosyalar yeniden indekslenir
+        self._index = LexicalIndex()
+
+    # --- dosya önbelleği ---
+
+    def _load_files(self) -> list[_FileEntry]:
+        """data_dir'deki dosyaları döndürür; mtime/boyut değişmediyse önbellekteki içerik kullanılır."""
+        if not os.path.exists(self.data_dir):
+            self._files.clear()
+            self._index.clear()
+            return []
+        paths = []
+        for ext in self.extensions:
+            paths.extend(glob.glob(os.path.join(self.data_dir, ext)))
+        paths = sorted(paths)
+        for path in set(self._files) - set(paths):
+            self._unindex(self._files.pop(path))
+        entries = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                entry = self._files.get(path)
+                if entry is None or entry.mtime != stat.st_mtime or entry.size != stat.st_size:
+                    with open(path, "r", encoding="utf-8") as f:
+                        content = f.read().strip()
+                    if entry is not None:
+                        self._unindex(entry)
+                    entry = _FileEntry(path, stat.st_mtime, stat.st_size, content, self.count_tokens)
+                    self._files[path] = entry
+                    self._index.add([f"{path}#{i}" for i in range(len(entry.passages))], entry.passages)
+            except (OSError, UnicodeDecodeError):
+                continue
+            if entry.content:
+                entries.append(entry)
+        return entries
+
+    def _unindex(self, entry: _FileEntry) -> None:
+        self._index.delete([f"{entry.path}#{i}" for i in range(len(entry.passages))])
+
+    # --- sıralama ---
+
+    def build(self, query: str, rag_docs: list | None = None, token_budget: int | None = None) -> str:
+        """
+        Sorgu için bütçeye sığan yerel bağlam metnini döndürür (boşsa "").
+        token_budget: Bu çağrı için bütçe (ajanın prompt bütçesinden kalan); None → self.token_budget.
+        """
+        files = self._load_files()
+        rag_docs = rag_docs or []
+
+        # Aday parçalar: (anahtar, dosya, metin)
+        candidates = [(f"{entry.path}#{i}", entry, p) for entry in files for i, p in enumerate(entry.passages)]
+        lexical = self._index.scores(query)
+        keyword = [lexical.get(key, 0.0) for key, _, _ in candidates]
+        fused: dict[str, float] = {}
+        ranked = sorted((s, i) for i, s in enumerate(keyword) if s > 0)
+        for rank, (_, i) in enumerate(reversed(ranked)):
+            fused[candidates[i][0]] = 1.0 / (self.rrf_k + rank + 1)
+        for rank, doc in enumerate(rag_docs):
+            fused[f"rag#{rank}"] = fused.get(f"rag#{rank}", 0.0) + 1.0 / (self.rrf_k + rank + 1)
+
+        # Dosya ilgisi: parçalarının en iyi füzyon skoru ve RAG'de kaynak olarak geçmesi
+        file_score: dict[str, float] = {}
+        for key, entry, _ in candidates:
+            if key in fused:
+                file_score[entry.path] = max(file_score.get(entry.path, 0.0), fused[key])
+        for rank, doc in enumerate(rag_docs):
+            source = os.path.abspath((getattr(doc, "metadata", None) or {}).get("source", ""))
+            for entry in files:
+                if os.path.abspath(entry.path) == source:
+                    file_score[entry.path] = max(file_score.get(entry.path, 0.0), fused[f"rag#{rank}"])
+
+        # Tek sıralı liste: (skor, bütün_dosya_mı, bölüm_metni, ham_metin, dosya_yolu)
+        # Eşit skorda bütün dosya parçalarından önce gelir; sığmazsa parçaları yarışmaya devam eder.
+        items = []
+        for path, score in file_score.items():
+            entry = self._files[path]
+            if entry.tokens <= self.whole_file_max_tokens:
+                items.append((score, 1, f"--- Dosya: {entry.name} ---\n{entry.content}", entry.content, path))
+        for key, entry, passage in candidates:
+            if key in fused:
+                items.append((fused[key], 0, f"--- Dosya: {entry.name} (ilgili bölüm) ---\n{passage}", passage, entry.path))
+        for rank, doc in enumerate(rag_docs):
+            # Kaynağı data/ dosyası olan chunk'lar o dosya bütün olarak eklendiyse atlanır
+            source = os.path.abspath((getattr(doc, "metadata", None) or {}).get("source", ""))
+            path = next((entry.path for entry in files if os.path.abspath(entry.path) == source), None)
+            items.append((fused[f"rag#{rank}"], 0, f"--- RAG ---\n{doc.page_content}", doc.page_content, path))
+
+        budget = self.token_budget if token_budget is None else token_budget
+        sections: list[str] = []
+        included_text: list[str] = []
+        included_paths: list[str | None] = []
+        whole_files: set[str] = set()
+        for _, is_whole, section, text, path in sorted(items, key=lambda x: (x[0], x[1]), reverse=True):
+            if not is_whole and path in whole_files:
+                continue
+            squashed = _squash(text)
+            if not squashed or any(squashed in done or done in squashed for done in included_text):
+                continue
+            cost = self.count_tokens(section)
+            if cost > budget:
+                continue
+            sections.append(section)
+            # Bütün dosya eklendiğinde o dosyadan önce eklenmiş parçalar çıkarılır
+            if is_whole:
+                whole_files.add(path)
+                kept = [
+                    (sec, txt, src)
+                    for sec, txt, src in zip(sections[:-1], included_text, included_paths)
+                    if not (txt in squashed or src == path)
+                ]
+                budget += sum(self.count_tokens(sec) for sec in sections[:-1]) - sum(self.count_tokens(sec) for sec, _, _ in kept)
+                sections = [sec for sec, _, _ in kept] + [section]
+                included_text = [txt for _, txt, _ in kept]
+                included_paths = [src for _, _, src in kept]
+            included_text.append(squashed)
+            included_paths.append(path)
+            budget -= cost
+
+        return "\n\n".join(sections)
@@ -1,30 +1,89 @@
+import json
 import os
-from langchain_community.document_loaders import PyPDFLoader, TextLoader
+from typing import Iterator
+
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from src.utils.json_chunker import json_file_documents
+
+TEXT_EXTENSIONS = (".txt", ".md")
+
 
 class DocumentProcessor:
-    """PDF, TXT, MD dosyalarını yükleyip parçalara ayırır. RAG / vector store için kullanılır."""
+    """PDF, TXT, MD, JSON dosyalarını yükleyip parçalara ayırır. RAG / vector store için kullanılır."""
 
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, block_chars: int = 512_000):
+        """
+        Args:
+            file_path: Dosya yolu.
+            block_chars: Büyük metin dosyaları bu boyuttaki bölümler halinde okunur;
+                bundan küçük dosyalar tek parça işlenir (process() çıktısı değişmez).
+        """
         self.file_path = file_path
+        self.block_chars = block_chars
+        self.splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
 
     def process(self):
+        return list(self.iter_chunks())
+
+    def iter_chunks(self) -> Iterator[Document]:
+        """
+        Chunk'ları dosyayı tamamen belleğe almadan üretir: PDF'ler sayfa sayfa, büyük metin dosyaları
+        satır sınırlarında (mümkünse boş satırdaki bölüm sonlarında) bölünerek okunur.
+        JSON dosyalarında her mantıksal kayıt bir chunk olur (bkz. json_chunker); kayıt yolu ve alanları metadata'dadır.
+        """
         if not os.path.exists(self.file_path):
             raise FileNotFoundError(f"Döküman bulunamadı: {self.file_path}")
 
         ext = os.path.splitext(self.file_path)[-1].lower()
         if ext == ".pdf":
-            loader = PyPDFLoader(self.file_path)
-        elif ext in (".txt", ".md", ".json"):
-            loader = TextLoader(self.file_path, encoding="utf-8")
+            pages = self._iter_pdf_pages()
+        elif ext == ".json":
+            pages = self._iter_json_records()
+        elif ext in TEXT_EXTENSIONS:
+            pages = self._iter_text_blocks()
         else:
             raise ValueError(f"Desteklenmeyen format: {ext}. PDF, TXT, MD veya JSON kullanın.")
 
+        while True:
+            try:
+                page = next(pages)
+            except StopIteration:
+                return
+            except Exception as e:
+                raise RuntimeError(f"Döküman okunamadı: {e}") from e
+            yield from self.splitter.split_documents([page])
+
+    def _iter_pdf_pages(self) -> Iterator[Document]:
+        yield from PyPDFLoader(self.file_path).lazy_load()
+
+    def _iter_json_records(self) -> Iterator[Document]:
+        """Kayıtlar dosyadan akış halinde ayrıştırılır; dosya bütün olarak belleğe alınmaz."""
+        documents = json_file_documents(self.file_path)
         try:
-            documents = loader.load()
-        except Exception as e:
-            raise RuntimeError(f"Döküman okunamadı: {e}") from e
+            first = next(documents)
+        except StopIteration:
+            return
+        except json.JSONDecodeError:
+            # Geçerli JSON değilse (ör. satır satır JSON) düz metin gibi işlenir; doğrulama ilk kayıttan önce yapılır
+            yield from self._iter_text_blocks()
+            return
+        yield first
+        yield from documents
 
-        splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-        return splitter.split_documents(documents)
\ No newline at end of file
+    def _iter_text_blocks(self) -> Iterator[Document]:
+        metadata = {"source": self.file_path}
+        lines: list[str] = []
+        size = 0
+        with open(self.file_path, encoding="utf-8") as f:
+            for line in f:
+                # Blok doluysa bölüm sonunda (boş satır) kes; hiç bölüm sonu yoksa 2 katında satır sonunda kes
+                if size >= self.block_chars and (not line.strip() or size >= 2 * self.block_chars):
+                    yield Document(page_content="".join(lines), metadata=dict(metadata))
+                    lines, size = [], 0
+                lines.append(line)
+                size += len(line)
+        if lines:
+            yield Document(page_content="".join(lines), metadata=dict(metadata))
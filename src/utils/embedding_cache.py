@@ -0,0 +1,154 @@
+"""
+İçerik adresli embedding önbelleği.
+Anahtar: sha256(model adı + metin). Vektörler SQLite'ta float32 blob olarak tutulur; aynı chunk metni
+(yeniden yükleme, aynı sınırlarla yeniden parçalama) veya aynı sorgu tekrar embed edilmez.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+
+from langchain_core.embeddings import Embeddings
+
+from src.utils.cache_stats import HitStats
+
+
+def embedding_key(model: str, text: str) -> str:
+    """Model adı ve metinden deterministik önbellek anahtarı."""
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+def _to_blob(vector: list[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _from_blob(blob: bytes) -> list[float]:
+    values = array("f")
+    values.frombytes(blob)
+    return values.tolist()
+
+
+class EmbeddingCache:
+    """SQLite tabanlı kalıcı vektör önbelleği; en fazla max_entries kayıt (en eski erişilenler silinir)."""
+
+    def __init__(self, path: str, max_entries: int = 200_000):
+        self.path = path
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_accessed ON embeddings (accessed_at)")
+        self._conn.commit()
+        # Yaklaşık kayıt sayısı; temizlik sadece sınır aşıldığında çalışır (her yazımda tablo taranmaz)
+        self._approx_count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        """Bulunan anahtarlar için {anahtar: vektör}; erişim zamanları güncellenir."""
+        found = {}
+        if not keys:
+            return found
+        now = time.time()
+        with self._lock:
+            # SQLite parametre sınırı nedeniyle parça parça sorgulanır
+            for start in range(0, len(keys), 500):
+                part = keys[start : start + 500]
+                marks = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", part
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = _from_blob(blob)
+                if rows:
+                    self._conn.execute(
+                        f"UPDATE embeddings SET accessed_at = ? WHERE key IN ({marks})", [now, *part]
+                    )
+            self._conn.commit()
+        return found
+
+    def set_many(self, model: str, items: dict[str, list[float]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, vector, accessed_at) VALUES (?, ?, ?, ?)",
+                [(key, model, _to_blob(vector), now) for key, vector in items.items()],
+            )
+            self._approx_count += len(items)
+            if self._approx_count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    "SELECT key FROM embeddings ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                self._approx_count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._approx_count = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddings(HitStats, Embeddings):
+    """
+    Bir LangChain Embeddings nesnesini önbellekle sarar. Hem yükleme (embed_documents) hem
+    sorgu (embed_query) yolunda önce önbelleğe bakılır; sadece eksik metinler alttaki modele gider.
+    """
+
+    def __init__(self, inner: Embeddings, cache: EmbeddingCache, model_name: str | None = None):
+        self.inner = inner
+        self.cache = cache
+        # Farklı modellerin vektörleri karışmasın diye model adı anahtara girer
+        self.model_name = model_name or getattr(inner, "model", None) or type(inner).__name__
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [embedding_key(self.model_name, t) for t in texts]
+        found = self.cache.get_many(list(dict.fromkeys(keys)))
+        # Aynı çağrıdaki tekrar eden metinler modele bir kez gider
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = self.inner.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self.cache.set_many(self.model_name, computed)
+            found.update(computed)
+        with self._stats_lock:
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        # Bazı modeller sorgu ve doküman için farklı önek kullanır; sorgu vektörleri ayrı anahtar alanında tutulur
+        key = embedding_key(f"{self.model_name}\0query", text)
+        cached = self.cache.get_many([key]).get(key)
+        if cached is not None:
+            with self._stats_lock:
+                self.hits += 1
+            return cached
+        vector = self.inner.embed_query(text)
+        self.cache.set_many(self.model_name, {key: vector})
+        with self._stats_lock:
+            self.misses += 1
+        return vector
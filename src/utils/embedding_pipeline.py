@@ -0,0 +1,191 @@
+"""
+Doküman chunk'ları için toplu (batch) embedding hattı.
+Chunk'lar ayarlanabilir boyuttaki batch'ler halinde, sınırlı sayıda paralel istekle embed edilir;
+başarısız batch'ler geri çekilmeli (backoff) olarak yeniden denenir, sonuçlar Chroma'ya sayfa sayfa yazılır.
+Tek bir batch'in hatası tüm yüklemeyi durdurmaz; başarısız chunk id'leri rapora yazılır.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Callable
+
+
+class EmbeddingStats:
+    """EmbeddingPipeline.run sonucunun özeti."""
+
+    def __init__(self, total: int = 0):
+        self.total = total
+        self.embedded = 0
+        self.written = 0
+        self.batches = 0
+        self.retries = 0
+        self.failed_ids: list[str] = []
+        self.errors: list[str] = []
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.written / self.seconds if self.seconds else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "embedded": self.embedded,
+            "written": self.written,
+            "failed": len(self.failed_ids),
+            "batches": self.batches,
+            "retries": self.retries,
+            "seconds": round(self.seconds, 3),
+            "chunks_per_second": round(self.chunks_per_second, 1),
+        }
+
+
+class EmbeddingPipeline:
+    """
+    embeddings.embed_documents'ı batch'ler halinde paralel çağırıp sonuçları Chroma koleksiyonuna yazar.
+
+    progress(done, total): her sayfa yazıldıktan sonra çağrılır (konsol ilerleme çubuğu için).
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        batch_size: int = 32,
+        max_workers: int = 4,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        page_size: int = 256,
+        progress: Callable[[int, int], None] | None = None,
+    ):
+        """
+        Args:
+            embeddings: LangChain Embeddings nesnesi (embed_documents metodu yeterli).
+            batch_size: Tek embedding isteğindeki chunk sayısı.
+            max_workers: Ollama'ya aynı anda gidebilecek embedding isteği sayısı.
+            max_retries: Batch başına yeniden deneme sayısı (ilk deneme hariç).
+            retry_backoff: İlk yeniden denemeden önceki bekleme; her denemede iki katına çıkar.
+            page_size: Chroma'ya tek upsert'te yazılan kayıt sayısı.
+        """
+        self.embeddings = embeddings
+        self.batch_size = max(1, batch_size)
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.page_size = max(1, page_size)
+        self.progress = progress
+
+    def _embed_batch(self, texts: list[str], stats: EmbeddingStats) -> list[list[float]]:
+        attempt = 0
+        while True:
+            try:
+                vectors = self.embeddings.embed_documents(texts)
+                if len(vectors) != len(texts):
+                    raise ValueError(f"{len(texts)} metin için {len(vectors)} vektör döndü")
+                return vectors
+            except Exception:
+                if attempt >= self.max_retries:
+                    raise
+                stats.add_retry()
+                time.sleep(self.retry_backoff * (2 ** attempt))
+                attempt += 1
+
+    @staticmethod
+    def _upsert(collection, ids, vectors, texts, metadatas) -> None:
+        # Chroma boş metadata dict'ini kabul etmez; metadatasız kayıtlar ayrı yazılır
+        with_meta = [i for i, m in enumerate(metadatas) if m]
+        without_meta = [i for i, m in enumerate(metadatas) if not m]
+        if with_meta:
+            collection.upsert(
+                ids=[ids[i] for i in with_meta],
+                embeddings=[vectors[i] for i in with_meta],
+                documents=[texts[i] for i in with_meta],
+                metadatas=[metadatas[i] for i in with_meta],
+            )
+        if without_meta:
+            collection.upsert(
+                ids=[ids[i] for i in without_meta],
+                embeddings=[vectors[i] for i in without_meta],
+                documents=[texts[i] for i in without_meta],
+            )
+
+    def run(self, collection, chunks, ids: list[str] | None = None) -> EmbeddingStats:
+        """
+        chunks'ı embed edip collection'a (chromadb Collection) yazar.
+        ids verilmezse rastgele id üretilir. Upsert'ler çağıran thread'de yapılır.
+        """
+        chunks = list(chunks)
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in chunks]
+        return self.run_records(collection, zip(ids, chunks), total=len(chunks))
+
+    def run_records(self, collection, records, total: int | None = None) -> EmbeddingStats:
+        """
+        (id, Document) çiftlerini üreten bir iterable'ı tüketerek embed eder ve yazar.
+        records sadece yeni batch'e yer açıldıkça okunur; üretici (ör. ParallelLoader) bu sayede
+        embedding hızına göre yavaşlar. total bilinmiyorsa okunan kayıt sayısı kullanılır.
+        """
+        stats = EmbeddingStats(total=total or 0)
+        source = iter(records)
+        started = time.perf_counter()
+        page: list[tuple[str, list[float], str, dict]] = []
+
+        def report_progress() -> None:
+            if self.progress is not None:
+                self.progress(stats.written + len(stats.failed_ids), stats.total)
+
+        def flush() -> None:
+            if not page:
+                return
+            page_ids, vectors, texts, metadatas = (list(col) for col in zip(*page))
+            try:
+                self._upsert(collection, page_ids, vectors, texts, metadatas)
+                stats.written += len(page)
+            except Exception as e:
+                stats.failed_ids.extend(page_ids)
+                stats.errors.append(f"Chroma'ya yazılamadı: {e}")
+            page.clear()
+            report_progress()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = {}
+            exhausted = False
+            # Bellekte en fazla max_workers * 2 batch'lik chunk ve vektör tutulur
+            while True:
+                while not exhausted and len(pending) < self.max_workers * 2:
+                    batch = list(islice(source, self.batch_size))
+                    if not batch:
+                        exhausted = True
+                        break
+                    if total is None:
+                        stats.total += len(batch)
+                    texts = [chunk.page_content for _, chunk in batch]
+                    pending[pool.submit(self._embed_batch, texts, stats)] = batch
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = pending.pop(future)
+                    stats.batches += 1
+                    try:
+                        vectors = future.result()
+                    except Exception as e:
+                        stats.failed_ids.extend(chunk_id for chunk_id, _ in batch)
+                        stats.errors.append(f"Embedding başarısız ({len(batch)} chunk): {e}")
+                        report_progress()
+                        continue
+                    stats.embedded += len(batch)
+                    for (chunk_id, chunk), vector in zip(batch, vectors):
+                        page.append((chunk_id, vector, chunk.page_content, dict(chunk.metadata or {})))
+                    if len(page) >= self.page_size:
+                        flush()
+            flush()
+
+        stats.seconds = time.perf_counter() - started
+        return stats
@@ -0,0 +1,199 @@
+"""
+data/ klasörünün vector store'a artımlı (incremental) yüklenmesi.
+Manifest (yol, boyut, mtime, içerik hash'i, chunk id'leri) sayesinde başlangıçta sadece
+yeni veya değişmiş dosyalar embed edilir; silinen/değişen dosyaların eski chunk'ları kaldırılır.
+"""
+import glob
+import hashlib
+import json
+import os
+from typing import Callable
+
+from src.utils.parallel_loader import ParallelLoader
+
+SUPPORTED_EXTENSIONS = ["*.txt", "*.md", "*.pdf", "*.json"]
+MANIFEST_FILENAME = "ingest_manifest.json"
+# Parçalama mantığı değiştiğinde artırılır; eski sürümle yüklenmiş dosyalar içerikleri aynı olsa da yeniden parçalanır
+CHUNKER_VERSION = 2
+
+
+def file_sha256(path: str) -> str:
+    """Dosya içeriğinin sha256 özeti (büyük dosyalar için parça parça okunur)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def chunk_id(source: str, index: int, content: str) -> str:
+    """Kaynak yolu, sıra ve içerikten deterministik chunk id; aynı chunk tekrar yüklenirse üzerine yazılır."""
+    raw = f"{source}\0{index}\0{content}".encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:32]
+
+
+class IngestManifest:
+    """Yüklenmiş dosyaların kaydı. Vector store ile aynı klasörde JSON olarak tutulur."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.files: dict[str, dict] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.files = json.load(f).get("files", {})
+            except (OSError, json.JSONDecodeError):
+                # Bozuk manifest: her şey yeniden yüklenir (chunk id'leri deterministik olduğu için çift kayıt oluşmaz)
+                self.files = {}
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "files": self.files}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class IngestReport:
+    """sync_data_dir sonucunun özeti (main.py bunu konsola yazar)."""
+
+    def __init__(self):
+        self.added: list[str] = []
+        self.updated: list[str] = []
+        self.removed: list[str] = []
+        self.unchanged: list[str] = []
+        self.failed: dict[str, str] = {}
+        self.chunks_added = 0
+        self.chunks_deleted = 0
+        self.embed_stats = None  # EmbeddingStats: süre, chunk/sn, yeniden denemeler
+
+
+def _list_data_files(data_dir: str) -> list[str]:
+    files = []
+    for ext in SUPPORTED_EXTENSIONS:
+        files.extend(glob.glob(os.path.join(data_dir, ext)))
+    return sorted(files)
+
+
+def data_file_stats(data_dir: str) -> dict[str, tuple[int, int]]:
+    """data_dir'deki desteklenen dosyalar için {yol: (boyut, mtime_ns)}; sadece stat, içerik okunmaz."""
+    stats = {}
+    for path in _list_data_files(data_dir) if os.path.exists(data_dir) else []:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        stats[path] = (st.st_size, st.st_mtime_ns)
+    return stats
+
+
+def data_fingerprint(data_dir: str) -> str:
+    """data_dir'in parmak izi: herhangi bir dosya eklenir, silinir veya değişirse farklı bir değer döner."""
+    raw = json.dumps(sorted(data_file_stats(data_dir).items()))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def sync_data_dir(
+    vector_store,
+    data_dir: str = "./data",
+    manifest_path: str | None = None,
+    progress: Callable[[int, int], None] | None = None,
+    loader: ParallelLoader | None = None,
+) -> IngestReport:
+    """
+    data_dir'i vector store ile eşitler.
+    - Boyut ve mtime aynıysa dosya hiç okunmaz (değişmemiş korpusta başlangıç süresi sabit kalır).
+    - mtime değişip içerik hash'i aynıysa sadece manifest güncellenir.
+    - Değişen dosyanın eski chunk'ları silinir, yenileri deterministik id'lerle eklenir.
+    - Değişen dosyalar ParallelLoader ile birden fazla süreçte akış halinde ayrıştırılır; chunk'lar sınırlı
+      bir kuyruk üzerinden tek bir batch'li embedding hattına akar. Embed edilemeyen chunk'ı olan dosya
+      manifest'e yazılmaz ve bir sonraki çalıştırmada yeniden denenir.
+    - Klasörden silinen dosyaların chunk'ları vector store'dan kaldırılır.
+    progress(done, total): embedding ilerlemesi (total, ayrıştırma ilerledikçe büyür).
+    loader: Ayrıştırma sürücüsü (varsayılan: CPU sayısı kadar süreç).
+    """
+    report = IngestReport()
+    if manifest_path is None:
+        manifest_path = os.path.join(vector_store.persist_directory, MANIFEST_FILENAME)
+    manifest = IngestManifest(manifest_path)
+    current = _list_data_files(data_dir) if os.path.exists(data_dir) else []
+    dirty = False
+    pending = {}  # path → (entry, stat, digest)
+
+    for path in current:
+        stat = os.stat(path)
+        entry = manifest.files.get(path)
+        current_chunker = bool(entry) and entry.get("chunker", 1) == CHUNKER_VERSION
+        if current_chunker and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            report.unchanged.append(path)
+            continue
+
+        digest = file_sha256(path)
+        if current_chunker and entry["sha256"] == digest:
+            entry["mtime"] = stat.st_mtime
+            report.unchanged.append(path)
+            dirty = True
+            continue
+        pending[path] = (entry, stat, digest)
+
+    file_ids: dict[str, list[str]] = {path: [] for path in pending}
+
+    def records():
+        # Ayrıştırma süreçlerinden gelen chunk'lar doğrudan embedding hattına akar; sadece id'ler bellekte tutulur
+        for kind, path, payload in (loader or ParallelLoader()).iter_events(pending):
+            if kind == "error":
+                report.failed[path] = payload
+            elif kind == "chunks":
+                ids = file_ids[path]
+                for chunk in payload:
+                    cid = chunk_id(path, len(ids), chunk.page_content)
+                    ids.append(cid)
+                    yield cid, chunk
+
+    failed_ids: set[str] = set()
+    if pending:
+        stats = vector_store.add_records_batched(records(), progress=progress)
+        report.embed_stats = stats
+        if stats is None:
+            failed_ids = {i for ids in file_ids.values() for i in ids}
+            for path in pending:
+                report.failed.setdefault(path, "vector store'a eklenemedi")
+        else:
+            failed_ids = set(stats.failed_ids)
+
+    for path, (entry, stat, digest) in pending.items():
+        if path in report.failed:
+            continue
+        ids = file_ids[path]
+        if failed_ids.intersection(ids):
+            report.failed[path] = "vector store'a eklenemedi"
+            continue
+        id_set = set(ids)
+        # Eski chunk'lar yenileri yazıldıktan sonra silinir: aynı kaynaklı ama yeni id kümesinde olmayan
+        # kayıtlar (manifest öncesi yüklemeler dahil)
+        report.chunks_deleted += vector_store.delete_by_source(path, keep_ids=id_set, save=False)
+        if entry:
+            vector_store.delete_documents([i for i in entry.get("chunk_ids", []) if i not in id_set], save=False)
+        report.chunks_added += len(ids)
+        (report.updated if entry else report.added).append(path)
+        manifest.files[path] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": digest,
+            "chunk_ids": ids,
+            "chunker": CHUNKER_VERSION,
+        }
+        dirty = True
+
+    for path in sorted(set(manifest.files) - set(current)):
+        entry = manifest.files.pop(path)
+        report.chunks_deleted += vector_store.delete_by_source(path, save=False)
+        vector_store.delete_documents(entry.get("chunk_ids", []), save=False)
+        report.removed.append(path)
+        dirty = True
+
+    # Silmeler sözcüksel indeksi dosya başına değil, eşitleme sonunda bir kez diske yazar
+    vector_store.save_lexical_index()
+    if dirty:
+        manifest.save()
+    return report
@@ -0,0 +1,244 @@
+"""
+JSON veri dosyaları için yapı farkındalıklı parçalama.
+Karakter tabanlı bölücü kayıtları (ör. orders.json'daki bir sipariş) ortasından kesiyordu; burada her
+mantıksal kayıt (nesne listelerinin her elemanı: siparisler[i], puanlar[i], pizzalar[i]) tek bir chunk olur.
+Listeler dışında kalan alanlar (donem, notlar, ...) dosya başına tek bir "$" chunk'ında toplanır.
+Kaydın yolu, anahtarları ve skaler alanları metadata'ya yazılır; böylece Chroma'da where filtresiyle arama yapılabilir.
+Dosyalar iter_file_records ile akış halinde okunur: büyük bir kayıt listesi belleğe bütün olarak alınmaz.
+"""
+import json
+import os
+from typing import Iterator
+
+from langchain_core.documents import Document
+
+# Kayıt alanlarıyla çakışmaması gereken metadata anahtarları
+RESERVED_METADATA = ("source", "record_path", "record_key", "record_index", "keys")
+# Akışlı okumada dosyadan bir seferde okunan karakter sayısı
+READ_SIZE = 1 << 16
+
+
+def _is_record_list(value) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(item, dict) for item in value)
+
+
+def _contains_records(value) -> bool:
+    return isinstance(value, dict) and any(_is_record_list(v) or _contains_records(v) for v in value.values())
+
+
+def iter_records(data, path: str = "$") -> Iterator[tuple[str, str, int | None, object]]:
+    """
+    (kayıt_yolu, liste_anahtarı, sıra, değer) dörtlülerini üretir, ör. ("$.siparisler[0]", "siparisler", 0, {...}).
+    Kayıt listesi içermeyen alanlar ("$", "$", None, {kalan alanlar}) olarak en sonda döner.
+    """
+    if _is_record_list(data):
+        key = path.rsplit(".", 1)[-1] if path != "$" else "$"
+        for index, item in enumerate(data):
+            yield f"{path}[{index}]", key, index, item
+        return
+    if not isinstance(data, dict):
+        yield path, "$", None, data
+        return
+    rest = {}
+    for key, value in data.items():
+        if _is_record_list(value) or _contains_records(value):
+            yield from iter_records(value, f"{path}.{key}")
+        else:
+            rest[key] = value
+    if rest:
+        yield path, "$", None, rest
+
+
+class _JsonReader:
+    """
+    Dosyayı parça parça okuyan JSON okuyucu: nesne alanları ve dizi elemanları tek tek ayrıştırılır
+    (json.JSONDecoder.raw_decode); bellekte o an ayrıştırılan değer ve okuma tamponu kadar veri tutulur.
+    """
+
+    def __init__(self, f):
+        self._f = f
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self, size: int | None = None) -> bool:
+        """Tampona yeni veri ekler (tüketilmiş kısım atılır); dosya bittiyse False."""
+        if self._eof:
+            return False
+        chunk = self._f.read(size or READ_SIZE)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._buf, self._pos)
+
+    def peek(self) -> str:
+        """Boşlukları atlayıp sıradaki karakteri döndürür; dosya sonunda ""."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise self._error(f"'{char}' bekleniyordu")
+        self._pos += 1
+
+    def value(self):
+        """Sıradaki değeri bütün olarak ayrıştırır."""
+        self.peek()
+        size = READ_SIZE
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill(size):
+                    raise
+                size *= 2
+                continue
+            # Tamponun sonunda biten sayı yarım okunmuş olabilir ("12|3"): devamı okunup yeniden ayrıştırılır
+            if end == len(self._buf) and self._fill(size):
+                size *= 2
+                continue
+            self._pos = end
+            return value
+
+    def items(self) -> Iterator:
+        """Sıradaki diziyi eleman eleman ayrıştırır."""
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == "]":
+                self._pos += 1
+                return
+            self.expect(",")
+
+    def members(self) -> Iterator[str]:
+        """Sıradaki nesnenin anahtarlarını üretir; çağıran her anahtardan sonra değeri (value/items) tüketir."""
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise self._error("Nesne anahtarı metin olmalı")
+            self.expect(":")
+            yield key
+            if self.peek() == "}":
+                self._pos += 1
+                return
+            self.expect(",")
+
+    def end(self) -> None:
+        if self.peek():
+            raise self._error("Fazladan veri")
+
+
+def _scan_list(reader: _JsonReader) -> bool:
+    count, all_records = 0, True
+    for item in reader.items():
+        count += 1
+        all_records = all_records and isinstance(item, dict)
+    return count > 0 and all_records
+
+
+def _scan(reader: _JsonReader) -> bool | dict[str, bool]:
+    """Üst düzey dizinin (bool) veya nesnenin her alanının ({anahtar: bool}) kayıt listesi olup olmadığı."""
+    if reader.peek() == "[":
+        return _scan_list(reader)
+    if reader.peek() != "{":
+        reader.value()
+        return False
+    kinds = {}
+    for key in reader.members():
+        if reader.peek() == "[":
+            kinds[key] = _scan_list(reader)
+        else:
+            reader.value()
+            kinds[key] = False
+    return kinds
+
+
+def iter_file_records(path: str) -> Iterator[tuple[str, str, int | None, object]]:
+    """
+    iter_records'un dosyadan akışlı karşılığı (aynı kayıtlar, aynı sıra). Dosya iki kez okunur: ilk geçiş
+    JSON'u doğrular ve hangi listelerin kayıt listesi olduğunu belirler, ikincisi kayıtları tek tek üretir.
+    Bellekte bir seferde tek kayıt tutulur; sadece kayıt listesi olmayan alanlar ve kayıt listesi içeren
+    iç içe nesneler ("$.veri.puanlar") bütün olarak ayrıştırılır.
+    Geçersiz JSON'da hiçbir kayıt üretilmeden json.JSONDecodeError yükselir.
+    """
+    with open(path, encoding="utf-8") as f:
+        reader = _JsonReader(f)
+        kinds = _scan(reader)
+        reader.end()
+    with open(path, encoding="utf-8") as f:
+        reader = _JsonReader(f)
+        if reader.peek() == "[" and kinds is True:
+            for index, item in enumerate(reader.items()):
+                yield f"$[{index}]", "$", index, item
+            return
+        if reader.peek() != "{":
+            yield from iter_records(reader.value())
+            return
+        rest = {}
+        for key in reader.members():
+            if kinds.get(key):
+                for index, item in enumerate(reader.items()):
+                    yield f"$.{key}[{index}]", key, index, item
+                continue
+            value = reader.value()
+            if _contains_records(value):
+                yield from iter_records(value, f"$.{key}")
+            else:
+                rest[key] = value
+        if rest:
+            yield "$", "$", None, rest
+
+
+def record_text(record_path: str, value) -> str:
+    """Kaydın embed edilen / bağlama eklenen metni: yol + tek satırlık JSON (girintisiz, daha az token)."""
+    return f"{record_path}: {json.dumps(value, ensure_ascii=False)}"
+
+
+def record_metadata(source: str, record_path: str, record_key: str, index: int | None, value) -> dict:
+    metadata = {"source": source, "record_path": record_path, "record_key": record_key}
+    if index is not None:
+        metadata["record_index"] = index
+    if isinstance(value, dict):
+        metadata["keys"] = ",".join(str(k) for k in value)
+        for key, field in value.items():
+            # Chroma metadata'sı sadece skaler değer kabul eder; iç içe alanlar metinde kalır
+            if key not in RESERVED_METADATA and isinstance(field, (str, int, float, bool)):
+                metadata[str(key)] = field
+    return metadata
+
+
+def json_documents(data, source: str) -> Iterator[Document]:
+    """Ayrıştırılmış JSON verisinden kayıt başına bir Document üretir (metin başında dosya adı bulunur)."""
+    return _documents(iter_records(data), source)
+
+
+def json_file_documents(path: str) -> Iterator[Document]:
+    """json_documents'in dosyadan akışlı karşılığı (bkz. iter_file_records)."""
+    return _documents(iter_file_records(path), path)
+
+
+def _documents(records, source: str) -> Iterator[Document]:
+    name = os.path.basename(source)
+    for record_path, record_key, index, value in records:
+        yield Document(
+            page_content=f"{name} {record_text(record_path, value)}",
+            metadata=record_metadata(source, record_path, record_key, index, value),
+        )
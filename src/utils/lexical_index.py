@@ -0,0 +1,245 @@
+"""
+Yerel ters indeks (inverted index) ile BM25 sözcüksel arama.
+Chroma'ya yazılan chunk'lar yükleme sırasında burada da indekslenir. Tam isimler ("Fatma Çelik"),
+pizza adları ve sayılar yoğun vektör aramasından daha iyi bulunur; sorgu için embedding çağrısı gerekmez.
+Terimler normalize_tr ile üretilir (Türkçe küçük harf + ASCII katlama: "Çelik" == "celik"); 5 harften
+uzun terimlerin ilk 5 harfi ayrıca indekslenir ("siparişleri" ↔ "sipariş").
+"""
+import heapq
+import json
+import math
+import os
+import threading
+from collections import Counter
+
+from langchain_core.documents import Document
+
+from src.utils.text import tokenize
+
+
+def index_terms(text: str) -> list[str]:
+    """İndekslenen terimler: normalize edilmiş kelimeler + uzun kelimelerin 5 harflik önekleri."""
+    tokens = [t for t in tokenize(text) if len(t) > 1 or t.isdigit()]
+    return tokens + [f"p:{t[:5]}" for t in tokens if len(t) > 5]
+
+
+def _match_value(value, condition) -> bool:
+    if isinstance(condition, dict):
+        op, operand = next(iter(condition.items()))
+        if op == "$eq":
+            return value == operand
+        if op == "$ne":
+            return value != operand
+        if op == "$in":
+            return value in operand
+        if op == "$nin":
+            return value not in operand
+        if value is None:
+            return False
+        if op == "$gt":
+            return value > operand
+        if op == "$gte":
+            return value >= operand
+        if op == "$lt":
+            return value < operand
+        if op == "$lte":
+            return value <= operand
+        raise ValueError(f"Desteklenmeyen filtre operatörü: {op}")
+    return value == condition
+
+
+def matches_where(metadata: dict, where: dict | None) -> bool:
+    """Chroma where filtresinin (eşitlik, $eq/$ne/$in/$nin/$gt/$gte/$lt/$lte, $and/$or) yerel karşılığı."""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, part) for part in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, part) for part in condition):
+                return False
+        elif not _match_value(metadata.get(key), condition):
+            return False
+    return True
+
+
+class LexicalIndex:
+    """
+    Bellekte BM25 ters indeksi; path verilirse save() ile JSON olarak saklanır ve açılışta yüklenir.
+    Thread-safe: yükleme ana thread'de, aramalar researcher thread'lerinde çalışabilir.
+    """
+
+    def __init__(self, path: str | None = None, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._docs: dict[str, tuple[str, dict]] = {}
+        self._terms: dict[str, Counter] = {}
+        self._lengths: dict[str, int] = {}
+        self._postings: dict[str, dict[str, int]] = {}
+        self._total_len = 0
+        self._dirty = False
+        # İndeks son kaydedildiğinde Chroma'daki kayıt sayısı; None → eşitlik bilinmiyor (tam karşılaştırma gerekir)
+        self.synced_count: int | None = None
+        self._pending = False
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+                docs = data.get("docs", {})
+                self.synced_count = data.get("chroma_count")
+            except (OSError, json.JSONDecodeError):
+                # Bozuk indeks: boş başlanır, VectorStoreManager Chroma'dan yeniden kurar
+                docs = {}
+            for doc_id, item in docs.items():
+                self._add(doc_id, item["text"], item.get("metadata") or {})
+        if path and os.path.exists(self._pending_path):
+            # Önceki süreç Chroma'ya yazarken indeksi kaydedemeden durmuş; işaret bir sonraki save()'de kalkar
+            self.synced_count = None
+            self._pending = True
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def ids(self) -> set[str]:
+        with self._lock:
+            return set(self._docs)
+
+    @property
+    def _pending_path(self) -> str:
+        return f"{self.path}.pending"
+
+    def begin_write(self) -> None:
+        """
+        Chroma'ya yazmadan önce çağrılır: indeks bir sonraki save()'e kadar diskte "yarıda" işaretlenir;
+        süreç arada durursa açılışta Chroma ile id'ler tam karşılaştırılır.
+        """
+        if not self.path or self._pending:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        open(self._pending_path, "w").close()
+        self._pending = True
+
+    def _add(self, doc_id: str, text: str, metadata: dict) -> None:
+        self._remove(doc_id)
+        terms = Counter(index_terms(text))
+        self._docs[doc_id] = (text, metadata)
+        self._terms[doc_id] = terms
+        self._lengths[doc_id] = sum(terms.values())
+        self._total_len += self._lengths[doc_id]
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+
+    def _remove(self, doc_id: str) -> None:
+        terms = self._terms.pop(doc_id, None)
+        if terms is None:
+            return
+        del self._docs[doc_id]
+        self._total_len -= self._lengths.pop(doc_id)
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+
+    def add(self, ids: list[str], texts: list[str], metadatas: list[dict] | None = None) -> None:
+        """Kayıtları ekler; aynı id varsa üzerine yazılır."""
+        metadatas = metadatas or [{}] * len(ids)
+        with self._lock:
+            for doc_id, text, metadata in zip(ids, texts, metadatas):
+                self._add(doc_id, text, dict(metadata or {}))
+            self._dirty = True
+
+    def delete(self, ids) -> None:
+        with self._lock:
+            for doc_id in ids:
+                if doc_id in self._docs:
+                    self._remove(doc_id)
+                    self._dirty = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._docs.clear()
+            self._terms.clear()
+            self._lengths.clear()
+            self._postings.clear()
+            self._total_len = 0
+            self._dirty = True
+
+    def save(self, chroma_count: int | None = None) -> None:
+        """
+        Değişiklik varsa indeksi path'e atomik olarak yazar ve begin_write işaretini kaldırır.
+        chroma_count: O anki Chroma kayıt sayısı; açılışta hızlı tutarlılık kontrolü için indeksle saklanır.
+        """
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty and not self._pending and chroma_count == self.synced_count:
+                return
+            docs = {doc_id: {"text": text, "metadata": metadata} for doc_id, (text, metadata) in self._docs.items()}
+            self._dirty = False
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "chroma_count": chroma_count, "docs": docs}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self.synced_count = chroma_count
+        if self._pending:
+            try:
+                os.remove(self._pending_path)
+            except FileNotFoundError:
+                pass
+            self._pending = False
+
+    def _idf(self, term: str) -> float:
+        n = len(self._docs)
+        df = len(self._postings.get(term, ()))
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def scores(self, query: str, where: dict | None = None) -> dict[str, float]:
+        """Sorgu terimlerinden en az birini içeren kayıtların BM25 skorları ({id: skor})."""
+        query_terms = set(index_terms(query))
+        with self._lock:
+            n = len(self._docs)
+            if not n or not query_terms:
+                return {}
+            avg_len = self._total_len / n or 1.0
+            scores: dict[str, float] = {}
+            for term in query_terms:
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = self._idf(term)
+                for doc_id, tf in posting.items():
+                    norm = tf + self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+            if where:
+                scores = {i: s for i, s in scores.items() if matches_where(self._docs[i][1], where)}
+            return scores
+
+    def search(self, query: str, k: int = 3, where: dict | None = None) -> list[tuple[Document, float]]:
+        """
+        BM25'e göre en iyi k kaydı [(doküman, skor 0..1), ...] olarak döndürür.
+        Skor, sorgu terimlerinin IDF ağırlıklı kapsama oranıdır (tüm nadir terimler eşleşiyorsa 1'e yakın);
+        vektör aramasının alaka skoruyla aynı eşikle karşılaştırılabilir.
+        """
+        scores = self.scores(query, where)
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        query_terms = set(index_terms(query))
+        results = []
+        with self._lock:
+            # Korpusta hiç geçmeyen terimler de paydaya en yüksek IDF ile girer
+            weights = {term: self._idf(term) for term in query_terms}
+            total = sum(weights.values()) or 1.0
+            for doc_id, _ in top:
+                entry = self._docs.get(doc_id)
+                if entry is None:
+                    continue
+                text, metadata = entry
+                terms = self._terms[doc_id]
+                coverage = sum(w for term, w in weights.items() if term in terms) / total
+                results.append((Document(page_content=text, metadata=dict(metadata), id=doc_id), coverage))
+        return results
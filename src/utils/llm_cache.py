@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from src.utils.cache_stats import HitStats
+
+
+def make_cache_key(model: str, prompt: str, options: dict | None = None) -> str:
+    """Model, prompt ve üretim seçeneklerinden deterministik bir anahtar (sha256) üretir."""
+    raw = json.dumps(
+        {"model": model, "prompt": prompt, "options": options or {}},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache(HitStats, ABC):
+    """
+    LLMClient.ask önündeki yanıt önbelleği için ortak arayüz.
+    Alt sınıflar sadece _get / _set / clear metotlarını uygular; isabet sayaçları burada tutulur.
+    """
+
+    def __init__(self, ttl_seconds: float | None = 3600.0):
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def _expires_at(self) -> float | None:
+        return time.time() + self.ttl_seconds if self.ttl_seconds else None
+
+    @abstractmethod
+    def _get(self, key: str) -> str | None:
+        """Süresi dolmamış kayıt; yoksa None."""
+
+    @abstractmethod
+    def _set(self, key: str, value: str, expires_at: float | None) -> None:
+        """Kaydı yazar; expires_at None ise süresizdir."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Tüm kayıtları siler."""
+
+    def get(self, key: str) -> str | None:
+        value = self._get(key)
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self._set(key, value, self._expires_at())
+
+
+class MemoryResponseCache(ResponseCache):
+    """Süreç içi LRU önbellek: en fazla max_size kayıt, her kayıt ttl_seconds kadar geçerli."""
+
+    def __init__(self, max_size: int = 256, ttl_seconds: float | None = 3600.0):
+        super().__init__(ttl_seconds)
+        self.max_size = max_size
+        self._data: OrderedDict[str, tuple[str, float | None]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _get(self, key: str) -> str | None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def _set(self, key: str, value: str, expires_at: float | None) -> None:
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteResponseCache(ResponseCache):
+    """Diskte SQLite önbellek; uygulama yeniden başlatılsa da yanıtlar korunur."""
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl_seconds: float | None = 7 * 24 * 3600.0):
+        super().__init__(ttl_seconds)
+        self.path = path
+        self.max_entries = max_entries
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def _get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at < now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return value
+
+    def _set(self, key: str, value: str, expires_at: float | None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, time.time()),
+            )
+            # Boyut sınırı: en uzun süredir kullanılmayan kayıtlar silinir
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
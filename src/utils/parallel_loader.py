@@ -0,0 +1,132 @@
+"""
+Dosyaları birden fazla süreçte paralel ayrıştıran yükleme sürücüsü.
+Her worker süreci kendisine düşen dosyayı DocumentProcessor.iter_chunks ile akış halinde okur ve
+chunk'ları küçük paketler halinde sınırlı boyutlu bir kuyruğa koyar. Kuyruk doluysa worker bekler;
+böylece embedding aşaması ne kadar tüketirse o kadar ayrıştırılır ve bellek kullanımı korpus
+büyüklüğünden bağımsız kalır.
+
+Olaylar (kind, path, payload) üçlüleridir:
+  ("chunks", path, [Document, ...])  dosyanın sıradaki chunk'ları (dosya içi sıra korunur)
+  ("done", path, chunk_sayısı)       dosya tamamlandı
+  ("error", path, mesaj)             dosya okunamadı (önceden gönderilmiş chunk'ları geçersiz sayılmalı)
+"""
+import multiprocessing
+import os
+import queue
+from typing import Iterable, Iterator
+
+from src.utils.document_processor import DocumentProcessor
+
+_CRASH_MESSAGE = "Ayrıştırma süreci beklenmedik şekilde sonlandı."
+
+
+def iter_file_events(path: str, batch_size: int = 64) -> Iterator[tuple[str, str, object]]:
+    """Tek dosyanın olaylarını üretir (hem worker süreçte hem tek süreçli modda kullanılır)."""
+    batch = []
+    count = 0
+    try:
+        for chunk in DocumentProcessor(path).iter_chunks():
+            batch.append(chunk)
+            count += 1
+            if len(batch) >= batch_size:
+                yield ("chunks", path, batch)
+                batch = []
+    except Exception as e:
+        yield ("error", path, str(e))
+        return
+    if batch:
+        yield ("chunks", path, batch)
+    yield ("done", path, count)
+
+
+def _worker_main(tasks, events, batch_size: int) -> None:
+    pid = os.getpid()
+    while True:
+        path = tasks.get()
+        if path is None:
+            break
+        events.put(("start", path, pid))
+        for event in iter_file_events(path, batch_size):
+            events.put(event)
+    events.put(("exit", None, pid))
+
+
+class ParallelLoader:
+    """
+    Dosya listesini worker süreç havuzunda ayrıştırıp olayları tek bir iterator'dan verir.
+    Tek dosya veya max_workers=1 ise süreç açılmaz, aynı süreçte akış halinde okunur.
+    """
+
+    def __init__(self, max_workers: int | None = None, queue_size: int = 16, batch_size: int = 64):
+        """
+        Args:
+            max_workers: Ayrıştırma süreci sayısı (varsayılan: CPU sayısı).
+            queue_size: Kuyrukta bekleyebilecek en fazla paket sayısı (geri basınç sınırı).
+            batch_size: Bir pakette gönderilen chunk sayısı.
+        """
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self.queue_size = max(1, queue_size)
+        self.batch_size = max(1, batch_size)
+
+    def iter_events(self, paths: Iterable[str]) -> Iterator[tuple[str, str, object]]:
+        paths = list(paths)
+        workers = min(self.max_workers, len(paths))
+        if workers <= 1:
+            for path in paths:
+                yield from iter_file_events(path, self.batch_size)
+            return
+        yield from self._iter_parallel(paths, workers)
+
+    def _iter_parallel(self, paths: list[str], workers: int) -> Iterator[tuple[str, str, object]]:
+        # fork, ana süreçteki thread'lerle (Chroma, httpx) birlikte güvenli değildir
+        ctx = multiprocessing.get_context("spawn")
+        tasks = ctx.Queue()
+        events = ctx.Queue(maxsize=self.queue_size)
+        for path in paths:
+            tasks.put(path)
+        for _ in range(workers):
+            tasks.put(None)
+        procs = [
+            ctx.Process(target=_worker_main, args=(tasks, events, self.batch_size), daemon=True)
+            for _ in range(workers)
+        ]
+        for proc in procs:
+            proc.start()
+
+        finished: set[str] = set()
+        current: dict[int, str] = {}  # pid → işlenen dosya
+        exited: set[int] = set()
+        try:
+            while len(exited) < workers:
+                try:
+                    kind, path, payload = events.get(timeout=0.5)
+                except queue.Empty:
+                    # Çıkış mesajı göndermeden ölen worker'lar (ör. bellek sınırı) beklenmez
+                    for proc in procs:
+                        if proc.pid not in exited and not proc.is_alive():
+                            exited.add(proc.pid)
+                            path = current.pop(proc.pid, None)
+                            if path is not None and path not in finished:
+                                finished.add(path)
+                                yield ("error", path, _CRASH_MESSAGE)
+                    continue
+                if kind == "start":
+                    current[payload] = path
+                elif kind == "exit":
+                    exited.add(payload)
+                elif path not in finished:
+                    if kind in ("done", "error"):
+                        finished.add(path)
+                    yield (kind, path, payload)
+            # Tüm worker'lar öldüyse hiç başlanmamış dosyalar kalabilir
+            for path in paths:
+                if path not in finished:
+                    yield ("error", path, _CRASH_MESSAGE)
+        finally:
+            for proc in procs:
+                if proc.is_alive():
+                    proc.terminate()
+            for proc in procs:
+                proc.join(timeout=5)
+            tasks.cancel_join_thread()
+            events.cancel_join_thread()
@@ -0,0 +1,162 @@
+"""
+Kod / sorgu çıktısının LLM'e gitmeden biçimlendirilmesi.
+CoderAgent çalıştırma çıktısı zaten nihai cevapsa (tek sayı, "Margherita: 5" satırları, kısa liste, küçük tablo)
+özet için ayrıca LLM çağrılmaz; çıktı burada şablonlarla düzenlenir. Yapısı tanınmayan serbest metin için
+format_result None döner ve özet LLM adımı çalışır.
+"""
+import ast
+import re
+
+MAX_LINES = 20
+MAX_LINE_CHARS = 120
+
+_NUMBER_RE = re.compile(r"^[-+]?\d+(?:[.,]\d+)?$")
+_KEY_VALUE_RE = re.compile(r"^([^:=]{1,60}?)\s*[:=]\s*(\S.*)$")
+_SENTENCE_END = (".", "!", "?")
+
+
+def format_number(value) -> str:
+    """Tam sayı değerli sayılar tam sayı, diğerleri en fazla 2 ondalıkla yazılır (4.60 → 4.6)."""
+    number = float(value)
+    if number.is_integer():
+        return str(int(number))
+    return f"{number:.2f}".rstrip("0").rstrip(".")
+
+
+def _parse_number(text: str) -> str | None:
+    if not _NUMBER_RE.match(text):
+        return None
+    return format_number(text.replace(",", "."))
+
+
+def _scalar(value) -> str | None:
+    if isinstance(value, bool):
+        return "evet" if value else "hayır"
+    if isinstance(value, (int, float)):
+        return format_number(value)
+    if isinstance(value, str) and len(value) <= MAX_LINE_CHARS and "\n" not in value:
+        return value
+    return None
+
+
+def render_key_values(pairs: list[tuple[str, str]]) -> str:
+    if len(pairs) == 1:
+        key, value = pairs[0]
+        return f"{key}: {value}"
+    return "\n".join(f"- {key}: {value}" for key, value in pairs)
+
+
+def render_list(items: list[str]) -> str:
+    return "\n".join(f"- {item}" for item in items)
+
+
+def render_table(header: list[str] | None, rows: list[list[str]]) -> str:
+    """Sütunları hizalanmış düz metin tablo (başlık varsa altı çizgili)."""
+    lines = ([header] if header else []) + rows
+    widths = [max(len(line[i]) for line in lines) for i in range(len(lines[0]))]
+    render = lambda cells: "  ".join(cell.ljust(width) for cell, width in zip(cells, widths)).rstrip()
+    out = [render(line) for line in lines]
+    if header:
+        out.insert(1, "  ".join("-" * width for width in widths))
+    return "\n".join(out)
+
+
+def _format_literal(value) -> str | None:
+    """Python değerinin (print edilmiş list/dict/tuple) şablonla gösterimi."""
+    scalar = _scalar(value)
+    if scalar is not None:
+        return scalar
+    if isinstance(value, dict):
+        pairs = [(str(k), _scalar(v)) for k, v in value.items()]
+        if 0 < len(pairs) <= MAX_LINES and all(v is not None for _, v in pairs):
+            return render_key_values(pairs)
+        return None
+    if not isinstance(value, (list, tuple)) or not 0 < len(value) <= MAX_LINES:
+        return None
+    if all(isinstance(v, dict) for v in value):
+        header = list(value[0])
+        if not header or any(list(v) != header for v in value):
+            return None
+        rows = [[_scalar(v[k]) for k in header] for v in value]
+        return None if any(c is None for row in rows for c in row) else render_table(header, rows)
+    if all(isinstance(v, (list, tuple)) for v in value):
+        rows = [[_scalar(c) for c in v] for v in value]
+        if any(c is None for row in rows for c in row) or len({len(row) for row in rows}) != 1:
+            return None
+        if len(rows[0]) == 2:
+            return render_key_values([(k, v) for k, v in rows])
+        return render_table(None, rows)
+    items = [_scalar(v) for v in value]
+    return None if any(i is None for i in items) else render_list(items)
+
+
+def _split_row(line: str) -> list[tuple[str, str]] | None:
+    """'pizza: Margherita, adet: 2' → [('pizza', 'Margherita'), ('adet', '2')]; biçime uymuyorsa None."""
+    parts = []
+    for part in line.split(", "):
+        match = _KEY_VALUE_RE.match(part)
+        if not match:
+            return None
+        parts.append((match.group(1).strip(), match.group(2).strip()))
+    return parts
+
+
+def _split_columns(line: str) -> list[str]:
+    if "\t" in line:
+        return [c.strip() for c in line.split("\t")]
+    if "|" in line:
+        return [c.strip() for c in line.strip("|").split("|")]
+    return re.split(r"\s{2,}", line.strip())
+
+
+def _format_lines(lines: list[str]) -> str | None:
+    # Kayıt satırları: her satırda aynı anahtarlar ("pizza: X, adet: 2") → tablo
+    rows = [_split_row(line) for line in lines]
+    if all(rows) and len(rows[0]) > 1 and len({tuple(k for k, _ in row) for row in rows}) == 1:
+        header = [k for k, _ in rows[0]]
+        if len(rows) == 1:
+            return render_key_values(rows[0])
+        return render_table(header, [[v for _, v in row] for row in rows])
+
+    # Anahtar/değer satırları ("Margherita: 5")
+    pairs = [_KEY_VALUE_RE.match(line) for line in lines]
+    if all(pairs):
+        values = [m.group(2).strip() for m in pairs]
+        if all(_parse_number(v) is not None or len(v) <= 60 for v in values):
+            return render_key_values([
+                (m.group(1).strip(), _parse_number(v) or v) for m, v in zip(pairs, values)
+            ])
+
+    # Sekme / | / çoklu boşlukla ayrılmış sütunlar → tablo
+    columns = [_split_columns(line) for line in lines]
+    if len(lines) > 1 and len(columns[0]) > 1 and len({len(c) for c in columns}) == 1:
+        return render_table(None, columns)
+
+    # Kısa öğe listesi (her satır birkaç kelimelik bir isim/değer, cümle değil)
+    if all(len(line) <= 60 and len(line.split()) <= 6 and not line.endswith(_SENTENCE_END) for line in lines):
+        if len(lines) == 1:
+            return _parse_number(lines[0]) or lines[0]
+        return render_list([_parse_number(line) or line for line in lines])
+    return None
+
+
+def format_result(output: str) -> str | None:
+    """
+    Çalıştırma çıktısı yapılandırılmışsa (sayı, anahtar/değer, liste, küçük tablo) şablonla biçimlendirilmiş
+    cevabı, aksi halde None döndürür (None → özet için LLM çağrılır).
+    """
+    text = (output or "").strip()
+    if not text or "Kod Çalıştırma Hatası" in text:
+        return None
+    number = _parse_number(text)
+    if number is not None:
+        return number
+    if text[0] in "[({":
+        try:
+            return _format_literal(ast.literal_eval(text))
+        except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+            pass
+    lines = [line.rstrip() for line in text.splitlines() if line.strip()]
+    if len(lines) > MAX_LINES or any(len(line) > MAX_LINE_CHARS for line in lines):
+        return None
+    return _format_lines(lines)
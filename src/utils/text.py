@@ -0,0 +1,33 @@
+import re
+
+# Türkçe büyük/küçük harf: "I" → "ı", "İ" → "i" (str.lower() bunları yanlış çevirir)
+_TR_LOWER = str.maketrans({"I": "ı", "İ": "i"})
+# ASCII katlama: "Çelik" ile "celik" aynı terime düşsün
+_TR_FOLD = str.maketrans({"ç": "c", "ğ": "g", "ı": "i", "ö": "o", "ş": "s", "ü": "u", "â": "a", "î": "i", "û": "u"})
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_tr(text: str) -> str:
+    """Türkçe kurallarıyla küçük harfe çevirir ve ASCII'ye katlar."""
+    return text.translate(_TR_LOWER).lower().translate(_TR_FOLD)
+
+
+def tokenize(text: str) -> list[str]:
+    """normalize_tr sonrası harf/rakam dizilerini terim listesi olarak döndürür."""
+    return _TOKEN_RE.findall(normalize_tr(text))
+
+
+def query_signature(query: str) -> tuple[frozenset, frozenset]:
+    """(sayılar, kelime kökleri); kök = ilk 5 harf (Türkçe ekler için kaba kök)."""
+    tokens = tokenize(query)
+    numbers = frozenset(t for t in tokens if t.isdigit())
+    stems = frozenset(t[:5] for t in tokens if not t.isdigit())
+    return numbers, stems
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Yaklaşık token sayısı. Türkçe metin İngilizceden daha fazla token'a bölündüğü için
+    karakter/3 oranı kullanılır (karakter/4 Türkçede düşük tahmin eder).
+    """
+    return (len(text) + 2) // 3
@@ -0,0 +1,89 @@
+"""
+Yerel token sayacı.
+tokenizer_path ile bir Hugging Face `tokenizer.json` (ör. Llama 3; fast ve smart model aynı tokenizer'ı kullanır)
+verilirse `tokenizers` kütüphanesiyle gerçek token sayısı hesaplanır; verilmezse veya kütüphane yoksa
+estimate_tokens tahmini kullanılır. Şablonlar ve dosya parçaları tekrar tekrar sayıldığı için kısa metinlerin
+sayıları LRU önbellekte tutulur.
+"""
+from collections import OrderedDict
+
+from src.utils.text import estimate_tokens
+
+try:
+    from tokenizers import Tokenizer
+except ImportError:  # tokenizers opsiyonel; yoksa karakter tabanlı tahmin kullanılır
+    Tokenizer = None
+
+TRUNCATION_MARKER = "\n[...]\n"
+
+
+class TokenCounter:
+    def __init__(self, tokenizer_path: str | None = None, cache_size: int = 4096, max_cached_chars: int = 4096):
+        """
+        Args:
+            tokenizer_path: tokenizer.json yolu; None → estimate_tokens.
+            cache_size: Önbellekte tutulan metin sayısı; 0 → önbellek kapalı.
+            max_cached_chars: Bundan uzun metinler önbelleğe alınmaz (tek seferlik prompt'lar belleği şişirmesin).
+        """
+        self.tokenizer = Tokenizer.from_file(tokenizer_path) if tokenizer_path and Tokenizer is not None else None
+        self.cache_size = cache_size
+        self.max_cached_chars = max_cached_chars
+        self._cache: OrderedDict[str, int] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self) -> str:
+        return "tokenizers" if self.tokenizer is not None else "estimate"
+
+    def _count(self, text: str) -> int:
+        if self.tokenizer is None:
+            return estimate_tokens(text)
+        return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+
+    def count(self, text: str) -> int:
+        """Metnin token sayısı (boş metin → 0)."""
+        if not text:
+            return 0
+        if not self.cache_size or len(text) > self.max_cached_chars:
+            return self._count(text)
+        cached = self._cache.get(text)
+        if cached is not None:
+            self._cache.move_to_end(text)
+            self.hits += 1
+            return cached
+        self.misses += 1
+        tokens = self._cache[text] = self._count(text)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return tokens
+
+    def fit(self, text: str, max_tokens: int) -> str:
+        """
+        Metin max_tokens'a sığıyorsa aynen, sığmıyorsa baş ve sonundan eşit parçalar korunup ortası
+        "[...]" ile kesilmiş halini döndürür (talimatlar genelde başta, soru/hata sonda olur).
+        """
+        if self.count(text) <= max_tokens:
+            return text
+        keep = max_tokens - self.count(TRUNCATION_MARKER)
+        if keep <= 0:
+            return ""
+        head_tokens, tail_tokens = (keep + 1) // 2, keep // 2
+        if self.tokenizer is None:
+            # estimate_tokens ≈ karakter/3: n token ≈ 3n - 2 karakter
+            head_end, tail_start = max(3 * head_tokens - 2, 0), len(text) - max(3 * tail_tokens - 2, 0)
+        else:
+            offsets = self.tokenizer.encode(text, add_special_tokens=False).offsets
+            head_end = offsets[head_tokens - 1][1] if head_tokens else 0
+            tail_start = offsets[-tail_tokens][0] if tail_tokens else len(text)
+        return text[:head_end] + TRUNCATION_MARKER + text[tail_start:]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "cached": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
@@ -1,14 +1,61 @@
 from langchain_community.vectorstores import Chroma
 from langchain_ollama import OllamaEmbeddings
 import os
+from itertools import islice
+
+from src.utils.embedding_cache import CachedEmbeddings, EmbeddingCache
+from src.utils.embedding_pipeline import EmbeddingPipeline, EmbeddingStats
+from src.utils.lexical_index import LexicalIndex
+
+LEXICAL_INDEX_FILENAME = "lexical_index.json"
+SEARCH_MODES = ("hybrid", "vector", "lexical")
+
+
+class _IndexedCollection:
+    """Chroma koleksiyonuna yazılan her sayfayı sözcüksel indekse de ekleyen ince sarmalayıcı."""
+
+    def __init__(self, collection, lexical: LexicalIndex | None):
+        self.collection = collection
+        self.lexical = lexical
+
+    def upsert(self, ids, embeddings, documents, metadatas=None):
+        if metadatas is None:
+            self.collection.upsert(ids=ids, embeddings=embeddings, documents=documents)
+        else:
+            self.collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+        # Sadece Chroma'ya başarıyla yazılan kayıtlar indekslenir
+        if self.lexical is not None:
+            self.lexical.add(ids, documents, metadatas)
+
 
 class VectorStoreManager:
     """Vektör veritabanı işlemlerini (kayıt ve arama) yöneten sınıf."""
     
-    def __init__(self, chunks=None):
+    def __init__(
+        self,
+        chunks=None,
+        persist_directory: str = "./chroma_db",
+        embeddings=None,
+        embed_batch_size: int = 32,
+        embed_workers: int = 4,
+        embed_retries: int = 3,
+        embedding_cache_path: str | None = None,
+        lexical_index: bool = True,
+        rrf_k: int = 60,
+    ):
         # Ollama üzerinden Llama 3.2 modelini embedding için kullanıyoruz
-        self.embeddings = OllamaEmbeddings(model="nomic-embed-text")
-        self.persist_directory = "./chroma_db"
+        self.embeddings = embeddings or OllamaEmbeddings(model="nomic-embed-text")
+        # embedding_cache_path verilirse aynı metin (chunk veya sorgu) bir daha embed edilmez
+        if embedding_cache_path:
+            self.embeddings = CachedEmbeddings(self.embeddings, EmbeddingCache(embedding_cache_path))
+        self.persist_directory = persist_directory
+        # Yeni chunk'lar batch'ler halinde, sınırlı paralellikle embed edilip sayfa sayfa yazılır
+        self.embed_batch_size = embed_batch_size
+        self.embed_workers = embed_workers
+        self.embed_retries = embed_retries
+        # Chroma ile aynı chunk'ların BM25 indeksi (tam isim/sayı aramaları ve embedding'siz hızlı mod için)
+        self.lexical = LexicalIndex(os.path.join(persist_directory, LEXICAL_INDEX_FILENAME)) if lexical_index else None
+        self.rrf_k = rrf_k
         
         if chunks:
             # Eğer döküman parçaları gelmişse veritabanını oluştur ve diske kaydet
@@ -23,77 +70,218 @@ class VectorStoreManager:
                 persist_directory=self.persist_directory,
                 embedding_function=self.embeddings
             )
+        self._sync_lexical_index()
 
-    def search(self, query: str, k: int = 3):
-        """Soruyla en alakalı k adet döküman parçasını getirir."""
-        if not self.db:
+    def _sync_lexical_index(self, page_size: int = 1000) -> None:
+        """
+        İndeks Chroma ile aynı id'leri içermiyorsa (ilk kurulum, eski store, yarıda kalmış yazma) Chroma'dan
+        yeniden kurar. İndeks yarıda kalmış bir yazma olmadan Chroma'nın bugünkü kayıt sayısıyla kaydedildiyse
+        sabit sürede döner; aksi halde Chroma'dan sadece id'ler okunup karşılaştırılır.
+        """
+        if self.lexical is None or self.db is None:
+            return
+        count = self.get_document_count()
+        if self.lexical.synced_count == count and len(self.lexical) == count:
+            return
+        chroma_ids = {i for page in self._iter_pages(page_size, include=()) for i in page["ids"]}
+        if self.lexical.ids() != chroma_ids:
+            self.lexical.clear()
+            for page in self._iter_pages(page_size):
+                self.lexical.add(page["ids"], page["documents"], page["metadatas"])
+        self.save_lexical_index()
+
+    def search(self, query: str, k: int = 3, where: dict | None = None):
+        """
+        Soruyla en alakalı k adet döküman parçasını getirir.
+        where: Chroma metadata filtresi, ör. {"record_key": "puanlar"} veya {"source": "./data/orders.json"}.
+        """
+        if self.db is None:
+            return []
+        return self.db.similarity_search(query, k=k, filter=where)
+
+    def search_with_scores(self, query: str, k: int = 3, where: dict | None = None):
+        """search() ile aynı, ancak [(doküman, alaka_skoru 0..1), ...] döndürür (yüksek = daha alakalı)."""
+        if self.db is None:
+            return []
+        return self.db.similarity_search_with_relevance_scores(query, k=k, filter=where)
+
+    def search_lexical(self, query: str, k: int = 3, where: dict | None = None):
+        """
+        Sadece BM25 indeksiyle arama; embedding çağrısı yapılmaz.
+        [(doküman, skor 0..1), ...] döndürür (skor: sorgu terimlerinin IDF ağırlıklı kapsama oranı).
+        """
+        if self.lexical is None:
             return []
-        return self.db.similarity_search(query, k=k)
+        return self.lexical.search(query, k=k, where=where)
+
+    def search_hybrid(self, query: str, k: int = 3, where: dict | None = None, mode: str = "hybrid"):
+        """
+        Vektör ve BM25 sonuçlarını reciprocal rank fusion ile birleştirir; [(doküman, skor 0..1), ...] döndürür.
+        Sıralama füzyon skoruna göredir; dönen skor, dokümanın vektör alaka skoru ile sözcüksel kapsama
+        skorunun büyüğüdür (researcher'ın güven eşiği için).
+        mode="vector" veya "lexical" tek kaynağı kullanır ("lexical" embedding çağrısı yapmaz).
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Bilinmeyen arama modu: {mode}. Geçerli değerler: {', '.join(SEARCH_MODES)}")
+        if mode == "vector" or self.lexical is None:
+            return self.search_with_scores(query, k=k, where=where)
+        if mode == "lexical":
+            return self.search_lexical(query, k=k, where=where)
+
+        candidates = max(k * 4, 10)
+        fused: dict[tuple, float] = {}
+        best: dict[tuple, tuple] = {}
+        for results in (self.search_with_scores(query, k=candidates, where=where),
+                        self.search_lexical(query, k=candidates, where=where)):
+            for rank, (doc, score) in enumerate(results):
+                # Chroma sonuçlarında id olmadığı için kaynak + içerik ile eşlenir
+                key = (doc.metadata.get("source"), doc.page_content)
+                fused[key] = fused.get(key, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+                if key not in best or score > best[key][1]:
+                    best[key] = (doc, score)
+        ranked = sorted(fused, key=fused.get, reverse=True)[:k]
+        return [best[key] for key in ranked]
     
-    def add_documents(self, chunks):
-        """Mevcut veritabanına yeni dokümanlar ekler (mevcut veriler korunur)."""
-        if not self.db or not chunks:
-            return False
-        try:
-            self.db.add_documents(chunks)
-            return True
-        except Exception as e:
-            print(f"Hata: Yeni dokümanlar eklenirken hata oluştu: {e}")
+    def add_documents(self, chunks, ids: list[str] | None = None, progress=None):
+        """
+        Mevcut veritabanına yeni dokümanlar ekler (mevcut veriler korunur).
+        ids verilirse aynı id'li kayıtların üzerine yazılır (tekrar yükleme idempotent olur).
+        Tüm chunk'lar yazıldıysa True döner; ayrıntılı sonuç için add_documents_batched kullanılır.
+        """
+        stats = self.add_documents_batched(chunks, ids=ids, progress=progress)
+        if stats is None:
             return False
+        for error in stats.errors:
+            print(f"Hata: Yeni dokümanlar eklenirken hata oluştu: {error}")
+        return not stats.failed_ids
+
+    def add_documents_batched(self, chunks, ids: list[str] | None = None, progress=None) -> EmbeddingStats | None:
+        """
+        Chunk'ları EmbeddingPipeline ile (batch, paralel istek, yeniden deneme, sayfalı upsert) ekler.
+        progress(done, total) ilerleme bildirimi içindir. Veritabanı yoksa veya chunk yoksa None döner.
+        """
+        if self.db is None or not chunks:
+            return None
+        self._begin_write()
+        stats = self._pipeline(progress).run(self._indexed_collection(), chunks, ids=ids)
+        self.save_lexical_index()
+        return stats
+
+    def add_records_batched(self, records, progress=None) -> EmbeddingStats | None:
+        """
+        (id, chunk) çiftlerini akış halinde ekler; records tüketildikçe okunur (bkz. EmbeddingPipeline.run_records).
+        Veritabanı yoksa None döner.
+        """
+        if self.db is None:
+            return None
+        self._begin_write()
+        stats = self._pipeline(progress).run_records(self._indexed_collection(), records)
+        self.save_lexical_index()
+        return stats
+
+    def _indexed_collection(self) -> _IndexedCollection:
+        return _IndexedCollection(self.db._collection, self.lexical)
+
+    def _pipeline(self, progress=None) -> EmbeddingPipeline:
+        return EmbeddingPipeline(
+            self.embeddings,
+            batch_size=self.embed_batch_size,
+            max_workers=self.embed_workers,
+            max_retries=self.embed_retries,
+            progress=progress,
+        )
+
+    def delete_documents(self, ids: list[str], save: bool = True) -> None:
+        """
+        Verilen id'lere sahip chunk'ları siler.
+        save=False: sözcüksel indeks diske yazılmaz; toplu silmelerden sonra save_lexical_index() bir kez çağrılır.
+        """
+        if self.db is not None and ids:
+            self._begin_write()
+            self.db.delete(ids=list(ids))
+            if self.lexical is not None:
+                self.lexical.delete(ids)
+            if save:
+                self.save_lexical_index()
+
+    def delete_by_source(self, source: str, keep_ids: set[str] | None = None, save: bool = True) -> int:
+        """metadata["source"] == source olan chunk'ları (keep_ids hariç) siler; silinen sayıyı döndürür."""
+        if self.db is None:
+            return 0
+        found = self.db.get(where={"source": source}, include=[])
+        stale = [i for i in found.get("ids", []) if not keep_ids or i not in keep_ids]
+        self.delete_documents(stale, save=save)
+        return len(stale)
+
+    def _begin_write(self) -> None:
+        if self.lexical is not None:
+            self.lexical.begin_write()
+
+    def save_lexical_index(self) -> None:
+        """Sözcüksel indeksi (değiştiyse) Chroma'nın kayıt sayısıyla birlikte diske yazar."""
+        if self.lexical is not None:
+            self.lexical.save(chroma_count=self.get_document_count())
 
 
 #veri tabanı işlemleri için fonksiyonlar:
+    # Hepsi koleksiyonu sayfa sayfa okur; milyonlarca chunk'lık korpusta da bellek kullanımı batch_size ile sınırlıdır
+    def _iter_pages(self, batch_size: int = 500, where: dict | None = None, include=("documents", "metadatas")):
+        """Koleksiyonu limit/offset ile sayfa sayfa okur; her sayfa Chroma get() sonucudur."""
+        if self.db is None:
+            return
+        collection = self.db._collection
+        offset = 0
+        while True:
+            page = collection.get(where=where, include=list(include), limit=batch_size, offset=offset)
+            if not page["ids"]:
+                return
+            yield page
+            if len(page["ids"]) < batch_size:
+                return
+            offset += batch_size
+
+    def iter_documents(self, batch_size: int = 500, where: dict | None = None, include=("documents", "metadatas")):
+        """
+        Kayıtları tek tek üretir: {"id", "content"?, "metadata"?}.
+        include sadece istenen alanları getirir; ör. include=("metadatas",) içerikleri hiç okumaz,
+        include=() sadece id'leri döndürür. where: Chroma metadata filtresi.
+        """
+        include = tuple(include)
+        for page in self._iter_pages(batch_size, where, include):
+            for i, doc_id in enumerate(page["ids"]):
+                record = {"id": doc_id}
+                if "documents" in include:
+                    record["content"] = page["documents"][i]
+                if "metadatas" in include:
+                    record["metadata"] = page["metadatas"][i] or {}
+                yield record
+
     # A. get_all_documents: veritabanındaki tüm dokümanları getirir
     def get_all_documents(self, limit: int = None):
-        """Veritabanındaki tüm dokümanları getirir."""
-        if not self.db:
-            return []
-        # Boş bir query ile tüm dokümanları almak için get() metodunu kullanıyoruz
-        try:
-            # Chromadbden tüm dokümanları çekmek için get() kullanılır
-            results = self.db.get()
-            if results and 'documents' in results:
-                documents = results['documents']
-                if limit:
-                    documents = documents[:limit]
-                return documents
-            return []
-        except Exception as e:
-            # Eğer get() çalışmazsa, boş query ile similarity_search kullan
-            if limit:
-                return self.db.similarity_search("", k=limit)
-            # Limit yoksa
-            return self.db.similarity_search("", k=1000) # büyük bir sayı ile tümünü almaya çalış
+        """Veritabanındaki dokümanların metinlerini getirir (limit verilirse ilk limit kadarını)."""
+        records = self.iter_documents(include=("documents",))
+        return [record["content"] for record in islice(records, limit)]
     
     # B. get_document_count: veritabanındaki toplam doküman sayısını döndürür
-    def get_document_count(self):
-        """Veritabanındaki toplam doküman sayısını döndürür."""
-        if not self.db: # eğer veritabanı yoksa 0 döndür
-            return 0
-        try:
-            results = self.db.get() # veritabanındaki tüm dokümanları al
-            if results and 'documents' in results:
-                return len(results['documents']) # doküman sayısını döndür
-            return 0
-        except Exception:
+    def get_document_count(self, where: dict | None = None):
+        """Toplam doküman sayısı; filtresiz sayım koleksiyondan doğrudan alınır (içerikler okunmaz)."""
+        if self.db is None: # eğer veritabanı yoksa 0 döndür
             return 0
+        if where is None:
+            return self.db._collection.count()
+        # Filtreli sayımda sadece id'ler sayfa sayfa okunur
+        return sum(1 for _ in self.iter_documents(where=where, include=()))
     
     # C. get_documents_with_metadata: veritabanındaki dokümanları metadata bilgileriyle birlikte getirir
-    def get_documents_with_metadata(self, limit: int = 10): 
-        """Dokümanları metadata bilgileriyle birlikte getirir."""
-        if not self.db:
-            return []
-        try:
-            # Boş query ile arama yaparak tüm dokümanları al
-            docs = self.db.similarity_search("", k=limit if limit else 1000) # büyük bir sayı ile tümünü almaya çalış
-            result = []
-            for i, doc in enumerate(docs): 
-                result.append({ # dictşonary for loop içinde oluşturulur ve sonuç listesine eklenir 
-                    "id": i,
-                    "content": doc.page_content[:500] + "..." if len(doc.page_content) > 500 else doc.page_content, 
-                    "full_content": doc.page_content,
-                    "metadata": doc.metadata if hasattr(doc, 'metadata') else {} # eğer doc.metadata varsa onu döndür, yoksa boş bir dictionary döndür
-                })
-            return result
-        except Exception as e:
-            return [] 
\ No newline at end of file
+    def get_documents_with_metadata(self, limit: int = 10, where: dict | None = None):
+        """Dokümanları id ve metadata bilgileriyle birlikte getirir (limit=None: hepsi)."""
+        result = []
+        for record in islice(self.iter_documents(where=where), limit):
+            content = record["content"] or ""
+            result.append({
+                "id": record["id"],
+                "content": content[:500] + "..." if len(content) > 500 else content,
+                "full_content": content,
+                "metadata": record["metadata"],
+            })
+        return result
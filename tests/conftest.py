@@ -19,8 +19,9 @@ def mock_code_executor():
 
 @pytest.fixture
 def mock_search_tool():
-    """SearchTool mock; search() ve search_with_source() ayarlanabilir."""
+    """SearchTool mock; asearch(), search() ve search_with_source() ayarlanabilir."""
     tool = MagicMock()
+    tool.asearch = AsyncMock(return_value="Mock arama sonucu")
     tool.search = MagicMock(return_value="Mock arama sonucu")
     tool.search_with_source = MagicMock(
         return_value=("Mock arama sonucu", "mock", None)
@@ -33,4 +34,5 @@ def mock_vector_store():
     """VectorStoreManager mock; search() boş veya dolu liste döner."""
     store = MagicMock()
     store.search = MagicMock(return_value=[])
+    store.search_hybrid = MagicMock(return_value=[])
     return store
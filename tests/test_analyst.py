@@ -3,6 +3,7 @@ import pytest
 from unittest.mock import AsyncMock, patch
 
 from src.agents.analyst import QueryAnalyst
+from src.tools.query_engine import QueryEngine
 
 
 class TestQueryAnalystNormalFlow:
@@ -59,3 +60,36 @@ class TestQueryAnalystBadInputAndFormat:
         analyst = QueryAnalyst(mock_llm_client)
         result = await analyst.analyze("test")
         assert result["task_type"] == "web_search"
+
+
+class TestQueryAnalystQuerySpec:
+    """query_engine verilirse prompt tablo şemasını içerir ve query_spec karara taşınır."""
+
+    @pytest.mark.asyncio
+    async def test_prompt_includes_schema_and_spec_is_returned(self, mock_llm_client, tmp_path):
+        (tmp_path / "reviews.json").write_text('{"puanlar": [{"isim": "Elif Kaya", "hiz": 5}]}', encoding="utf-8")
+        mock_llm_client.ask = AsyncMock(return_value=(
+            '{"task_type": "coding", "reason": "ortalama", "plan": [], '
+            '"query_spec": {"table": "puanlar", "agg": {"op": "avg", "field": "hiz"}}}'
+        ))
+        analyst = QueryAnalyst(mock_llm_client, query_engine=QueryEngine(str(tmp_path)))
+        result = await analyst.analyze("ortalama hız puanı")
+        assert result["query_spec"]["table"] == "puanlar"
+        system = mock_llm_client.ask.await_args.kwargs["system"]
+        assert "puanlar (reviews.json, 1 satır)" in system
+        assert "query_spec" in system
+
+
+class TestQueryAnalystPromptLayout:
+    """Sabit talimatlar sistem prompt'unda; soru sadece kullanıcı mesajında (Ollama KV önbelleği ön eki tekrar kullanır)."""
+
+    @pytest.mark.asyncio
+    async def test_system_prompt_is_identical_across_queries(self, mock_llm_client):
+        analyst = QueryAnalyst(mock_llm_client)
+        await analyst.analyze("Menüde ne var?")
+        await analyst.analyze("Toplam sipariş kaç?")
+        first, second = mock_llm_client.ask.await_args_list
+        assert first.kwargs["system"] == second.kwargs["system"] == analyst.system_prompt()
+        assert first.args[0] == "Kullanıcı Sorgusu: Menüde ne var?"
+        assert "Toplam sipariş kaç?" not in second.kwargs["system"]
+        assert first.kwargs["agent"] == "analyst"
@@ -0,0 +1,129 @@
+"""SemanticAnswerCache birim testleri: benzer soru isabeti, yanlış eşleşme koruması, data/ değişince boşalma, graf entegrasyonu."""
+import os
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.orchestration import build_graph
+from src.utils.answer_cache import SemanticAnswerCache
+from src.utils.text import tokenize
+
+
+class BagOfStemsEmbeddings:
+    """Kelime köklerinden (ilk 4 harf) vektör: aynı kelimeleri farklı sırayla/ekle içeren sorgular benzer çıkar."""
+
+    def __init__(self):
+        self.vocab = {}
+        self.calls = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        vector = [0.0] * 64
+        for token in tokenize(text):
+            index = self.vocab.setdefault(token[:4], len(self.vocab) % 64)
+            vector[index] += 1.0
+        return vector
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    d = tmp_path / "data"
+    d.mkdir()
+    (d / "orders.json").write_text('{"siparisler": []}', encoding="utf-8")
+    (d / "reviews.json").write_text('{"puanlar": [{"isim": "Elif Kaya", "hiz": 5, "lezzet": 4}]}', encoding="utf-8")
+    return d
+
+
+@pytest.fixture
+def cache(data_dir):
+    return SemanticAnswerCache(BagOfStemsEmbeddings(), str(data_dir), threshold=0.75, check_interval=0.0)
+
+
+class TestSemanticAnswerCache:
+    """Normal akış: aynı sorunun farklı ifadesi önbellekten döner."""
+
+    def test_paraphrase_hits(self, cache):
+        cache.store("en çok satan pizza hangisi", "Margherita", {"task_type": "coding"}, elapsed=4.0)
+        entry = cache.lookup("hangi pizza en çok satıldı")
+        assert entry is not None and entry.response == "Margherita"
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["saved_seconds"] == 4.0
+
+    def test_different_names_or_numbers_do_not_hit(self, cache):
+        cache.store("Elif Kaya lezzet puanı kaç", "5", elapsed=1.0)
+        cache.store("3 numaralı müşteri ne sipariş etti", "Vegetariana", elapsed=1.0)
+        assert cache.lookup("Mehmet Demir lezzet puanı kaç") is None
+        assert cache.lookup("4 numaralı müşteri ne sipariş etti") is None
+        assert cache.stats()["hit_rate"] == 0.0
+
+    def test_queries_differing_in_a_data_field_do_not_hit(self, cache):
+        cache.store("3-9 Şubat döneminde tüm müşterilerin verdiği ortalama hız puanı kaçtır acaba", "4.2", elapsed=1.0)
+        assert cache.lookup("3-9 Şubat döneminde tüm müşterilerin verdiği ortalama lezzet puanı kaçtır acaba") is None
+
+    def test_data_change_invalidates(self, cache, data_dir):
+        cache.store("kaç sipariş var", "10", elapsed=1.0)
+        path = data_dir / "orders.json"
+        path.write_text('{"siparisler": [1]}', encoding="utf-8")
+        os.utime(path, ns=(1, 1))
+        assert cache.lookup("kaç sipariş var") is None
+        assert len(cache) == 0
+        assert cache.stats()["invalidations"] == 1
+
+    def test_expired_entries_are_ignored(self, cache):
+        cache.ttl_seconds = 0.0
+        cache.store("kaç sipariş var", "10")
+        assert cache.lookup("kaç sipariş var") is None
+
+    def test_query_is_embedded_once_for_lookup_and_store(self, cache):
+        cache.store("ilk soru", "x")
+        calls = cache.embeddings.calls
+        cache.lookup("kaç sipariş var")
+        cache.store("kaç sipariş var", "10")
+        assert cache.embeddings.calls == calls + 1
+
+
+class TestGraphWithAnswerCache:
+    """Graf: isabette hiçbir ajan çalışmaz, yanıt akışa yazılır; ıskalamada yanıt kaydedilir."""
+
+    @pytest.mark.asyncio
+    async def test_second_paraphrase_skips_agents(self, cache, mock_llm_client):
+        analyst = MagicMock()
+        analyst.analyze = AsyncMock(return_value={"task_type": "coding", "reason": "", "plan": []})
+        coder = MagicMock()
+        coder.solve = AsyncMock(return_value="Margherita")
+        graph = build_graph(analyst, MagicMock(), coder, mock_llm_client, answer_cache=cache)
+
+        first = await graph.ainvoke({"query": "en çok satan pizza hangisi"})
+        assert first["response"] == "Margherita" and not first["cache_hit"]
+
+        tokens, final = [], {}
+        async for mode, chunk in graph.astream({"query": "hangi pizza en çok satıldı"}, stream_mode=["custom", "values"]):
+            if mode == "custom":
+                tokens.append(chunk["token"])
+            else:
+                final = chunk
+        assert tokens == ["Margherita"]
+        assert final["cache_hit"] and final["decision"]["source"] == "cache"
+        assert analyst.analyze.await_count == 1
+        assert coder.solve.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_answers_are_not_stored(self, cache, mock_llm_client):
+        analyst = MagicMock()
+        analyst.analyze = AsyncMock(return_value={"task_type": "coding", "reason": "", "plan": []})
+
+        async def failing_solve(query, on_failure=None, **kwargs):
+            on_failure()
+            return "Kod çalıştırılırken hata oluştu."
+
+        coder = MagicMock()
+        coder.solve = AsyncMock(side_effect=failing_solve)
+        graph = build_graph(analyst, MagicMock(), coder, mock_llm_client, answer_cache=cache)
+        result = await graph.ainvoke({"query": "en çok satan pizza hangisi"})
+        assert result["failed"]
+        assert len(cache) == 0
+
+        mock_llm_client.ask_streaming = AsyncMock(return_value="Model hatası (qwen): bağlantı reddedildi")
+        analyst.analyze = AsyncMock(return_value={"task_type": "general", "reason": "", "plan": []})
+        await graph.ainvoke({"query": "merhaba"})
+        assert len(cache) == 0
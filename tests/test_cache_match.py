@@ -0,0 +1,15 @@
+"""Önbellek eşleştirme yardımcıları birim testleri: data/ alan ve varlık adlarının kökleri."""
+import json
+
+from src.utils.cache_match import data_terms
+
+
+class TestDataTerms:
+    def test_field_names_and_short_values_are_terms(self, tmp_path):
+        (tmp_path / "reviews.json").write_text(
+            json.dumps({"puanlar": [{"isim": "Elif Kaya", "hiz": 5, "lezzet": 4, "yorum": "Çok uzun bir serbest metin yorumu"}]}),
+            encoding="utf-8",
+        )
+        terms = data_terms(str(tmp_path))
+        assert {"puanl", "isim", "hiz", "lezze", "elif", "kaya"} <= terms
+        assert "serbe" not in terms
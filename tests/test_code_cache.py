@@ -0,0 +1,76 @@
+"""CodeCache birim testleri: birebir/benzer soru isabeti, sayı ve isim koruması, veri değişince geçersizleşme, kalıcılık."""
+import os
+
+import pytest
+
+from src.utils.code_cache import CodeCache, normalize_query
+
+CODE = '```python\nimport json\nwith open("./data/orders.json", encoding="utf-8") as f:\n    print(len(json.load(f)["siparisler"]))\n```'
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    d = tmp_path / "data"
+    d.mkdir()
+    (d / "orders.json").write_text('{"siparisler": []}', encoding="utf-8")
+    (d / "menu.json").write_text('{"pizzalar": []}', encoding="utf-8")
+    return d
+
+
+class TestCodeCacheLookup:
+    def test_normalize_query_folds_case_and_punctuation(self):
+        assert normalize_query("Kaç SİPARİŞ var?") == normalize_query("kaç sipariş var")
+
+    def test_exact_and_near_repeat_hit(self, data_dir):
+        cache = CodeCache(str(data_dir))
+        cache.store("Toplam kaç sipariş var?", CODE)
+        assert cache.lookup("toplam kaç sipariş var").code == CODE
+        assert cache.lookup("Toplamda kaç sipariş var?").code == CODE
+        assert cache.stats()["hits"] == 2
+
+    def test_different_numbers_or_names_miss(self, data_dir):
+        cache = CodeCache(str(data_dir))
+        cache.store("9 numaralı müşterinin hız puanı", CODE)
+        cache.store("Fatma Çelik hangi pizzaları sipariş etti", CODE)
+        assert cache.lookup("7 numaralı müşterinin hız puanı") is None
+        assert cache.lookup("Elif Kaya hangi pizzaları sipariş etti") is None
+
+    def test_queries_differing_in_a_data_field_miss(self, data_dir):
+        (data_dir / "reviews.json").write_text('{"puanlar": [{"isim": "Elif Kaya", "hiz": 5, "lezzet": 4}]}', encoding="utf-8")
+        cache = CodeCache(str(data_dir))
+        cache.store("3-9 Şubat döneminde tüm müşterilerin verdiği ortalama hız puanı kaçtır acaba", CODE)
+        assert cache.lookup("3-9 Şubat döneminde tüm müşterilerin verdiği ortalama lezzet puanı kaçtır acaba") is None
+        assert cache.lookup("3-9 Şubat döneminde tüm müşterilerin verdiği ortalama hız puanı kaçtır peki") is not None
+
+
+class TestCodeCacheInvalidation:
+    def test_change_in_referenced_file_invalidates(self, data_dir):
+        cache = CodeCache(str(data_dir))
+        cache.store("kaç sipariş var", CODE)
+        path = data_dir / "orders.json"
+        path.write_text('{"siparisler": [{"isim": "Elif"}]}', encoding="utf-8")
+        os.utime(path, (1, 1))
+        assert cache.lookup("kaç sipariş var") is None
+        assert cache.stats()["invalidations"] == 1
+        assert len(cache) == 0
+
+    def test_change_in_unrelated_file_keeps_entry(self, data_dir):
+        cache = CodeCache(str(data_dir))
+        cache.store("kaç sipariş var", CODE)
+        path = data_dir / "menu.json"
+        path.write_text('{"pizzalar": [{"ad": "Margherita"}]}', encoding="utf-8")
+        os.utime(path, (1, 1))
+        assert cache.lookup("kaç sipariş var") is not None
+
+    def test_code_without_data_paths_depends_on_whole_data_dir(self, data_dir):
+        cache = CodeCache(str(data_dir))
+        cache.store("dosya sayısı", "```python\nimport os\nprint(len(os.listdir('data')))\n```")
+        (data_dir / "new.txt").write_text("yeni", encoding="utf-8")
+        assert cache.lookup("dosya sayısı") is None
+
+
+class TestCodeCachePersistence:
+    def test_entries_survive_reload(self, data_dir, tmp_path):
+        path = str(tmp_path / "code_cache.json")
+        CodeCache(str(data_dir), path=path).store("kaç sipariş var", CODE)
+        assert CodeCache(str(data_dir), path=path).lookup("kaç sipariş var").code == CODE
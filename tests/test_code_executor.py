@@ -53,3 +53,64 @@ class TestCodeExecutorErrorCases:
         result = executor.execute(code)
         assert "Kod Çalıştırma Hatası" in result
         assert "ZeroDivisionError" in result or "Traceback" in result
+
+
+class TestCodeExecutorWorkerPool:
+    """Çalışan süreç havuzu: paralel çalıştırma, zaman aşımı sonrası toparlanma, süreç yeniden kullanımı."""
+
+    def test_parallel_executions_do_not_mix_output(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        with CodeExecutor(pool_size=3) as executor:
+            codes = [f"import time\nfor _ in range(3):\n    print('job{i}')\n    time.sleep(0.02)" for i in range(6)]
+            with ThreadPoolExecutor(max_workers=6) as pool:
+                results = list(pool.map(executor.execute, codes))
+        for i, result in enumerate(results):
+            assert result.split() == [f"job{i}"] * 3
+
+    def test_timeout_kills_worker_and_pool_recovers(self):
+        with CodeExecutor(timeout_seconds=1, pool_size=1) as executor:
+            first_pid = executor.pool._workers[0].process.pid
+            result = executor.execute("while True:\n    pass")
+            assert "Kod Çalıştırma Hatası" in result
+            assert "1 saniye içinde tamamlanamadı" in result
+            assert executor.execute("print(7)") == "7"
+            assert executor.pool._workers[0].process.pid != first_pid
+
+    def test_worker_process_is_reused_between_jobs(self):
+        with CodeExecutor(pool_size=1) as executor:
+            first = executor.execute("import os\nprint(os.getpid())")
+            second = executor.execute("import os\nprint(os.getpid())")
+        assert first == second
+
+    def test_namespace_is_fresh_for_each_job(self):
+        with CodeExecutor(pool_size=1) as executor:
+            executor.execute("leftover = 1")
+            result = executor.execute("print(leftover)")
+        assert "NameError" in result
+
+    def test_runs_in_project_root_with_preloaded_data_files(self):
+        with CodeExecutor(pool_size=1) as executor:
+            result = executor.execute("import os\nprint(os.path.isdir('./data'), isinstance(dict(data_files), dict))")
+        assert result == "True True"
+
+    def test_chdir_does_not_leak_into_next_job(self):
+        with CodeExecutor(pool_size=1) as executor:
+            executor.execute("import os\nos.chdir('/')\nprint(os.getcwd())")
+            result = executor.execute("import os\nprint(os.path.isdir('./data'))")
+        assert result == "True"
+
+    def test_stdin_reads_do_not_block_on_protocol_pipe(self):
+        with CodeExecutor(timeout_seconds=5, pool_size=1) as executor:
+            first_pid = executor.pool._workers[0].process.pid
+            assert executor.execute("import sys\nprint(repr(sys.stdin.read()))") == "''"
+            result = executor.execute("input('sayı: ')")
+            assert "EOFError" in result
+            assert executor.pool._workers[0].process.pid == first_pid
+
+    def test_crashed_worker_is_replaced(self):
+        with CodeExecutor(pool_size=1) as executor:
+            result = executor.execute("import os\nos._exit(3)")
+            assert "Kod Çalıştırma Hatası" in result
+            assert "çıkış kodu 3" in result
+            assert executor.execute("print('tekrar')") == "tekrar"
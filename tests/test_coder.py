@@ -1,8 +1,10 @@
-"""CoderAgent birim testleri: normal çözüm, executor hatası, çıktı üretmeyen kod."""
+"""CoderAgent birim testleri: normal çözüm, executor hatası, çıktı üretmeyen kod, kod önbelleği, sorgu motoru."""
 import pytest
 from unittest.mock import AsyncMock, MagicMock
 
 from src.agents.coder import CoderAgent
+from src.tools.query_engine import QueryEngine
+from src.utils.code_cache import CodeCache
 
 
 class TestCoderAgentNormalFlow:
@@ -20,17 +22,45 @@ class TestCoderAgentNormalFlow:
         assert result == "42"
 
     @pytest.mark.asyncio
-    async def test_solve_returns_llm_summary_when_output_not_pure_number(self, mock_llm_client, mock_code_executor):
+    async def test_solve_returns_llm_summary_when_output_is_unstructured(self, mock_llm_client, mock_code_executor):
         mock_llm_client.ask = AsyncMock(side_effect=[
-            "```python\nprint('Toplam: 10')\n```",
+            "```python\nprint('Siparişler incelendi, bu hafta 10 sipariş verildi.')\n```",
             "Toplam 10 sipariş vardır.",
         ])
-        mock_code_executor.execute = MagicMock(return_value="Toplam: 10")
+        mock_code_executor.execute = MagicMock(return_value="Siparişler incelendi, bu hafta 10 sipariş verildi.")
         coder = CoderAgent(mock_llm_client, mock_code_executor)
         result = await coder.solve("kaç sipariş?")
         assert "10" in result
 
 
+    @pytest.mark.asyncio
+    async def test_structured_output_is_formatted_without_summary_call(self, mock_llm_client, mock_code_executor):
+        mock_llm_client.ask = AsyncMock(return_value="```python\nprint(counts)\n```")
+        mock_code_executor.execute = MagicMock(return_value="Margherita: 5\nPepperoni: 3")
+        coder = CoderAgent(mock_llm_client, mock_code_executor)
+        result = await coder.solve("hangi pizzadan kaç adet satıldı?")
+        assert result == "- Margherita: 5\n- Pepperoni: 3"
+        assert mock_llm_client.ask.await_count == 1
+
+
+class TestCoderAgentPromptLayout:
+    """Şemalar ve kurallar sabit SYSTEM_PROMPT'ta; kod üretme ve düzeltme çağrıları aynı ön eki paylaşır."""
+
+    @pytest.mark.asyncio
+    async def test_generation_and_fix_share_static_system_prompt(self, mock_llm_client, mock_code_executor):
+        mock_llm_client.ask = AsyncMock(side_effect=["```python\nbroken\n```", "```python\nprint(3)\n```"])
+        mock_code_executor.execute = MagicMock(side_effect=["Kod Çalıştırma Hatası: NameError", "3"])
+        coder = CoderAgent(mock_llm_client, mock_code_executor)
+        assert await coder.solve("kaç pizza çeşidi var?") == "3"
+        generate, fix = mock_llm_client.ask.await_args_list
+        assert generate.args[0] == "Soru: kaç pizza çeşidi var?"
+        assert generate.kwargs["system"] is fix.kwargs["system"] is CoderAgent.SYSTEM_PROMPT
+        # Çalışmayan kod yanıt önbelleğinden tekrar dönmesin
+        assert generate.kwargs["use_cache"] is False and fix.kwargs["use_cache"] is False
+        assert "kaç pizza" not in CoderAgent.SYSTEM_PROMPT
+        assert '"siparisler" (liste, içinde {"pizza": str, "adet": int})' in CoderAgent.SYSTEM_PROMPT
+
+
 class TestCoderAgentToolAndExecutionErrors:
     """Tool/executor hatası: anlamlı hata mesajı üretilir ve testle doğrulanır."""
 
@@ -76,5 +106,123 @@ class TestCoderAgentToolAndExecutionErrors:
         ])
         mock_code_executor.execute = MagicMock(return_value=err_msg)
         coder = CoderAgent(mock_llm_client, mock_code_executor)
-        result = await coder.solve("test")
+        failures = []
+        result = await coder.solve("test", on_failure=lambda: failures.append(True))
         assert "SyntaxError" in result or "sözdizimi" in result or "hatası" in result
+        assert failures == [True]
+
+
+class TestCoderAgentTokenBudget:
+    """Uzun çalıştırma çıktısı ve hata metinleri prompt bütçesine sığacak şekilde kısaltılır."""
+
+    @pytest.mark.asyncio
+    async def test_long_output_and_traceback_are_fitted_to_budget(self, mock_llm_client, mock_code_executor):
+        traceback = "Kod Çalıştırma Hatası: Traceback\n" + "  File x.py, line 1\n" * 400 + "KeyError: 'tarih'"
+        mock_llm_client.ask = AsyncMock(side_effect=[
+            "```python\nprint(data)\n```",
+            "```python\n" + "x = 1\n" * 500 + "```",
+            "Hata özeti.",
+        ])
+        mock_code_executor.execute = MagicMock(return_value=traceback)
+        coder = CoderAgent(mock_llm_client, mock_code_executor, token_budget=400)
+        await coder.solve("ortalama hız puanı nedir?")
+        fix_prompt, summary_prompt = (call.args[0] for call in mock_llm_client.ask.call_args_list[1:])
+        for prompt in (fix_prompt, summary_prompt):
+            assert coder.token_counter.count(prompt) <= 400
+            assert "KeyError: 'tarih'" in prompt and "[...]" in prompt
+
+
+class TestCoderAgentStreaming:
+    """on_token verilirse yalnızca son özet adımı akıtılır."""
+
+    @pytest.mark.asyncio
+    async def test_summary_step_streams_when_on_token_given(self, mock_llm_client, mock_code_executor):
+        mock_llm_client.ask = AsyncMock(return_value="```python\nprint('Siparişler incelendi, bu hafta 10 sipariş verildi.')\n```")
+        mock_llm_client.ask_streaming = AsyncMock(return_value="Toplam 10 sipariş vardır.")
+        mock_code_executor.execute = MagicMock(return_value="Siparişler incelendi, bu hafta 10 sipariş verildi.")
+        coder = CoderAgent(mock_llm_client, mock_code_executor)
+        result = await coder.solve("kaç sipariş?", on_token=lambda t: None)
+        assert result == "Toplam 10 sipariş vardır."
+        assert mock_llm_client.ask.await_count == 1
+        mock_llm_client.ask_streaming.assert_awaited_once()
+
+
+class TestCoderAgentCodeCache:
+    """code_cache verilirse çalışmış kod tekrar eden sorularda LLM'e gitmeden yeniden çalıştırılır."""
+
+    @pytest.mark.asyncio
+    async def test_repeat_question_reuses_cached_code(self, mock_llm_client, mock_code_executor, tmp_path):
+        mock_llm_client.ask = AsyncMock(return_value="```python\nprint(42)\n```")
+        mock_code_executor.execute = MagicMock(return_value="42")
+        coder = CoderAgent(mock_llm_client, mock_code_executor, code_cache=CodeCache(str(tmp_path)))
+        assert await coder.solve("Toplam kaç sipariş var?") == "42"
+        assert await coder.solve("toplam kaç sipariş var") == "42"
+        assert mock_llm_client.ask.await_count == 1
+        assert mock_code_executor.execute.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_failing_cached_code_is_discarded_and_regenerated(self, mock_llm_client, mock_code_executor, tmp_path):
+        cache = CodeCache(str(tmp_path))
+        cache.store("kaç sipariş var", "```python\nprint(old)\n```")
+        mock_llm_client.ask = AsyncMock(return_value="```python\nprint(7)\n```")
+        mock_code_executor.execute = MagicMock(side_effect=["Kod Çalıştırma Hatası:\nNameError", "7"])
+        coder = CoderAgent(mock_llm_client, mock_code_executor, code_cache=cache)
+        assert await coder.solve("kaç sipariş var") == "7"
+        assert mock_llm_client.ask.await_count == 1
+        assert cache.lookup("kaç sipariş var").code == "```python\nprint(7)\n```"
+
+    @pytest.mark.asyncio
+    async def test_failed_code_is_not_cached(self, mock_llm_client, mock_code_executor, tmp_path):
+        cache = CodeCache(str(tmp_path))
+        mock_llm_client.ask = AsyncMock(side_effect=["```python\nbroken\n```", "```python\nbroken\n```", "Hata."])
+        mock_code_executor.execute = MagicMock(return_value="Kod Çalıştırma Hatası:\nSyntaxError")
+        await CoderAgent(mock_llm_client, mock_code_executor, code_cache=cache).solve("kaç sipariş var")
+        assert len(cache) == 0
+
+
+class TestCoderAgentQueryEngine:
+    """query_engine verilirse sorgu tanımı yerel motorda çalışır; tanım ifade edemiyorsa kod üretimine dönülür."""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        (tmp_path / "reviews.json").write_text(
+            '{"puanlar": [{"isim": "Elif Kaya", "hiz": 5}, {"isim": "Can Öztürk", "hiz": 3}]}', encoding="utf-8"
+        )
+        return QueryEngine(str(tmp_path))
+
+    @pytest.mark.asyncio
+    async def test_analyst_spec_runs_without_code_generation(self, mock_llm_client, mock_code_executor, engine):
+        mock_llm_client.ask = AsyncMock(side_effect=AssertionError("LLM çağrılmamalı"))
+        coder = CoderAgent(mock_llm_client, mock_code_executor, query_engine=engine)
+        spec = {"table": "puanlar", "agg": {"op": "sum", "field": "hiz"}}
+        assert await coder.solve("toplam hız puanı", query_spec=spec) == "8"
+        mock_code_executor.execute.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_spec_is_planned_when_analyst_was_skipped(self, mock_llm_client, mock_code_executor, engine):
+        mock_llm_client.ask = AsyncMock(return_value='{"table": "puanlar", "agg": {"op": "max", "field": "hiz"}}')
+        coder = CoderAgent(mock_llm_client, mock_code_executor, query_engine=engine)
+        assert await coder.solve("en yüksek hız puanı") == "5"
+        assert mock_llm_client.ask.await_args.kwargs["task_type"] == "general"
+
+    @pytest.mark.asyncio
+    async def test_invalid_spec_falls_back_to_code_generation(self, mock_llm_client, mock_code_executor, engine):
+        mock_llm_client.ask = AsyncMock(return_value="```python\nprint(4)\n```")
+        mock_code_executor.execute = MagicMock(return_value="4")
+        coder = CoderAgent(mock_llm_client, mock_code_executor, query_engine=engine)
+        result = await coder.solve("medyan hız", query_spec={"table": "puanlar", "agg": {"op": "median", "field": "hiz"}}, plan_query=False)
+        assert result == "4"
+        assert mock_llm_client.ask.await_args.kwargs["task_type"] == "coding"
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("spec", [
+        {"table": "puanlar", "group_by": ["isim"], "agg": {"op": "sum", "field": "hiz"}},
+        {"table": "puanlar", "where": [{"field": "hiz", "op": "in", "value": 200}]},
+        {"table": "puanlar", "order": 1},
+        {"table": "puanlar", "sort_by": ["hiz"]},
+    ])
+    async def test_malformed_spec_falls_back_to_code_generation(self, mock_llm_client, mock_code_executor, engine, spec):
+        mock_llm_client.ask = AsyncMock(return_value="```python\nprint(4)\n```")
+        mock_code_executor.execute = MagicMock(return_value="4")
+        coder = CoderAgent(mock_llm_client, mock_code_executor, query_engine=engine)
+        assert await coder.solve("hız puanları", query_spec=spec, plan_query=False) == "4"
@@ -0,0 +1,91 @@
+"""ContextBuilder birim testleri: token bütçesi, bütün dosya/parça seçimi, RAG tekrar eleme, mtime önbelleği."""
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+from langchain_core.documents import Document
+
+from src.utils.context_builder import ContextBuilder
+from src.utils.text import estimate_tokens
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    d = tmp_path / "data"
+    d.mkdir()
+    (d / "welcome.txt").write_text("Pizza Friday her Cuma yapılır ve %10 indirim vardır.", encoding="utf-8")
+    big = "\n\n".join(f"Bölüm {i}: depo envanteri satır {i} un maya tuz." for i in range(200))
+    big += "\n\nBölüm özel: Fatma Çelik Margherita sipariş etti."
+    (d / "big.md").write_text(big, encoding="utf-8")
+    return d
+
+
+class TestContextBuilderSelection:
+    def test_small_relevant_file_included_whole(self, data_dir):
+        out = ContextBuilder(str(data_dir)).build("Pizza Friday nedir")
+        assert "--- Dosya: welcome.txt ---" in out
+        assert "%10 indirim" in out
+
+    def test_large_file_contributes_only_relevant_passages(self, data_dir):
+        out = ContextBuilder(str(data_dir), token_budget=200).build("Fatma Çelik ne sipariş etti")
+        assert "big.md (ilgili bölüm)" in out
+        assert "Fatma Çelik Margherita" in out
+        assert "Bölüm 150:" not in out
+
+    def test_output_respects_token_budget(self, data_dir):
+        out = ContextBuilder(str(data_dir), token_budget=100).build("depo envanteri un maya")
+        assert 0 < estimate_tokens(out) <= 100
+
+    def test_irrelevant_query_returns_empty(self, data_dir):
+        assert ContextBuilder(str(data_dir)).build("xyzzy") == ""
+
+
+class TestContextBuilderRag:
+    def test_rag_chunk_overlapping_included_file_is_deduplicated(self, data_dir):
+        rag = [Document(page_content="Pizza Friday her Cuma yapılır", metadata={"source": str(data_dir / "welcome.txt")})]
+        out = ContextBuilder(str(data_dir)).build("Pizza Friday", rag)
+        assert "--- RAG ---" not in out
+        assert out.count("Pizza Friday her Cuma") == 1
+
+    def test_new_rag_chunk_is_included(self, data_dir):
+        rag = [Document(page_content="Kampanya: ikinci pizza yarı fiyatına.", metadata={"source": "x.pdf"})]
+        out = ContextBuilder(str(data_dir)).build("kampanya", rag)
+        assert "--- RAG ---\nKampanya: ikinci pizza yarı fiyatına." in out
+
+
+class TestContextBuilderFileCache:
+    def test_unchanged_files_are_not_reread(self, data_dir):
+        builder = ContextBuilder(str(data_dir))
+        builder.build("pizza")
+        with patch("builtins.open", side_effect=AssertionError("dosya tekrar okundu")):
+            builder.build("pizza")
+
+    def test_modified_file_is_reloaded(self, data_dir):
+        builder = ContextBuilder(str(data_dir))
+        builder.build("pizza")
+        path = data_dir / "welcome.txt"
+        path.write_text("Pizza Friday iptal edildi.", encoding="utf-8")
+        os.utime(path, (1, 1))
+        assert "iptal" in builder.build("Pizza Friday")
+
+
+class TestContextBuilderJson:
+    def test_large_json_file_contributes_whole_records(self, tmp_path):
+        d = tmp_path / "data"
+        d.mkdir()
+        records = [{"musteri_no": i, "isim": f"Müşteri {i}", "lezzet": i % 5} for i in range(100)]
+        records.append({"musteri_no": 100, "isim": "Fatma Çelik", "lezzet": 5})
+        (d / "reviews.json").write_text(json.dumps({"puanlar": records}, ensure_ascii=False, indent=2), encoding="utf-8")
+        out = ContextBuilder(str(d), token_budget=150).build("Fatma Çelik lezzet")
+        assert '$.puanlar[100]: {"musteri_no": 100, "isim": "Fatma Çelik", "lezzet": 5}' in out
+
+    def test_rag_record_from_whole_included_file_is_skipped(self, tmp_path):
+        d = tmp_path / "data"
+        d.mkdir()
+        path = d / "orders.json"
+        path.write_text('{"siparisler": [{"isim": "Elif Kaya", "pizza": "Margherita"}]}', encoding="utf-8")
+        rag = [Document(page_content='orders.json $.siparisler[0]: {"isim": "Elif Kaya"}', metadata={"source": str(path)})]
+        out = ContextBuilder(str(d)).build("Elif Kaya", rag)
+        assert "--- Dosya: orders.json ---" in out
+        assert "--- RAG ---" not in out
@@ -0,0 +1,57 @@
+"""DocumentProcessor birim testleri: akış halinde okuma, büyük dosyaların bölüm bölüm işlenmesi."""
+import pytest
+from langchain_community.document_loaders import TextLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from src.utils.document_processor import DocumentProcessor
+
+
+class TestIterChunks:
+    """Normal akış: küçük dosyalar tek parça, büyük dosyalar bölüm sınırlarında işlenir."""
+
+    def test_small_file_is_split_like_before(self, tmp_path):
+        path = tmp_path / "a.md"
+        path.write_text("# Başlık\n" + "Pizza Friday her Cuma yapılır. " * 80, encoding="utf-8")
+        expected = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100).split_documents(
+            TextLoader(str(path), encoding="utf-8").load()
+        )
+        assert DocumentProcessor(str(path)).process() == expected
+
+    def test_large_file_is_read_in_sections(self, tmp_path):
+        path = tmp_path / "big.txt"
+        sections = [f"Bölüm {i}\n" + f"satır {i}\n" * 20 for i in range(50)]
+        path.write_text("\n".join(sections), encoding="utf-8")
+        processor = DocumentProcessor(str(path), block_chars=500)
+        blocks = list(processor._iter_text_blocks())
+        assert len(blocks) > 5
+        assert all(len(b.page_content) < 1000 for b in blocks)
+        # Bloklar bölüm başlarında kesilir ve birleşince dosyanın kendisi elde edilir
+        assert all(b.page_content.lstrip("\n").startswith("Bölüm") for b in blocks)
+        assert "".join(b.page_content for b in blocks) == path.read_text(encoding="utf-8")
+
+    def test_chunks_are_produced_lazily(self, tmp_path):
+        path = tmp_path / "big.txt"
+        path.write_text("satır\n" * 100_000, encoding="utf-8")
+        chunks = DocumentProcessor(str(path), block_chars=10_000).iter_chunks()
+        first = next(chunks)
+        assert first.page_content.startswith("satır")
+
+
+class TestErrors:
+    """Hata durumları: eksik dosya, desteklenmeyen format, okunamayan içerik."""
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            DocumentProcessor(str(tmp_path / "yok.txt")).process()
+
+    def test_unsupported_extension(self, tmp_path):
+        path = tmp_path / "a.csv"
+        path.write_text("x", encoding="utf-8")
+        with pytest.raises(ValueError):
+            DocumentProcessor(str(path)).process()
+
+    def test_invalid_encoding_is_reported_as_read_error(self, tmp_path):
+        path = tmp_path / "a.txt"
+        path.write_bytes(b"\xff\xfe\x00bozuk")
+        with pytest.raises(RuntimeError, match="Döküman okunamadı"):
+            DocumentProcessor(str(path)).process()
@@ -0,0 +1,67 @@
+"""DuckDuckGo HTML ayrıştırıcı testleri: kaydedilmiş fixture sayfaları, arka uçların aynı sonucu vermesi, erken durma."""
+import os
+
+import pytest
+
+from src.tools import duckduckgo_parser
+from src.tools.duckduckgo_parser import parse_results
+from src.tools.search_tool import SearchTool
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _page(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class TestParseResults:
+    @pytest.mark.parametrize("max_results", [1, 3, 100])
+    def test_backends_agree_on_fixture_page(self, max_results):
+        html = _page("duckduckgo_results.html")
+        lxml_results = parse_results(html, max_results, backend="lxml")
+        assert lxml_results == parse_results(html, max_results, backend="html.parser")
+        assert len(lxml_results) == min(max_results, 31)
+
+    def test_fields_are_extracted_and_whitespace_normalized(self):
+        title, snippet, url = parse_results(_page("duckduckgo_results.html"), 2)[1]
+        assert title.endswith(" Margherita")
+        assert "pizza margherita" in snippet and "  " not in snippet and "&amp;" not in snippet
+        assert url == "https://site0.example.com/tarif/0"
+
+    def test_missing_fields_fall_back(self):
+        html = '<div class="result"><p>reklam</p></div>'
+        assert parse_results(html, 3) == [("N/A", "Özet bulunamadı", "N/A")]
+
+    def test_no_results_page_and_empty_input(self):
+        assert parse_results(_page("duckduckgo_no_results.html"), 3) == []
+        assert parse_results("", 3) == []
+        assert parse_results(_page("duckduckgo_results.html"), 0) == []
+
+    def test_lxml_stops_after_max_results(self, monkeypatch):
+        """İlk sonuçlardan sonra gelen kısım hiç beslenmez: sayfanın sonu bozuk olsa da sonuç değişmez."""
+        monkeypatch.setattr(duckduckgo_parser, "FEED_CHUNK_CHARS", 512)
+        html = _page("duckduckgo_results.html")
+        fed = []
+        original = duckduckgo_parser.etree.HTMLPullParser
+
+        class _Recording:
+            def __init__(self, *args, **kwargs):
+                self._parser = original(*args, **kwargs)
+
+            def feed(self, data):
+                fed.append(len(data))
+                self._parser.feed(data)
+
+            def __getattr__(self, name):
+                return getattr(self._parser, name)
+
+        monkeypatch.setattr(duckduckgo_parser.etree, "HTMLPullParser", _Recording)
+        assert len(parse_results(html, 3, backend="lxml")) == 3
+        assert sum(fed) < len(html) / 2
+
+    def test_unknown_backend_is_rejected(self):
+        with pytest.raises(ValueError):
+            parse_results("<html></html>", 3, backend="regex")
+        with pytest.raises(ValueError):
+            SearchTool(html_parser="regex")
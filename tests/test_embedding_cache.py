@@ -0,0 +1,100 @@
+"""Embedding önbelleği birim testleri: kalıcılık, sadece eksik metinlerin embed edilmesi, model ayrımı, vector store entegrasyonu."""
+import itertools
+from unittest.mock import patch
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.utils.embedding_cache import CachedEmbeddings, EmbeddingCache
+from src.utils.vector_store import VectorStoreManager
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    """Alttaki modele giden metinleri kaydeder."""
+
+    calls: list = []
+
+    def embed_documents(self, texts):
+        self.calls.append(("documents", list(texts)))
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.calls.append(("query", text))
+        return super().embed_query(text)
+
+
+@pytest.fixture
+def inner():
+    emb = CountingEmbeddings(size=8)
+    emb.calls = []
+    return emb
+
+
+class TestCachedEmbeddings:
+    """Normal akış: önbellekte olan metin modele gitmez."""
+
+    def test_only_missing_texts_are_embedded(self, tmp_path, inner):
+        cached = CachedEmbeddings(inner, EmbeddingCache(str(tmp_path / "e.sqlite")), model_name="m")
+        first = cached.embed_documents(["a", "b"])
+        second = cached.embed_documents(["b", "c", "a"])
+        assert inner.calls == [("documents", ["a", "b"]), ("documents", ["c"])]
+        assert second[0] == pytest.approx(first[1], abs=1e-6)
+        assert second[2] == pytest.approx(first[0], abs=1e-6)
+        assert cached.stats()["hits"] == 2
+
+    def test_duplicates_within_a_call_are_embedded_once(self, tmp_path, inner):
+        cached = CachedEmbeddings(inner, EmbeddingCache(str(tmp_path / "e.sqlite")), model_name="m")
+        vectors = cached.embed_documents(["x", "x", "y"])
+        assert inner.calls == [("documents", ["x", "y"])]
+        assert vectors[0] == vectors[1]
+
+    def test_cache_survives_restart(self, tmp_path, inner):
+        path = str(tmp_path / "e.sqlite")
+        CachedEmbeddings(inner, EmbeddingCache(path), model_name="m").embed_documents(["kalıcı"])
+        inner.calls.clear()
+        again = CachedEmbeddings(inner, EmbeddingCache(path), model_name="m")
+        again.embed_documents(["kalıcı"])
+        again.embed_query("sorgu")
+        again.embed_query("sorgu")
+        assert inner.calls == [("query", "sorgu")]
+
+    def test_models_do_not_share_vectors(self, tmp_path, inner):
+        cache = EmbeddingCache(str(tmp_path / "e.sqlite"))
+        CachedEmbeddings(inner, cache, model_name="m1").embed_documents(["metin"])
+        CachedEmbeddings(inner, cache, model_name="m2").embed_documents(["metin"])
+        assert len(inner.calls) == 2
+
+    def test_oldest_entries_are_evicted(self, tmp_path):
+        clock = itertools.count(1)
+        with patch("src.utils.embedding_cache.time.time", side_effect=lambda: next(clock)):
+            cache = EmbeddingCache(str(tmp_path / "e.sqlite"), max_entries=2)
+            cache.set_many("m", {"k1": [1.0]})
+            cache.set_many("m", {"k2": [2.0]})
+            cache.get_many(["k1"])
+            cache.set_many("m", {"k3": [3.0]})
+        assert set(cache.get_many(["k1", "k2", "k3"])) == {"k1", "k3"}
+
+
+class TestVectorStoreIntegration:
+    """VectorStoreManager: yükleme ve arama önbellekten geçer."""
+
+    def test_reingest_and_repeated_query_skip_the_model(self, tmp_path, inner):
+        docs = [Document(page_content="Pizza Friday her Cuma.", metadata={"source": "a.txt"})]
+        cache_path = str(tmp_path / "e.sqlite")
+        store = VectorStoreManager(
+            persist_directory=str(tmp_path / "db1"), embeddings=inner, embedding_cache_path=cache_path
+        )
+        store.add_documents(docs, ids=["1"])
+        store.search("Cuma")
+        store.search("Cuma")
+        assert [kind for kind, _ in inner.calls] == ["documents", "query"]
+
+        # Vector store silinip yeniden oluşturulsa da embedding'ler önbellekten gelir
+        inner.calls.clear()
+        fresh = VectorStoreManager(
+            persist_directory=str(tmp_path / "db2"), embeddings=inner, embedding_cache_path=cache_path
+        )
+        fresh.add_documents(docs, ids=["1"])
+        assert fresh.search("Cuma")[0].page_content == "Pizza Friday her Cuma."
+        assert inner.calls == []
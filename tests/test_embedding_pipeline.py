@@ -0,0 +1,114 @@
+"""EmbeddingPipeline birim testleri: batch'leme, sınırlı paralellik, yeniden deneme, hatalı batch'in izolasyonu, sayfalı yazım."""
+import threading
+import time
+
+from langchain_core.documents import Document
+
+from src.utils.embedding_pipeline import EmbeddingPipeline
+
+
+class FakeEmbeddings:
+    """embed_documents çağrılarını kaydeder; fail_texts içindeki metinler için fail_times kez hata verir."""
+
+    def __init__(self, delay: float = 0.0, fail_texts=(), fail_times: int = 0):
+        self.delay = delay
+        self.fail_texts = set(fail_texts)
+        self.fail_times = fail_times
+        self.calls = []
+        self.failures = {}
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.calls.append(list(texts))
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(self.delay)
+            bad = self.fail_texts.intersection(texts)
+            if bad:
+                key = min(bad)
+                with self._lock:
+                    self.failures[key] = self.failures.get(key, 0) + 1
+                    count = self.failures[key]
+                if count <= self.fail_times:
+                    raise ConnectionError("ollama meşgul")
+            return [[float(len(t)), 1.0] for t in texts]
+        finally:
+            with self._lock:
+                self.running -= 1
+
+
+class FakeCollection:
+    def __init__(self):
+        self.upserts = []
+
+    def upsert(self, ids, embeddings, documents, metadatas=None):
+        self.upserts.append({"ids": ids, "embeddings": embeddings, "documents": documents, "metadatas": metadatas})
+
+    @property
+    def ids(self):
+        return [i for u in self.upserts for i in u["ids"]]
+
+
+def _docs(n):
+    return [Document(page_content=f"metin {i}", metadata={"source": "a.txt"}) for i in range(n)]
+
+
+class TestBatching:
+    """Normal akış: chunk'lar batch'ler halinde embed edilip sayfa sayfa yazılır."""
+
+    def test_all_chunks_are_embedded_in_batches(self):
+        emb = FakeEmbeddings()
+        col = FakeCollection()
+        stats = EmbeddingPipeline(emb, batch_size=4, max_workers=2, page_size=5).run(
+            col, _docs(10), ids=[f"id{i}" for i in range(10)]
+        )
+        assert sorted(len(c) for c in emb.calls) == [2, 4, 4]
+        assert sorted(col.ids) == sorted(f"id{i}" for i in range(10))
+        assert stats.written == stats.embedded == 10
+        assert stats.batches == 3
+        assert all(len(u["ids"]) <= 8 for u in col.upserts)
+
+    def test_parallel_requests_are_bounded(self):
+        emb = FakeEmbeddings(delay=0.02)
+        EmbeddingPipeline(emb, batch_size=1, max_workers=3).run(FakeCollection(), _docs(12))
+        assert emb.max_running == 3
+
+    def test_progress_reaches_total(self):
+        seen = []
+        EmbeddingPipeline(FakeEmbeddings(), batch_size=3, page_size=4, progress=lambda d, t: seen.append((d, t))).run(
+            FakeCollection(), _docs(10)
+        )
+        assert seen[-1] == (10, 10)
+        assert [d for d, _ in seen] == sorted(d for d, _ in seen)
+
+    def test_empty_metadata_is_written_separately(self):
+        col = FakeCollection()
+        docs = [Document(page_content="a", metadata={"source": "x"}), Document(page_content="b")]
+        EmbeddingPipeline(FakeEmbeddings()).run(col, docs, ids=["1", "2"])
+        by_id = {u["ids"][0]: u["metadatas"] for u in col.upserts}
+        assert by_id == {"1": [{"source": "x"}], "2": None}
+
+
+class TestRetriesAndFailures:
+    """Hata senaryoları: geçici hata yeniden denenir, kalıcı hata sadece kendi batch'ini düşürür."""
+
+    def test_transient_failure_is_retried(self):
+        emb = FakeEmbeddings(fail_texts={"metin 0"}, fail_times=2)
+        stats = EmbeddingPipeline(emb, batch_size=2, max_retries=3, retry_backoff=0).run(FakeCollection(), _docs(4))
+        assert stats.retries == 2
+        assert stats.failed_ids == []
+        assert stats.written == 4
+
+    def test_permanent_failure_only_drops_its_batch(self):
+        emb = FakeEmbeddings(fail_texts={"metin 0"}, fail_times=99)
+        col = FakeCollection()
+        stats = EmbeddingPipeline(emb, batch_size=2, max_retries=1, retry_backoff=0).run(
+            col, _docs(6), ids=[f"id{i}" for i in range(6)]
+        )
+        assert sorted(stats.failed_ids) == ["id0", "id1"]
+        assert sorted(col.ids) == ["id2", "id3", "id4", "id5"]
+        assert "ollama meşgul" in stats.errors[0]
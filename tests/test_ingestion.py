@@ -0,0 +1,150 @@
+"""Artımlı yükleme birim testleri: manifest, değişmeyen dosyayı atlama, değişen/silinen dosyanın chunk'larını temizleme."""
+import json
+import os
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.utils.ingestion import chunk_id, sync_data_dir
+from src.utils.vector_store import VectorStoreManager
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    d = tmp_path / "data"
+    d.mkdir()
+    (d / "a.txt").write_text("Pizza Friday her Cuma yapılır.", encoding="utf-8")
+    (d / "b.md").write_text("# Kurallar\nHer çalışanın haftalık 1 gün izni vardır.", encoding="utf-8")
+    return d
+
+
+@pytest.fixture
+def store(tmp_path):
+    return VectorStoreManager(
+        persist_directory=str(tmp_path / "chroma_db"),
+        embeddings=DeterministicFakeEmbedding(size=16),
+    )
+
+
+def _all_ids(store):
+    return set(store.db.get(include=[])["ids"])
+
+
+class TestChunkId:
+    def test_deterministic(self):
+        assert chunk_id("a.txt", 0, "x") == chunk_id("a.txt", 0, "x")
+        assert chunk_id("a.txt", 0, "x") != chunk_id("a.txt", 1, "x")
+
+
+class TestSyncDataDir:
+    def test_first_run_adds_all_files(self, data_dir, store):
+        report = sync_data_dir(store, str(data_dir))
+        assert len(report.added) == 2
+        assert report.chunks_added == len(_all_ids(store)) == 2
+        assert os.path.exists(os.path.join(store.persist_directory, "ingest_manifest.json"))
+
+    def test_second_run_with_unchanged_corpus_embeds_nothing(self, data_dir, store):
+        sync_data_dir(store, str(data_dir))
+        ids_before = _all_ids(store)
+        report = sync_data_dir(store, str(data_dir))
+        assert report.chunks_added == 0
+        assert len(report.unchanged) == 2
+        assert _all_ids(store) == ids_before
+
+    def test_touched_but_identical_file_is_not_reembedded(self, data_dir, store):
+        sync_data_dir(store, str(data_dir))
+        path = data_dir / "a.txt"
+        os.utime(path, (1, 1))
+        report = sync_data_dir(store, str(data_dir))
+        assert report.chunks_added == 0
+        assert str(path) in report.unchanged
+
+    def test_changed_file_replaces_its_chunks(self, data_dir, store):
+        sync_data_dir(store, str(data_dir))
+        (data_dir / "a.txt").write_text("Pizza Friday artık Cumartesi.", encoding="utf-8")
+        report = sync_data_dir(store, str(data_dir))
+        assert report.updated == [str(data_dir / "a.txt")]
+        assert report.chunks_deleted == 1
+        docs = store.db.get(where={"source": str(data_dir / "a.txt")})["documents"]
+        assert docs == ["Pizza Friday artık Cumartesi."]
+
+    def test_removed_file_chunks_are_deleted(self, data_dir, store):
+        sync_data_dir(store, str(data_dir))
+        os.remove(data_dir / "b.md")
+        report = sync_data_dir(store, str(data_dir))
+        assert report.removed == [str(data_dir / "b.md")]
+        assert len(_all_ids(store)) == 1
+
+    def test_lexical_index_is_saved_once_per_sync(self, data_dir, store, monkeypatch):
+        sync_data_dir(store, str(data_dir))
+        saves = []
+        save = store.lexical.save
+        monkeypatch.setattr(store.lexical, "save", lambda **kwargs: (saves.append(1), save(**kwargs)))
+        (data_dir / "a.txt").write_text("Pizza Friday artık Cumartesi.", encoding="utf-8")
+        os.remove(data_dir / "b.md")
+        sync_data_dir(store, str(data_dir))
+        # Yeni chunk'ların eklenmesi bir kez, değişen ve silinen dosyaların silmeleri sonda bir kez yazar
+        assert len(saves) == 2
+        assert store.lexical.ids() == _all_ids(store)
+
+    def test_legacy_duplicates_without_manifest_are_cleaned(self, data_dir, store):
+        from src.utils.document_processor import DocumentProcessor
+
+        # Manifest öncesi davranış: rastgele id'lerle iki kez eklenmiş chunk'lar
+        legacy = DocumentProcessor(str(data_dir / "a.txt")).process()
+        store.add_documents(legacy)
+        store.add_documents(legacy)
+        sync_data_dir(store, str(data_dir))
+        assert len(store.db.get(where={"source": str(data_dir / "a.txt")}, include=[])["ids"]) == 1
+
+    def test_file_with_failed_embeddings_is_retried_next_run(self, data_dir, store):
+        class FlakyEmbeddings:
+            def __init__(self, inner):
+                self.inner = inner
+                self.fail = True
+
+            def embed_documents(self, texts):
+                if self.fail and any("Pizza Friday" in t for t in texts):
+                    raise ConnectionError("ollama kapalı")
+                return self.inner.embed_documents(texts)
+
+            def embed_query(self, text):
+                return self.inner.embed_query(text)
+
+        flaky = FlakyEmbeddings(store.embeddings)
+        store.embeddings = flaky
+        store.embed_batch_size = 1
+        store.embed_retries = 0
+        report = sync_data_dir(store, str(data_dir))
+        assert str(data_dir / "a.txt") in report.failed
+        assert report.added == [str(data_dir / "b.md")]
+        assert report.embed_stats.written == 1
+
+        flaky.fail = False
+        report = sync_data_dir(store, str(data_dir))
+        assert report.added == [str(data_dir / "a.txt")]
+        assert len(_all_ids(store)) == 2
+
+    def test_parallel_loader_feeds_embedding_stage(self, data_dir, store):
+        from src.utils.parallel_loader import ParallelLoader
+
+        report = sync_data_dir(store, str(data_dir), loader=ParallelLoader(max_workers=2, queue_size=1, batch_size=1))
+        assert sorted(report.added) == [str(data_dir / "a.txt"), str(data_dir / "b.md")]
+        assert report.chunks_added == len(_all_ids(store)) == 2
+        assert _all_ids(store) == {
+            chunk_id(str(data_dir / "a.txt"), 0, "Pizza Friday her Cuma yapılır."),
+            chunk_id(str(data_dir / "b.md"), 0, "# Kurallar\nHer çalışanın haftalık 1 gün izni vardır."),
+        }
+
+    def test_files_from_older_chunker_are_rechunked(self, data_dir, store):
+        sync_data_dir(store, str(data_dir))
+        manifest_path = os.path.join(store.persist_directory, "ingest_manifest.json")
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        for entry in manifest["files"].values():
+            del entry["chunker"]
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        report = sync_data_dir(store, str(data_dir))
+        assert len(report.updated) == 2
+        assert len(_all_ids(store)) == 2
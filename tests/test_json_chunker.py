@@ -0,0 +1,113 @@
+"""JSON parçalayıcı birim testleri: kayıt başına chunk, kayıt yolu/alan metadata'sı, metadata filtreli arama."""
+import json
+
+import pytest
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.utils.document_processor import DocumentProcessor
+from src.utils.ingestion import sync_data_dir
+from src.utils import json_chunker
+from src.utils.json_chunker import iter_file_records, iter_records, json_documents
+from src.utils.vector_store import VectorStoreManager
+
+ORDERS = {
+    "donem": "3-9 Şubat 2026",
+    "toplam_musteri": 2,
+    "siparisler": [
+        {"musteri_no": 1, "isim": "Elif Kaya", "siparisler": [{"pizza": "Margherita", "adet": 1}]},
+        {"musteri_no": 2, "isim": "Mehmet Demir", "siparisler": [{"pizza": "Pepperoni", "adet": 2}]},
+    ],
+}
+
+
+class TestIterRecords:
+    """Normal akış: nesne listelerinin her elemanı ayrı kayıt, kalan alanlar tek "$" kaydı."""
+
+    def test_each_list_entry_is_a_record(self):
+        records = list(iter_records(ORDERS))
+        assert [r[0] for r in records] == ["$.siparisler[0]", "$.siparisler[1]", "$"]
+        assert records[1][1:] == ("siparisler", 1, ORDERS["siparisler"][1])
+        assert records[2][3] == {"donem": "3-9 Şubat 2026", "toplam_musteri": 2}
+
+    def test_nested_and_top_level_lists(self):
+        nested = {"veri": {"puanlar": [{"a": 1}], "not": "x"}}
+        assert [r[0] for r in iter_records(nested)] == ["$.veri.puanlar[0]", "$.veri"]
+        assert [r[0] for r in iter_records([{"a": 1}, {"a": 2}])] == ["$[0]", "$[1]"]
+        assert [r[0] for r in iter_records([1, 2])] == ["$"]
+
+
+class TestIterFileRecords:
+    """Akışlı okuma: dosyadan iter_records ile aynı kayıtlar; tampon sınırına denk gelen sayı/metin bozulmaz."""
+
+    @pytest.mark.parametrize("read_size", [1, 7, 1 << 16])
+    @pytest.mark.parametrize("data", [
+        ORDERS,
+        {"veri": {"puanlar": [{"a": 1}], "not": "x"}, "sayilar": [1, 2], "karisik": [{"a": 1}, 2], "bos": []},
+        [{"a": 12345, "b": "uzun bir metin \\ \" değeri"}, {"a": -1.5e3}],
+        [1, 2],
+        {},
+        "metin",
+    ])
+    def test_matches_in_memory_records(self, tmp_path, monkeypatch, read_size, data):
+        monkeypatch.setattr(json_chunker, "READ_SIZE", read_size)
+        path = tmp_path / "veri.json"
+        path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        assert list(iter_file_records(str(path))) == list(iter_records(data))
+
+    @pytest.mark.parametrize("text", ['{"a": 1}\n{"a": 2}\n', '{"a": [{"b": 1}, {"b": 2}', '[{"a": 1},]'])
+    def test_invalid_json_raises_before_any_record(self, tmp_path, text):
+        path = tmp_path / "bozuk.json"
+        path.write_text(text, encoding="utf-8")
+        records = iter_file_records(str(path))
+        with pytest.raises(json.JSONDecodeError):
+            next(records)
+
+
+class TestJsonDocuments:
+    """Metadata: kaynak, kayıt yolu, anahtarlar ve skaler alanlar (iç içe alanlar sadece metinde)."""
+
+    def test_metadata_contains_path_keys_and_scalars(self):
+        doc = next(json_documents(ORDERS, "data/orders.json"))
+        assert doc.page_content.startswith("orders.json $.siparisler[0]: {")
+        assert doc.metadata == {
+            "source": "data/orders.json",
+            "record_path": "$.siparisler[0]",
+            "record_key": "siparisler",
+            "record_index": 0,
+            "keys": "musteri_no,isim,siparisler",
+            "musteri_no": 1,
+            "isim": "Elif Kaya",
+        }
+
+    def test_record_is_not_cut_mid_object(self, tmp_path):
+        path = tmp_path / "orders.json"
+        path.write_text(json.dumps(ORDERS, ensure_ascii=False, indent=2), encoding="utf-8")
+        chunks = DocumentProcessor(str(path)).process()
+        assert len(chunks) == 3
+        for chunk in chunks:
+            json.loads(chunk.page_content.split(": ", 1)[1])
+
+    def test_invalid_json_falls_back_to_text(self, tmp_path):
+        path = tmp_path / "satirlar.json"
+        path.write_text('{"a": 1}\n{"a": 2}\n', encoding="utf-8")
+        chunks = DocumentProcessor(str(path)).process()
+        assert [c.page_content for c in chunks] == ['{"a": 1}\n{"a": 2}']
+
+
+class TestFilteredSearch:
+    """Vector store: where filtresi sadece eşleşen kayıtları döndürür."""
+
+    @pytest.mark.filterwarnings("ignore:Relevance scores")
+    def test_search_with_metadata_filter(self, tmp_path):
+        data = tmp_path / "data"
+        data.mkdir()
+        (data / "orders.json").write_text(json.dumps(ORDERS, ensure_ascii=False), encoding="utf-8")
+        store = VectorStoreManager(
+            persist_directory=str(tmp_path / "db"), embeddings=DeterministicFakeEmbedding(size=16)
+        )
+        sync_data_dir(store, str(data))
+        docs = store.search("sipariş", k=5, where={"isim": "Mehmet Demir"})
+        assert [d.metadata["record_path"] for d in docs] == ["$.siparisler[1]"]
+        scored = store.search_with_scores("sipariş", k=5, where={"record_key": "siparisler"})
+        assert len(scored) == 2
@@ -0,0 +1,148 @@
+"""LexicalIndex birim testleri: BM25 sıralaması, Türkçe normalizasyon, filtre, kalıcılık, vector store ile hibrit arama."""
+import os
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.utils.lexical_index import LexicalIndex, matches_where
+from src.utils.vector_store import LEXICAL_INDEX_FILENAME, VectorStoreManager
+
+DOCS = {
+    "1": ("Fatma Çelik iki Margherita sipariş etti.", {"source": "orders.json", "musteri_no": 5}),
+    "2": ("Elif Kaya bir Pepperoni sipariş etti.", {"source": "orders.json", "musteri_no": 1}),
+    "3": ("Pizza Friday her Cuma yapılır ve indirim vardır.", {"source": "welcome.txt"}),
+}
+
+
+@pytest.fixture
+def index():
+    idx = LexicalIndex()
+    idx.add(list(DOCS), [t for t, _ in DOCS.values()], [m for _, m in DOCS.values()])
+    return idx
+
+
+class TestLexicalSearch:
+    """Normal akış: tam isim ve sayılar BM25 ile en üstte gelir."""
+
+    def test_exact_name_ranks_first(self, index):
+        results = index.search("Fatma Çelik ne sipariş etti", k=2)
+        assert results[0][0].id == "1"
+        assert results[0][1] > results[1][1]
+
+    def test_turkish_case_and_ascii_folding(self, index):
+        assert index.search("FATMA CELIK")[0][0].id == "1"
+        assert index.search("PİZZA FRİDAY")[0][0].id == "3"
+
+    def test_suffix_prefix_match(self, index):
+        assert index.search("siparişleri")[0][0].metadata["source"] == "orders.json"
+
+    def test_coverage_score_is_between_zero_and_one(self, index):
+        score = index.search("Margherita")[0][1]
+        assert score == pytest.approx(1.0)
+        assert 0 < index.search("Margherita xyzzy")[0][1] < 1
+
+    def test_no_match_returns_empty(self, index):
+        assert index.search("xyzzy") == []
+
+    def test_where_filter(self, index):
+        results = index.search("sipariş", k=5, where={"musteri_no": {"$gte": 2}})
+        assert [d.id for d, _ in results] == ["1"]
+
+
+class TestLexicalIndexMaintenance:
+    """Güncelleme, silme ve diskte saklama."""
+
+    def test_upsert_and_delete(self, index):
+        index.add(["1"], ["Fatma Çelik Vegetariana sipariş etti."], [{"source": "orders.json"}])
+        assert index.search("Margherita") == []
+        assert index.search("Vegetariana")[0][0].id == "1"
+        index.delete(["1", "yok"])
+        assert len(index) == 2
+        assert index.search("Fatma") == []
+
+    def test_save_and_reload(self, tmp_path, index):
+        index.path = str(tmp_path / "idx.json")
+        index._dirty = True
+        index.save()
+        reloaded = LexicalIndex(index.path)
+        assert len(reloaded) == 3
+        assert reloaded.search("Pepperoni")[0][0].metadata == {"source": "orders.json", "musteri_no": 1}
+
+    def test_matches_where_operators(self):
+        meta = {"a": 1, "b": "x"}
+        assert matches_where(meta, {"$and": [{"a": 1}, {"b": {"$in": ["x", "y"]}}]})
+        assert matches_where(meta, {"$or": [{"a": 2}, {"b": {"$ne": "z"}}]})
+        assert not matches_where(meta, {"c": {"$gt": 0}})
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    query_calls: int = 0
+
+    def embed_query(self, text):
+        self.query_calls += 1
+        return super().embed_query(text)
+
+
+@pytest.mark.filterwarnings("ignore:Relevance scores")
+class TestVectorStoreHybrid:
+    """VectorStoreManager: indeks yüklemeyle birlikte kurulur, hibrit ve sadece sözcüksel arama."""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        store = VectorStoreManager(persist_directory=str(tmp_path / "db"), embeddings=CountingEmbeddings(size=16))
+        docs = [Document(page_content=t, metadata=m) for t, m in DOCS.values()]
+        store.add_documents(docs, ids=list(DOCS))
+        return store
+
+    def test_lexical_mode_needs_no_embedding(self, store):
+        results = store.search_hybrid("Fatma Çelik", k=1, mode="lexical")
+        assert results[0][0].page_content.startswith("Fatma Çelik")
+        assert store.embeddings.query_calls == 0
+
+    def test_hybrid_puts_exact_name_first(self, store):
+        results = store.search_hybrid("Elif Kaya", k=3)
+        assert results[0][0].page_content.startswith("Elif Kaya")
+        assert results[0][1] == pytest.approx(1.0)
+        assert store.embeddings.query_calls == 1
+
+    def test_deletes_are_mirrored(self, store):
+        store.delete_documents(["2"])
+        assert store.search_lexical("Pepperoni") == []
+
+    def test_index_is_rebuilt_from_chroma_when_missing(self, store):
+        os.remove(os.path.join(store.persist_directory, LEXICAL_INDEX_FILENAME))
+        reopened = VectorStoreManager(persist_directory=store.persist_directory, embeddings=store.embeddings)
+        assert len(reopened.lexical) == 3
+        assert reopened.search_lexical("Pizza Friday")[0][0].metadata["source"] == "welcome.txt"
+
+    def test_interrupted_write_with_same_count_is_repaired(self, store):
+        # Chroma'ya yazılırken süreç durdu: indeks kaydedilmedi, kayıt sayısı aynı kaldı
+        store.lexical.begin_write()
+        store.db.delete(ids=["2"])
+        store.db.add_texts(["Yeni şube Kadıköy'de açıldı."], metadatas=[{"source": "haber.txt"}], ids=["4"])
+        reopened = VectorStoreManager(persist_directory=store.persist_directory, embeddings=store.embeddings)
+        assert reopened.lexical.ids() == {"1", "3", "4"}
+        assert reopened.search_lexical("Kadıköy")
+        assert not os.path.exists(os.path.join(store.persist_directory, LEXICAL_INDEX_FILENAME + ".pending"))
+
+    def test_warm_start_does_not_read_chroma_ids(self, store, monkeypatch):
+        monkeypatch.setattr(
+            VectorStoreManager, "_iter_pages", lambda *args, **kwargs: pytest.fail("Chroma sayfalanmamalı")
+        )
+        reopened = VectorStoreManager(persist_directory=store.persist_directory, embeddings=store.embeddings)
+        assert reopened.lexical.ids() == set(DOCS)
+
+    def test_deferred_delete_saves_once(self, store, monkeypatch):
+        saves = []
+        monkeypatch.setattr(store.lexical, "save", lambda **kwargs: saves.append(1))
+        store.delete_documents(["1"], save=False)
+        store.delete_documents(["2"], save=False)
+        assert saves == []
+        assert store.search_lexical("Pepperoni") == []
+        store.save_lexical_index()
+        assert saves == [1]
+
+    def test_unknown_mode_is_rejected(self, store):
+        with pytest.raises(ValueError):
+            store.search_hybrid("x", mode="bm25")
@@ -0,0 +1,135 @@
+"""Yanıt önbelleği birim testleri: anahtar üretimi, LRU/TTL, SQLite kalıcılığı, LLMClient entegrasyonu."""
+import itertools
+
+import pytest
+from unittest.mock import MagicMock, patch
+import httpx
+
+from src.llm_client import LLMClient
+from src.utils.llm_cache import MemoryResponseCache, ResponseCache, SQLiteResponseCache, make_cache_key
+
+
+class TestCacheKey:
+    def test_same_inputs_same_key(self):
+        assert make_cache_key("m", "p", {"a": 1, "b": 2}) == make_cache_key("m", "p", {"b": 2, "a": 1})
+
+    def test_model_prompt_and_options_change_key(self):
+        base = make_cache_key("m", "p", {})
+        assert make_cache_key("m2", "p", {}) != base
+        assert make_cache_key("m", "p2", {}) != base
+        assert make_cache_key("m", "p", {"num_ctx": 2048}) != base
+
+
+class TestResponseCacheInterface:
+    def test_incomplete_backend_fails_on_instantiation(self):
+        class GetOnlyCache(ResponseCache):
+            def _get(self, key):
+                return None
+
+        with pytest.raises(TypeError):
+            GetOnlyCache()
+
+
+class TestMemoryResponseCache:
+    def test_hit_and_miss_counters(self):
+        cache = MemoryResponseCache()
+        assert cache.get("k") is None
+        cache.set("k", "v")
+        assert cache.get("k") == "v"
+        assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+    def test_lru_eviction_respects_max_size(self):
+        cache = MemoryResponseCache(max_size=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")  # a en son kullanılan
+        cache.set("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert len(cache) == 2
+
+    def test_expired_entries_are_misses(self):
+        cache = MemoryResponseCache(ttl_seconds=10)
+        with patch("src.utils.llm_cache.time.time", return_value=1000.0):
+            cache.set("k", "v")
+        with patch("src.utils.llm_cache.time.time", return_value=1011.0):
+            assert cache.get("k") is None
+
+
+class TestSQLiteResponseCache:
+    def test_survives_reopen(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite")
+        cache = SQLiteResponseCache(path)
+        cache.set("k", "kalıcı")
+        cache.close()
+        assert SQLiteResponseCache(path).get("k") == "kalıcı"
+
+    def test_max_entries_evicts_least_recently_used(self, tmp_path):
+        cache = SQLiteResponseCache(str(tmp_path / "c.sqlite"), max_entries=2)
+        clock = itertools.count(1)
+        with patch("src.utils.llm_cache.time.time", side_effect=lambda: float(next(clock))):
+            cache.set("a", "1")
+            cache.set("b", "2")
+            cache.get("a")
+            cache.set("c", "3")
+        assert len(cache) == 2
+        assert cache.get("b") is None
+
+
+class TestLLMClientCaching:
+    @pytest.fixture(autouse=True)
+    def _patch_langfuse(self):
+        with patch("src.llm_client.get_client") as m:
+            m.return_value = MagicMock()
+            yield
+
+    @staticmethod
+    def _counting_client(**kwargs):
+        calls = {"n": 0}
+
+        def handler(request):
+            calls["n"] += 1
+            return httpx.Response(200, json={"response": f"cevap {calls['n']}"})
+
+        return LLMClient(transport=httpx.MockTransport(handler), **kwargs), calls
+
+    @pytest.mark.asyncio
+    async def test_repeated_prompt_served_from_cache(self):
+        client, calls = self._counting_client()
+        assert await client.ask("aynı soru") == "cevap 1"
+        assert await client.ask("aynı soru") == "cevap 1"
+        assert calls["n"] == 1
+        assert client.cache.hits == 1
+
+    @pytest.mark.asyncio
+    async def test_use_cache_false_bypasses(self):
+        client, calls = self._counting_client()
+        await client.ask("soru")
+        assert await client.ask("soru", use_cache=False) == "cevap 2"
+        assert calls["n"] == 2
+
+    @pytest.mark.asyncio
+    async def test_errors_are_not_cached(self):
+        responses = [httpx.Response(500, text="hata"), httpx.Response(200, json={"response": "tamam"})]
+        client = LLMClient(transport=httpx.MockTransport(lambda r: responses.pop(0)))
+        assert "Model hatası" in await client.ask("soru")
+        assert await client.ask("soru") == "tamam"
+
+    @pytest.mark.asyncio
+    async def test_disabled_cache(self):
+        client, calls = self._counting_client(enable_cache=False)
+        await client.ask("soru")
+        await client.ask("soru")
+        assert client.cache is None
+        assert calls["n"] == 2
+
+    @pytest.mark.asyncio
+    async def test_stream_result_is_cached_for_ask(self):
+        def handler(request):
+            return httpx.Response(200, text='{"response": "akış", "done": false}\n{"response": "", "done": true}\n')
+
+        client = LLMClient(transport=httpx.MockTransport(handler))
+        assert await client.ask_streaming("soru") == "akış"
+        tokens = [t async for t in client.ask_stream("soru")]
+        assert tokens == ["akış"]
+        assert client.cache.hits == 1
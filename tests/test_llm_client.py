@@ -1,6 +1,8 @@
 """LLMClient birim testleri: model seçimi, başarılı çağrı, API hataları (geçersiz model vb.)."""
+import json
+
 import pytest
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import MagicMock, patch
 import httpx
 
 from src.llm_client import LLMClient
@@ -52,54 +54,435 @@ class TestLLMClientAsk:
 
     @pytest.mark.asyncio
     async def test_ask_returns_response_on_success(self):
-        client = LLMClient()
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {"response": "Evet, pizza siparişi alınır."}
-        mock_response.raise_for_status = MagicMock()
+        def handler(request):
+            return httpx.Response(200, json={"response": "Evet, pizza siparişi alınır."})
 
-        with patch("httpx.AsyncClient") as mock_client_cls:
-            mock_client = AsyncMock()
-            mock_client.__aenter__.return_value.post = AsyncMock(return_value=mock_response)
-            mock_client.__aexit__.return_value = None
-            mock_client_cls.return_value = mock_client
-
-            result = await client.ask("Pizza siparişi alıyor musunuz?", task_type="general")
-            assert result == "Evet, pizza siparişi alınır."
+        client = LLMClient(transport=httpx.MockTransport(handler))
+        result = await client.ask("Pizza siparişi alıyor musunuz?", task_type="general")
+        assert result == "Evet, pizza siparişi alınır."
+        await client.aclose()
 
     @pytest.mark.asyncio
     async def test_ask_returns_meaningful_error_on_404_invalid_model(self):
         """Geçersiz veya yüklü olmayan model: API 404 döndüğünde anlamlı hata mesajı."""
-        client = LLMClient()
-        with patch("httpx.AsyncClient") as mock_client_cls:
-            mock_post = AsyncMock(side_effect=httpx.HTTPStatusError(
-                "Model not found", request=MagicMock(), response=MagicMock(status_code=404)
-            ))
-            mock_client = AsyncMock()
-            mock_client.__aenter__.return_value.post = mock_post
-            mock_client.__aexit__.return_value = None
-            mock_client_cls.return_value = mock_client
+        def handler(request):
+            return httpx.Response(404, json={"error": "Model not found"})
 
-            result = await client.ask("Test", task_type="coding")
+        client = LLMClient(transport=httpx.MockTransport(handler))
+        result = await client.ask("Test", task_type="coding")
 
-            assert "Model hatası" in result
-            assert client.models["smart"] in result
-            assert "404" in result or "Model not found" in result or "not found" in result.lower()
+        assert "Model hatası" in result
+        assert client.models["smart"] in result
+        assert "404" in result or "Model not found" in result or "not found" in result.lower()
 
     @pytest.mark.asyncio
     async def test_ask_returns_meaningful_error_on_500_server_error(self):
         """Sunucu hatası (500): anlamlı hata mesajı döner."""
-        client = LLMClient()
-        with patch("httpx.AsyncClient") as mock_client_cls:
-            mock_post = AsyncMock(side_effect=httpx.HTTPStatusError(
-                "Internal Server Error", request=MagicMock(), response=MagicMock(status_code=500)
-            ))
-            mock_client = AsyncMock()
-            mock_client.__aenter__.return_value.post = mock_post
-            mock_client.__aexit__.return_value = None
-            mock_client_cls.return_value = mock_client
-
-            result = await client.ask("Test", task_type="general")
-
-            assert "Model hatası" in result
-            assert client.models["fast"] in result
+        def handler(request):
+            return httpx.Response(500, text="Internal Server Error")
+
+        client = LLMClient(transport=httpx.MockTransport(handler))
+        result = await client.ask("Test", task_type="general")
+
+        assert "Model hatası" in result
+        assert client.models["fast"] in result
+
+    @pytest.mark.asyncio
+    async def test_ask_returns_meaningful_error_on_connection_failure(self):
+        """Ollama kapalıysa (bağlantı hatası): anlamlı hata mesajı döner."""
+        def handler(request):
+            raise httpx.ConnectError("Connection refused", request=request)
+
+        client = LLMClient(transport=httpx.MockTransport(handler))
+        result = await client.ask("Test", task_type="general")
+
+        assert "Model hatası" in result
+        assert "Connection refused" in result
+
+
+class TestLLMClientConnectionPool:
+    """Bağlantı havuzu: çağrılar arasında aynı AsyncClient kullanılır, start/aclose açık yaşam döngüsü."""
+
+    @pytest.fixture(autouse=True)
+    def _patch_langfuse(self):
+        with patch("src.llm_client.get_client") as m:
+            m.return_value = MagicMock()
+            yield
+
+    @pytest.mark.asyncio
+    async def test_pool_is_reused_across_calls(self):
+        client = LLMClient(transport=httpx.MockTransport(lambda r: httpx.Response(200, json={"response": "ok"})))
+        await client.start()
+        http_before = client._http
+        await client.ask("a")
+        await client.ask("b", task_type="coding")
+        assert client._http is http_before
+        await client.aclose()
+        assert client._http is None
+
+    @pytest.mark.asyncio
+    async def test_ask_without_start_opens_pool_lazily(self):
+        client = LLMClient(transport=httpx.MockTransport(lambda r: httpx.Response(200, json={"response": "ok"})))
+        assert client._http is None
+        assert await client.ask("a") == "ok"
+        assert client._http is not None
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_context_manager_closes_pool(self):
+        transport = httpx.MockTransport(lambda r: httpx.Response(200, json={"response": "ok"}))
+        async with LLMClient(transport=transport) as client:
+            assert await client.ask("a") == "ok"
+        assert client._http is None
+
+    @pytest.mark.asyncio
+    async def test_per_model_timeout_is_applied(self):
+        seen = {}
+
+        def handler(request):
+            seen["timeout"] = request.extensions["timeout"]
+            return httpx.Response(200, json={"response": "ok"})
+
+        client = LLMClient(timeouts={"smart": 300.0}, transport=httpx.MockTransport(handler))
+        await client.ask("x", task_type="coding")
+        assert seen["timeout"]["read"] == 300.0
+        await client.ask("x", task_type="general")
+        assert seen["timeout"]["read"] == client.timeouts["fast"]
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_model_concurrency_limits_in_flight_requests(self):
+        import asyncio
+
+        state = {"running": 0, "max": 0}
+
+        async def handler(request):
+            state["running"] += 1
+            state["max"] = max(state["max"], state["running"])
+            await asyncio.sleep(0.02)
+            state["running"] -= 1
+            return httpx.Response(200, json={"response": "ok"})
+
+        client = LLMClient(
+            model_concurrency={"smart": 2}, transport=httpx.MockTransport(handler), enable_cache=False
+        )
+        results = await asyncio.gather(*(client.ask(f"q{i}", task_type="coding") for i in range(6)))
+        assert results == ["ok"] * 6
+        assert state["max"] == 2
+        stats = client.model_stats()[client.models["smart"]]
+        assert {k: stats[k] for k in ("limit", "in_flight", "waiting", "requests")} == {
+            "limit": 2, "in_flight": 0, "waiting": 0, "requests": 6
+        }
+        assert stats["waited"] == 4 and stats["max_wait_ms"] > 0
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_long_general_prompt_is_downgraded_when_smart_is_saturated(self):
+        import asyncio
+
+        release = asyncio.Event()
+        models = []
+
+        async def handler(request):
+            payload = json.loads(request.content)
+            models.append(payload["model"])
+            if payload["prompt"].startswith("kod"):
+                await release.wait()
+            return httpx.Response(200, json={"response": "ok"})
+
+        client = LLMClient(
+            model_concurrency={"smart": 1}, downgrade_after=0.5, transport=httpx.MockTransport(handler), enable_cache=False
+        )
+        client.scheduler.default_latency = 5.0
+        blocker = asyncio.create_task(client.ask("kod yaz", task_type="coding"))
+        await asyncio.sleep(0.01)
+        # Kod üretimi düşürülmez; uzun genel prompt büyük model doluyken küçük modele gider
+        coding = asyncio.create_task(client.ask("kod düzelt", task_type="coding"))
+        assert await client.ask("x" * 2000, task_type="general") == "ok"
+        release.set()
+        await asyncio.gather(blocker, coding)
+        assert models.count(client.models["smart"]) == 2
+        assert models.count(client.models["fast"]) == 1
+        assert client.model_stats()[client.models["smart"]]["downgraded_from"] == 1
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_downgraded_request_is_served_from_fast_model_cache(self):
+        import asyncio
+
+        release = asyncio.Event()
+        models = []
+
+        async def handler(request):
+            payload = json.loads(request.content)
+            models.append(payload["model"])
+            if payload["prompt"].startswith("kod"):
+                await release.wait()
+            return httpx.Response(200, json={"response": "ok"})
+
+        client = LLMClient(model_concurrency={"smart": 1}, downgrade_after=0.5, transport=httpx.MockTransport(handler))
+        client.scheduler.default_latency = 5.0
+        blocker = asyncio.create_task(client.ask("kod yaz", task_type="coding"))
+        await asyncio.sleep(0.01)
+        coding = asyncio.create_task(client.ask("kod düzelt", task_type="coding"))
+        assert await client.ask("x" * 2000, task_type="general") == "ok"
+        # Büyük model hâlâ dolu: aynı istek yine düşürülür ve küçük modelin önbelleğinden döner
+        assert await client.ask("x" * 2000, task_type="general") == "ok"
+        release.set()
+        await asyncio.gather(blocker, coding)
+        assert models.count(client.models["fast"]) == 1
+        assert client.cache.hits == 1
+        await client.aclose()
+
+
+class TestLLMClientTokenBudget:
+    """Token sayısına göre model seçimi; num_ctx/num_predict her çağrıda ihtiyaca göre; sığmayan prompt kısaltılır."""
+
+    @pytest.fixture(autouse=True)
+    def _patch_langfuse(self):
+        with patch("src.llm_client.get_client") as m:
+            m.return_value = MagicMock()
+            yield
+
+    @staticmethod
+    def _client(payloads, **kwargs):
+        def handler(request):
+            payloads.append(json.loads(request.content))
+            return httpx.Response(200, json={"response": "ok"})
+
+        return LLMClient(transport=httpx.MockTransport(handler), **kwargs)
+
+    def test_model_selection_uses_token_count(self):
+        counter = MagicMock()
+        counter.count.return_value = 600
+        client = LLMClient(token_counter=counter)
+        assert client._select_model("general", "kısa ama çok token") == client.models["smart"]
+
+    @pytest.mark.asyncio
+    async def test_options_use_smallest_context_bucket_and_task_output_limit(self):
+        payloads = []
+        client = self._client(payloads)
+        await client.ask("Merhaba")
+        await client.ask("kod yaz", task_type="coding")
+        await client.ask("spec", max_tokens=128)
+        assert payloads[0]["options"] == {"num_ctx": 2048, "num_predict": 512}
+        assert payloads[1]["options"] == {"num_ctx": 2048, "num_predict": 1024}
+        assert payloads[2]["options"]["num_predict"] == 128
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_context_grows_per_model_but_never_shrinks(self):
+        payloads = []
+        client = self._client(payloads, smart_prompt_tokens=10_000)
+        await client.ask("x" * 9000)  # ~3000 token → 4096
+        await client.ask("kısa")
+        assert [p["options"]["num_ctx"] for p in payloads] == [4096, 4096]
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_prompt_over_model_limit_is_truncated_in_the_middle(self):
+        payloads = []
+        client = self._client(payloads, context_limits={"smart": 2048})
+        prompt = "BAŞ " + "orta " * 2000 + "SORU"
+        await client.ask(prompt)
+        sent = payloads[0]
+        assert sent["options"]["num_ctx"] == 2048
+        assert sent["prompt"].startswith("BAŞ") and sent["prompt"].endswith("SORU")
+        assert client.token_counter.count(sent["prompt"]) <= 2048 - 512
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_cache_key_ignores_context_size(self):
+        payloads = []
+        client = self._client(payloads, smart_prompt_tokens=10_000)
+        await client.ask("aynı soru")
+        await client.ask("y" * 9000)
+        assert await client.ask("aynı soru") == "ok"
+        assert len(payloads) == 2
+        await client.aclose()
+
+
+class TestLLMClientChatMode:
+    """system verilince /api/chat: sabit sistem mesajı + kullanıcı mesajı; keep_alive, prompt ölçümleri ve ısıtma."""
+
+    @pytest.fixture(autouse=True)
+    def _patch_langfuse(self):
+        with patch("src.llm_client.get_client") as m:
+            m.return_value = MagicMock()
+            yield
+
+    @staticmethod
+    def _client(requests, reply=None, **kwargs):
+        def handler(request):
+            requests.append((request.url.path, json.loads(request.content)))
+            if request.url.path == "/api/chat":
+                body = {"message": {"role": "assistant", "content": "ok"}, "done": True}
+            else:
+                body = {"response": "ok", "done": True}
+            body.update(reply or {})
+            return httpx.Response(200, json=body)
+
+        return LLMClient(transport=httpx.MockTransport(handler), **kwargs)
+
+    @pytest.mark.asyncio
+    async def test_system_prompt_goes_to_chat_endpoint_with_keep_alive(self):
+        requests = []
+        client = self._client(requests)
+        assert await client.ask("Soru: kaç sipariş var?", system="Sabit talimat") == "ok"
+        await client.ask("Merhaba")
+        (chat_path, chat), (generate_path, generate) = requests
+        assert chat_path == "/api/chat" and generate_path == "/api/generate"
+        assert chat["messages"] == [
+            {"role": "system", "content": "Sabit talimat"},
+            {"role": "user", "content": "Soru: kaç sipariş var?"},
+        ]
+        assert chat["keep_alive"] == generate["keep_alive"] == "30m"
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_keep_alive_none_is_not_sent(self):
+        requests = []
+        client = self._client(requests, keep_alive=None)
+        await client.ask("x")
+        assert "keep_alive" not in requests[0][1]
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_cache_key_includes_system_prompt(self):
+        requests = []
+        client = self._client(requests)
+        await client.ask("aynı soru", system="talimat A")
+        await client.ask("aynı soru", system="talimat B")
+        await client.ask("aynı soru", system="talimat A")
+        assert len(requests) == 2
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_long_user_prompt_is_truncated_but_system_is_kept(self):
+        requests = []
+        client = self._client(requests, context_limits={"smart": 2048})
+        system = "SABİT " * 300
+        await client.ask("BAŞ " + "orta " * 2000 + "SORU", system=system)
+        sent = requests[0][1]
+        assert sent["messages"][0]["content"] == system
+        user = sent["messages"][1]["content"]
+        assert user.startswith("BAŞ") and user.endswith("SORU") and "[...]" in user
+        assert client.token_counter.count(system) + client.token_counter.count(user) <= 2048 - 512
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_chat_stream_yields_message_content(self):
+        lines = [json.dumps({"message": {"role": "assistant", "content": t}, "done": False}) for t in ("Mer", "ha")]
+        lines.append(json.dumps({"message": {"role": "assistant", "content": ""}, "done": True, "prompt_eval_count": 3}))
+        client = LLMClient(transport=httpx.MockTransport(lambda r: httpx.Response(200, text="\n".join(lines))))
+        tokens = [t async for t in client.ask_stream("x", system="talimat", agent="researcher")]
+        assert tokens == ["Mer", "ha"]
+        assert client.prompt_stats()["researcher"]["evaluated_tokens"] == 3
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_prompt_stats_estimate_reused_prefix_per_agent(self):
+        requests = []
+        counter = MagicMock()
+        counter.count.side_effect = lambda text: 100 if text.startswith("SABİT") else 20
+        reply = {"prompt_eval_count": 30, "prompt_eval_duration": 60_000_000, "load_duration": 2_000_000}
+        client = self._client(requests, reply=reply, token_counter=counter)
+        await client.ask("soru 1", system="SABİT talimat", agent="analyst")
+        await client.ask("soru 2", system="SABİT talimat", agent="analyst", use_cache=False)
+        await client.ask("kısa", task_type="general")
+        stats = client.prompt_stats()
+        assert stats["analyst"] == {
+            "calls": 2,
+            "prompt_tokens": 240,
+            "evaluated_tokens": 60,
+            "reused_tokens": 180,
+            "reuse_ratio": 0.75,
+            "prompt_eval_ms": 120.0,
+            "avg_prompt_eval_ms": 60.0,
+            "saved_ms": 360.0,
+            "load_ms": 4.0,
+            "loads": 0,
+        }
+        assert stats["general"]["calls"] == 1
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_warmup_loads_models_and_primes_system_prefixes(self):
+        requests = []
+        client = self._client(requests)
+        durations = await client.warmup([("coding", "Kod talimatı " * 400)])
+        assert set(durations) == {client.models["fast"], client.models["smart"]}
+        (fast_path, fast), (smart_path, smart) = requests
+        assert fast_path == "/api/generate" and fast["prompt"] == "" and fast["keep_alive"] == "30m"
+        assert smart_path == "/api/chat" and smart["messages"][1] == {"role": "user", "content": ""}
+        assert smart["options"]["num_predict"] == 1
+        # Ayrılan bağlam, sonraki kod çağrısında modeli yeniden yükletmez
+        await client.ask("Soru: ortalama?", task_type="coding", system="Kod talimatı " * 400)
+        assert requests[-1][1]["options"]["num_ctx"] == smart["options"]["num_ctx"] == 4096
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_warmup_skips_unreachable_models(self):
+        def handler(request):
+            raise httpx.ConnectError("bağlantı reddedildi")
+
+        client = LLMClient(transport=httpx.MockTransport(handler))
+        assert await client.warmup() == {}
+        await client.aclose()
+
+
+class TestLLMClientAskStream:
+    """ask_stream(): Ollama NDJSON akışı parça parça üretilir; hata tek parça mesaj olarak döner."""
+
+    @pytest.fixture(autouse=True)
+    def _patch_langfuse(self):
+        with patch("src.llm_client.get_client") as m:
+            self.langfuse = MagicMock()
+            m.return_value = self.langfuse
+            yield
+
+    @staticmethod
+    def _ndjson(*tokens):
+        lines = [json.dumps({"response": t, "done": False}) for t in tokens]
+        lines.append(json.dumps({"response": "", "done": True}))
+        return "\n".join(lines) + "\n"
+
+    @pytest.mark.asyncio
+    async def test_ask_stream_yields_tokens_in_order(self):
+        seen = {}
+
+        def handler(request):
+            seen["payload"] = json.loads(request.content)
+            return httpx.Response(200, text=self._ndjson("Mer", "ha", "ba"))
+
+        client = LLMClient(transport=httpx.MockTransport(handler))
+        tokens = [t async for t in client.ask_stream("Selam")]
+        assert tokens == ["Mer", "ha", "ba"]
+        assert seen["payload"]["stream"] is True
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_ask_stream_records_time_to_first_token(self):
+        client = LLMClient(transport=httpx.MockTransport(lambda r: httpx.Response(200, text=self._ndjson("a"))))
+        _ = [t async for t in client.ask_stream("x")]
+        gen = self.langfuse.start_observation.return_value
+        update_kwargs = [c.kwargs for c in gen.update.call_args_list]
+        assert any("completion_start_time" in kw for kw in update_kwargs)
+        assert any("time_to_first_token_ms" in kw.get("metadata", {}) for kw in update_kwargs)
+        gen.end.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_ask_stream_error_yields_meaningful_message(self):
+        client = LLMClient(transport=httpx.MockTransport(lambda r: httpx.Response(404, text="not found")))
+        tokens = [t async for t in client.ask_stream("x", task_type="coding")]
+        assert len(tokens) == 1
+        assert "Model hatası" in tokens[0]
+        assert client.models["smart"] in tokens[0]
+
+    @pytest.mark.asyncio
+    async def test_ask_streaming_forwards_tokens_and_returns_full_text(self):
+        client = LLMClient(transport=httpx.MockTransport(lambda r: httpx.Response(200, text=self._ndjson("4", "2"))))
+        received = []
+        text = await client.ask_streaming("x", on_token=received.append)
+        assert text == "42"
+        assert received == ["4", "2"]
@@ -0,0 +1,87 @@
+"""ModelScheduler birim testleri: eşzamanlılık sınırı, öncelikli kuyruk, iptal, küçük modele düşürme, metrikler."""
+import asyncio
+
+import pytest
+
+from src.model_scheduler import ModelScheduler
+
+
+async def _hold(scheduler, model, priority, order, gate):
+    async with scheduler.slot(model, priority):
+        order.append(priority)
+        await gate.wait()
+
+
+class TestModelSchedulerQueue:
+    @pytest.mark.asyncio
+    async def test_interactive_requests_overtake_queued_background_work(self):
+        scheduler = ModelScheduler({"smart": 1})
+        order, gate = [], asyncio.Event()
+        first = asyncio.create_task(_hold(scheduler, "smart", "normal", order, gate))
+        await asyncio.sleep(0)
+        tasks = [asyncio.create_task(_hold(scheduler, "smart", p, order, gate)) for p in ("background", "normal", "interactive")]
+        await asyncio.sleep(0)
+        stats = scheduler.stats("smart")
+        assert stats["in_flight"] == 1 and stats["waiting"] == 3
+        assert stats["waiting_by_priority"] == {"interactive": 1, "normal": 1, "background": 1}
+        gate.set()
+        await asyncio.gather(first, *tasks)
+        assert order == ["normal", "interactive", "normal", "background"]
+        assert scheduler.stats("smart")["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue_and_slot_is_not_lost(self):
+        scheduler = ModelScheduler({"smart": 1})
+        order, gate = [], asyncio.Event()
+        first = asyncio.create_task(_hold(scheduler, "smart", "normal", order, gate))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(_hold(scheduler, "smart", "normal", order, gate))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        assert scheduler.waiting("smart") == 0
+        gate.set()
+        await first
+        async with scheduler.slot("smart"):
+            assert scheduler.in_flight("smart") == 1
+
+    @pytest.mark.asyncio
+    async def test_unlimited_model_never_queues(self):
+        scheduler = ModelScheduler({"smart": 1})
+        gate = asyncio.Event()
+        tasks = [asyncio.create_task(_hold(scheduler, "fast", "normal", [], gate)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert scheduler.stats("fast")["in_flight"] == 5 and scheduler.waiting("fast") == 0
+        gate.set()
+        await asyncio.gather(*tasks)
+
+
+class TestModelSchedulerDowngrade:
+    def test_choose_downgrades_only_eligible_tasks_when_wait_is_long(self):
+        scheduler = ModelScheduler({"smart": 1, "fast": 4}, downgrade_after=1.0, default_latency=2.0)
+        assert scheduler.choose("smart", "fast") == "smart"  # boş slot var
+        scheduler._state("smart").in_flight = 1
+        assert scheduler.expected_wait("smart") == 2.0
+        assert scheduler.choose("smart", "fast", eligible=False) == "smart"
+        assert scheduler.choose("smart", "fast") == "fast"
+        assert scheduler.stats("smart")["downgraded_from"] == 1
+        assert scheduler.stats("fast")["downgraded_to"] == 1
+
+    def test_no_downgrade_when_fallback_would_finish_later_or_disabled(self):
+        scheduler = ModelScheduler({"smart": 1}, downgrade_after=1.0, default_latency=2.0)
+        scheduler._state("smart").in_flight = 1
+        scheduler._state("fast").latency = 5.0  # küçük model de yavaşlamış: beklemek daha erken bitirir
+        assert scheduler.choose("smart", "fast") == "smart"
+        assert ModelScheduler({"smart": 1}, downgrade_after=None).choose("smart", "fast") == "smart"
+
+    @pytest.mark.asyncio
+    async def test_observed_latency_feeds_the_estimate(self):
+        now = [0.0]
+        scheduler = ModelScheduler({"smart": 1}, clock=lambda: now[0], latency_alpha=0.5)
+        async with scheduler.slot("smart"):
+            now[0] += 4.0
+        async with scheduler.slot("smart"):
+            now[0] += 2.0
+        assert scheduler.stats("smart")["latency_ms"] == 3000.0
+        scheduler._state("smart").in_flight = 1
+        assert scheduler.expected_wait("smart") == 3.0
@@ -0,0 +1,72 @@
+"""build_graph birim testleri: analyst kararına göre yönlendirme ve son node'un token akışı."""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.orchestration import build_graph
+
+
+def _make_graph(task_type, mock_llm_client):
+    analyst = MagicMock()
+    analyst.analyze = AsyncMock(return_value={"task_type": task_type, "reason": "", "plan": []})
+
+    async def fake_research(query, on_token=None):
+        for t in ("Yerel ", "cevap"):
+            on_token(t)
+        return "Yerel cevap"
+
+    researcher = MagicMock()
+    researcher.research = AsyncMock(side_effect=fake_research)
+    coder = MagicMock()
+    coder.solve = AsyncMock(return_value="42")
+    return build_graph(analyst, researcher, coder, mock_llm_client), researcher, coder
+
+
+class TestGraphRouting:
+    """Analyst task_type → doğru node."""
+
+    @pytest.mark.asyncio
+    async def test_coding_routes_to_coder(self, mock_llm_client):
+        graph, _, coder = _make_graph("coding", mock_llm_client)
+        result = await graph.ainvoke({"query": "kaç sipariş?"})
+        assert result["response"] == "42"
+        coder.solve.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_general_uses_streaming_client(self, mock_llm_client):
+        mock_llm_client.ask_streaming = AsyncMock(return_value="Merhaba!")
+        graph, _, _ = _make_graph("general", mock_llm_client)
+        result = await graph.ainvoke({"query": "selam"})
+        assert result["response"] == "Merhaba!"
+
+
+class TestGraphStreaming:
+    """astream(stream_mode=["custom", "values"]): token'lar custom kanaldan akar."""
+
+    @pytest.mark.asyncio
+    async def test_researcher_tokens_are_streamed(self, mock_llm_client):
+        graph, _, _ = _make_graph("rag", mock_llm_client)
+        tokens, final = [], {}
+        async for mode, chunk in graph.astream({"query": "menü?"}, stream_mode=["custom", "values"]):
+            if mode == "custom":
+                tokens.append(chunk["token"])
+            else:
+                final = chunk
+        assert tokens == ["Yerel ", "cevap"]
+        assert final["response"] == "Yerel cevap"
+
+
+class TestGraphQuerySpec:
+    """Analyst kararındaki query_spec coder'a iletilir."""
+
+    @pytest.mark.asyncio
+    async def test_query_spec_is_passed_to_coder(self, mock_llm_client):
+        spec = {"table": "puanlar", "agg": {"op": "count"}}
+        analyst = MagicMock()
+        analyst.analyze = AsyncMock(return_value={"task_type": "coding", "reason": "", "plan": [], "query_spec": spec})
+        coder = MagicMock()
+        coder.solve = AsyncMock(return_value="10")
+        graph = build_graph(analyst, MagicMock(), coder, mock_llm_client)
+        await graph.ainvoke({"query": "kaç değerlendirme var?"})
+        kwargs = coder.solve.await_args.kwargs
+        assert kwargs["query_spec"] == spec
+        assert kwargs["plan_query"] is False
@@ -0,0 +1,52 @@
+"""ParallelLoader birim testleri: çok süreçli ayrıştırma, dosya içi sıra, hatalı dosyanın izolasyonu."""
+from src.utils.document_processor import DocumentProcessor
+from src.utils.parallel_loader import ParallelLoader
+
+
+def _write_corpus(tmp_path, count=4):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"doc{i}.txt"
+        path.write_text("\n\n".join(f"Doküman {i} paragraf {j}. " * 30 for j in range(20)), encoding="utf-8")
+        paths.append(str(path))
+    return paths
+
+
+def _collect(events):
+    chunks, done, errors = {}, {}, {}
+    for kind, path, payload in events:
+        if kind == "chunks":
+            chunks.setdefault(path, []).extend(c.page_content for c in payload)
+        elif kind == "done":
+            done[path] = payload
+        else:
+            errors[path] = payload
+    return chunks, done, errors
+
+
+class TestParallelLoader:
+    """Normal akış: süreç havuzu tek süreçli okuma ile aynı chunk'ları aynı sırayla üretir."""
+
+    def test_worker_processes_match_serial_processing(self, tmp_path):
+        paths = _write_corpus(tmp_path)
+        loader = ParallelLoader(max_workers=2, queue_size=2, batch_size=5)
+        chunks, done, errors = _collect(loader.iter_events(paths))
+        assert errors == {}
+        for path in paths:
+            expected = [c.page_content for c in DocumentProcessor(path).process()]
+            assert chunks[path] == expected
+            assert done[path] == len(expected)
+
+    def test_bad_file_does_not_stop_others(self, tmp_path):
+        paths = _write_corpus(tmp_path, count=2)
+        bad = tmp_path / "bozuk.txt"
+        bad.write_bytes(b"\xff\xfe\x00bozuk")
+        loader = ParallelLoader(max_workers=2)
+        chunks, done, errors = _collect(loader.iter_events([str(bad), *paths]))
+        assert list(errors) == [str(bad)]
+        assert set(done) == set(paths)
+
+    def test_single_worker_reads_in_process(self, tmp_path):
+        paths = _write_corpus(tmp_path, count=2)
+        events = ParallelLoader(max_workers=1, batch_size=1000).iter_events(paths)
+        assert [kind for kind, _, _ in events] == ["chunks", "done", "chunks", "done"]
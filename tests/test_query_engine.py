@@ -0,0 +1,114 @@
+"""QueryEngine birim testleri: tablo yükleme, filtre/gruplama/toplulaştırma/sıralama, geçersiz tanım, dosya değişince yenileme."""
+import json
+import os
+
+import pytest
+
+from src.tools.query_engine import QueryEngine, QuerySpecError, parse_spec
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    d = tmp_path / "data"
+    d.mkdir()
+    orders = {
+        "toplam_musteri": 3,
+        "siparisler": [
+            {"musteri_no": 1, "isim": "Elif Kaya", "siparisler": [{"pizza": "Margherita", "adet": 2}]},
+            {"musteri_no": 2, "isim": "Fatma Çelik", "siparisler": [{"pizza": "Pepperoni", "adet": 1}, {"pizza": "Margherita", "adet": 1}]},
+            {"musteri_no": 3, "isim": "Can Öztürk", "siparisler": [{"pizza": "Pepperoni", "adet": 1}]},
+        ],
+    }
+    menu = {
+        "pizzalar": [
+            {"ad": "Margherita", "fiyat": 95, "vejetaryen": True, "etiketler": ["Vejetaryen", "Klasik"]},
+            {"ad": "Pepperoni", "fiyat": 120, "vejetaryen": False, "etiketler": ["Etli"]},
+            {"ad": "Marinara", "fiyat": 85, "vejetaryen": True, "etiketler": ["Vegan"]},
+        ]
+    }
+    (d / "orders.json").write_text(json.dumps(orders, ensure_ascii=False), encoding="utf-8")
+    (d / "menu.json").write_text(json.dumps(menu, ensure_ascii=False), encoding="utf-8")
+    return d
+
+
+class TestQueryEngineTables:
+    def test_nested_records_are_exploded_and_scalars_form_a_table(self, data_dir):
+        tables = QueryEngine(str(data_dir)).tables()
+        assert tables["siparisler"].size == 4
+        assert set(tables["siparisler"].columns) == {"musteri_no", "isim", "pizza", "adet"}
+        assert tables["orders"].size == 1
+        assert tables["pizzalar"].columns["etiketler"][0] == "Vejetaryen, Klasik"
+
+    def test_describe_lists_fields_and_types(self, data_dir):
+        text = QueryEngine(str(data_dir)).describe()
+        assert "siparisler (orders.json, 4 satır)" in text
+        assert "adet:sayı" in text
+        assert "vejetaryen:true/false" in text
+
+
+class TestQueryEngineExecute:
+    def test_group_sum_top_1(self, data_dir):
+        spec = {"table": "siparisler", "group_by": "pizza", "agg": {"op": "sum", "field": "adet"}, "order": "desc", "limit": 1}
+        result = QueryEngine(str(data_dir)).execute(spec)
+        assert result.kind == "pairs"
+        assert result.text() == "Margherita: 3"
+
+    def test_scalar_aggregates(self, data_dir):
+        engine = QueryEngine(str(data_dir))
+        assert engine.execute({"table": "pizzalar", "agg": {"op": "avg", "field": "fiyat"}}).text() == "100"
+        assert engine.execute({"table": "siparisler", "agg": {"op": "count_distinct", "field": "musteri_no"}}).value == 3
+        assert engine.execute({"table": "pizzalar", "agg": {"op": "max", "field": "fiyat"}}).text() == "120"
+
+    def test_text_filter_is_case_and_accent_insensitive(self, data_dir):
+        spec = {"table": "siparisler", "where": [{"field": "isim", "op": "eq", "value": "fatma celik"}], "select": ["pizza", "adet"]}
+        assert QueryEngine(str(data_dir)).execute(spec).text() == "pizza: Pepperoni, adet: 1\npizza: Margherita, adet: 1"
+
+    def test_numeric_bool_and_contains_filters_with_sorting(self, data_dir):
+        engine = QueryEngine(str(data_dir))
+        spec = {"table": "pizzalar", "where": [{"field": "fiyat", "op": "lt", "value": 100}], "select": ["ad"], "sort_by": "fiyat", "order": "asc"}
+        assert engine.execute(spec).text() == "ad: Marinara\nad: Margherita"
+        spec = {"table": "pizzalar", "where": [{"field": "vejetaryen", "op": "eq", "value": True}], "agg": {"op": "count"}}
+        assert engine.execute(spec).value == 2
+        spec = {"table": "pizzalar", "where": [{"field": "etiketler", "op": "contains", "value": "etli"}], "select": ["ad"]}
+        assert engine.execute(spec).text() == "ad: Pepperoni"
+
+    @pytest.mark.parametrize("spec", [
+        {"table": "yok"},
+        {"table": "siparisler", "where": [{"field": "tarih", "op": "eq", "value": 1}]},
+        {"table": "siparisler", "agg": {"op": "median", "field": "adet"}},
+        {"table": "siparisler", "agg": {"op": "sum", "field": "isim"}},
+        {"table": "pizzalar", "where": [{"field": "fiyat", "op": "gt", "value": "pahalı"}]},
+        # LLM'in ürettiği yanlış tipli tanımlar TypeError/ValueError/AttributeError yerine QuerySpecError verir
+        {"table": ["siparisler"]},
+        {"table": "siparisler", "group_by": ["isim"], "agg": {"op": "sum", "field": "adet"}},
+        {"table": "siparisler", "where": [{"field": "adet", "op": "in", "value": 200}]},
+        {"table": "siparisler", "where": [{"field": "adet", "op": "in", "value": ["abc"]}]},
+        {"table": "siparisler", "where": [{"field": ["adet"], "op": "eq", "value": 1}]},
+        {"table": "siparisler", "agg": {"op": "sum", "field": ["adet"]}},
+        {"table": "siparisler", "order": 1},
+        {"table": "siparisler", "sort_by": ["adet"]},
+        {"table": "siparisler", "select": 5},
+        {"table": "siparisler", "limit": True},
+    ])
+    def test_invalid_spec_raises(self, data_dir, spec):
+        with pytest.raises(QuerySpecError):
+            QueryEngine(str(data_dir)).execute(spec)
+
+    def test_modified_file_is_reloaded(self, data_dir):
+        engine = QueryEngine(str(data_dir))
+        assert engine.execute({"table": "pizzalar", "agg": {"op": "count"}}).value == 3
+        path = data_dir / "menu.json"
+        path.write_text(json.dumps({"pizzalar": [{"ad": "Diavola", "fiyat": 130}]}), encoding="utf-8")
+        os.utime(path, (1, 1))
+        assert engine.execute({"table": "pizzalar", "agg": {"op": "count"}}).value == 1
+
+
+class TestParseSpec:
+    def test_wrapped_and_plain_specs(self):
+        assert parse_spec('{"query_spec": {"table": "puanlar"}}') == {"table": "puanlar"}
+        assert parse_spec('Tanım: {"table": "puanlar", "agg": {"op": "count"}}') == {"table": "puanlar", "agg": {"op": "count"}}
+
+    def test_null_or_garbage_returns_none(self):
+        assert parse_spec("null") is None
+        assert parse_spec('{"query_spec": null}') is None
+        assert parse_spec("{bozuk") is None
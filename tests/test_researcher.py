@@ -1,8 +1,13 @@
 """ResearcherAgent birim testleri: normal araştırma, search/vector_store davranışı."""
+import asyncio
+import time
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock
+from langchain_core.documents import Document
 
 from src.agents.researcher import ResearcherAgent
+from src.utils.context_builder import ContextBuilder
 
 
 class TestResearcherAgentNormalFlow:
@@ -11,7 +16,7 @@ class TestResearcherAgentNormalFlow:
     @pytest.mark.asyncio
     async def test_research_returns_llm_response(self, mock_llm_client, mock_search_tool, mock_vector_store):
         mock_llm_client.ask = AsyncMock(return_value="Yerel menüde Margherita ve Pepperoni var.")
-        mock_search_tool.search = MagicMock(return_value="İnternet: Pizza çeşitleri...")
+        mock_search_tool.asearch = AsyncMock(return_value="İnternet: Pizza çeşitleri...")
         mock_vector_store.search = MagicMock(return_value=[])
         researcher = ResearcherAgent(mock_llm_client, mock_search_tool, mock_vector_store)
         result = await researcher.research("Menüde hangi pizzalar var?")
@@ -20,20 +25,33 @@ class TestResearcherAgentNormalFlow:
     @pytest.mark.asyncio
     async def test_research_passes_search_result_to_llm(self, mock_llm_client, mock_search_tool, mock_vector_store):
         mock_llm_client.ask = AsyncMock(return_value="Özet: A.")
-        mock_search_tool.search = MagicMock(return_value="Önemli bilgi: X")
+        mock_search_tool.asearch = AsyncMock(return_value="Önemli bilgi: X")
         researcher = ResearcherAgent(mock_llm_client, mock_search_tool, mock_vector_store)
         await researcher.research("test")
         call_args = mock_llm_client.ask.call_args[0][0]
         assert "Önemli bilgi: X" in call_args or "X" in call_args
 
 
+class TestResearcherAgentPromptLayout:
+    """Kurallar sabit sistem prompt'unda; soru ve bağlam kullanıcı mesajında."""
+
+    @pytest.mark.asyncio
+    async def test_rules_are_sent_as_system_prompt(self, mock_llm_client, mock_search_tool, mock_vector_store):
+        researcher = ResearcherAgent(mock_llm_client, mock_search_tool, mock_vector_store)
+        await researcher.research("Pizza Friday nedir")
+        call = mock_llm_client.ask.call_args
+        assert call.kwargs["system"] == ResearcherAgent.SYSTEM_PROMPT
+        assert call.args[0].startswith("Kullanıcı sorusu: Pizza Friday nedir")
+        assert "Kurallar:" not in call.args[0]
+
+
 class TestResearcherAgentSearchError:
     """Search tool hata/boş döndürürse: yine de LLM'e giden prompt'ta bu bilgi olmalı."""
 
     @pytest.mark.asyncio
     async def test_research_when_search_returns_error_message(self, mock_llm_client, mock_search_tool, mock_vector_store):
         """Search 'ulaşılamıyor' gibi mesaj döndürürse agent yine de cevap üretebilir."""
-        mock_search_tool.search = MagicMock(
+        mock_search_tool.asearch = AsyncMock(
             return_value="Şu an internet sonuçlarına ulaşılamıyor. Lütfen biraz sonra tekrar deneyin veya Tavily API key ekleyin."
         )
         mock_llm_client.ask = AsyncMock(
@@ -44,3 +62,108 @@ class TestResearcherAgentSearchError:
         assert "menü" in result.lower() or "pizza" in result.lower()
         call_args = mock_llm_client.ask.call_args[0][0]
         assert "ulaşılamıyor" in call_args or "Tavily" in call_args
+
+
+class TestResearcherAgentStreaming:
+    """on_token verilirse cevap ask_streaming ile akıtılır."""
+
+    @pytest.mark.asyncio
+    async def test_research_streams_when_on_token_given(self, mock_llm_client, mock_search_tool, mock_vector_store):
+        mock_llm_client.ask_streaming = AsyncMock(return_value="Akış cevabı")
+        researcher = ResearcherAgent(mock_llm_client, mock_search_tool, mock_vector_store)
+        received = []
+        result = await researcher.research("test", on_token=received.append)
+        assert result == "Akış cevabı"
+        mock_llm_client.ask.assert_not_called()
+        assert mock_llm_client.ask_streaming.call_args.kwargs["on_token"] == received.append
+
+
+class TestResearcherAgentContextBudget:
+    """Yerel bağlam ContextBuilder'dan gelir; tüm data/ klasörü prompt'a doldurulmaz."""
+
+    @pytest.mark.asyncio
+    async def test_prompt_uses_context_builder_output(self, mock_llm_client, mock_search_tool, mock_vector_store):
+        builder = MagicMock()
+        builder.build = MagicMock(return_value="--- Dosya: welcome.txt ---\nPizza Friday")
+        researcher = ResearcherAgent(mock_llm_client, mock_search_tool, mock_vector_store, context_builder=builder)
+        await researcher.research("Pizza Friday nedir")
+        prompt = mock_llm_client.ask.call_args[0][0]
+        assert "Pizza Friday" in prompt
+        assert "reviews.json ---" not in prompt
+        args, kwargs = builder.build.call_args
+        assert args == ("Pizza Friday nedir", [])
+        assert 0 < kwargs["token_budget"] < researcher.token_budget
+
+    @pytest.mark.asyncio
+    async def test_prompt_respects_token_budget(self, mock_llm_client, mock_search_tool, mock_vector_store, tmp_path):
+        (tmp_path / "notlar.txt").write_text("\n\n".join(f"Pizza notu {i}: " + "hamur " * 60 for i in range(30)), encoding="utf-8")
+        mock_search_tool.asearch = AsyncMock(return_value="İnternet sonucu " * 400)
+        researcher = ResearcherAgent(
+            mock_llm_client,
+            mock_search_tool,
+            mock_vector_store,
+            context_builder=ContextBuilder(str(tmp_path)),
+            token_budget=600,
+        )
+        await researcher.research("Pizza notu hamur")
+        prompt = mock_llm_client.ask.call_args[0][0]
+        assert researcher.token_counter.count(prompt) <= 600
+        assert "[...]" in prompt and "Pizza notu" in prompt
+
+
+class TestResearcherAgentConcurrentContext:
+    """RAG ve internet araması eşzamanlı, ayrı süre sınırlarıyla; güvenli RAG'de internet atlanır."""
+
+    @staticmethod
+    def _slow(value, seconds):
+        def fn(*args, **kwargs):
+            time.sleep(seconds)
+            return value
+        return fn
+
+    @staticmethod
+    def _aslow(value, seconds):
+        async def fn(*args, **kwargs):
+            await asyncio.sleep(seconds)
+            return value
+        return fn
+
+    @pytest.mark.asyncio
+    async def test_sources_run_concurrently(self, mock_llm_client, mock_search_tool, mock_vector_store):
+        mock_vector_store.search_hybrid = MagicMock(side_effect=self._slow([], 0.3))
+        mock_search_tool.asearch = AsyncMock(side_effect=self._aslow("web", 0.3))
+        researcher = ResearcherAgent(mock_llm_client, mock_search_tool, mock_vector_store, web_hedge_delay=0.0)
+        start = time.perf_counter()
+        await researcher.research("test")
+        assert time.perf_counter() - start < 0.55
+
+    @pytest.mark.asyncio
+    async def test_confident_rag_skips_web_search(self, mock_llm_client, mock_search_tool, mock_vector_store):
+        doc = Document(page_content="Pizza Friday her Cuma.", metadata={})
+        mock_vector_store.search_hybrid = MagicMock(return_value=[(doc, 0.95)])
+        researcher = ResearcherAgent(mock_llm_client, mock_search_tool, mock_vector_store)
+        await researcher.research("Pizza Friday nedir")
+        mock_search_tool.asearch.assert_not_awaited()
+        assert "internet araması yapılmadı" in mock_llm_client.ask.call_args[0][0]
+
+    @pytest.mark.asyncio
+    async def test_web_deadline_returns_timeout_message(self, mock_llm_client, mock_search_tool, mock_vector_store):
+        mock_search_tool.asearch = AsyncMock(side_effect=self._aslow("geç sonuç", 0.5))
+        researcher = ResearcherAgent(mock_llm_client, mock_search_tool, mock_vector_store, web_timeout=0.1)
+        await researcher.research("test")
+        prompt = mock_llm_client.ask.call_args[0][0]
+        assert "tamamlanamadı" in prompt
+        assert "geç sonuç" not in prompt
+
+    @pytest.mark.asyncio
+    async def test_rag_failure_does_not_break_research(self, mock_llm_client, mock_search_tool, mock_vector_store):
+        mock_vector_store.search_hybrid = MagicMock(side_effect=RuntimeError("ollama kapalı"))
+        researcher = ResearcherAgent(mock_llm_client, mock_search_tool, mock_vector_store)
+        await researcher.research("test")
+        assert "Mock arama sonucu" in mock_llm_client.ask.call_args[0][0]
+
+    @pytest.mark.asyncio
+    async def test_rag_mode_is_passed_to_vector_store(self, mock_llm_client, mock_search_tool, mock_vector_store):
+        researcher = ResearcherAgent(mock_llm_client, mock_search_tool, mock_vector_store, rag_mode="lexical")
+        await researcher.research("Fatma Çelik")
+        assert mock_vector_store.search_hybrid.call_args.kwargs["mode"] == "lexical"
@@ -0,0 +1,60 @@
+"""format_result birim testleri: sayı, anahtar/değer, liste, tablo çıktıları yerelde biçimlenir; serbest metin LLM'e kalır."""
+import pytest
+
+from src.utils.result_formatter import format_number, format_result
+
+
+class TestFormatResultScalars:
+    @pytest.mark.parametrize("output, expected", [
+        ("42", "42"),
+        ("  42\n", "42"),
+        ("4.6000000001", "4.6"),
+        ("4,25", "4.25"),
+        ("95.0", "95"),
+        ("Margherita", "Margherita"),
+        ("True", "True"),
+    ])
+    def test_single_values(self, output, expected):
+        assert format_result(output) == expected
+
+    def test_format_number(self):
+        assert format_number(3.14159) == "3.14"
+        assert format_number(10.0) == "10"
+
+
+class TestFormatResultStructured:
+    def test_key_value_lines(self):
+        assert format_result("Margherita: 5\nPepperoni: 3.50") == "- Margherita: 5\n- Pepperoni: 3.5"
+        assert format_result("Toplam: 10") == "Toplam: 10"
+
+    def test_short_item_list(self):
+        assert format_result("Margherita\nMarinara\n") == "- Margherita\n- Marinara"
+
+    def test_python_literals(self):
+        assert format_result("['Margherita', 'Pepperoni']") == "- Margherita\n- Pepperoni"
+        assert format_result("{'Margherita': 5, 'Pepperoni': 3}") == "- Margherita: 5\n- Pepperoni: 3"
+        assert format_result("[('Margherita', 5), ('Pepperoni', 3)]") == "- Margherita: 5\n- Pepperoni: 3"
+
+    def test_record_rows_become_table(self):
+        out = format_result("ad: Marinara, fiyat: 85\nad: Margherita, fiyat: 95")
+        assert out.splitlines() == ["ad          fiyat", "----------  -----", "Marinara    85", "Margherita  95"]
+
+    def test_list_of_dicts_becomes_table(self):
+        out = format_result("[{'isim': 'Elif Kaya', 'hiz': 5}, {'isim': 'Can Öztürk', 'hiz': 3}]")
+        assert out.splitlines()[0] == "isim        hiz"
+        assert out.splitlines()[-1] == "Can Öztürk  3"
+
+    def test_whitespace_separated_columns(self):
+        out = format_result("Margherita    5    95\nPepperoni    3    120")
+        assert out.splitlines() == ["Margherita  5  95", "Pepperoni   3  120"]
+
+
+class TestFormatResultUnstructured:
+    @pytest.mark.parametrize("output", [
+        "Siparişler incelendi, bu hafta 10 müşteri sipariş verdi.",
+        "Kod Çalıştırma Hatası:\nNameError",
+        "",
+        "\n".join(f"satır {i}" for i in range(50)),
+    ])
+    def test_returns_none(self, output):
+        assert format_result(output) is None
@@ -0,0 +1,81 @@
+"""QueryRouter birim testleri: kural/sınıflandırıcı yönlendirmesi, belirsiz sorguda LLM'e düşme, kaydet/yükle, doğruluk."""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.agents.router import QueryRouter, load_labelled_queries
+from src.orchestration import build_graph
+
+
+@pytest.fixture(scope="module")
+def router():
+    return QueryRouter.default()
+
+
+class TestQueryRouterRouting:
+    """Belirgin sorgular doğrudan yönlendirilir; karar dict'i analyst biçimindedir."""
+
+    def test_average_question_goes_to_coder(self, router):
+        decision = router.route("ortalama hız puanı nedir")
+        assert decision["task_type"] == "coding"
+        assert decision["source"] == "router"
+        assert decision["confidence"] >= router.threshold
+
+    def test_greeting_goes_to_general(self, router):
+        assert router.route("merhaba")["task_type"] == "general"
+
+    def test_rule_question_goes_to_researcher(self, router):
+        assert router.route("Pizza Friday nedir")["task_type"] == "rag"
+
+    def test_empty_query_falls_back(self, router):
+        assert router.route("") is None
+
+    def test_high_threshold_falls_back_to_llm(self):
+        strict = QueryRouter.default(threshold=1.01)
+        assert strict.route("ortalama hız puanı nedir") is None
+
+
+class TestQueryRouterPersistence:
+    def test_save_and_load_roundtrip(self, router, tmp_path):
+        path = str(tmp_path / "router.json")
+        router.save(path)
+        loaded = QueryRouter.load(path, threshold=router.threshold)
+        for query, _ in load_labelled_queries()[:10]:
+            assert loaded.predict(query) == pytest.approx(router.predict(query))
+
+    def test_unknown_route_in_training_data_raises(self):
+        with pytest.raises(ValueError, match="Bilinmeyen route"):
+            QueryRouter().train([("x", "web")])
+
+
+class TestQueryRouterAccuracy:
+    """Etiketli set üzerinde hızlı yol doğruluğu (eğitim setinde ölçüm; çapraz doğrulama scripts/eval_router.py)."""
+
+    def test_fast_path_accuracy_on_labelled_set(self, router):
+        metrics = router.evaluate(load_labelled_queries())
+        assert metrics["fast_path_accuracy"] >= 0.95
+        assert metrics["coverage"] >= 0.5
+
+
+class TestGraphWithRouter:
+    """Router güvenliyse analyst LLM çağrısı yapılmaz; değilse analyst'e düşülür."""
+
+    @pytest.mark.asyncio
+    async def test_confident_route_skips_analyst(self, mock_llm_client):
+        analyst = MagicMock()
+        analyst.analyze = AsyncMock()
+        coder = MagicMock()
+        coder.solve = AsyncMock(return_value="4.0")
+        graph = build_graph(analyst, MagicMock(), coder, mock_llm_client, router=QueryRouter.default())
+        result = await graph.ainvoke({"query": "ortalama hız puanı nedir"})
+        assert result["response"] == "4.0"
+        analyst.analyze.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_uncertain_route_calls_analyst(self, mock_llm_client):
+        analyst = MagicMock()
+        analyst.analyze = AsyncMock(return_value={"task_type": "coding", "reason": "", "plan": []})
+        coder = MagicMock()
+        coder.solve = AsyncMock(return_value="1")
+        graph = build_graph(analyst, MagicMock(), coder, mock_llm_client, router=QueryRouter.default(threshold=1.01))
+        await graph.ainvoke({"query": "ortalama hız puanı nedir"})
+        analyst.analyze.assert_awaited_once()
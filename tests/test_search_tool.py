@@ -1,50 +1,209 @@
-"""SearchTool birim testleri: tüm kaynaklar başarısız olduğunda anlamlı hata mesajı."""
+"""SearchTool birim testleri: hata mesajları, yerel sahte sunucularla hedge/paralel sağlayıcılar, önbellek, devre kesici."""
+import json
 import os
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
 import pytest
-from unittest.mock import patch, MagicMock
 
-from src.tools.search_tool import SearchTool
+from src.tools.search_tool import CircuitBreaker, SearchTool
+
+DDG_HTML = """<html><body>
+<div class="result"><a class="result__a" href="https://ornek.com/pizza">Pizza tarihi</a>
+<a class="result__snippet">Pizza İtalya'da doğdu.</a></div>
+</body></html>"""
+WIKI_JSON = {"title": "Pizza", "extract": "Pizza bir yemektir.", "content_urls": {"desktop": {"page": "https://tr.wikipedia.org/wiki/Pizza"}}}
+TAVILY_JSON = {"results": [{"title": "Tavily", "content": "Tavily özeti", "url": "https://tavily.com"}]}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self):
+        provider = self.path.strip("/").split("/")[0].split("?")[0]
+        self.server.counts[provider] += 1
+        self.server.paths.append(self.path)
+        behavior = self.server.behaviors.get(provider, {})
+        time.sleep(behavior.get("delay", 0.0))
+        status = behavior.get("status", 200)
+        body = behavior.get("body", "")
+        data = body.encode("utf-8") if isinstance(body, str) else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = _handle
+    do_POST = _handle
+
+
+@pytest.fixture
+def stub():
+    """Tavily (/tavily), DuckDuckGo (/ddg) ve Wikipedia (/wiki/...) yerine yerel sahte sunucu."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.daemon_threads = True
+    server.counts = Counter()
+    server.paths = []
+    server.behaviors = {
+        "tavily": {"body": TAVILY_JSON},
+        "ddg": {"body": DDG_HTML},
+        "wiki": {"body": WIKI_JSON},
+    }
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    server.endpoints = {"tavily": f"{url}/tavily", "duckduckgo": f"{url}/ddg", "wikipedia": f"{url}/wiki/"}
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _tool(stub, **kwargs) -> SearchTool:
+    kwargs.setdefault("tavily_api_key", None)
+    with patch.dict(os.environ, {"TAVILY_API_KEY": ""}):
+        return SearchTool(endpoints=stub.endpoints, **kwargs)
 
 
 class TestSearchToolErrorCases:
     """Arama başarısız olduğunda (Tavily yok, scraping/Wikipedia da sonuç vermez): anlamlı mesaj."""
 
-    def test_search_with_source_returns_meaningful_message_when_all_fail(self):
-        """Tavily key yok, scraping ve Wikipedia mock ile boş dönerse: kullanıcıya net mesaj."""
-        with patch.dict(os.environ, {}, clear=False):
-            # TAVILY_API_KEY yok
-            if "TAVILY_API_KEY" in os.environ:
-                del os.environ["TAVILY_API_KEY"]
-        tool = SearchTool()
-        with patch.object(tool, "_search_with_direct_scraping", return_value=None), \
-             patch.object(tool, "_search_with_simple_api", return_value=None):
-            text, source, tavily_err = tool.search_with_source("test query")
-        assert "ulaşılamıyor" in text or "internet" in text.lower()
-        assert "TAVILY_API_KEY" in text or "tekrar deneyin" in text
+    def test_search_with_source_returns_meaningful_message_when_all_fail(self, stub):
+        stub.behaviors["ddg"] = {"status": 500}
+        stub.behaviors["wiki"] = {"status": 404}
+        text, source, tavily_err = _tool(stub).search_with_source("test query")
+        assert "ulaşılamıyor" in text
+        assert "TAVILY_API_KEY" in text
         assert source == "yok"
+        assert tavily_err is None
 
-    def test_search_returns_same_message_when_all_sources_fail(self):
+    def test_search_returns_same_message_when_all_sources_fail(self, stub):
         """search() sadece metni döndürür; aynı anlamlı mesaj olmalı."""
-        with patch.dict(os.environ, {}, clear=False):
-            if "TAVILY_API_KEY" in os.environ:
-                del os.environ["TAVILY_API_KEY"]
-        tool = SearchTool()
-        with patch.object(tool, "_search_with_direct_scraping", return_value=None), \
-             patch.object(tool, "_search_with_simple_api", return_value=None):
-            result = tool.search("test")
-        assert "ulaşılamıyor" in result or "internet" in result.lower() or "TAVILY" in result
+        stub.behaviors["ddg"] = {"body": "<html></html>"}
+        stub.behaviors["wiki"] = {"status": 404}
+        assert "ulaşılamıyor" in _tool(stub).search("test")
 
 
 class TestSearchToolTavilyError:
     """Tavily API key varken Tavily hata döndürürse: hata mesajı üçlüde (tavily_error) taşınır."""
 
-    def test_tavily_error_propagated_in_tuple(self):
-        tool = SearchTool()
-        with patch.dict(os.environ, {"TAVILY_API_KEY": "fake-key"}, clear=False):
-            tool.tavily_api_key = "fake-key"
-        with patch.object(tool, "_search_with_tavily", return_value=(None, "API kotası aşıldı")), \
-             patch.object(tool, "_search_with_direct_scraping", return_value=None), \
-             patch.object(tool, "_search_with_simple_api", return_value=None):
-            text, source, tavily_error = tool.search_with_source("test")
-        assert tavily_error == "API kotası aşıldı"
+    def test_tavily_error_propagated_in_tuple(self, stub):
+        stub.behaviors.update({"tavily": {"status": 429}, "ddg": {"status": 500}, "wiki": {"status": 404}})
+        text, source, tavily_error = _tool(stub, tavily_api_key="fake-key").search_with_source("test")
+        assert "429" in tavily_error
         assert source == "yok"
+
+    @pytest.mark.asyncio
+    async def test_tavily_result_is_preferred(self, stub):
+        async with _tool(stub, tavily_api_key="fake-key") as tool:
+            text, source, _ = await tool.asearch_with_source("pizza")
+        assert source == "Tavily API"
+        assert "Tavily özeti" in text
+        assert stub.counts["ddg"] == 0
+
+
+class TestSearchToolHedging:
+    """Sağlayıcılar öncelik sırasıyla başlar; yavaş veya hatalı sağlayıcı sıradakini bekletmez."""
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_does_not_start_fallback(self, stub):
+        async with _tool(stub, hedge_delay=0.5) as tool:
+            text, source, _ = await tool.asearch_with_source("pizza")
+        assert source == "DuckDuckGo (scraping)"
+        assert "Pizza tarihi" in text
+        assert stub.counts["wiki"] == 0
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged(self, stub):
+        stub.behaviors["ddg"] = {"body": DDG_HTML, "delay": 1.0}
+        async with _tool(stub, hedge_delay=0.1) as tool:
+            start = time.perf_counter()
+            _, source, _ = await tool.asearch_with_source("pizza")
+            elapsed = time.perf_counter() - start
+        assert source == "Wikipedia API"
+        assert elapsed < 0.8
+
+    @pytest.mark.asyncio
+    async def test_failed_primary_starts_fallback_immediately(self, stub):
+        stub.behaviors["ddg"] = {"status": 500}
+        async with _tool(stub, hedge_delay=5.0) as tool:
+            start = time.perf_counter()
+            _, source, _ = await tool.asearch_with_source("pizza")
+        assert source == "Wikipedia API"
+        assert time.perf_counter() - start < 2.0
+
+
+class TestSearchToolWikipedia:
+    @pytest.mark.asyncio
+    async def test_query_is_url_encoded_in_title(self, stub):
+        stub.behaviors["ddg"] = {"status": 500}
+        async with _tool(stub, cache_size=0) as tool:
+            _, source, _ = await tool.asearch_with_source("pizza nedir? 50% / #1")
+        assert source == "Wikipedia API"
+        assert "/wiki/pizza_nedir%3F_50%25_%2F_%231" in stub.paths
+
+
+class TestSearchToolCacheAndBreaker:
+    @pytest.mark.asyncio
+    async def test_repeated_query_is_served_from_cache(self, stub):
+        async with _tool(stub) as tool:
+            await tool.asearch_with_source("Pizza tarihi")
+            text, source, _ = await tool.asearch_with_source("pizza  TARİHİ?")
+        assert source == "DuckDuckGo (scraping) (önbellek)"
+        assert "Pizza tarihi" in text
+        assert stub.counts["ddg"] == 1
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_skips_failing_provider(self, stub):
+        stub.behaviors["ddg"] = {"status": 500}
+        async with _tool(stub, cache_size=0, failure_threshold=2) as tool:
+            for _ in range(4):
+                _, source, _ = await tool.asearch_with_source("pizza")
+                assert source == "Wikipedia API"
+            assert tool.stats()["providers"]["duckduckgo"]["circuit"] == "open"
+        assert stub.counts["ddg"] == 2
+        assert stub.counts["wiki"] == 4
+
+    def test_breaker_half_open_allows_single_trial(self):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0, clock=lambda: now[0])
+        breaker.record_failure()
+        assert not breaker.allow()
+        now[0] = 10.0
+        assert breaker.allow()
+        assert not breaker.allow()
+        breaker.record_success()
+        assert breaker.state == "closed"
+
+    @staticmethod
+    def _half_open_wikipedia(tool) -> list[float]:
+        now = [0.0]
+        tool.breakers["wikipedia"] = CircuitBreaker(failure_threshold=1, reset_timeout=10.0, clock=lambda: now[0])
+        tool.breakers["wikipedia"].record_failure()
+        now[0] = 10.0
+        return now
+
+    @pytest.mark.asyncio
+    async def test_unlaunched_half_open_provider_keeps_its_trial(self, stub):
+        async with _tool(stub, cache_size=0) as tool:
+            self._half_open_wikipedia(tool)
+            _, source, _ = await tool.asearch_with_source("pizza")
+            assert source == "DuckDuckGo (scraping)"
+            assert stub.counts["wiki"] == 0
+            stub.behaviors["ddg"] = {"status": 500}
+            _, source, _ = await tool.asearch_with_source("pizza")
+        assert source == "Wikipedia API"
+        assert tool.breakers["wikipedia"].state == "closed"
+
+    @pytest.mark.asyncio
+    async def test_cancelled_half_open_trial_is_released(self, stub):
+        stub.behaviors["ddg"] = {"body": DDG_HTML, "delay": 0.3}
+        stub.behaviors["wiki"] = {"body": WIKI_JSON, "delay": 1.0}
+        async with _tool(stub, cache_size=0, hedge_delay=0.05) as tool:
+            self._half_open_wikipedia(tool)
+            _, source, _ = await tool.asearch_with_source("pizza")
+            assert source == "DuckDuckGo (scraping)"
+            assert tool.breakers["wikipedia"].state == "half_open"
+            assert tool.breakers["wikipedia"].allow()
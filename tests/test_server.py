@@ -0,0 +1,132 @@
+"""QueryServer birim testleri: /query, /health, /metrics, backpressure (503) ve zaman aşımı (504)."""
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.server import QueryServer
+
+
+class FakeGraph:
+    """graph.ainvoke yerine geçer; eşzamanlı çalışan çağrı sayısını ölçer."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+        self.release = None
+
+    async def ainvoke(self, state):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            if self.release is not None:
+                await self.release.wait()
+            await asyncio.sleep(self.delay)
+            return {"query": state["query"], "decision": {"task_type": "general"}, "response": f"yanıt: {state['query']}"}
+        finally:
+            self.running -= 1
+
+
+async def _client(server: QueryServer) -> TestClient:
+    client = TestClient(TestServer(server.create_app()))
+    await client.start_server()
+    return client
+
+
+class TestQueryEndpoint:
+    """Normal akış: sorgu grafı çalıştırır ve JSON yanıt döner."""
+
+    @pytest.mark.asyncio
+    async def test_query_returns_graph_response(self):
+        client = await _client(QueryServer(FakeGraph()))
+        try:
+            resp = await client.post("/query", json={"query": "selam"})
+            assert resp.status == 200
+            data = await resp.json()
+            assert data["response"] == "yanıt: selam"
+            assert data["task_type"] == "general"
+            assert data["route_source"] == "analyst"
+        finally:
+            await client.close()
+
+    @pytest.mark.asyncio
+    async def test_empty_query_returns_400(self):
+        client = await _client(QueryServer(FakeGraph()))
+        try:
+            resp = await client.post("/query", json={"query": "  "})
+            assert resp.status == 400
+            resp = await client.post("/query", data="json değil")
+            assert resp.status == 400
+        finally:
+            await client.close()
+
+    @pytest.mark.asyncio
+    async def test_metrics_include_answer_cache_stats(self):
+        cache = MagicMock()
+        cache.stats = MagicMock(return_value={"hits": 3, "misses": 1, "hit_rate": 0.75, "saved_seconds": 12.5})
+        client = await _client(QueryServer(FakeGraph(), answer_cache=cache))
+        try:
+            metrics = await (await client.get("/metrics")).json()
+            assert metrics["answer_cache"]["hit_rate"] == 0.75
+            assert metrics["answer_cache"]["saved_seconds"] == 12.5
+        finally:
+            await client.close()
+
+    @pytest.mark.asyncio
+    async def test_health(self):
+        client = await _client(QueryServer(FakeGraph()))
+        try:
+            resp = await client.get("/health")
+            assert (await resp.json()) == {"status": "ok"}
+        finally:
+            await client.close()
+
+
+class TestConcurrencyAndBackpressure:
+    """Eşzamanlılık sınırı, sıra doluyken 503 ve süre aşımında 504."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_queries_are_limited(self):
+        graph = FakeGraph(delay=0.05)
+        client = await _client(QueryServer(graph, max_concurrent=2, max_queue=10))
+        try:
+            responses = await asyncio.gather(*(client.post("/query", json={"query": f"s{i}"}) for i in range(6)))
+            assert [r.status for r in responses] == [200] * 6
+            assert graph.max_running == 2
+        finally:
+            await client.close()
+
+    @pytest.mark.asyncio
+    async def test_full_queue_returns_503_with_retry_after(self):
+        graph = FakeGraph()
+        graph.release = asyncio.Event()
+        server = QueryServer(graph, max_concurrent=1, max_queue=1, retry_after_seconds=3)
+        client = await _client(server)
+        try:
+            pending = [asyncio.ensure_future(client.post("/query", json={"query": f"s{i}"})) for i in range(2)]
+            while server.pending < 2:
+                await asyncio.sleep(0.01)
+            resp = await client.post("/query", json={"query": "fazla"})
+            assert resp.status == 503
+            assert resp.headers["Retry-After"] == "3"
+            graph.release.set()
+            assert [r.status for r in await asyncio.gather(*pending)] == [200, 200]
+            metrics = await (await client.get("/metrics")).json()
+            assert metrics["requests"]["rejected"] == 1
+            assert metrics["requests"]["completed"] == 2
+            assert metrics["active"] == 0 and metrics["queued"] == 0
+        finally:
+            await client.close()
+
+    @pytest.mark.asyncio
+    async def test_slow_query_returns_504(self):
+        client = await _client(QueryServer(FakeGraph(delay=1.0), request_timeout=0.05))
+        try:
+            resp = await client.post("/query", json={"query": "yavaş"})
+            assert resp.status == 504
+            metrics = await (await client.get("/metrics")).json()
+            assert metrics["requests"]["timed_out"] == 1
+        finally:
+            await client.close()
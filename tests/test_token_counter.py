@@ -0,0 +1,50 @@
+"""TokenCounter birim testleri: tahmin yedeği, tokenizers arka ucu, önbellek, bütçeye sığdırma."""
+import pytest
+from tokenizers import Tokenizer, models, pre_tokenizers, trainers
+
+from src.utils.text import estimate_tokens
+from src.utils.token_counter import TRUNCATION_MARKER, TokenCounter
+
+
+@pytest.fixture
+def tokenizer_path(tmp_path):
+    """Ağa çıkmadan kelime düzeyinde küçük bir tokenizer.json (gerçek model tokenizer'ı ile aynı dosya biçimi)."""
+    tokenizer = Tokenizer(models.WordLevel(unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.train_from_iterator(["pizza margherita fiyat adet sipariş"], trainers.WordLevelTrainer(special_tokens=["[UNK]"]))
+    path = tmp_path / "tokenizer.json"
+    tokenizer.save(str(path))
+    return str(path)
+
+
+class TestTokenCounter:
+    def test_without_tokenizer_falls_back_to_estimate(self):
+        counter = TokenCounter()
+        assert counter.backend == "estimate"
+        assert counter.count("Fatma Çelik ne sipariş etti?") == estimate_tokens("Fatma Çelik ne sipariş etti?")
+        assert counter.count("") == 0
+
+    def test_tokenizer_backend_counts_real_tokens(self, tokenizer_path):
+        counter = TokenCounter(tokenizer_path)
+        assert counter.backend == "tokenizers"
+        assert counter.count("pizza margherita fiyat") == 3
+
+    def test_repeated_texts_are_cached_and_long_texts_are_not(self):
+        counter = TokenCounter(cache_size=2, max_cached_chars=50)
+        for text in ("a", "b", "a", "c", "a"):
+            counter.count(text)
+        assert counter.stats()["hits"] == 2
+        counter.count("x" * 100)
+        counter.count("x" * 100)
+        assert "x" * 100 not in counter._cache
+        assert len(counter._cache) == 2
+
+    @pytest.mark.parametrize("use_tokenizer", [False, True])
+    def test_fit_keeps_head_and_tail_within_budget(self, tokenizer_path, use_tokenizer):
+        counter = TokenCounter(tokenizer_path if use_tokenizer else None)
+        text = " ".join(["pizza"] * 50 + ["fiyat"] * 50)
+        fitted = counter.fit(text, 20)
+        assert counter.count(fitted) <= 20
+        assert fitted.startswith("pizza") and fitted.endswith("fiyat") and TRUNCATION_MARKER in fitted
+        assert counter.fit("pizza fiyat", 20) == "pizza fiyat"
+        assert counter.fit(text, 0) == ""
@@ -0,0 +1,67 @@
+"""VectorStoreManager toplu okuma birim testleri: sayfalı iterasyon, O(1) sayım, alan projeksiyonu."""
+from unittest.mock import patch
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from src.utils.vector_store import VectorStoreManager
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = VectorStoreManager(persist_directory=str(tmp_path / "db"), embeddings=DeterministicFakeEmbedding(size=8))
+    docs = [
+        Document(page_content=f"parça {i} " + "x" * (600 if i == 0 else 10), metadata={"source": f"f{i % 3}.txt", "sira": i})
+        for i in range(25)
+    ]
+    store.add_documents(docs, ids=[f"id{i:02d}" for i in range(25)])
+    return store
+
+
+class TestIterDocuments:
+    """Normal akış: tüm kayıtlar sayfa sayfa, istenen alanlarla okunur."""
+
+    def test_pages_through_all_records(self, store):
+        with patch.object(store.db._collection, "get", wraps=store.db._collection.get) as get:
+            records = list(store.iter_documents(batch_size=10))
+        assert sorted(r["id"] for r in records) == [f"id{i:02d}" for i in range(25)]
+        assert [call.kwargs["limit"] for call in get.call_args_list] == [10, 10, 10]
+        assert {r["metadata"]["sira"] for r in records} == set(range(25))
+
+    def test_projection_skips_bodies(self, store):
+        with patch.object(store.db._collection, "get", wraps=store.db._collection.get) as get:
+            records = list(store.iter_documents(include=("metadatas",)))
+        assert get.call_args.kwargs["include"] == ["metadatas"]
+        assert all(set(r) == {"id", "metadata"} for r in records)
+        assert all(set(r) == {"id"} for r in store.iter_documents(include=()))
+
+    def test_where_filter(self, store):
+        records = list(store.iter_documents(batch_size=4, where={"source": "f1.txt"}))
+        assert len(records) == 8
+        assert all(r["metadata"]["source"] == "f1.txt" for r in records)
+
+
+class TestBulkAccessors:
+    """Sayım ve listeleme: tüm içerik belleğe alınmaz, boş sorgu embed edilmez."""
+
+    def test_count_uses_collection_count(self, store):
+        with patch.object(store.db, "get", side_effect=AssertionError("tüm dokümanlar okundu")):
+            assert store.get_document_count() == 25
+        assert store.get_document_count(where={"source": "f0.txt"}) == 9
+
+    def test_listing_does_not_run_similarity_search(self, store):
+        with patch.object(store.db, "similarity_search", side_effect=AssertionError("boş sorgu embed edildi")):
+            assert len(store.get_all_documents()) == 25
+            assert len(store.get_all_documents(limit=5)) == 5
+            listed = store.get_documents_with_metadata(limit=None)
+        assert len(listed) == 25
+        first = next(item for item in listed if item["id"] == "id00")
+        assert first["content"].endswith("...") and len(first["full_content"]) > 500
+        assert first["metadata"] == {"source": "f0.txt", "sira": 0}
+
+    def test_missing_db(self, store):
+        store.db = None
+        assert store.get_document_count() == 0
+        assert store.get_all_documents() == []
+        assert store.get_documents_with_metadata() == []